@@ -222,11 +222,35 @@ def ensure_schema(app, logger) -> None:
                     bitrate INTEGER,
                     hash VARCHAR(64),
                     missing_tags BOOLEAN NOT NULL DEFAULT 0,
+                    loudness_lufs FLOAT,
+                    loudness_range_lu FLOAT,
+                    true_peak_dbtp FLOAT,
+                    loudness_analyzed_at DATETIME,
+                    loudness_retry_at DATETIME,
+                    bpm FLOAT,
+                    first_beat_seconds FLOAT,
+                    tempo_analyzed_at DATETIME,
+                    tempo_retry_at DATETIME,
                     created_at DATETIME NOT NULL,
                     updated_at DATETIME NOT NULL
                 )
                 """
             ))
+        else:
+            analysis_cols = {c["name"] for c in insp.get_columns("music_analysis")}
+            for name, col_type in [
+                ("loudness_lufs", "FLOAT"),
+                ("loudness_range_lu", "FLOAT"),
+                ("true_peak_dbtp", "FLOAT"),
+                ("loudness_analyzed_at", "DATETIME"),
+                ("loudness_retry_at", "DATETIME"),
+                ("bpm", "FLOAT"),
+                ("first_beat_seconds", "FLOAT"),
+                ("tempo_analyzed_at", "DATETIME"),
+                ("tempo_retry_at", "DATETIME"),
+            ]:
+                if name not in analysis_cols:
+                    conn.execute(text(f"ALTER TABLE music_analysis ADD COLUMN {name} {col_type}"))
         if "music_cue" not in insp.get_table_names():
             conn.execute(text(
                 """
@@ -455,6 +479,17 @@ def ensure_schema(app, logger) -> None:
                     )
                     """
             ))
+        if "recording_catalog" in insp.get_table_names():
+            catalog_cols = {c["name"] for c in insp.get_columns("recording_catalog")}
+            for name, col_type in [
+                ("tier", "VARCHAR(16) NOT NULL DEFAULT 'primary'"),
+                ("primary_path", "VARCHAR(1024)"),
+                ("archive_bitrate", "VARCHAR(16)"),
+                ("archived_at", "DATETIME"),
+                ("restored_at", "DATETIME"),
+            ]:
+                if name not in catalog_cols:
+                    conn.execute(text(f"ALTER TABLE recording_catalog ADD COLUMN {name} {col_type}"))
 
     if not Plugin.query.filter_by(name="website_content").first():
         db.session.add(Plugin(name="website_content", enabled=True))
@@ -1,25 +1,14 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, send_file, abort, send_from_directory, make_response, jsonify, Response, stream_with_context
-from io import BytesIO, StringIO
+from io import StringIO
 from dataclasses import dataclass
-import mutagen  # type: ignore
-from mutagen.id3 import ID3  # type: ignore
-from mutagen.mp4 import MP4  # type: ignore
-import ffmpeg
 import json
 import csv
 import math
 import os
-import subprocess
 import secrets
 import base64
-import hashlib
-import zipfile
 import re
-import threading
-import tempfile
-import weakref
 from collections import deque
-from tempfile import NamedTemporaryFile
 from .scheduler import refresh_schedule, pause_shows_until, schedule_marathon_event, cancel_marathon_event, stop_active_show_recording
 from .utils import (
     update_user_config,
@@ -56,6 +45,7 @@ from .models import (
     PodcastEpisode,
     MarathonEvent,
     MusicAnalysis,
+    RecordingCatalog,
 )
 from app.plugins import ensure_plugin_record, plugin_display_name
 from sqlalchemy import case, func, tuple_, or_
@@ -87,10 +77,37 @@ from app.services.library.dj_library import (
     match_youtube_playlist,
 )
 from app.services.library.media_library import decode_media_token
-from app.services.log_export import build_docx, read_log_csv, read_recording_metadata, recording_csv_path
+from app.services.library.cover_art import send_cover
+from app.services.library.preview import ensure_preview, prefetch_previews
+from app.services.library.transcode import ensure_transcoded_mp3
+from app.services.log_export import (
+    build_docx,
+    read_log_csv,
+    read_recording_metadata,
+    recording_csv_path,
+)
 from app.services.radiodj_client import RadioDJClient
+from app.services.recording_segments import (
+    is_segment_directory,
+    iter_segment_bytes,
+    list_segments,
+    live_segment_directories,
+    read_segment_manifest,
+)
+from app.services.recordings_catalog import (
+    catalog_recording,
+    delete_recording,
+    ensure_catalog,
+    period_folder_map,
+    period_label as catalog_period_label,
+    query_recordings,
+    recording_facets,
+    recording_roots,
+)
+from app.services.recording_archive import ArchiveError, restore_recording
+from app.services.recording_clips import ClipError, clip_bounds, ensure_clip, ensure_segment_clip
+from app.services.recording_retention import plan_retention, recent_retention_runs
 from app.services.recording_periods import (
-    UNASSIGNED_PERIOD_LABEL,
     current_recording_period,
     load_recording_periods,
     save_recording_periods,
@@ -98,8 +115,9 @@ from app.services.recording_periods import (
     recordings_base_root,
 )
 from app.services.health import get_health_snapshot, reset_health_counts
+from app.services.zip_stream import iter_zip
 from app.services.system_resources import get_memory_status
-from app.services.listener_analytics import peak_listeners_for_show
+from app.services.listener_analytics import listener_samples_for_show
 from app.services.settings_backup import backup_settings, backup_data_snapshot
 from app.services.live_reads import upsert_cards, card_query, chunk_cards
 from app.services.archivist_db import import_archivist_csv, search_archivist
@@ -238,19 +256,8 @@ class RecordingEntry:
     size_bytes: int
     modified_at: datetime
     period_label: str
-
-
-def _parse_recording_label(filename: str) -> str | None:
-    match = re.match(r"(.+)[_-]\d{2}[-_]\d{2}[-_]\d{2,4}_RAWDATA", filename)
-    if match:
-        return match.group(1)
-    return None
-
-
-def _normalize_key(value: str | None) -> str:
-    if not value:
-        return ""
-    return value.strip().lower()
+    duration_seconds: float | None = None
+    tier: str = "primary"
 
 
 def _normalize_group_by(value: str | None) -> str:
@@ -265,204 +272,62 @@ def _safe_folder_value(value: str | None) -> str:
     return value.replace(" ", "_")
 
 
-def _read_recording_tags(path: str) -> dict[str, str]:
-    try:
-        audio = mutagen.File(path, easy=True)
-    except Exception:
-        return {}
-    if not audio or not getattr(audio, "tags", None):
-        return {}
-
-    def _first_value(key: str) -> str | None:
-        if key not in audio.tags:
-            return None
-        value = audio.tags.get(key)
-        if isinstance(value, (list, tuple)):
-            value = value[0] if value else None
-        return str(value).strip() if value else None
-
-    title = _first_value("title")
-    artist = _first_value("artist")
-    album = _first_value("album")
-    payload = {}
-    if title:
-        payload["title"] = title
-    if artist:
-        payload["artist"] = artist
-    if album:
-        payload["album"] = album
-    return payload
-
-
-def _parse_id3_show_name(tags: dict[str, str]) -> str | None:
-    title = tags.get("title")
-    if title:
-        match = re.match(r"(.+)\s+\(\d{2}-\d{2}-\d{4}\)$", title)
-        if match:
-            return match.group(1).strip()
-        return title.strip()
-    album = tags.get("album")
-    if album:
-        return album.strip()
-    return None
-
-
-def _path_parts(full: str, base_root: str) -> list[str]:
-    rel = os.path.relpath(full, base_root)
-    if rel in (".", ""):
-        return []
-    return rel.split(os.sep)
-
-
-def _extract_recording_names(
-    *,
-    full: str,
-    base_root: str,
-    period_folders: set[str],
-) -> tuple[str, str]:
-    show_name = None
-    dj_name = None
-
-    parts = _path_parts(full, base_root)
-    period_folder = None
-    remaining = parts
-    if parts and parts[0] in period_folders:
-        period_folder = parts[0]
-        remaining = parts[1:]
-
-    dj_folder = None
-    show_folder = None
-    if remaining:
-        if len(remaining) > 1:
-            dj_folder = remaining[0]
-            if len(remaining) > 2 and remaining[1].lower() == "radio shows":
-                show_folder = remaining[2] if len(remaining) > 3 else None
-            elif len(remaining) > 2:
-                show_folder = remaining[1]
-        elif period_folder is None:
-            dj_folder = remaining[0]
-
-    if dj_folder:
-        dj_name = dj_folder.replace("_", " ").strip()
-
-    if show_folder:
-        show_name = show_folder.replace("_", " ").strip()
-
-    if not show_name:
-        filename = os.path.basename(full)
-        safe_label = _parse_recording_label(filename) or os.path.splitext(filename)[0]
-        show_name = safe_label.replace("_", " ").strip()
-        if not dj_name and safe_label:
-            dj_name = safe_label.replace("_", " ").strip()
-
-    if not show_name or not dj_name:
-        tags = _read_recording_tags(full)
-        if not show_name:
-            show_name = _parse_id3_show_name(tags)
-        if not dj_name:
-            dj_name = (tags.get("artist") or "").strip() or None
-
-    return show_name or "Unknown", dj_name or "Unknown"
-
-
-def _period_folder_map(periods: list[str]) -> dict[str, str]:
-    return {period_folder_name(period): period for period in periods}
-
-
-def _period_label_for_path(path: str, base_root: str, period_map: dict[str, str]) -> str:
-    rel = os.path.relpath(os.path.dirname(path), base_root)
-    if rel == ".":
-        return UNASSIGNED_PERIOD_LABEL
-    folder = rel.split(os.sep, 1)[0]
-    return period_map.get(folder, folder)
-
-
-def _build_recording_entry(
-    *,
-    full: str,
-    base_root: str,
-    period_map: dict[str, str],
-    period_folders: set[str],
-    root: str,
-) -> RecordingEntry:
-    filename = os.path.basename(full)
-    show_name, dj_name = _extract_recording_names(
-        full=full,
-        base_root=base_root,
-        period_folders=period_folders,
-    )
-    stat = os.stat(full)
-    log_path = recording_csv_path(full)
-    has_log = os.path.isfile(log_path)
+def _recording_entry_from_row(row: RecordingCatalog, period_map: dict[str, str]) -> RecordingEntry:
     return RecordingEntry(
-        show_name=show_name,
-        dj_name=dj_name,
-        show_key=_normalize_key(show_name),
-        dj_key=_normalize_key(dj_name),
-        filename=filename,
-        full_path=full,
-        log_csv_path=log_path,
-        has_log=has_log,
-        token=base64.urlsafe_b64encode(full.encode("utf-8")).decode("utf-8"),
-        size_bytes=stat.st_size,
-        modified_at=datetime.fromtimestamp(stat.st_mtime),
-        period_label=_period_label_for_path(full, base_root, period_map),
+        show_name=row.show_name,
+        dj_name=row.dj_name,
+        show_key=row.show_key,
+        dj_key=row.dj_key,
+        filename=row.filename,
+        full_path=row.path,
+        log_csv_path=recording_csv_path(row.path),
+        has_log=row.has_log,
+        token=base64.urlsafe_b64encode(row.path.encode("utf-8")).decode("utf-8"),
+        size_bytes=row.size_bytes,
+        modified_at=row.modified_at,
+        period_label=catalog_period_label(row.period_folder, period_map),
+        duration_seconds=row.duration_seconds,
+        tier=row.tier,
     )
 
 
+def _catalog_period_folder(period: str | None) -> str | None:
+    if not period or period == ALL_PERIODS_VALUE:
+        return None
+    return period_folder_name(period)
+
+
 def _collect_recordings(
     show: str | None = None,
     dj: str | None = None,
     period: str | None = None,
 ) -> list[RecordingEntry]:
-    base_root = _recordings_root()
-    periods = load_recording_periods().get("periods", [])
-    period_map = _period_folder_map(periods)
-    period_folders = set(period_map.keys())
-    root = base_root
-    if period and period != ALL_PERIODS_VALUE:
-        root = os.path.join(base_root, period_folder_name(period))
-        if not os.path.isdir(root):
-            return []
-    show_filter = _normalize_key(show)
-    dj_filter = _normalize_key(dj)
-
-    entries: list[RecordingEntry] = []
-    for current_root, _, files in os.walk(root):
-        for filename in files:
-            if not filename.lower().endswith((".mp3", ".wav", ".m4a", ".aac")):
-                continue
-            full = os.path.join(current_root, filename)
-            if (
-                period
-                and period != ALL_PERIODS_VALUE
-                and not os.path.normcase(os.path.abspath(full)).startswith(os.path.normcase(os.path.abspath(root)))
-            ):
-                continue
-            entry = _build_recording_entry(
-                full=full,
-                base_root=base_root,
-                period_map=period_map,
-                period_folders=period_folders,
-                root=root,
-            )
-            if show_filter and entry.show_key != show_filter:
-                continue
-            if dj_filter and entry.dj_key != dj_filter:
-                continue
-            entries.append(entry)
-    entries.sort(key=lambda item: item.modified_at, reverse=True)
-    return entries
+    ensure_catalog()
+    period_map = period_folder_map(load_recording_periods().get("periods", []))
+    rows, _ = query_recordings(show=show, dj=dj, period_folder=_catalog_period_folder(period))
+    return [_recording_entry_from_row(row, period_map) for row in rows]
 
 
 def _resolve_recording_path(token: str) -> str | None:
+    try:
+        decoded = base64.urlsafe_b64decode(token.encode("utf-8")).decode("utf-8")
+    except Exception:
+        return None
+    full = os.path.normcase(os.path.abspath(os.path.normpath(decoded)))
+    roots = [os.path.normcase(root) for _, root in recording_roots()]
+    if not any(full.startswith(root) for root in roots) or not os.path.isfile(full):
+        return None
+    return full
+
+
+def _resolve_segment_dir(token: str) -> str | None:
     try:
         decoded = base64.urlsafe_b64decode(token.encode("utf-8")).decode("utf-8")
     except Exception:
         return None
     full = os.path.normcase(os.path.abspath(os.path.normpath(decoded)))
     root = os.path.normcase(os.path.abspath(os.path.normpath(_recordings_root())))
-    if not full.startswith(root) or not os.path.isfile(full):
+    if not full.startswith(root) or not is_segment_directory(full) or not os.path.isdir(full):
         return None
     return full
 
@@ -624,16 +489,17 @@ def recordings_manage():
     periods = periods_payload.get("periods", [])
     if period_param not in periods and period_param != ALL_PERIODS_VALUE:
         period_param = current_recording_period()
-    entries = _collect_recordings(show=show_filter, dj=dj_filter, period=period_param)
-    available_entries = _collect_recordings(period=period_param)
-    shows = sorted({entry.show_name for entry in available_entries})
-    djs = sorted({entry.dj_name for entry in available_entries})
-    total_entries = len(entries)
+    ensure_catalog()
+    period_folder = _catalog_period_folder(period_param)
+    shows, djs = recording_facets(period_folder=period_folder)
+    filters = {"show": show_filter, "dj": dj_filter, "period_folder": period_folder, "page_size": RECORDINGS_PAGE_SIZE}
+    rows, total_entries = query_recordings(page=page, **filters)
     total_pages = max(math.ceil(total_entries / RECORDINGS_PAGE_SIZE), 1)
     if page > total_pages:
         page = total_pages
-    page_start = (page - 1) * RECORDINGS_PAGE_SIZE
-    page_entries = entries[page_start: page_start + RECORDINGS_PAGE_SIZE]
+        rows, _ = query_recordings(page=page, **filters)
+    period_map = period_folder_map(periods)
+    page_entries = [_recording_entry_from_row(row, period_map) for row in rows]
     return render_template(
         "recordings_manage.html",
         recordings=page_entries,
@@ -663,6 +529,107 @@ def recordings_file(token: str):
     return resp
 
 
+@main_bp.route("/recordings/clip/<path:token>")
+@permission_required({"logs:view"})
+def recordings_clip(token: str):
+    full = _resolve_recording_path(token)
+    if not full:
+        abort(404)
+    row = RecordingCatalog.query.filter_by(path=full).first()
+    try:
+        start, end = clip_bounds(request.args.get("start"), request.args.get("end"), row.duration_seconds if row else None)
+        clip = ensure_clip(full, start, end)
+    except ClipError as exc:
+        abort(400, description=str(exc))
+    except FileNotFoundError:
+        abort(503, description="ffmpeg is not available to cut clips")
+    base, extension = os.path.splitext(os.path.basename(full))
+    resp = send_file(
+        clip,
+        conditional=True,
+        as_attachment=request.args.get("download") == "1",
+        download_name=f"{base}_{int(start)}-{int(math.ceil(end))}{extension}",
+    )
+    resp.headers["X-Robots-Tag"] = "noindex, nofollow"
+    return resp
+
+
+@main_bp.route("/recordings/live")
+@permission_required({"logs:view"})
+def recordings_live():
+    base_root = _recordings_root()
+    payload = []
+    for segment_dir in live_segment_directories(base_root) if os.path.isdir(base_root) else []:
+        manifest = read_segment_manifest(segment_dir)
+        segments = list_segments(segment_dir)
+        token = base64.urlsafe_b64encode(segment_dir.encode("utf-8")).decode("utf-8")
+        payload.append({
+            "show_name": manifest.get("show_name"),
+            "recording": manifest.get("recording"),
+            "started_at": manifest.get("started_at"),
+            "attempts": len(manifest.get("attempts") or []),
+            "segments": segments,
+            "recorded_seconds": max((seg["end"] or seg["start"] for seg in segments), default=0),
+            "token": token,
+            "audio_url": url_for("main.recordings_live_audio", token=token),
+            "clip_url": url_for("main.recordings_live_clip", token=token),
+        })
+    return jsonify({"recordings": payload})
+
+
+@main_bp.route("/recordings/live/<path:token>/audio")
+@permission_required({"logs:view"})
+def recordings_live_audio(token: str):
+    segment_dir = _resolve_segment_dir(token)
+    if not segment_dir:
+        abort(404)
+    start = max(0.0, request.args.get("start", 0.0, type=float))
+    resp = Response(stream_with_context(iter_segment_bytes(segment_dir, start_seconds=start)), mimetype="audio/mpeg")
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Robots-Tag"] = "noindex, nofollow"
+    return resp
+
+
+@main_bp.route("/recordings/live/<path:token>/clip")
+@permission_required({"logs:view"})
+def recordings_live_clip(token: str):
+    segment_dir = _resolve_segment_dir(token)
+    if not segment_dir:
+        abort(404)
+    segments = list_segments(segment_dir)
+    recorded = max((seg["end"] or seg["start"] for seg in segments), default=0)
+    try:
+        start, end = clip_bounds(request.args.get("start"), request.args.get("end"), recorded or None)
+        clip = ensure_segment_clip(segment_dir, start, end)
+    except ClipError as exc:
+        abort(400, description=str(exc))
+    except FileNotFoundError:
+        abort(503, description="ffmpeg is not available to cut clips")
+    base = os.path.splitext(read_segment_manifest(segment_dir).get("recording") or "recording")[0]
+    resp = send_file(
+        clip,
+        conditional=True,
+        as_attachment=request.args.get("download") == "1",
+        download_name=f"{base}_{int(start)}-{int(math.ceil(end))}.mp3",
+    )
+    resp.headers["Cache-Control"] = "no-store"
+    resp.headers["X-Robots-Tag"] = "noindex, nofollow"
+    return resp
+
+
+def _log_entry_offset(entry, window_start: datetime):
+    """Seconds from the show start to a log entry's ``HH:MM`` time, or None."""
+    if not entry.time:
+        return None
+    try:
+        occurred = datetime.combine(window_start.date(), datetime.strptime(entry.time, "%H:%M").time())
+    except ValueError:
+        return None
+    if occurred < window_start:
+        occurred += timedelta(days=1)
+    return (occurred - window_start).total_seconds()
+
+
 @main_bp.route("/recordings/view/<path:token>")
 @permission_required({"logs:view"})
 def recordings_view(token: str):
@@ -681,22 +648,38 @@ def recordings_view(token: str):
         pass
     hour_counts = []
     peak_listeners = None
+    listener_samples = []
     if window_start and window_end:
         hours = max(1, math.ceil((window_end - window_start).total_seconds() / 3600))
         hour_counts = [0] * hours
         for entry in entries:
-            if entry.entry_type not in {"psa", "live_read"} or not entry.time:
-                continue
-            try:
-                occurred = datetime.combine(window_start.date(), datetime.strptime(entry.time, "%H:%M").time())
-                if occurred < window_start:
-                    occurred += timedelta(days=1)
-                index = int((occurred - window_start).total_seconds() // 3600)
-                if 0 <= index < hours:
-                    hour_counts[index] += 1
-            except ValueError:
+            if entry.entry_type not in {"psa", "live_read"}:
                 continue
-        peak_listeners = peak_listeners_for_show(metadata.get("show_name", ""), window_start, window_end)
+            offset = _log_entry_offset(entry, window_start)
+            if offset is not None and 0 <= int(offset // 3600) < hours:
+                hour_counts[int(offset // 3600)] += 1
+        listener_samples = listener_samples_for_show(metadata.get("show_name", ""), window_start, window_end)
+        peak_listeners = max((listeners for _ts, listeners in listener_samples), default=None)
+    waveform = metadata.get("waveform") or {}
+    overview = None
+    if waveform.get("points"):
+        overview = {
+            "points": waveform["points"],
+            "seconds": waveform.get("seconds") or len(waveform["points"]),
+            "markers": [],
+            "listeners": [
+                {"offset": (ts - window_start).total_seconds(), "listeners": listeners}
+                for ts, listeners in listener_samples
+            ],
+        }
+        if window_start:
+            for entry in entries:
+                offset = _log_entry_offset(entry, window_start)
+                if offset is not None and offset <= overview["seconds"]:
+                    label = " - ".join(part for part in (entry.title, entry.artist) if part) or entry.message
+                    overview["markers"].append(
+                        {"offset": offset, "type": entry.entry_type, "label": f"{entry.time} {label}".strip()}
+                    )
     compliance = {
         "has_log": bool(entries),
         "hour_counts": hour_counts,
@@ -709,9 +692,73 @@ def recordings_view(token: str):
         token=token,
         compliance=compliance,
         peak_listeners=peak_listeners,
+        integrity=metadata.get("integrity"),
+        catalog_row=RecordingCatalog.query.filter_by(path=full).first(),
+        overview=overview,
     )
 
 
+@main_bp.post("/recordings/delete/<path:token>")
+@permission_required({"logs:edit"})
+def recordings_delete(token: str):
+    full = _resolve_recording_path(token)
+    if not full:
+        abort(404)
+    try:
+        delete_recording(full)
+    except OSError as exc:
+        path = exc.filename or full
+        logger.error("Unable to delete recording file %s: %s", path, exc)
+        flash(f"Unable to delete {os.path.basename(path)}.", "danger")
+        return redirect(url_for("main.recordings_view", token=token))
+    flash(f"Deleted recording {os.path.basename(full)}.", "success")
+    return redirect(url_for("main.recordings_manage"))
+
+
+@main_bp.post("/recordings/restore/<path:token>")
+@permission_required({"logs:edit"})
+def recordings_restore(token: str):
+    full = _resolve_recording_path(token)
+    row = RecordingCatalog.query.filter_by(path=full).first() if full else None
+    if row is None:
+        abort(404)
+    try:
+        row = restore_recording(row)
+    except (OSError, ArchiveError) as exc:
+        db.session.rollback()
+        logger.error("Unable to restore archived recording %s: %s", full, exc)
+        flash(f"Unable to restore {os.path.basename(full)}: {exc}", "danger")
+        return redirect(url_for("main.recordings_view", token=token))
+    flash(f"Restored {row.filename} from the archive.", "success")
+    return redirect(url_for("main.recordings_view", token=base64.urlsafe_b64encode(row.path.encode("utf-8")).decode("utf-8")))
+
+
+@main_bp.route("/recordings/retention")
+@permission_required({"logs:view"})
+def recordings_retention():
+    """Current quota usage, what the next pass would remove, and the stored runs."""
+    try:
+        plan = plan_retention()
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    runs = [
+        {
+            "id": run.id,
+            "created_at": run.created_at.isoformat(),
+            "trigger": run.trigger,
+            "simulate": run.simulate,
+            "action": run.action,
+            "recordings": run.recordings,
+            "bytes_planned": run.bytes_planned,
+            "bytes_freed": run.bytes_freed,
+            "failed": run.failed,
+            "plan": json.loads(run.plan) if request.args.get("details") == "1" else None,
+        }
+        for run in recent_retention_runs(min(100, max(1, request.args.get("runs", 10, type=int))))
+    ]
+    return jsonify({"plan": plan, "runs": runs})
+
+
 @main_bp.post('/settings/health/reset')
 @permission_required({"settings:edit"})
 def reset_health_counters():
@@ -768,8 +815,7 @@ def recordings_download():
     period_param = request.values.get("period") or current_recording_period()
     group_by = _normalize_group_by(request.values.get("group_by"))
     periods = load_recording_periods().get("periods", [])
-    period_map = _period_folder_map(periods)
-    period_folders = set(period_map.keys())
+    period_map = period_folder_map(periods)
     if period_param not in periods and period_param != ALL_PERIODS_VALUE:
         period_param = current_recording_period()
     entries: list[RecordingEntry] = []
@@ -784,20 +830,11 @@ def recordings_download():
                 period=period_param,
                 group_by=group_by,
             ))
-        base_root = _recordings_root()
         for token in tokens:
             full = _resolve_recording_path(token)
-            if not full:
-                continue
-            entries.append(
-                _build_recording_entry(
-                    full=full,
-                    base_root=base_root,
-                    period_map=period_map,
-                    period_folders=period_folders,
-                    root=base_root,
-                )
-            )
+            row = catalog_recording(full) if full else None
+            if row is not None:
+                entries.append(_recording_entry_from_row(row, period_map))
     else:
         entries = _collect_recordings(show=show_filter, dj=dj_filter, period=period_param)
     if not entries:
@@ -815,43 +852,25 @@ def recordings_download():
     elif dj_filter:
         label = dj_filter
 
-    tmp = NamedTemporaryFile(delete=False, suffix=".zip")
-    tmp_path = tmp.name
-    tmp.close()
-
-    with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
-        for entry in entries:
-            period_folder = entry.period_label.replace(" ", "_")
-            show_folder = _safe_folder_value(entry.show_name)
-            dj_folder = _safe_folder_value(entry.dj_name)
-            if group_by == "dj":
-                arcname = os.path.join(period_folder, dj_folder, entry.filename)
-            elif group_by == "show":
-                arcname = os.path.join(period_folder, show_folder, entry.filename)
-            else:
-                arcname = os.path.join(period_folder, dj_folder, show_folder, entry.filename)
-            archive.write(entry.full_path, arcname=arcname)
-            if entry.has_log:
-                if group_by == "dj":
-                    log_arcname = os.path.join(period_folder, dj_folder, os.path.basename(entry.log_csv_path))
-                elif group_by == "show":
-                    log_arcname = os.path.join(period_folder, show_folder, os.path.basename(entry.log_csv_path))
-                else:
-                    log_arcname = os.path.join(
-                        period_folder,
-                        dj_folder,
-                        show_folder,
-                        os.path.basename(entry.log_csv_path),
-                    )
-                archive.write(entry.log_csv_path, arcname=log_arcname)
-
-    response = send_file(
-        tmp_path,
-        mimetype="application/zip",
-        as_attachment=True,
-        download_name=f"{label.replace(' ', '_')}_recordings.zip",
-    )
-    response.call_on_close(lambda: os.unlink(tmp_path))
+    members = []
+    for entry in entries:
+        period_folder = entry.period_label.replace(" ", "_")
+        show_folder = _safe_folder_value(entry.show_name)
+        dj_folder = _safe_folder_value(entry.dj_name)
+        if group_by == "dj":
+            folder = os.path.join(period_folder, dj_folder)
+        elif group_by == "show":
+            folder = os.path.join(period_folder, show_folder)
+        else:
+            folder = os.path.join(period_folder, dj_folder, show_folder)
+        members.append((entry.full_path, os.path.join(folder, entry.filename)))
+        if entry.has_log:
+            members.append((entry.log_csv_path, os.path.join(folder, os.path.basename(entry.log_csv_path))))
+
+    # Stored entries streamed straight from disk: the download starts at once and needs no temp file.
+    response = Response(stream_with_context(iter_zip(members)), mimetype="application/zip")
+    response.headers.set("Content-Disposition", "attachment", filename=f"{label.replace(' ', '_')}_recordings.zip")
+    response.headers["X-Robots-Tag"] = "noindex, nofollow"
     return response
 
 
@@ -1753,113 +1772,8 @@ def _safe_music_path(path: str) -> str:
     return normalized
 
 
-def _is_alac(path: str) -> bool:
-    try:
-        probe = ffmpeg.probe(path)
-    except Exception:
-        return False
-    for stream in probe.get("streams", []):
-        if stream.get("codec_type") == "audio" and stream.get("codec_name") == "alac":
-            return True
-    return False
-
-
-def _transcode_cache_dir() -> str:
-    cache_dir = os.path.join(current_app.instance_path, "transcodes")
-    os.makedirs(cache_dir, exist_ok=True)
-    return cache_dir
-
-
-_transcode_guard = threading.Lock()
-_transcode_locks: weakref.WeakValueDictionary[str, threading.Lock] = weakref.WeakValueDictionary()
-_transcode_slots: threading.BoundedSemaphore | None = None
-
-
-def _transcode_slot() -> threading.BoundedSemaphore:
-    global _transcode_slots
-    if _transcode_slots is None:
-        count = max(1, int(current_app.config.get("TRANSCODE_MAX_CONCURRENCY", 2)))
-        _transcode_slots = threading.BoundedSemaphore(count)
-    return _transcode_slots
-
-
-def _target_lock(target: str) -> threading.Lock:
-    with _transcode_guard:
-        return _transcode_locks.setdefault(target, threading.Lock())
-
-
-def _transcode_cache_path(path: str) -> str:
-    stat = os.stat(path)
-    key_text = f"{path}:{stat.st_mtime}:{stat.st_size}"
-    try:
-        key = os.fsencode(key_text)
-    except Exception:
-        key = key_text.encode("utf-8", "surrogatepass")
-    return os.path.join(_transcode_cache_dir(), f"{hashlib.sha1(key).hexdigest()}.mp3")
-
-
-def _ensure_transcoded_mp3(path: str) -> str | None:
-    if not current_app.config.get("TRANSCODE_ALAC_TO_MP3", True):
-        return None
-    if os.path.splitext(path)[1].lower() != ".m4a":
-        return None
-    if not _is_alac(path):
-        return None
-    target = _transcode_cache_path(path)
-    if os.path.exists(target):
-        return target
-    lock = _target_lock(target)
-    timeout = max(1, int(current_app.config.get("TRANSCODE_TIMEOUT_SECONDS", 900)))
-    acquired_slot = False
-    temp_path = None
-    try:
-        with lock:
-            if os.path.exists(target):
-                return target
-            acquired_slot = _transcode_slot().acquire(timeout=timeout)
-            if not acquired_slot:
-                return None
-            fd, temp_path = tempfile.mkstemp(prefix="transcode-", suffix=".mp3", dir=_transcode_cache_dir())
-            os.close(fd)
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-nostdin",
-                    "-hide_banner",
-                    "-loglevel",
-                    "error",
-                    "-y",
-                    "-i",
-                    path,
-                    "-vn",
-                    "-c:a",
-                    "libmp3lame",
-                    "-b:a",
-                    "192k",
-                    temp_path,
-                ],
-                check=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                timeout=timeout,
-            )
-            os.replace(temp_path, target)
-            temp_path = None
-    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except OSError:
-                pass
-        return None
-    finally:
-        if acquired_slot:
-            _transcode_slot().release()
-    return target
-
-
 def _send_audio(path: str):
-    transcoded = _ensure_transcoded_mp3(path)
+    transcoded = ensure_transcoded_mp3(path)
     if transcoded:
         return send_file(transcoded, mimetype="audio/mpeg", conditional=True)
     return send_file(path, conditional=True)
@@ -1875,6 +1789,34 @@ def music_stream():
     return _send_audio(safe_path)
 
 
+@main_bp.route("/music/preview")
+@permission_required({"music:view"})
+def music_preview():
+    """Short clip from the hook/cue-in for auditioning; falls back to the full stream."""
+    path = request.args.get("path")
+    if not path:
+        abort(404)
+    safe_path = _safe_music_path(path)
+    if current_app.config.get("PREVIEW_ENABLED", True):
+        clip = ensure_preview(safe_path)
+        if clip:
+            return send_file(clip, mimetype="audio/mpeg", conditional=True, max_age=3600)
+    return _send_audio(safe_path)
+
+
+@main_bp.route("/music/preview/prefetch", methods=["POST"])
+@permission_required({"music:view"})
+def music_preview_prefetch():
+    payload = request.get_json(force=True, silent=True) or {}
+    paths = payload.get("paths") or []
+    if not isinstance(paths, list):
+        return jsonify({"status": "error", "message": "paths must be a list"}), 400
+    if not current_app.config.get("PREVIEW_ENABLED", True):
+        return jsonify({"status": "ok", "queued": 0})
+    safe_paths = [_safe_music_path(path) for path in paths[:50] if isinstance(path, str) and path]
+    return jsonify({"status": "ok", "queued": prefetch_previews(safe_paths)})
+
+
 @main_bp.route("/music/pretranscode", methods=["POST"])
 @permission_required({"music:view"})
 def music_pretranscode():
@@ -1883,7 +1825,7 @@ def music_pretranscode():
     if not path:
         return jsonify({"status": "error", "message": "path required"}), 400
     safe_path = _safe_music_path(path)
-    transcoded = _ensure_transcoded_mp3(safe_path)
+    transcoded = ensure_transcoded_mp3(safe_path)
     return jsonify({"status": "ok", "transcoded": bool(transcoded)})
 
 
@@ -1894,34 +1836,10 @@ def music_cover():
     if not path:
         abort(404)
     safe_path = _safe_music_path(path)
-    audio = mutagen.File(safe_path, easy=False)
-    if not audio:
-        abort(404)
-
-    image_data = None
-    mime = "image/jpeg"
-
-    if isinstance(audio, MP4):
-        covr = audio.tags.get("covr") if audio.tags else None
-        if covr:
-            image_data = bytes(covr[0])
-            mime = "image/jpeg"
-    else:
-        try:
-            id3 = ID3(safe_path)
-            apic = id3.get("APIC:") or id3.get("APIC")
-            if apic:
-                image_data = apic.data
-                mime = apic.mime or mime
-        except Exception:
-            if hasattr(audio, "pictures") and audio.pictures:
-                pic = audio.pictures[0]
-                image_data = pic.data
-                mime = pic.mime or mime
-
-    if not image_data:
+    resp = send_cover(safe_path, request.args.get("size", type=int), private=True)
+    if resp is None:
         abort(404)
-    return send_file(BytesIO(image_data), mimetype=mime, conditional=True)
+    return resp
 
 
 @main_bp.route("/music/detail")
@@ -1995,18 +1913,28 @@ def music_cue_page():
             "bitrate": track.get("bitrate") or analysis.bitrate,
             "hash": analysis.hash,
             "missing_tags": analysis.missing_tags,
+            "loudness_lufs": analysis.loudness_lufs,
+            "loudness_range_lu": analysis.loudness_range_lu,
+            "true_peak_dbtp": analysis.true_peak_dbtp,
+            "bpm": analysis.bpm,
+            "first_beat_seconds": analysis.first_beat_seconds,
         })
     elif track:
         track.setdefault("duration_seconds", None)
         track.setdefault("peak_db", None)
         track.setdefault("rms_db", None)
         track.setdefault("peaks", None)
+        track.setdefault("loudness_lufs", None)
+        track.setdefault("loudness_range_lu", None)
+        track.setdefault("true_peak_dbtp", None)
+        track.setdefault("bpm", None)
+        track.setdefault("first_beat_seconds", None)
     try:
         safe_path = _safe_music_path(path)
     except Exception:
         safe_path = None
     if safe_path:
-        _ensure_transcoded_mp3(safe_path)
+        ensure_transcoded_mp3(safe_path)
     cue_obj = load_cue(path)
     cue = {
         "cue_in": cue_obj.cue_in if cue_obj else None,
@@ -401,6 +401,15 @@ class MusicAnalysis(db.Model):
     bitrate = db.Column(db.Integer, nullable=True)
     hash = db.Column(db.String(64), nullable=True)
     missing_tags = db.Column(db.Boolean, default=False, nullable=False)
+    loudness_lufs = db.Column(db.Float, nullable=True)  # EBU R128 integrated loudness
+    loudness_range_lu = db.Column(db.Float, nullable=True)
+    true_peak_dbtp = db.Column(db.Float, nullable=True)
+    loudness_analyzed_at = db.Column(db.DateTime, nullable=True)
+    loudness_retry_at = db.Column(db.DateTime, nullable=True)  # set when the last measurement failed
+    bpm = db.Column(db.Float, nullable=True)
+    first_beat_seconds = db.Column(db.Float, nullable=True)
+    tempo_analyzed_at = db.Column(db.DateTime, nullable=True)
+    tempo_retry_at = db.Column(db.DateTime, nullable=True)  # set when the last analysis failed
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
@@ -424,6 +433,33 @@ class MusicCue(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
+class ExternalLookupCache(db.Model):
+    """Cached responses from external metadata services (MusicBrainz, AudioDB)."""
+    __tablename__ = "external_lookup_cache"
+
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(600), unique=True, nullable=False)  # "<source>:<normalized artist|title|variant>"
+    source = db.Column(db.String(32), nullable=False)
+    found = db.Column(db.Boolean, default=False, nullable=False)  # False rows are cached "no match" answers
+    payload = db.Column(Text, nullable=True)  # JSON
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class MetadataEnrichmentItem(db.Model):
+    """Background MusicBrainz enrichment queue; suggestions are stored, never auto-applied."""
+    __tablename__ = "metadata_enrichment_queue"
+
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(500), unique=True, nullable=False)
+    status = db.Column(db.String(16), default="pending", nullable=False)  # pending | matched | no_match | error
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    suggestion = db.Column(Text, nullable=True)  # JSON
+    error = db.Column(db.String(255), nullable=True)
+    queued_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    processed_at = db.Column(db.DateTime, nullable=True)
+
+
 class SavedSearch(db.Model):
     __tablename__ = "saved_search"
 
@@ -435,6 +471,18 @@ class SavedSearch(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
 
+class Crate(db.Model):
+    """Saved rotation rules (see ``app.services.library.crates``)."""
+    __tablename__ = "crate"
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(128), nullable=False)
+    rules = db.Column(Text, nullable=False, default="{}")
+    created_by = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
 class JobHealth(db.Model):
     __tablename__ = "job_health"
 
@@ -616,3 +664,48 @@ class RemoteLinkSignal(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
     session = db.relationship("RemoteLinkSession", backref="signals")
+
+
+class RecordingCatalog(db.Model):
+    """Recordings on disk (see ``app.services.recordings_catalog``)."""
+    __tablename__ = "recording_catalog"
+
+    id = db.Column(db.Integer, primary_key=True)
+    path = db.Column(db.String(1024), unique=True, nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    period_folder = db.Column(db.String(255), nullable=False, default="", index=True)  # "" for the recordings root
+    show_name = db.Column(db.String(255), nullable=False)
+    dj_name = db.Column(db.String(255), nullable=False)
+    show_key = db.Column(db.String(255), nullable=False, index=True)
+    dj_key = db.Column(db.String(255), nullable=False, index=True)
+    show_date = db.Column(db.Date, nullable=True)
+    size_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+    mtime = db.Column(db.Float, nullable=False, default=0.0)  # raw st_mtime, used to spot changed files
+    modified_at = db.Column(db.DateTime, nullable=False, index=True)
+    duration_seconds = db.Column(db.Float, nullable=True)
+    has_log = db.Column(db.Boolean, default=False, nullable=False)
+    sidecar_mtime = db.Column(db.Float, nullable=True)
+    sidecar = db.Column(Text, nullable=True)  # JSON copy of the recording's metadata sidecar
+    tier = db.Column(db.String(16), nullable=False, default="primary", index=True)  # primary | archive
+    primary_path = db.Column(db.String(1024), nullable=True)  # where an archived recording is restored to
+    archive_bitrate = db.Column(db.String(16), nullable=True)  # set when the archived copy was re-encoded
+    archived_at = db.Column(db.DateTime, nullable=True)
+    restored_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class RecordingRetentionRun(db.Model):
+    """One retention pass: its quotas, the plan it made and what was done (see ``app.services.recording_retention``)."""
+    __tablename__ = "recording_retention_run"
+
+    id = db.Column(db.Integer, primary_key=True)
+    simulate = db.Column(db.Boolean, nullable=False, default=True)
+    action = db.Column(db.String(16), nullable=False)  # archive | delete
+    trigger = db.Column(db.String(32), nullable=False, default="scheduled")  # scheduled | manual
+    recordings = db.Column(db.Integer, nullable=False, default=0)
+    bytes_planned = db.Column(db.BigInteger, nullable=False, default=0)
+    bytes_freed = db.Column(db.BigInteger, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    plan = db.Column(Text, nullable=False)  # JSON plan including per-recording results
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -3,12 +3,12 @@ from __future__ import annotations
 import time
 import threading
 from datetime import datetime, timedelta, timezone, date
-from flask import Blueprint, jsonify, current_app, request, session, url_for, render_template, abort, send_file
+from flask import Blueprint, jsonify, current_app, request, session, url_for, render_template, abort
 import os
 import shutil
 import json
 import base64
-import io
+from collections.abc import Mapping
 from typing import Optional
 from urllib.parse import urlparse, quote_from_bytes
 from app.models import (
@@ -19,6 +19,7 @@ from app.models import (
     DJ,
     Show,
     SavedSearch,
+    Crate,
     Plugin,
     WebsiteContent,
     WebsiteArticle,
@@ -32,6 +33,7 @@ from app.models import (
     NowPlayingState,
     PlaybackQueueItem,
     PlaybackSession,
+    MusicAnalysis,
     db,
 )
 from app.utils import (
@@ -70,9 +72,10 @@ from app.services.library.music_search import (
     harvest_cover_art,
     cover_art_candidates,
     enrich_metadata_external,
-    invalidate_library_editor_index_cache,
 )
+from app.services.library.crates import build_crate_rotation, crate_rules, discard_crate_state, normalize_rules
 from app.services.library.media_library import decode_media_token, list_media, load_media_meta, save_media_meta
+from app.services.library.saved_searches import discard_saved_search_results, saved_search_count, saved_search_results
 from app.services.archivist_db import (
     lookup_album,
     analyze_album_rip,
@@ -80,7 +83,15 @@ from app.services.archivist_db import (
     delete_album_rip_upload,
     cleanup_album_tmp,
 )
-from app.services.library.library_index import get_library_index_status, start_library_index_job
+from app.services.library.library_index import (
+    get_library_index_history,
+    get_library_index_status,
+    resolve_subtree,
+    start_library_index_job,
+    start_subtree_index_job,
+)
+from app.services.library.cover_art import send_cover
+from app.services.library.enrichment import enqueue_enrichment, enqueue_missing_metadata, enrichment_queue_status
 from app.db_utils import ensure_playback_session_schema
 from sqlalchemy import func
 from app.logger import init_logger
@@ -272,6 +283,13 @@ def _normalize_plan_payload(payload: dict | None) -> dict | None:
     cues = data.get("cues") or data.get("cue")
     if cues is not None:
         data["cues"] = cues
+    metadata = data.get("metadata") if isinstance(data.get("metadata"), dict) else {}
+    path = data.get("path") or metadata.get("path")
+    if data.get("bpm") is None and path:
+        analysis = MusicAnalysis.query.filter_by(path=path).first()
+        if analysis and analysis.bpm:
+            data["bpm"] = analysis.bpm
+            data["first_beat"] = analysis.first_beat_seconds
     return data
 
 
@@ -425,7 +443,7 @@ def _cover_url_for_track(title: Optional[str], artist: Optional[str]) -> Optiona
         return None
     index = get_music_index()
     files = index.get("files", {})
-    if not isinstance(files, dict):
+    if not isinstance(files, Mapping):
         return None
     for entry in files.values():
         if not isinstance(entry, dict):
@@ -978,6 +996,7 @@ def music_saved_searches():
                 "query": s.query,
                 "filters": deserialize_filters(s.filters),
                 "created_at": s.created_at.isoformat(),
+                "total": saved_search_count(s),
             }
             for s in searches
         ])
@@ -1007,9 +1026,84 @@ def music_saved_searches():
             return jsonify({"status": "error", "message": "forbidden"}), 403
         db.session.delete(s)
         db.session.commit()
+        discard_saved_search_results(sid)
     return jsonify({"status": "ok"})
 
 
+@api_bp.route("/music/saved-searches/<int:search_id>/results")
+def music_saved_search_results(search_id: int):
+    user_email = session.get("user_email") or "anonymous"
+    saved = db.session.get(SavedSearch, search_id)
+    if not saved or (saved.created_by and saved.created_by != user_email):
+        return jsonify({"status": "error", "message": "not found"}), 404
+    page = request.args.get("page", type=int, default=1)
+    per_page = request.args.get("per_page", type=int, default=50)
+    return jsonify(saved_search_results(saved, page=page, per_page=per_page))
+
+
+@api_bp.route("/music/crates", methods=["GET", "POST", "DELETE"])
+def music_crates():
+    user_email = session.get("user_email") or "anonymous"
+    if request.method == "GET":
+        crates = Crate.query.order_by(Crate.name.asc()).all()
+        return jsonify([
+            {
+                "id": crate.id,
+                "name": crate.name,
+                "rules": crate_rules(crate),
+                "created_by": crate.created_by,
+                "updated_at": crate.updated_at.isoformat(),
+            }
+            for crate in crates
+        ])
+
+    if request.method == "POST":
+        payload = request.get_json(force=True, silent=True) or {}
+        name = (payload.get("name") or "").strip()
+        if not name:
+            return jsonify({"status": "error", "message": "name required"}), 400
+        try:
+            rules = normalize_rules(payload.get("rules"))
+        except ValueError as exc:
+            return jsonify({"status": "error", "message": str(exc)}), 400
+        crate_id = payload.get("id")
+        if crate_id:
+            crate = db.session.get(Crate, int(crate_id))
+            if not crate:
+                return jsonify({"status": "error", "message": "not found"}), 404
+            if crate.created_by and crate.created_by != user_email:
+                return jsonify({"status": "error", "message": "forbidden"}), 403
+        else:
+            crate = Crate(created_by=user_email)
+            db.session.add(crate)
+        crate.name = name[:128]
+        crate.rules = json.dumps(rules)
+        db.session.commit()
+        return jsonify({"status": "ok", "id": crate.id, "rules": rules}), 200 if crate_id else 201
+
+    crate_id = request.args.get("id", type=int)
+    if not crate_id:
+        return jsonify({"status": "error", "message": "id required"}), 400
+    crate = db.session.get(Crate, crate_id)
+    if not crate:
+        return jsonify({"status": "error", "message": "not found"}), 404
+    if crate.created_by and crate.created_by != user_email:
+        return jsonify({"status": "error", "message": "forbidden"}), 403
+    db.session.delete(crate)
+    db.session.commit()
+    discard_crate_state(crate_id)
+    return jsonify({"status": "ok"})
+
+
+@api_bp.route("/music/crates/<int:crate_id>/rotation")
+def music_crate_rotation(crate_id: int):
+    crate = db.session.get(Crate, crate_id)
+    if not crate:
+        return jsonify({"status": "error", "message": "not found"}), 404
+    hours = min(max(request.args.get("hours", default=24.0, type=float), 0.25), 168.0)
+    return jsonify(build_crate_rotation(crate, hours=hours))
+
+
 @api_bp.route("/archivist/album-info")
 def archivist_album_info():
     query = (request.args.get("q") or "").strip()
@@ -1102,41 +1196,10 @@ def music_cover_image():
     safe_path = _safe_music_path(path)
     if not safe_path:
         abort(404)
-    cover_path = os.path.splitext(safe_path)[0] + ".jpg"
-    if os.path.exists(cover_path):
-        return send_file(cover_path, conditional=True)
-    try:
-        import mutagen  # type: ignore
-        from mutagen.id3 import ID3  # type: ignore
-        from mutagen.mp4 import MP4  # type: ignore
-    except Exception:
-        abort(404)
-    audio = mutagen.File(safe_path, easy=False)
-    if not audio:
-        abort(404)
-    image_data = None
-    mime = "image/jpeg"
-    if isinstance(audio, MP4):
-        covr = audio.tags.get("covr") if audio.tags else None
-        if covr:
-            image_data = bytes(covr[0])
-    else:
-        try:
-            id3 = ID3(safe_path)
-            apic = id3.get("APIC:") or id3.get("APIC")
-            if apic:
-                image_data = apic.data
-                mime = apic.mime or mime
-        except Exception:
-            image_data = None
-    if not image_data:
+    resp = send_cover(safe_path, request.args.get("size", type=int), private=False)
+    if resp is None:
         abort(404)
-    return send_file(
-        io.BytesIO(image_data),
-        mimetype=mime,
-        conditional=True,
-        download_name=os.path.basename(cover_path),
-    )
+    return resp
 
 
 @api_bp.route("/music/cover-art", methods=["POST"])
@@ -1194,6 +1257,25 @@ def music_enrich():
     return jsonify(result), code
 
 
+@api_bp.route("/music/enrich/queue", methods=["GET", "POST"])
+def music_enrich_queue():
+    if request.method == "POST":
+        payload = request.get_json(force=True, silent=True) or {}
+        paths = [p for p in (payload.get("paths") or []) if isinstance(p, str)]
+        if payload.get("missing"):
+            try:
+                limit = int(payload.get("limit") or 500)
+            except (TypeError, ValueError):
+                return jsonify({"status": "error", "message": "limit must be an integer"}), 400
+            queued = enqueue_missing_metadata(limit=limit)
+        elif paths:
+            queued = enqueue_enrichment(paths)
+        else:
+            return jsonify({"status": "error", "message": "paths or missing required"}), 400
+        return jsonify({"status": "ok", "queued": queued})
+    return jsonify({"status": "ok", **enrichment_queue_status()})
+
+
 @api_bp.route("/archivist/musicbrainz-releases")
 def archivist_musicbrainz_releases():
     title = request.args.get("title") or request.args.get("q")
@@ -1220,8 +1302,6 @@ def music_bulk_update():
     if not paths:
         return jsonify({"status": "error", "message": "paths required"}), 400
     result = bulk_update_metadata(paths, updates, cover_bytes)
-    if result.get("status") == "ok":
-        invalidate_library_editor_index_cache()
     return jsonify(result)
 
 
@@ -1277,7 +1357,9 @@ def psa_cue():
 
 @api_bp.route("/music/scan/library")
 def music_scan_library():
-    snapshot = queues_snapshot()
+    cursor = request.args.get("cursor") or None
+    limit = request.args.get("limit", type=int)
+    snapshot = queues_snapshot(cursor=cursor, limit=limit)
     return jsonify(snapshot)
 
 
@@ -1707,11 +1789,32 @@ def library_index_status():
     payload = {
         "status": status.get("status"),
         "progress": status.get("progress"),
+        "total": status.get("total"),
+        "error": status.get("error"),
         "updated_at": status.get("updated_at"),
+        "metrics": status.get("metrics"),
+        "subtrees": status.get("subtrees"),
     }
     return jsonify(payload)
 
 
+@api_bp.route("/library/index/subtree", methods=["POST"])
+def library_index_subtree():
+    payload = request.get_json(silent=True) or {}
+    folder = resolve_subtree(payload.get("folder") or request.values.get("folder") or "")
+    if not folder:
+        return jsonify({"status": "error", "message": "folder must be an existing folder inside the music library"}), 400
+    started = start_subtree_index_job(folder)
+    state = get_library_index_status().get("subtrees", {}).get(folder, {})
+    return jsonify({"status": state.get("status"), "folder": folder, "started": started}), 202
+
+
+@api_bp.route("/library/index/history")
+def library_index_history():
+    limit = request.args.get("limit", default=50, type=int)
+    return jsonify({"runs": get_library_index_history(limit=max(1, min(limit, 500)))})
+
+
 @api_bp.route("/library/index/refresh", methods=["POST"])
 def library_index_refresh():
     started = start_library_index_job()
@@ -12,6 +12,7 @@ from app.services.log_export import (
     write_log_csv,
 )
 from app.services.recording_periods import recordings_period_root
+from app.services.recordings_catalog import catalog_recording
 from app.logger import init_logger
 from app.auth_utils import admin_required
 
@@ -152,6 +153,8 @@ def submit_log():
             "updated_at": datetime.utcnow().isoformat(),
         })
         logger.info("Log CSV written to %s with %s entries.", csv_path, len(csv_entries))
+        if os.path.isfile(recording_path):
+            catalog_recording(recording_path)
         flash("Log submitted successfully!", "success")
         logger.info("Log CSV saved with %s entries", len(rows))
         return redirect(url_for("logs.submit_log"))
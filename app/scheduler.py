@@ -5,24 +5,58 @@ from app.db_utils import table_exists
 from flask import current_app
 from .logger import init_logger
 from .models import db, Show, MarathonEvent
-from app.services.detection import probe_and_record
-from app.services.recording_periods import recordings_period_root
+from app.services.detection import classify_levels, probe_and_record, record_probe_result
+from app.services.recording_periods import recordings_base_root, recordings_period_root
 from app.services.radiodj_client import import_news_or_calendar
 from app.services.health import record_failure
 from app.services.log_export import recording_csv_path, write_recording_metadata
+from app.services.recording_integrity import verify_recording
+from app.services.recording_levels import LevelAnalyzer, pcm_output_args
+from app.services.recordings_catalog import catalog_finished_recording, reconcile_catalog
+from app.services.recording_archive import run_archive_pass
+from app.services.recording_retention import retention_configured, run_retention
+from app.services.recording_waveform import run_waveform_batch
+from app.services.recording_segments import (
+    begin_segment_attempt,
+    build_segment_command,
+    finalize_segmented_recording,
+    read_segment_manifest,
+    segment_directory,
+    stale_segment_directories,
+)
+from app.services.marathon_recorder import (
+    chunk_index_at,
+    chunk_output_path,
+    closed_chunks,
+    finalize_chunk,
+    finish_marathon,
+    marathon_chunks,
+    marathon_segment_dir,
+    next_segment_number,
+    segment_times_from,
+)
 from app.services.barix import restart_instreamer
 from app.services.settings_backup import backup_settings, backup_data_snapshot
 from app.services.stream_monitor import record_icecast_stat
 from app.services import api_cache
 from app.services.library.library_index import start_library_index_job
+from app.services.library.transcode import run_pretranscode_batch
+from app.services.library.cover_art import prune_cover_cache
+from app.services.library.enrichment import enqueue_missing_metadata, process_enrichment_queue
+from app.services.library.loudness import run_loudness_batch
+from app.services.library.tempo import run_tempo_batch
+from app.services.library.preview import prune_preview_cache, run_preview_batch
 from .utils import update_user_config, show_display_title, show_primary_host, scheduled_window_for_date, is_show_preempted_by_absence
 from datetime import date as date_cls
+from collections import deque
 import ffmpeg
 import mutagen
 from mutagen.id3 import COMM, TALB, TIT2, TPE1, ID3, ID3NoHeaderError
 import json
+import math
 import os
 import subprocess
+import threading
 
 scheduler = BackgroundScheduler()
 ACTIVE_RECORDINGS = {}
@@ -31,6 +65,7 @@ flask_app = None
 SHOW_JOB_PREFIX = "show:"
 TEMP_SHOW_JOB_PREFIX = "temporary-show-delete:"
 MARATHON_JOB_PREFIX = "marathon:"
+MARATHON_POLL_SECONDS = 15
 
 
 def _job_options() -> dict:
@@ -83,7 +118,17 @@ def init_scheduler(app):
             schedule_radiodj_now_playing()
             schedule_library_index_job()
             schedule_transcode_cache_cleanup()
+            schedule_pretranscode_job()
+            schedule_cover_cache_cleanup()
+            schedule_metadata_enrichment_job()
+            schedule_loudness_analysis_job()
+            schedule_tempo_analysis_job()
+            schedule_preview_job()
             schedule_schedule_refresh()
+            schedule_recordings_catalog_job()
+            schedule_recordings_archive_job()
+            schedule_recording_waveform_job()
+            schedule_recordings_retention_job()
 
 def refresh_schedule():
     """Refresh the scheduler with the latest shows from the database."""
@@ -239,6 +284,70 @@ def _apply_recording_tags(path, show_name, hosts, recorded_at, note=None):
         logger.error("Failed to tag recording %s: %s", path, exc)
 
 
+def _finalize_segments(segment_dir, output_file):
+    if not os.path.isdir(segment_dir):
+        return
+    keep = bool(flask_app.config.get("RECORDING_KEEP_SEGMENTS", False)) if flask_app else False
+    try:
+        if finalize_segmented_recording(segment_dir, output_file, keep_segments=keep):
+            logger.info("Stitched segmented recording %s.", output_file)
+        else:
+            logger.warning("Segmented recording %s captured no audio.", output_file)
+    except OSError as exc:
+        record_failure("recorder", reason=f"segment stitch failed: {exc}", restarted=False)
+        logger.error("Unable to stitch segments for %s: %s", output_file, exc)
+
+
+def _verify_recording(path):
+    if not os.path.exists(path):
+        return
+    min_coverage = float(flask_app.config.get("RECORDING_MIN_COVERAGE", 0.98)) if flask_app else 0.98
+    try:
+        report = verify_recording(path, min_coverage=min_coverage)
+    except (OSError, ValueError) as exc:
+        logger.warning("Unable to verify recording %s: %s", path, exc)
+        return
+    if not report["ok"]:
+        coverage = report["coverage"]
+        record_failure(
+            "recording_integrity",
+            reason=(
+                f"{os.path.basename(path)}: "
+                f"{'no audio' if coverage is None else f'{coverage:.1%} coverage'}, {len(report['gaps'])} gap(s)"
+            ),
+            restarted=False,
+        )
+
+
+def _catalog_recording(path):
+    try:
+        catalog_finished_recording(path)
+    except Exception as exc:  # noqa: BLE001
+        db.session.rollback()
+        logger.warning("Unable to catalog recording %s: %s", path, exc)
+
+
+def _level_window_handler(start_second, rms_db, peak_db):
+    """Classify one inline level window like a stream probe and feed the dead-air alerts."""
+    mean_power = sum(10 ** (value / 10) for value in rms_db) / len(rms_db)
+    avg_db = 10 * math.log10(mean_power) if mean_power > 0 else -100.0
+    with flask_app.app_context():
+        result = classify_levels(avg_db, rms_db, flask_app.config)
+        record_probe_result(result, source="Recording levels")
+    return result.classification
+
+
+def _start_level_analyzer(recording_path):
+    if flask_app is None or not flask_app.config.get("RECORDING_INLINE_LEVELS", True):
+        return None
+    return LevelAnalyzer(
+        recording_path,
+        sample_rate=int(flask_app.config.get("RECORDING_LEVELS_SAMPLE_RATE", 8000)),
+        window_seconds=int(flask_app.config.get("RECORDING_LEVELS_WINDOW_SECONDS", 60)),
+        on_window=_level_window_handler,
+    )
+
+
 def record_stream(stream_url, duration, output_file, config_file_path, marathon_event_id=None, chunk_end=None,
                   label=None, show_name=None, hosts=None, show_start_date=None, show_end_date=None, show_id=None):
     """Records the stream using FFmpeg."""
@@ -282,55 +391,95 @@ def record_stream(stream_url, duration, output_file, config_file_path, marathon_
     recorded_at = datetime.now()
     base_output_file = f"{output_file}_{recorded_at.strftime('%m-%d-%y')}_RAWDATA"
     start_time = recorded_at.strftime('%H-%M-%S')
+    app_config = flask_app.config if flask_app else {}
+    segmented = str(app_config.get("RECORDING_MODE", "single")).lower() == "segmented"
+    segment_seconds = max(10, int(app_config.get("RECORDING_SEGMENT_SECONDS", 300)))
+    segment_dir = segment_directory(f"{base_output_file}.mp3") if segmented else None
+    analyzer = _start_level_analyzer(f"{base_output_file}.mp3")
+    first_started_at = None
     try:
         if marathon_event_id:
             _update_marathon_status(marathon_event_id, "running")
         remaining_duration = int(duration)
         segment = 0
         while remaining_duration > 0:
-            suffix = "" if segment == 0 else f"_{segment}"
+            # Segmented mode keeps retries in the same chunk folder and stitches one file.
+            suffix = "" if segment == 0 or segmented else f"_{segment}"
             output_file = f"{base_output_file}{suffix}.mp3"
             started_at = datetime.utcnow()
             sidecar_start = started_at
             sidecar_end = sidecar_start + timedelta(seconds=remaining_duration)
-            try:
-                write_recording_metadata(output_file, {
-                    "schema_version": 1,
-                    "show_name": show_name or label or "Unscheduled Show",
-                    "dj": ", ".join(hosts or []),
-                    "show_date": recorded_at.date().isoformat(),
-                    "show_start": sidecar_start.isoformat(),
-                    "show_end": sidecar_end.isoformat(),
-                    "log_file": os.path.basename(recording_csv_path(output_file)),
-                    "updated_at": datetime.utcnow().isoformat(),
-                })
-            except OSError as exc:
-                logger.warning("Unable to write recording metadata sidecar for %s: %s", output_file, exc)
+            # Segmented retries extend the same recording, so its sidecar keeps the original window.
+            if not (segmented and segment):
+                try:
+                    write_recording_metadata(output_file, {
+                        "schema_version": 1,
+                        "show_name": show_name or label or "Unscheduled Show",
+                        "dj": ", ".join(hosts or []),
+                        "show_date": recorded_at.date().isoformat(),
+                        "show_start": sidecar_start.isoformat(),
+                        "show_end": sidecar_end.isoformat(),
+                        "log_file": os.path.basename(recording_csv_path(output_file)),
+                        "updated_at": datetime.utcnow().isoformat(),
+                    })
+                except OSError as exc:
+                    logger.warning("Unable to write recording metadata sidecar for %s: %s", output_file, exc)
             key = None
             process = None
             try:
-                process = subprocess.Popen([
-                    'ffmpeg', '-y', '-i', stream_url, '-t', str(remaining_duration), '-acodec', 'copy', output_file,
-                ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+                if segmented:
+                    attempt = begin_segment_attempt(
+                        segment_dir,
+                        recording_path=output_file,
+                        segment_seconds=segment_seconds,
+                        started_at=started_at,
+                        metadata={"show_name": show_name or label or "Unscheduled Show"},
+                    )
+                    command = build_segment_command(
+                        stream_url, remaining_duration, segment_dir, segment_seconds=segment_seconds, attempt=attempt,
+                    )
+                else:
+                    command = [
+                        'ffmpeg', '-y', '-i', stream_url, '-t', str(remaining_duration), '-acodec', 'copy', output_file,
+                    ]
+                if analyzer:
+                    first_started_at = first_started_at or started_at
+                    analyzer.start_attempt((started_at - first_started_at).total_seconds())
+                    command += pcm_output_args(remaining_duration, analyzer.sample_rate)
+                process = subprocess.Popen(
+                    command, stdout=subprocess.PIPE if analyzer else subprocess.DEVNULL, stderr=subprocess.PIPE,
+                )
                 key = _active_recording_key(show_name, output_file)
                 ACTIVE_RECORDINGS[key] = {
                     'process': process,
                     'show_name': show_name,
                     'output_file': output_file,
+                    'segment_dir': segment_dir,
                     'hosts': hosts or [],
                     'recorded_at': recorded_at,
                     'stop_requested': False,
                     'stop_reason': None,
                 }
-                _, stderr = process.communicate()
+                if analyzer:
+                    reader = threading.Thread(target=analyzer.drain, args=(process.stdout,), daemon=True)
+                    reader.start()
+                    stderr = process.stderr.read()
+                    process.wait()
+                    reader.join(timeout=30)
+                else:
+                    _, stderr = process.communicate()
                 state = ACTIVE_RECORDINGS.get(key, {})
                 if process.returncode not in (0, 255) and not state.get('stop_requested'):
                     err_msg = stderr.decode(errors='ignore') if stderr else f'ffmpeg exited {process.returncode}'
                     raise RuntimeError(err_msg.strip() or f'ffmpeg exited {process.returncode}')
                 logger.info(f"Recording started for {output_file}.")
                 logger.info(f"Start time:{start_time}.")
+                if segmented:
+                    _finalize_segments(segment_dir, output_file)
                 if show_name and os.path.exists(output_file):
                     _apply_recording_tags(output_file, show_name, hosts or [], recorded_at)
+                _verify_recording(f"{base_output_file}.mp3")
+                _catalog_recording(f"{base_output_file}.mp3")
                 return
             except ffmpeg.Error as e:
                 err_msg = e.stderr.decode() if getattr(e, "stderr", None) else str(e)
@@ -356,7 +505,7 @@ def record_stream(stream_url, duration, output_file, config_file_path, marathon_
             elapsed = max(1, int((datetime.utcnow() - started_at).total_seconds()))
             remaining_duration = max(0, remaining_duration - elapsed)
 
-            if show_name and os.path.exists(output_file):
+            if show_name and os.path.exists(output_file) and not segmented:
                 _apply_recording_tags(output_file, show_name, hosts or [], recorded_at, note="Barix Error - partial recording")
 
             restart_result = restart_instreamer(reason="recording_stream_failure")
@@ -371,14 +520,230 @@ def record_stream(stream_url, duration, output_file, config_file_path, marathon_
             record_failure("recorder", reason="barix_restart_triggered_during_record", restarted=True)
             segment += 1
             time.sleep(3)
+        if segmented:
+            # Only reached after a failure: stitch what was captured and mark it partial.
+            _finalize_segments(segment_dir, output_file)
+            if show_name and os.path.exists(output_file):
+                _apply_recording_tags(output_file, show_name, hosts or [], recorded_at, note="Barix Error - partial recording")
+        _verify_recording(f"{base_output_file}.mp3")
+        _catalog_recording(f"{base_output_file}.mp3")
         if marathon_event_id:
             event = _active_marathon()
             if event and chunk_end and chunk_end >= event.end_time:
                 _update_marathon_status(marathon_event_id, "completed")
     finally:
+        if analyzer:
+            analyzer.close()
         if ctx:
             ctx.pop()
 
+
+def _drain_stderr(stream, tail):
+    for line in iter(stream.readline, b""):
+        tail.append(line)
+
+
+def _finalize_marathon_chunk(segment_dir, chunk, base_folder, show_name, keep):
+    output_file = chunk_output_path(base_folder, chunk)
+    try:
+        path = finalize_chunk(segment_dir, chunk, output_file, show_name=show_name, keep_segments=keep)
+    except OSError as exc:
+        record_failure("recorder", reason=f"marathon chunk join failed: {exc}", restarted=False)
+        logger.error("Unable to join marathon chunk %s: %s", output_file, exc)
+        return
+    if path:
+        logger.info("Finished marathon chunk %s.", path)
+        _verify_recording(path)
+        _catalog_recording(path)
+
+
+def _marathon_cancel_stop_at(event_id, chunks):
+    """End of the chunk being recorded once the event is cancelled (from any process), else None.
+
+    Only the column is queried, so the loaded event is not expired and the
+    read sees a cancel committed by the web process.
+    """
+    row = db.session.query(MarathonEvent.canceled_at).filter(MarathonEvent.id == event_id).first()
+    if row is not None and row.canceled_at is None:
+        return None
+    return chunks[chunk_index_at(chunks, datetime.now())]["end"]
+
+
+def record_marathon(event_id, config_file_path):
+    """Records a whole marathon with one FFmpeg run, split into chunk files at the chunk boundaries."""
+
+    ctx = flask_app.app_context() if flask_app else None
+    if ctx:
+        ctx.push()
+
+    analyzer = None
+    key = None
+    try:
+        try:
+            with open(config_file_path, 'r') as file:
+                config = json.load(file)
+        except FileNotFoundError:
+            config = {}
+        if config.get('PAUSE_SHOWS_RECORDING', False) is True:
+            logger.info("Recording paused. Skipping marathon.")
+            return
+
+        event = MarathonEvent.query.get(event_id)
+        if not event or event.canceled_at:
+            return
+        key = _active_recording_key(event.name, f"{MARATHON_JOB_PREFIX}{event.id}")
+        if key in ACTIVE_RECORDINGS:
+            # A schedule refresh re-adds the job while the marathon is being recorded.
+            key = None
+            return
+
+        stream_url = flask_app.config["STREAM_URL"]
+        keep = bool(flask_app.config.get("RECORDING_KEEP_SEGMENTS", False))
+        base_folder = os.path.join(recordings_period_root(create=True), "Marathons", event.safe_name)
+        os.makedirs(base_folder, exist_ok=True)
+        chunks = marathon_chunks(event.start_time, event.end_time, event.chunk_hours, event.safe_name)
+        segment_dir = marathon_segment_dir(base_folder, event.safe_name)
+        # The marathon-wide level timeline lives with the segments; the analyzer mainly feeds dead-air alerts.
+        analyzer = _start_level_analyzer(os.path.join(segment_dir, f"{event.safe_name}.mp3"))
+        state = {
+            'process': None,
+            'show_name': event.name,
+            'output_file': segment_dir,
+            'segment_dir': segment_dir,
+            'hosts': [],
+            'recorded_at': datetime.now(),
+            'stop_requested': False,
+            'stop_reason': None,
+            # Set on cancel (here or via the database): stop once the current chunk is complete.
+            'stop_at': None,
+        }
+        ACTIVE_RECORDINGS[key] = state
+        _update_marathon_status(event.id, "running")
+
+        first_started_at = None
+        while True:
+            started_at = datetime.now()
+            remaining_duration = int(math.ceil((event.end_time - started_at).total_seconds()))
+            if remaining_duration <= 0 or state['stop_requested']:
+                break
+            state['stop_at'] = state.get('stop_at') or _marathon_cancel_stop_at(event_id, chunks)
+            if state.get('stop_at') and started_at >= state['stop_at']:
+                break
+            attempt = begin_segment_attempt(
+                segment_dir,
+                recording_path=os.path.join(base_folder, f"{event.safe_name}.mp3"),
+                segment_seconds=event.chunk_hours * 3600,
+                started_at=started_at,
+                metadata={"show_name": event.name, "marathon_event_id": event.id},
+                min_start_number=next_segment_number(segment_dir),
+                fields={"chunk_index": chunk_index_at(chunks, started_at)},
+            )
+            command = build_segment_command(
+                stream_url,
+                remaining_duration,
+                segment_dir,
+                segment_seconds=event.chunk_hours * 3600,
+                attempt=attempt,
+                segment_times=segment_times_from(chunks, started_at),
+            )
+            if analyzer:
+                first_started_at = first_started_at or started_at
+                analyzer.start_attempt((started_at - first_started_at).total_seconds())
+                command += pcm_output_args(remaining_duration, analyzer.sample_rate)
+
+            process = None
+            stderr_tail = deque(maxlen=20)
+            try:
+                process = subprocess.Popen(
+                    command, stdout=subprocess.PIPE if analyzer else subprocess.DEVNULL, stderr=subprocess.PIPE,
+                )
+                state['process'] = process
+                readers = [threading.Thread(target=_drain_stderr, args=(process.stderr, stderr_tail), daemon=True)]
+                if analyzer:
+                    readers.append(threading.Thread(target=analyzer.drain, args=(process.stdout,), daemon=True))
+                for reader in readers:
+                    reader.start()
+                logger.info("Marathon recording started for %s (attempt %s).", event.name, attempt["attempt"])
+                while process.poll() is None:
+                    # The web process cancels through the database; pick that up every poll.
+                    state['stop_at'] = state.get('stop_at') or _marathon_cancel_stop_at(event_id, chunks)
+                    stop_at = state.get('stop_at')
+                    if stop_at and datetime.now() >= stop_at:
+                        state['stop_requested'] = True
+                        state['stop_reason'] = "cancelled"
+                        process.terminate()
+                        process.wait(timeout=10)
+                        break
+                    # Join chunks as ffmpeg closes them, while the rest of the marathon records on.
+                    for index in closed_chunks(segment_dir, active_attempt=attempt["attempt"]):
+                        _finalize_marathon_chunk(segment_dir, chunks[index], base_folder, event.name, keep)
+                    wait = MARATHON_POLL_SECONDS
+                    if stop_at:
+                        wait = max(0.5, min(wait, (stop_at - datetime.now()).total_seconds()))
+                    try:
+                        process.wait(timeout=wait)
+                    except subprocess.TimeoutExpired:
+                        pass
+                for reader in readers:
+                    reader.join(timeout=30)
+                if state['stop_requested']:
+                    break
+                if process.returncode not in (0, 255):
+                    err_msg = b"".join(stderr_tail).decode(errors='ignore').strip()
+                    raise RuntimeError(err_msg or f'ffmpeg exited {process.returncode}')
+                if datetime.now() >= event.end_time - timedelta(seconds=5):
+                    break
+                raise RuntimeError("ffmpeg stopped before the end of the marathon")
+            except Exception as exc:  # noqa: BLE001
+                record_failure("recorder", reason=str(exc), restarted=False)
+                logger.error("Marathon recording error (attempt %s): %s", attempt["attempt"], exc)
+            finally:
+                state['process'] = None
+                if process is not None and process.poll() is None:
+                    try:
+                        process.terminate()
+                        process.wait(timeout=10)
+                    except Exception:
+                        try:
+                            process.kill()
+                            process.wait(timeout=5)
+                        except Exception:
+                            logger.warning("Unable to reap marathon recorder process for %s", event.name)
+
+            # One reconnect per outage, rather than one per chunk still to come.
+            restart_result = restart_instreamer(reason="recording_stream_failure")
+            record_failure(
+                "barix_auto_heal",
+                reason=f"Recording restart: {restart_result.status}: {restart_result.message}",
+                restarted=restart_result.should_count_restart,
+            )
+            if not restart_result.accepted:
+                break
+            record_failure("recorder", reason="barix_restart_triggered_during_record", restarted=True)
+            time.sleep(3)
+
+        if analyzer:
+            analyzer.close()
+            analyzer = None
+        limit = state.get('stop_at') or event.end_time
+        last_chunk = max(chunk["index"] for chunk in chunks if chunk["start"] < limit)
+        for index in closed_chunks(segment_dir):
+            if index <= last_chunk:
+                _finalize_marathon_chunk(segment_dir, chunks[index], base_folder, event.name, keep)
+        if not finish_marathon(segment_dir, keep_segments=keep, last_chunk=last_chunk):
+            record_failure("recorder", reason=f"marathon {event.name}: chunks left unjoined in {segment_dir}", restarted=False)
+        event = MarathonEvent.query.get(event_id)
+        if event and not event.canceled_at and (state['stop_requested'] or datetime.now() >= event.end_time):
+            _update_marathon_status(event_id, "completed")
+    finally:
+        if key is not None:
+            ACTIVE_RECORDINGS.pop(key, None)
+        if analyzer:
+            analyzer.close()
+        if ctx:
+            ctx.pop()
+
+
 def delete_show(show_id):
     """Delete a show from the database."""
 
@@ -489,11 +854,32 @@ def _schedule_marathon_jobs(event: MarathonEvent):
                 pass
 
     job_ids: list[str] = []
-    current = event.start_time
-    while current < event.end_time:
-        chunk_end = min(current + timedelta(hours=event.chunk_hours), event.end_time)
-        label = f"{event.safe_name}_{current.strftime('%a_%I%p').lstrip('0')}_{chunk_end.strftime('%I%p').lstrip('0')}"
-        output_file = os.path.join(base_folder, label)
+    if str(flask_app.config.get("RECORDING_MARATHON_MODE", "continuous")).lower() != "chunked":
+        job_id = f"{MARATHON_JOB_PREFIX}{event.id}:{int(event.start_time.timestamp())}"
+        if event.status != "completed" and event.end_time > datetime.now():
+            # Starting late (app restart, schedule refresh) resumes the marathon in its current chunk.
+            run_date = max(event.start_time, datetime.now() + timedelta(seconds=5))
+            try:
+                scheduler.add_job(
+                    record_marathon,
+                    "date",
+                    id=job_id,
+                    run_date=run_date,
+                    args=[event.id, user_config_path],
+                    replace_existing=True,
+                    **_job_options(),
+                )
+                job_ids.append(job_id)
+                logger.info("Scheduled marathon %s from %s to %s", job_id, event.start_time, event.end_time)
+            except Exception as exc:  # noqa: BLE001
+                logger.error("Failed to schedule marathon %s: %s", job_id, exc)
+        event.job_ids = ",".join(job_ids)
+        db.session.commit()
+        return
+
+    for chunk in marathon_chunks(event.start_time, event.end_time, event.chunk_hours, event.safe_name):
+        current, chunk_end = chunk["start"], chunk["end"]
+        output_file = os.path.join(base_folder, chunk["label"])
         job_id = f"{MARATHON_JOB_PREFIX}{event.id}:{int(current.timestamp())}"
         try:
             scheduler.add_job(
@@ -521,7 +907,6 @@ def _schedule_marathon_jobs(event: MarathonEvent):
             logger.info("Scheduled marathon chunk %s from %s to %s", job_id, current, chunk_end)
         except Exception as exc:  # noqa: BLE001
             logger.error("Failed to schedule marathon chunk %s: %s", job_id, exc)
-        current = chunk_end
 
     event.job_ids = ",".join(job_ids)
     db.session.commit()
@@ -562,6 +947,11 @@ def cancel_marathon_event(event_id: int):
         job = scheduler.get_job(job_id.strip()) if scheduler.running else None
         if job and job.next_run_time and job.next_run_time > now:
             scheduler.remove_job(job_id)
+    # A continuous recording keeps going until the chunk it is in is complete.
+    state = ACTIVE_RECORDINGS.get(_active_recording_key(event.name, f"{MARATHON_JOB_PREFIX}{event.id}"))
+    if state is not None:
+        chunks = marathon_chunks(event.start_time, event.end_time, event.chunk_hours, event.safe_name)
+        state["stop_at"] = chunks[chunk_index_at(chunks, datetime.now())]["end"]
     _update_marathon_status(event_id, "cancelled", canceled=True)
     api_cache.invalidate("schedule")
     return True
@@ -717,6 +1107,122 @@ def schedule_transcode_cache_cleanup():
         logger.error(f"Error scheduling transcode cache cleanup: {e}")
 
 
+def schedule_cover_cache_cleanup():
+    if flask_app is None:
+        return
+    try:
+        scheduler.add_job(
+            run_cover_cache_cleanup_job,
+            "interval",
+            hours=24,
+            id="cover_cache_cleanup_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Cover cache cleanup job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling cover cache cleanup: {e}")
+
+
+def schedule_metadata_enrichment_job():
+    if flask_app is None:
+        return
+    minutes = int(flask_app.config.get("ENRICHMENT_INTERVAL_MINUTES", 30))
+    try:
+        scheduler.add_job(
+            run_metadata_enrichment_job,
+            "interval",
+            minutes=max(5, minutes),
+            id="metadata_enrichment_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Metadata enrichment job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling metadata enrichment job: {e}")
+
+
+def schedule_loudness_analysis_job():
+    if flask_app is None:
+        return
+    if not flask_app.config.get("LOUDNESS_ANALYSIS_ENABLED", True):
+        return
+    minutes = int(flask_app.config.get("LOUDNESS_ANALYSIS_INTERVAL_MINUTES", 60))
+    try:
+        scheduler.add_job(
+            run_loudness_analysis_job,
+            "interval",
+            minutes=max(5, minutes),
+            id="loudness_analysis_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Loudness analysis job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling loudness analysis job: {e}")
+
+
+def schedule_tempo_analysis_job():
+    if flask_app is None:
+        return
+    if not flask_app.config.get("TEMPO_ANALYSIS_ENABLED", True):
+        return
+    minutes = int(flask_app.config.get("TEMPO_ANALYSIS_INTERVAL_MINUTES", 60))
+    try:
+        scheduler.add_job(
+            run_tempo_analysis_job,
+            "interval",
+            minutes=max(5, minutes),
+            id="tempo_analysis_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Tempo analysis job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling tempo analysis job: {e}")
+
+
+def schedule_preview_job():
+    if flask_app is None:
+        return
+    if not flask_app.config.get("PREVIEW_ENABLED", True):
+        return
+    minutes = int(flask_app.config.get("PREVIEW_INTERVAL_MINUTES", 120))
+    try:
+        scheduler.add_job(
+            run_preview_job,
+            "interval",
+            minutes=max(5, minutes),
+            id="preview_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Preview clip job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling preview clip job: {e}")
+
+
+def schedule_pretranscode_job():
+    """Nightly batch that fills the transcode cache during the off-peak window."""
+    if flask_app is None:
+        return
+    if not flask_app.config.get("PRETRANSCODE_ENABLED", True):
+        return
+    try:
+        scheduler.add_job(
+            run_pretranscode_job,
+            "cron",
+            hour=int(flask_app.config.get("PRETRANSCODE_OFF_PEAK_START_HOUR", 1)) % 24,
+            minute=15,
+            id="pretranscode_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Pre-transcode job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling pre-transcode job: {e}")
+
+
 def schedule_schedule_refresh():
     """Reconcile database schedule changes made by stateless web workers."""
     seconds = int(flask_app.config.get("SCHEDULE_REFRESH_INTERVAL_SECONDS", 60))
@@ -731,6 +1237,87 @@ def schedule_schedule_refresh():
     _schedule_pause_resume_from_config()
 
 
+def schedule_recordings_catalog_job():
+    if flask_app is None:
+        return
+    minutes = int(flask_app.config.get("RECORDINGS_CATALOG_RECONCILE_MINUTES", 30))
+    try:
+        scheduler.add_job(
+            run_recordings_catalog_job,
+            "interval",
+            minutes=max(5, minutes),
+            id="recordings_catalog_job",
+            # First pass soon after startup, so recordings cut short by a restart are stitched promptly.
+            next_run_time=datetime.now() + timedelta(minutes=1),
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Recordings catalog reconcile job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling recordings catalog job: {e}")
+
+
+def schedule_recordings_archive_job():
+    """Nightly move of old recordings to the archive tier, when one is configured."""
+    if flask_app is None:
+        return
+    if not flask_app.config.get("RECORDINGS_ARCHIVE_ROOT"):
+        return
+    try:
+        scheduler.add_job(
+            run_recordings_archive_job,
+            "cron",
+            hour=int(flask_app.config.get("RECORDINGS_ARCHIVE_HOUR", 3)) % 24,
+            minute=45,
+            id="recordings_archive_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Recordings archive job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling recordings archive job: {e}")
+
+
+def schedule_recordings_retention_job():
+    """Nightly retention pass, when any recordings quota is configured."""
+    if flask_app is None:
+        return
+    try:
+        with flask_app.app_context():
+            if not retention_configured():
+                return
+        scheduler.add_job(
+            run_recordings_retention_job,
+            "cron",
+            hour=int(flask_app.config.get("RECORDINGS_RETENTION_HOUR", 4)) % 24,
+            minute=15,
+            id="recordings_retention_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Recordings retention job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling recordings retention job: {e}")
+
+
+def schedule_recording_waveform_job():
+    if flask_app is None:
+        return
+    minutes = int(flask_app.config.get("RECORDING_WAVEFORM_INTERVAL_MINUTES", 15))
+    try:
+        scheduler.add_job(
+            run_recording_waveform_job,
+            "interval",
+            minutes=max(5, minutes),
+            id="recording_waveform_job",
+            replace_existing=True,
+            **_job_options(),
+        )
+        logger.info("Recording waveform job scheduled.")
+    except Exception as e:  # noqa: BLE001
+        logger.error(f"Error scheduling recording waveform job: {e}")
+
+
 def _schedule_pause_resume_from_config():
     path = os.path.join(flask_app.instance_path, "user_config.json")
     try:
@@ -795,6 +1382,123 @@ def run_stream_probe_job():
                     logger.error("Probe retry failed: %s", exc2)
 
 
+def _finalize_stale_segments():
+    """Stitch segment folders left in ``recording`` state by a recorder that died with the app."""
+    root = recordings_base_root(create=False)
+    if not os.path.isdir(root):
+        return
+    active = {state.get("segment_dir") for state in list(ACTIVE_RECORDINGS.values()) if state.get("segment_dir")}
+    stale_after = 60 * float(flask_app.config.get("RECORDING_STALE_SEGMENTS_MINUTES", 10))
+    keep = bool(flask_app.config.get("RECORDING_KEEP_SEGMENTS", False))
+    for segment_dir in stale_segment_directories(root, active=active, stale_after_seconds=stale_after):
+        manifest = read_segment_manifest(segment_dir)
+        event_id = manifest.get("marathon_event_id")
+        if event_id is not None:
+            event = MarathonEvent.query.get(event_id)
+            if event and not event.canceled_at and event.end_time > datetime.now():
+                continue  # the rescheduled marathon job resumes into this folder
+            if not event:
+                # Without the event the chunk windows are unknown; keep the audio for a manual join.
+                finish_marathon(segment_dir, keep_segments=True)
+                continue
+            chunks = marathon_chunks(event.start_time, event.end_time, event.chunk_hours, event.safe_name)
+            base_folder = os.path.dirname(segment_dir)
+            for index in closed_chunks(segment_dir):
+                if index < len(chunks):
+                    _finalize_marathon_chunk(segment_dir, chunks[index], base_folder, event.name, keep)
+            if not finish_marathon(segment_dir, keep_segments=keep, last_chunk=len(chunks) - 1):
+                record_failure(
+                    "recorder", reason=f"marathon {event.name}: chunks left unjoined in {segment_dir}", restarted=False
+                )
+            continue
+        if not manifest.get("recording"):
+            continue
+        output_file = os.path.join(os.path.dirname(segment_dir), manifest["recording"])
+        logger.warning("Recorder for %s is gone; stitching what was captured.", output_file)
+        _finalize_segments(segment_dir, output_file)
+        _verify_recording(output_file)
+
+
+def run_recordings_catalog_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            _finalize_stale_segments()
+        except Exception as exc:  # noqa: BLE001
+            db.session.rollback()
+            logger.warning("Finalizing stale segment folders failed: %s", exc)
+            record_failure("recorder", reason=f"stale segments: {exc}", restarted=False)
+        try:
+            counts = reconcile_catalog()
+        except Exception as exc:  # noqa: BLE001
+            db.session.rollback()
+            logger.warning("Recordings catalog reconcile failed: %s", exc)
+            record_failure("recordings_catalog", reason=str(exc), restarted=False)
+            return
+    if counts["added"] or counts["updated"] or counts["removed"]:
+        logger.info("Recordings catalog reconciled: %s", counts)
+
+
+def run_recordings_archive_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            result = run_archive_pass()
+        except Exception as exc:  # noqa: BLE001
+            db.session.rollback()
+            logger.warning("Recordings archive pass failed: %s", exc)
+            record_failure("recordings_archive", reason=str(exc), restarted=False)
+            return
+    if result["failed"]:
+        record_failure("recordings_archive", reason=f"{len(result['failed'])} recording(s) not archived", restarted=False)
+    if result["archived"]:
+        logger.info(
+            "Archived %s recording(s), %s bytes freed on the recordings path.",
+            result["archived"],
+            result["bytes_reclaimed"],
+        )
+
+
+def run_recordings_retention_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            run = run_retention()
+        except Exception as exc:  # noqa: BLE001
+            db.session.rollback()
+            logger.warning("Recordings retention pass failed: %s", exc)
+            record_failure("recordings_retention", reason=str(exc), restarted=False)
+            return
+        if run.failed:
+            record_failure("recordings_retention", reason=f"{run.failed} recording(s) not removed", restarted=False)
+        if run.recordings:
+            logger.info(
+                "Recordings retention %s: %s recording(s), %s bytes planned, %s bytes freed.",
+                "simulated" if run.simulate else run.action,
+                run.recordings,
+                run.bytes_planned,
+                run.bytes_freed,
+            )
+
+
+def run_recording_waveform_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            summary = run_waveform_batch()
+        except Exception as exc:  # noqa: BLE001
+            db.session.rollback()
+            logger.warning("Recording waveform batch failed: %s", exc)
+            record_failure("recording_waveform", reason=str(exc), restarted=False)
+            return
+    if summary["computed"] or summary["failed"]:
+        logger.info("Recording waveforms: %s", summary)
+
+
 def run_icecast_analytics_job():
     if flask_app is None:
         return
@@ -844,6 +1548,84 @@ def run_library_index_job():
         start_library_index_job()
 
 
+def run_pretranscode_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            run_pretranscode_batch()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Pre-transcode job failed: %s", exc)
+            record_failure("pretranscode", reason=str(exc))
+
+
+def run_loudness_analysis_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            summary = run_loudness_batch()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Loudness analysis job failed: %s", exc)
+            record_failure("loudness_analysis", reason=str(exc))
+            return
+        if summary.get("candidates"):
+            logger.info("Loudness analysis batch: %s", summary)
+
+
+def run_tempo_analysis_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            summary = run_tempo_batch()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Tempo analysis job failed: %s", exc)
+            record_failure("tempo_analysis", reason=str(exc))
+            return
+        if summary.get("candidates"):
+            logger.info("Tempo analysis batch: %s", summary)
+
+
+def run_preview_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            summary = run_preview_batch()
+            removed = prune_preview_cache()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Preview clip job failed: %s", exc)
+            record_failure("preview_clips", reason=str(exc))
+            return
+        if summary.get("rendered") or removed:
+            logger.info("Preview clip batch: %s (pruned %s)", summary, removed)
+
+
+def run_metadata_enrichment_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        try:
+            enqueue_missing_metadata()
+            counts = process_enrichment_queue()
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Metadata enrichment job failed: %s", exc)
+            record_failure("metadata_enrichment", reason=str(exc))
+            return
+        if counts.get("processed"):
+            logger.info("Metadata enrichment batch: %s", counts)
+
+
+def run_cover_cache_cleanup_job():
+    if flask_app is None:
+        return
+    with flask_app.app_context():
+        removed = prune_cover_cache()
+    if removed:
+        logger.info("Removed %s stale cover cache entries.", removed)
+
+
 def run_transcode_cache_cleanup_job():
     if flask_app is None:
         return
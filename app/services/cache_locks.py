@@ -0,0 +1,18 @@
+"""Per-target locks for cache files built on demand (transcodes, previews, clips).
+
+Two requests for the same cache file take the same lock, so the file is only
+built once; the lock disappears with its last holder.
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+
+_guard = threading.Lock()
+_locks: weakref.WeakValueDictionary[str, threading.Lock] = weakref.WeakValueDictionary()
+
+
+def cache_target_lock(target: str) -> threading.Lock:
+    with _guard:
+        return _locks.setdefault(target, threading.Lock())
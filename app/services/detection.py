@@ -1,7 +1,7 @@
 from dataclasses import dataclass
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Optional
+from typing import List, Optional
 import time
 import subprocess
 
@@ -15,6 +15,7 @@ from app.services.show_run_service import get_or_create_active_run
 from app.services.alerts import process_probe_alerts
 from app.services.health import record_failure
 from app.services.barix import BarixRestartResult, restart_instreamer
+from app.services.recording_levels import inline_levels_active
 from app.utils import get_current_show, show_display_title, show_primary_host
 
 logger = init_logger()
@@ -38,6 +39,53 @@ def _record_barix_restart_result(result: BarixRestartResult, reason_prefix: str
     )
 
 
+def classify_levels(avg_db: float, chunk_dbs: List[float], config) -> DetectionResult:
+    """Classify a run of chunk levels (dBFS) as dead air, automation or a live show."""
+    import numpy as np
+
+    silence_chunks = sum(1 for level in chunk_dbs if level <= config.get("DEAD_AIR_DB", -72))
+    automation_chunks = sum(
+        1
+        for level in chunk_dbs
+        if config.get("AUTOMATION_MIN_DB", -12) <= level <= config.get("AUTOMATION_MAX_DB", -2)
+    )
+
+    total_chunks = max(len(chunk_dbs), 1)
+
+    silence_ratio = silence_chunks / total_chunks
+    automation_ratio = automation_chunks / total_chunks
+    dynamic_range = 0.0
+    if chunk_dbs:
+        dynamic_range = float(np.percentile(chunk_dbs, 95) - np.percentile(chunk_dbs, 5))
+
+    silence_ratio_threshold = config.get("SILENCE_RATIO_DEAD_AIR", 0.5)
+    soft_dead_air_db = config.get("DEAD_AIR_SOFT_DB", -60)
+    automation_ratio_threshold = config.get("AUTOMATION_RATIO_THRESHOLD", 0.65)
+    automation_dynamic_cap = config.get("AUTOMATION_DYNAMIC_RANGE_MAX", 5.0)
+    automation_avg_min = config.get("AUTOMATION_AVG_MIN_DB", -18)
+    automation_avg_max = config.get("AUTOMATION_AVG_MAX_DB", -2)
+
+    if avg_db <= soft_dead_air_db or silence_ratio >= silence_ratio_threshold:
+        classification = "dead_air"
+        reason = "low_or_silent"
+    elif automation_ratio >= automation_ratio_threshold or (
+        automation_avg_min <= avg_db <= automation_avg_max and dynamic_range <= automation_dynamic_cap
+    ):
+        classification = "automation"
+        reason = "compressed_levels"
+    else:
+        classification = "live_show"
+        reason = "dynamic_levels"
+
+    return DetectionResult(
+        avg_db=round(float(avg_db), 2),
+        silence_ratio=round(silence_ratio, 3),
+        automation_ratio=round(automation_ratio, 3),
+        classification=classification,
+        reason=reason,
+    )
+
+
 def analyze_audio(file_path: str, config: dict) -> DetectionResult:
     """
     Analyze audio levels to detect dead air, automation, or live DJ.
@@ -62,47 +110,7 @@ def analyze_audio(file_path: str, config: dict) -> DetectionResult:
         chunks = make_chunks(audio, chunk_ms)
 
         chunk_dbs = [chunk.dBFS for chunk in chunks]
-        silence_chunks = sum(1 for level in chunk_dbs if level <= config.get("DEAD_AIR_DB", -72))
-        automation_chunks = sum(
-            1
-            for level in chunk_dbs
-            if config.get("AUTOMATION_MIN_DB", -12) <= level <= config.get("AUTOMATION_MAX_DB", -2)
-        )
-
-        total_chunks = max(len(chunks), 1)
-
-        silence_ratio = silence_chunks / total_chunks
-        automation_ratio = automation_chunks / total_chunks
-        dynamic_range = 0.0
-        if chunk_dbs:
-            dynamic_range = float(np.percentile(chunk_dbs, 95) - np.percentile(chunk_dbs, 5))
-
-        silence_ratio_threshold = config.get("SILENCE_RATIO_DEAD_AIR", 0.5)
-        soft_dead_air_db = config.get("DEAD_AIR_SOFT_DB", -60)
-        automation_ratio_threshold = config.get("AUTOMATION_RATIO_THRESHOLD", 0.65)
-        automation_dynamic_cap = config.get("AUTOMATION_DYNAMIC_RANGE_MAX", 5.0)
-        automation_avg_min = config.get("AUTOMATION_AVG_MIN_DB", -18)
-        automation_avg_max = config.get("AUTOMATION_AVG_MAX_DB", -2)
-
-        if avg_db <= soft_dead_air_db or silence_ratio >= silence_ratio_threshold:
-            classification = "dead_air"
-            reason = "low_or_silent"
-        elif automation_ratio >= automation_ratio_threshold or (
-            automation_avg_min <= avg_db <= automation_avg_max and dynamic_range <= automation_dynamic_cap
-        ):
-            classification = "automation"
-            reason = "compressed_levels"
-        else:
-            classification = "live_show"
-            reason = "dynamic_levels"
-
-        return DetectionResult(
-            avg_db=round(avg_db, 2),
-            silence_ratio=round(silence_ratio, 3),
-            automation_ratio=round(automation_ratio, 3),
-            classification=classification,
-            reason=reason,
-        )
+        return classify_levels(avg_db, chunk_dbs, config)
 
     except Exception as exc:  # noqa: BLE001
         logger.error(f"Error analyzing audio: {exc}")
@@ -194,19 +202,23 @@ def probe_and_record():
     Probe the configured stream, attach the result to the active show run
     (if any), and store it for API access.
     """
+    if inline_levels_active():
+        # A recording is already decoding the stream and reporting its levels.
+        # A stalled or failed analyzer does not count, so a dead stream is still probed and reported down.
+        logger.debug("Skipping stream probe; inline recording levels are active.")
+        return
+
     stream_url = current_app.config["STREAM_URL"]
 
     def _attempt_probe() -> Optional[DetectionResult]:
         return probe_stream(stream_url)
 
     result = _attempt_probe()
-    stream_up = result is not None
 
     if result is None and current_app.config.get("SELF_HEAL_ENABLED", True):
         record_failure("stream_probe", reason="probe_failed", restarted=True)
         time.sleep(1)
         result = _attempt_probe()
-        stream_up = result is not None
 
     if result is None and current_app.config.get("BARIX_AUTO_RESTART_ENABLED", False):
         restart_threshold = int(current_app.config.get("STREAM_DOWN_RESTART_THRESHOLD", 3))
@@ -237,6 +249,11 @@ def probe_and_record():
         process_probe_alerts(False, None)
         return
 
+    record_probe_result(result)
+
+
+def record_probe_result(result: DetectionResult, source: str = "Probe") -> None:
+    """Store a level classification for the current show run and feed the alerts."""
     show = get_current_show()
     show_run = None
     if show:
@@ -270,17 +287,18 @@ def probe_and_record():
         db.session.add(LogEntry(
             show_run_id=show_run.id,
             timestamp=datetime.utcnow(),
-            message=f"Probe: {result.classification}",
+            message=f"{source}: {result.classification}",
             entry_type="probe",
             description=f"reason={result.reason}, avg_db={result.avg_db}, silence={result.silence_ratio}, automation={result.automation_ratio}"
         ))
 
     db.session.commit()
 
-    process_probe_alerts(stream_up, result)
+    process_probe_alerts(True, result)
 
     logger.info(
-        "Stream probe: %s (avg_db=%.2f, silence=%.2f, automation=%.2f)",
+        "%s: %s (avg_db=%.2f, silence=%.2f, automation=%.2f)",
+        source,
         result.classification,
         result.avg_db,
         result.silence_ratio,
@@ -1,7 +1,13 @@
 """Library-related service helpers."""
 
+from app.services.library.crates import build_crate_rotation, normalize_rules, refresh_crate_members  # noqa: F401
 from app.services.library.dj_library import build_dj_library_index, match_text_playlist, match_youtube_playlist, search_dj_library  # noqa: F401
-from app.services.library.library_index import get_library_index_status, start_library_index_job  # noqa: F401
+from app.services.library.library_index import (  # noqa: F401
+    get_library_index_history,
+    get_library_index_status,
+    start_library_index_job,
+    start_subtree_index_job,
+)
 from app.services.library.media_library import get_media_index, list_media, load_media_meta, save_media_meta  # noqa: F401
 from app.services.library.music_search import (  # noqa: F401
     auto_fill_missing_cues,
@@ -21,3 +27,7 @@ from app.services.library.music_search import (  # noqa: F401
     search_music,
     update_metadata,
 )
+from app.services.library.loudness import run_loudness_batch  # noqa: F401
+from app.services.library.preview import ensure_preview, prefetch_previews, run_preview_batch  # noqa: F401
+from app.services.library.tempo import run_tempo_batch  # noqa: F401
+from app.services.library.transcode import ensure_transcoded_mp3, run_pretranscode_batch  # noqa: F401
@@ -0,0 +1,290 @@
+"""Disk-backed cover-art cache shared by ``/music/cover`` and ``/api/music/cover-image``.
+
+Artwork is extracted once per source version and stored under
+``instance/cover_cache/<key>/``.  The key is derived from the audio file's path,
+mtime and size (plus the ``.jpg`` sidecar, when present), so revalidation with
+``If-None-Match`` only costs a ``stat`` and never opens the audio file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+from flask import Response, current_app, make_response, request, send_file
+
+try:
+    import mutagen  # type: ignore
+    from mutagen.id3 import ID3  # type: ignore
+    from mutagen.mp4 import MP4  # type: ignore
+except Exception:  # noqa: BLE001
+    mutagen = None
+    ID3 = None
+    MP4 = None
+
+_MISSING_MARKER = "none"
+_MIME_EXTENSIONS = {"image/png": ".png", "image/gif": ".gif", "image/webp": ".webp"}
+
+
+@dataclass(frozen=True)
+class CachedCover:
+    path: str
+    mime: str
+    etag: str
+
+
+def _cover_cache_root() -> str:
+    root = os.path.join(current_app.instance_path, "cover_cache")
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def _sidecar_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".jpg"
+
+
+def thumbnail_sizes() -> Tuple[int, ...]:
+    sizes = current_app.config.get("COVER_THUMBNAIL_SIZES") or (96, 240, 480)
+    return tuple(sorted({int(size) for size in sizes if int(size) > 0}))
+
+
+def _snap_size(size: Optional[int], sizes: Sequence[int]) -> Optional[int]:
+    """Map a requested edge length onto the smallest pre-rendered size that covers it."""
+    if not size or size <= 0 or not sizes:
+        return None
+    for candidate in sizes:
+        if candidate >= size:
+            return candidate
+    return None
+
+
+def cover_cache_key(path: str) -> Optional[str]:
+    """Version key for ``path``'s artwork, computed from ``stat`` results only."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    parts = [path, str(stat.st_mtime_ns), str(stat.st_size)]
+    try:
+        sidecar = os.stat(_sidecar_path(path))
+        parts.extend(["jpg", str(sidecar.st_mtime_ns), str(sidecar.st_size)])
+    except OSError:
+        pass
+    text = "\0".join(parts)
+    try:
+        raw = os.fsencode(text)
+    except Exception:
+        raw = text.encode("utf-8", "surrogatepass")
+    return hashlib.sha1(raw).hexdigest()
+
+
+def cover_etag(path: str, size: Optional[int] = None) -> Optional[str]:
+    key = cover_cache_key(path)
+    if not key:
+        return None
+    snapped = _snap_size(size, thumbnail_sizes())
+    return f"{key}-{snapped or 'orig'}"
+
+
+def _extract_cover(path: str) -> Tuple[Optional[bytes], str]:
+    sidecar = _sidecar_path(path)
+    if os.path.exists(sidecar):
+        try:
+            with open(sidecar, "rb") as fh:
+                return fh.read(), "image/jpeg"
+        except OSError:
+            pass
+    if mutagen is None:
+        return None, "image/jpeg"
+    try:
+        audio = mutagen.File(path, easy=False)
+    except Exception:  # noqa: BLE001
+        return None, "image/jpeg"
+    if not audio:
+        return None, "image/jpeg"
+    if isinstance(audio, MP4):
+        covr = audio.tags.get("covr") if audio.tags else None
+        if covr:
+            return bytes(covr[0]), "image/jpeg"
+        return None, "image/jpeg"
+    try:
+        id3 = ID3(path)
+        apic = id3.get("APIC:") or id3.get("APIC")
+        if apic:
+            return apic.data, apic.mime or "image/jpeg"
+    except Exception:  # noqa: BLE001
+        pass
+    if getattr(audio, "pictures", None):
+        pic = audio.pictures[0]
+        return pic.data, pic.mime or "image/jpeg"
+    return None, "image/jpeg"
+
+
+def _write_atomic(target: str, data: bytes) -> None:
+    fd, temp_path = tempfile.mkstemp(prefix="cover-", dir=os.path.dirname(target))
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _find_original(entry_dir: str) -> Optional[Tuple[str, str]]:
+    try:
+        names = os.listdir(entry_dir)
+    except OSError:
+        return None
+    for name in names:
+        if name.startswith("orig."):
+            ext = "." + name.split(".", 1)[1]
+            mime = next((m for m, e in _MIME_EXTENSIONS.items() if e == ext), "image/jpeg")
+            return os.path.join(entry_dir, name), mime
+    return None
+
+
+def _render_thumbnail(source: str, target: str, size: int) -> bool:
+    fd, temp_path = tempfile.mkstemp(prefix="cover-", suffix=".jpg", dir=os.path.dirname(target))
+    os.close(fd)
+    try:
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-nostdin",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-y",
+                "-i",
+                source,
+                "-vf",
+                f"scale='min({size},iw)':'min({size},ih)':force_original_aspect_ratio=decrease",
+                "-frames:v",
+                "1",
+                "-q:v",
+                "3",
+                temp_path,
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=30,
+        )
+        if os.path.getsize(temp_path) <= 0:
+            return False
+        os.replace(temp_path, target)
+        return True
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def get_cached_cover(path: str, size: Optional[int] = None) -> Optional[CachedCover]:
+    """Return the cached artwork for ``path``, extracting/rendering it on first use.
+
+    ``None`` means the track has no artwork; that answer is cached too so
+    repeated misses do not re-parse the file.  When a thumbnail cannot be
+    rendered (no ffmpeg, unreadable image) the original is served instead.
+    """
+    key = cover_cache_key(path)
+    if not key:
+        return None
+    snapped = _snap_size(size, thumbnail_sizes())
+    etag = f"{key}-{snapped or 'orig'}"
+    entry_dir = os.path.join(_cover_cache_root(), key[:2], key)
+    if os.path.exists(os.path.join(entry_dir, _MISSING_MARKER)):
+        return None
+
+    if snapped:
+        thumb = os.path.join(entry_dir, f"{snapped}.jpg")
+        if os.path.exists(thumb):
+            return CachedCover(thumb, "image/jpeg", etag)
+
+    original = _find_original(entry_dir)
+    if original is None:
+        data, mime = _extract_cover(path)
+        os.makedirs(entry_dir, exist_ok=True)
+        if not data:
+            _write_atomic(os.path.join(entry_dir, _MISSING_MARKER), b"")
+            return None
+        target = os.path.join(entry_dir, "orig" + _MIME_EXTENSIONS.get(mime, ".jpg"))
+        _write_atomic(target, data)
+        original = (target, mime)
+
+    if snapped:
+        thumb = os.path.join(entry_dir, f"{snapped}.jpg")
+        if _render_thumbnail(original[0], thumb, snapped):
+            return CachedCover(thumb, "image/jpeg", etag)
+    return CachedCover(original[0], original[1], etag)
+
+
+def send_cover(path: str, size: Optional[int] = None, *, private: bool = True) -> Optional[Response]:
+    """Build the HTTP response for a cover request, or ``None`` when there is no art."""
+    max_age = int(current_app.config.get("COVER_CACHE_MAX_AGE_SECONDS", 86400))
+    etag = cover_etag(path, size)
+    if etag and request.if_none_match.contains(etag):
+        resp = make_response("", 304)
+    else:
+        cover = get_cached_cover(path, size)
+        if cover is None:
+            return None
+        resp = send_file(cover.path, mimetype=cover.mime, conditional=True, etag=cover.etag)
+    if etag:
+        resp.set_etag(etag)
+    if private:
+        resp.cache_control.private = True
+    else:
+        resp.cache_control.public = True
+    # send_file marks responses no-cache; both the 200 and the 304 carry the same policy.
+    resp.cache_control.no_cache = None
+    resp.cache_control.max_age = max_age
+    return resp
+
+
+def prune_cover_cache(max_bytes: Optional[int] = None, retention_days: Optional[int] = None) -> int:
+    """Drop cache entries unused for ``retention_days`` and trim the cache to ``max_bytes``.
+
+    Entries whose source changed are orphaned (their key no longer matches), so
+    they age out here.  Returns the number of entries removed.
+    """
+    root = _cover_cache_root()
+    if max_bytes is None:
+        max_bytes = int(current_app.config.get("COVER_CACHE_MAX_BYTES", 0) or 0)
+    if retention_days is None:
+        retention_days = int(current_app.config.get("COVER_CACHE_RETENTION_DAYS", 90))
+    cutoff = time.time() - retention_days * 86400
+    entries = []
+    for shard in os.scandir(root):
+        if not shard.is_dir():
+            continue
+        for entry in os.scandir(shard.path):
+            if not entry.is_dir():
+                continue
+            size = 0
+            newest = 0.0
+            for item in os.scandir(entry.path):
+                try:
+                    stat = item.stat()
+                except OSError:
+                    continue
+                size += stat.st_size
+                newest = max(newest, stat.st_atime, stat.st_mtime)
+            entries.append((newest, size, entry.path))
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    for newest, size, entry_path in sorted(entries):
+        if newest > cutoff and (max_bytes <= 0 or total <= max_bytes):
+            break
+        shutil.rmtree(entry_path, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
@@ -0,0 +1,320 @@
+"""Rule-based crates and rotation lists built from the music index.
+
+A :class:`~app.models.Crate` stores a small rule set (genres, moods, year
+range, folders, explicit flag, minimum days since last play, artist
+separation).  The static part of the rules is evaluated against the index
+once and the matching paths are kept in ``instance/crates/<id>.json``; later
+refreshes only re-check the paths the index change log reports as added,
+changed or removed.  Play history and artist separation are applied when a
+rotation is generated, since they depend on the time of the request.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import re
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Set
+
+from flask import current_app
+from sqlalchemy import func
+
+from app.models import Crate, LogEntry, MusicAnalysis
+from app.services.library import music_search
+from app.services.library.play_history import play_key
+
+DEFAULT_TRACK_SECONDS = 210.0
+_YEAR_RE = re.compile(r"(\d{4})")
+
+
+def _string_list(value, field: str) -> List[str]:
+    if value in (None, ""):
+        return []
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"{field} must be a list of strings")
+    return sorted({item.strip() for item in value if item.strip()})
+
+
+def _optional_int(value, field: str) -> Optional[int]:
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be an integer") from None
+
+
+def normalize_rules(raw: Optional[Mapping]) -> Dict:
+    """Validate a rule payload; raises ``ValueError`` with a user-facing message."""
+    raw = raw or {}
+    if not isinstance(raw, Mapping):
+        raise ValueError("rules must be an object")
+    explicit = raw.get("explicit")
+    if explicit not in (None, True, False):
+        raise ValueError("explicit must be true, false or null")
+    rules = {
+        "genres": _string_list(raw.get("genres"), "genres"),
+        "moods": _string_list(raw.get("moods"), "moods"),
+        "folders": [folder.replace("\\", "/").strip("/") for folder in _string_list(raw.get("folders"), "folders")],
+        "year_min": _optional_int(raw.get("year_min"), "year_min"),
+        "year_max": _optional_int(raw.get("year_max"), "year_max"),
+        "explicit": explicit,
+        "min_days_since_played": max(0, _optional_int(raw.get("min_days_since_played"), "min_days_since_played") or 0),
+        "artist_separation": max(0, _optional_int(raw.get("artist_separation"), "artist_separation") or 0),
+    }
+    if rules["year_min"] is not None and rules["year_max"] is not None and rules["year_min"] > rules["year_max"]:
+        raise ValueError("year_min must not be after year_max")
+    return rules
+
+
+def crate_rules(crate: Crate) -> Dict:
+    try:
+        return normalize_rules(json.loads(crate.rules or "{}"))
+    except ValueError:
+        return normalize_rules({})
+
+
+def _entry_year(entry: Mapping) -> Optional[int]:
+    match = _YEAR_RE.search(str(entry.get("year") or ""))
+    return int(match.group(1)) if match else None
+
+
+def rules_match(rules: Mapping, entry: Mapping) -> bool:
+    """Static rule check for one index entry (no play history, no ordering)."""
+    if rules.get("genres") and (entry.get("genre") or "").strip().lower() not in {
+        genre.lower() for genre in rules["genres"]
+    }:
+        return False
+    if rules.get("moods") and (entry.get("mood") or "").strip().lower() not in {mood.lower() for mood in rules["moods"]}:
+        return False
+    if rules.get("folders"):
+        folder = entry.get("folder") or ""
+        if not any(folder == prefix or folder.startswith(prefix + "/") for prefix in rules["folders"]):
+            return False
+    if rules.get("explicit") is not None and bool(entry.get("explicit")) is not rules["explicit"]:
+        return False
+    if rules.get("year_min") is not None or rules.get("year_max") is not None:
+        year = _entry_year(entry)
+        if year is None:
+            return False
+        if rules.get("year_min") is not None and year < rules["year_min"]:
+            return False
+        if rules.get("year_max") is not None and year > rules["year_max"]:
+            return False
+    return True
+
+
+def rules_digest(rules: Mapping) -> str:
+    static = {key: value for key, value in rules.items() if key not in {"min_days_since_played", "artist_separation"}}
+    return hashlib.sha1(json.dumps(static, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def evaluate_members(rules: Mapping, files: Mapping[str, Mapping]) -> Set[str]:
+    return {path for path, entry in files.items() if rules_match(rules, entry)}
+
+
+def update_members(
+    members: Set[str],
+    rules: Mapping,
+    files: Mapping[str, Mapping],
+    upserted: Iterable[str],
+    removed: Iterable[str],
+) -> Set[str]:
+    """Apply index changes to a materialized member set in place and return it."""
+    for path in removed:
+        members.discard(path)
+    for path in upserted:
+        entry = files.get(path)
+        if entry is not None and rules_match(rules, entry):
+            members.add(path)
+        else:
+            members.discard(path)
+    return members
+
+
+def _crate_state_path(crate_id: int) -> str:
+    return os.path.join(current_app.instance_path, "crates", f"{crate_id}.json")
+
+
+def _load_crate_state(crate_id: int) -> Dict:
+    try:
+        with open(_crate_state_path(crate_id), "r", encoding="utf-8") as fh:
+            return json.load(fh) or {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_crate_state(crate_id: int, payload: Dict) -> None:
+    path = _crate_state_path(crate_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    music_search.atomic_write_json(path, payload, "crate-")
+
+
+def discard_crate_state(crate_id: int) -> None:
+    try:
+        os.remove(_crate_state_path(crate_id))
+    except OSError:
+        pass
+
+
+def refresh_crate_members(crate: Crate, index: Optional[Dict] = None) -> List[str]:
+    """Bring the crate's materialized member list up to date with the index.
+
+    Falls back to a full evaluation when the rules changed, the crate has
+    never been evaluated, or the change log no longer covers its position.
+    Changes are read up to the ``change_seq`` of the snapshot the entries
+    come from, so a publish in between is picked up next time.
+    """
+    rules = crate_rules(crate)
+    digest = rules_digest(rules)
+    if index is None:
+        index = music_search.music_index_snapshot()
+    files = index.get("files") or {}
+    seq = index.get("change_seq")
+    state = _load_crate_state(crate.id)
+    changes = None
+    if seq is not None and state.get("rules_digest") == digest and state.get("root") == index.get("root"):
+        changes = music_search.music_index_changes_since(state.get("seq"), until=seq)
+    if changes is None:
+        members = evaluate_members(rules, files)
+    else:
+        members = update_members(set(state.get("members") or []), rules, files, changes["upserted"], changes["removed"])
+        seq = changes["seq"]
+        if not changes["upserted"] and not changes["removed"]:
+            return sorted(members)
+    ordered = sorted(members)
+    _write_crate_state(crate.id, {"rules_digest": digest, "root": index.get("root"), "seq": seq, "members": ordered})
+    return ordered
+
+
+def last_played_times(days: int, now: Optional[datetime] = None) -> Dict[str, datetime]:
+    """Most recent ``LogEntry`` play per artist/title key within ``days``."""
+    cutoff = (now or datetime.utcnow()) - timedelta(days=max(1, days))
+    rows = (
+        LogEntry.query.with_entities(LogEntry.artist, LogEntry.title, func.max(LogEntry.timestamp))
+        .filter(LogEntry.entry_type == "music", LogEntry.timestamp >= cutoff)
+        .group_by(LogEntry.artist, LogEntry.title)
+        .all()
+    )
+    played: Dict[str, datetime] = {}
+    for artist, title, timestamp in rows:
+        if not title or timestamp is None:
+            continue
+        key = play_key(artist, title)
+        if key not in played or timestamp > played[key]:
+            played[key] = timestamp
+    return played
+
+
+def _artist_key(entry: Mapping) -> str:
+    return re.sub(r"[\W_]+", "", (entry.get("artist") or "").casefold())
+
+
+def generate_rotation(
+    entries: Iterable[Mapping],
+    rules: Mapping,
+    *,
+    seconds: float,
+    last_played: Optional[Mapping[str, datetime]] = None,
+    durations: Optional[Mapping[str, float]] = None,
+    now: Optional[datetime] = None,
+    seed: Optional[str] = None,
+) -> List[Dict]:
+    """Order ``entries`` into a rotation that fills ``seconds`` of airtime.
+
+    Tracks played within ``min_days_since_played`` are dropped; the rest go
+    out never-played first, then longest since last play (ties shuffled by
+    ``seed``).  An artist does not repeat within ``artist_separation`` slots
+    unless nothing else is left.  A pool shorter than ``seconds`` is cycled.
+    """
+    now = now or datetime.utcnow()
+    last_played = last_played or {}
+    durations = durations or {}
+    rng = random.Random(seed if seed is not None else now.date().isoformat())
+    min_age = timedelta(days=rules.get("min_days_since_played") or 0)
+    pool = []
+    for entry in entries:
+        played = last_played.get(play_key(entry.get("artist"), entry.get("title")))
+        if played is not None and min_age and now - played < min_age:
+            continue
+        pool.append((played or datetime.min, rng.random(), entry))
+    pool.sort(key=lambda item: (item[0], item[1]))
+    ordered = [entry for _, _, entry in pool]
+    if not ordered or seconds <= 0:
+        return []
+
+    separation = int(rules.get("artist_separation") or 0)
+    recent: deque = deque(maxlen=separation or None)
+    rotation: List[Dict] = []
+    offset = 0.0
+    source = iter(ordered)
+    deferred: List[Mapping] = []
+    while offset < seconds:
+        pick = None
+        blocked = set(recent) if separation else set()
+        for idx, entry in enumerate(deferred):
+            if _artist_key(entry) not in blocked:
+                pick = deferred.pop(idx)
+                break
+        while pick is None:
+            entry = next(source, None)
+            if entry is None:
+                break
+            if _artist_key(entry) in blocked:
+                deferred.append(entry)
+            else:
+                pick = entry
+        if pick is None:
+            if deferred:
+                pick = deferred.pop(0)  # separation cannot be met with what is left
+            else:
+                source = iter(ordered)
+                continue
+        duration = float(durations.get(pick["path"]) or DEFAULT_TRACK_SECONDS)
+        rotation.append({
+            "path": pick["path"],
+            "title": pick.get("title"),
+            "artist": pick.get("artist"),
+            "duration_seconds": duration,
+            "offset_seconds": round(offset, 3),
+        })
+        offset += duration
+        if separation:
+            recent.append(_artist_key(pick))
+    return rotation
+
+
+def build_crate_rotation(crate: Crate, hours: float = 24.0, now: Optional[datetime] = None) -> Dict:
+    rules = crate_rules(crate)
+    now = now or datetime.utcnow()
+    index = music_search.music_index_snapshot()
+    members = refresh_crate_members(crate, index)
+    files = index.get("files") or {}
+    entries = [entry for entry in (files.get(path) for path in members) if entry is not None]
+    member_set = set(members)
+    durations = {
+        path: duration
+        for path, duration in MusicAnalysis.query.with_entities(MusicAnalysis.path, MusicAnalysis.duration_seconds)
+        .filter(MusicAnalysis.duration_seconds.isnot(None))
+        if path in member_set
+    }
+    history_days = max(
+        int(current_app.config.get("CRATE_PLAY_HISTORY_DAYS", 30)),
+        rules["min_days_since_played"],
+    )
+    rotation = generate_rotation(
+        entries,
+        rules,
+        seconds=hours * 3600.0,
+        last_played=last_played_times(history_days, now),
+        durations=durations,
+        now=now,
+        seed=f"{crate.id}:{now.date().isoformat()}",
+    )
+    return {"crate_id": crate.id, "name": crate.name, "members": len(members), "hours": hours, "items": rotation}
@@ -0,0 +1,348 @@
+"""Cached, rate-limited access to external metadata services.
+
+``lookup_musicbrainz`` and ``enrich_metadata_external`` route their HTTP calls
+through :func:`cached_lookup`, which keeps answers (including "no match") in the
+``external_lookup_cache`` table and spaces requests with a per-service limiter
+shared by all processes on the host (:class:`SharedRateLimiter`).  The
+background queue (:func:`process_enrichment_queue`) walks tracks with missing
+tags in batches and stores MusicBrainz suggestions for review.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import requests
+from flask import current_app
+from sqlalchemy import func
+
+from app.logger import init_logger
+from app.models import ExternalLookupCache, MetadataEnrichmentItem, db
+
+logger = init_logger()
+
+
+class LookupUnavailable(Exception):
+    """Transient failure (network, 5xx, rate limited); the answer must not be cached."""
+
+
+class SharedRateLimiter:
+    """Request spacing for one source, shared by every process on the host.
+
+    The next free request slot and any back-off deadline live in a small JSON
+    file that is only read and written under an exclusive ``flock``, so web
+    workers and the background service together stay at ``rate`` requests
+    per second.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rate: float,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.path = path
+        self.rate = max(0.001, float(rate))
+        self._clock = clock
+        self._sleep = sleep
+
+    def _locked(self, update: Callable[[Dict[str, float], float], Any]) -> Any:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a+", encoding="utf-8") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                handle.seek(0)
+                try:
+                    state = json.loads(handle.read() or "{}")
+                except ValueError:
+                    state = {}
+                result = update(state, self._clock())
+                handle.seek(0)
+                handle.truncate()
+                handle.write(json.dumps(state))
+                handle.flush()
+                return result
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Claim the next request slot, waiting up to ``timeout`` seconds (``None`` waits forever)."""
+        deadline = None if timeout is None else self._clock() + timeout
+
+        def _claim(state: Dict[str, float], now: float) -> float:
+            ready_at = max(float(state.get("next_at") or 0), float(state.get("blocked_until") or 0))
+            if now >= ready_at:
+                state["next_at"] = now + 1.0 / self.rate
+                return 0.0
+            return ready_at - now
+
+        while True:
+            wait = self._locked(_claim)
+            if not wait:
+                return True
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            self._sleep(wait)
+
+    def back_off(self, seconds: float) -> None:
+        """Refuse requests for ``seconds`` (used when the service answers 503/Retry-After)."""
+
+        def _block(state: Dict[str, float], now: float) -> None:
+            state["blocked_until"] = max(float(state.get("blocked_until") or 0), now + max(0.0, seconds))
+
+        self._locked(_block)
+
+
+def rate_limiter(source: str) -> SharedRateLimiter:
+    """Host-wide limiter for ``source``, sized from ``<SOURCE>_RATE_LIMIT_PER_SECOND``."""
+    rate = float(current_app.config.get(f"{source.upper()}_RATE_LIMIT_PER_SECOND", 1.0))
+    path = os.path.join(current_app.instance_path, "rate_limits", f"{source}.json")
+    return SharedRateLimiter(path, rate)
+
+
+def normalize_lookup_key(artist: Optional[str], title: Optional[str], *extra: object) -> str:
+    """Cache key for a lookup of exactly ``artist``/``title``, folded for case and spacing only.
+
+    Qualifiers such as "(Live)" or "(Remix)" are part of what the service is
+    asked, so they stay in the key.
+    """
+    def _norm(value: Optional[str]) -> str:
+        return " ".join((value or "").lower().split())
+
+    parts = [_norm(artist), _norm(title)]
+    parts.extend(str(item) for item in extra)
+    return "|".join(parts)
+
+
+def _get_cached(cache_key: str) -> Optional[ExternalLookupCache]:
+    row = ExternalLookupCache.query.filter_by(cache_key=cache_key).first()
+    if row and row.expires_at > datetime.utcnow():
+        return row
+    return None
+
+
+def _store(cache_key: str, source: str, value: Any, found: bool, ttl: timedelta) -> None:
+    now = datetime.utcnow()
+    row = ExternalLookupCache.query.filter_by(cache_key=cache_key).first()
+    if row is None:
+        row = ExternalLookupCache(cache_key=cache_key, source=source)
+        db.session.add(row)
+    row.found = found
+    row.payload = json.dumps(value) if found else None
+    row.fetched_at = now
+    row.expires_at = now + ttl
+    try:
+        db.session.commit()
+    except Exception as exc:  # noqa: BLE001
+        db.session.rollback()
+        logger.warning("Unable to cache %s lookup: %s", source, exc)
+
+
+def cached_lookup(
+    source: str,
+    key: str,
+    fetch: Callable[[], Any],
+    wait_seconds: Optional[float] = None,
+) -> Any:
+    """Return the cached answer for ``source``/``key`` or fetch, rate-limited, and cache it.
+
+    ``fetch`` returns a JSON-serialisable value; falsy values are cached as a
+    negative result for ``<SOURCE>_NEGATIVE_CACHE_HOURS`` and returned as
+    ``None``.  :class:`LookupUnavailable` propagates (nothing is cached) when
+    ``fetch`` raises it or no rate-limit token frees up within ``wait_seconds``.
+    """
+    cache_key = f"{source}:{key}"
+    row = _get_cached(cache_key)
+    if row is not None:
+        return json.loads(row.payload) if row.found and row.payload else None
+
+    prefix = source.upper()
+    if wait_seconds is None:
+        wait_seconds = float(current_app.config.get(f"{prefix}_RATE_LIMIT_WAIT_SECONDS", 5))
+    if not rate_limiter(source).acquire(timeout=wait_seconds):
+        raise LookupUnavailable("rate limited")
+    value = fetch()
+
+    if value:
+        ttl = timedelta(days=float(current_app.config.get(f"{prefix}_CACHE_DAYS", 30)))
+        _store(cache_key, source, value, True, ttl)
+        return value
+    ttl = timedelta(hours=float(current_app.config.get(f"{prefix}_NEGATIVE_CACHE_HOURS", 72)))
+    _store(cache_key, source, None, False, ttl)
+    return None
+
+
+def fetch_json(source: str, url: str, params: Dict, headers: Optional[Dict] = None, timeout: float = 8) -> Dict:
+    """GET ``url`` and decode JSON, mapping transient failures to :class:`LookupUnavailable`.
+
+    A 503 (MusicBrainz' rate-limit answer) also pauses the source's limiter for
+    ``Retry-After`` seconds.
+    """
+    try:
+        resp = requests.get(url, params=params, headers=headers or {}, timeout=timeout)
+    except requests.RequestException as exc:
+        raise LookupUnavailable(str(exc)) from exc
+    if resp.status_code in (429, 503):
+        try:
+            retry_after = float(resp.headers.get("Retry-After") or 1)
+        except ValueError:
+            retry_after = 1.0
+        rate_limiter(source).back_off(retry_after)
+        raise LookupUnavailable(f"HTTP {resp.status_code}")
+    if resp.status_code == 404:
+        return {}
+    if resp.status_code >= 400:
+        raise LookupUnavailable(f"HTTP {resp.status_code}")
+    try:
+        return resp.json() or {}
+    except ValueError as exc:
+        raise LookupUnavailable("invalid JSON") from exc
+
+
+# ---------------------------------------------------------------------------
+# Background enrichment queue
+# ---------------------------------------------------------------------------
+
+
+def enqueue_enrichment(paths: Iterable[str]) -> int:
+    """Queue ``paths`` for enrichment; already-queued pending paths are left alone."""
+    paths = [p for p in dict.fromkeys(paths) if p]
+    if not paths:
+        return 0
+    existing = {
+        item.path: item
+        for item in MetadataEnrichmentItem.query.filter(MetadataEnrichmentItem.path.in_(paths)).all()
+    }
+    added = 0
+    now = datetime.utcnow()
+    for path in paths:
+        item = existing.get(path)
+        if item is None:
+            db.session.add(MetadataEnrichmentItem(path=path, queued_at=now))
+            added += 1
+        elif item.status != "pending":
+            item.status = "pending"
+            item.queued_at = now
+            added += 1
+    db.session.commit()
+    return added
+
+
+def enqueue_missing_metadata(limit: int = 500) -> int:
+    """Queue index entries that are missing album, year or ISRC and were never processed."""
+    from app.services.library.music_search import get_music_index  # lazy import to avoid cycles
+
+    known = {path for (path,) in MetadataEnrichmentItem.query.with_entities(MetadataEnrichmentItem.path).all()}
+    candidates: List[str] = []
+    for path, entry in (get_music_index().get("files") or {}).items():
+        if path in known or not entry.get("title"):
+            continue
+        if entry.get("album") and entry.get("year") and entry.get("isrc"):
+            continue
+        candidates.append(path)
+        if len(candidates) >= limit:
+            break
+    return enqueue_enrichment(candidates)
+
+
+def process_enrichment_queue(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Look up one batch of pending queue items and store the best MusicBrainz match.
+
+    Tracks sharing an artist/title are resolved with a single lookup, and the
+    shared cache/rate limiter keep the batch within MusicBrainz' limits.
+    """
+    from app.services.library.music_search import get_music_index, lookup_musicbrainz  # lazy import to avoid cycles
+
+    batch_size = batch_size or int(current_app.config.get("ENRICHMENT_BATCH_SIZE", 50))
+    max_attempts = int(current_app.config.get("ENRICHMENT_MAX_ATTEMPTS", 3))
+    items = (
+        MetadataEnrichmentItem.query.filter_by(status="pending")
+        .order_by(MetadataEnrichmentItem.queued_at.asc())
+        .limit(batch_size)
+        .all()
+    )
+    counts = {"processed": 0, "matched": 0, "no_match": 0, "error": 0, "deferred": 0}
+    if not items:
+        return counts
+    files = get_music_index().get("files") or {}
+    resolved: Dict[str, Optional[List[Dict]]] = {}
+    for item in items:
+        entry = files.get(item.path)
+        item.attempts = (item.attempts or 0) + 1
+        item.processed_at = datetime.utcnow()
+        if not entry or not (entry.get("title") or entry.get("artist")):
+            item.status = "error"
+            item.error = "not_in_index" if not entry else "no_title_or_artist"
+            counts["error"] += 1
+            counts["processed"] += 1
+            continue
+        key = normalize_lookup_key(entry.get("artist"), entry.get("title"))
+        if key not in resolved:
+            try:
+                resolved[key] = lookup_musicbrainz(entry.get("title"), entry.get("artist"), limit=3, raise_unavailable=True)
+            except LookupUnavailable:
+                resolved[key] = None
+        results = resolved[key]
+        if results is None:
+            # Transient failure: leave pending unless it keeps failing.
+            if item.attempts >= max_attempts:
+                item.status = "error"
+                item.error = "lookup_unavailable"
+                counts["error"] += 1
+                counts["processed"] += 1
+            else:
+                counts["deferred"] += 1
+            continue
+        counts["processed"] += 1
+        if results:
+            item.status = "matched"
+            item.suggestion = json.dumps(results[0])
+            item.error = None
+            counts["matched"] += 1
+        else:
+            item.status = "no_match"
+            item.suggestion = None
+            counts["no_match"] += 1
+    db.session.commit()
+    return counts
+
+
+def enrichment_queue_status(recent: int = 20) -> Dict:
+    counts = dict(
+        MetadataEnrichmentItem.query.with_entities(MetadataEnrichmentItem.status, func.count())
+        .group_by(MetadataEnrichmentItem.status)
+        .all()
+    )
+    rows = (
+        MetadataEnrichmentItem.query.filter(MetadataEnrichmentItem.processed_at.isnot(None))
+        .order_by(MetadataEnrichmentItem.processed_at.desc())
+        .limit(recent)
+        .all()
+    )
+    return {
+        "counts": counts,
+        "recent": [
+            {
+                "path": row.path,
+                "status": row.status,
+                "attempts": row.attempts,
+                "suggestion": json.loads(row.suggestion) if row.suggestion else None,
+                "error": row.error,
+                "processed_at": row.processed_at.isoformat() if row.processed_at else None,
+            }
+            for row in rows
+        ],
+    }
+
+
+def get_enrichment_suggestion(path: str) -> Optional[Dict]:
+    item = MetadataEnrichmentItem.query.filter_by(path=path, status="matched").first()
+    if item and item.suggestion:
+        return json.loads(item.suggestion)
+    return None
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import json
 import os
+import tempfile
 import threading
 import time
 import fcntl
-from datetime import datetime
-from typing import Dict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from flask import current_app
 
+from app.models import MusicAnalysis, db
 from app.services.library import music_search
 
 _library_index_state: Dict[str, object] = {
@@ -17,8 +21,15 @@ _library_index_state: Dict[str, object] = {
     "total": 0,
     "updated_at": None,
     "error": None,
+    "metrics": None,
 }
 _state_lock = threading.Lock()
+_subtree_jobs: Dict[str, Dict[str, object]] = {}
+_subtree_run_lock = threading.Lock()
+
+INDEX_PHASES = ("walk", "stat", "tags", "analysis", "db_flush", "checkpoint", "json_write", "priority_wait")
+_STATE_UPDATE_INTERVAL = 0.5
+_RATE_SMOOTHING = 0.3
 
 
 def _set_state(**updates: object) -> None:
@@ -33,91 +44,546 @@ def _calculate_progress(completed: int, total: int) -> int:
     return min(100, int((completed / total) * 100))
 
 
+class IndexRunMetrics:
+    """Per-phase timings, file counts and a smoothed throughput/ETA for one index run."""
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.started_at = datetime.utcnow()
+        self._started = clock()
+        self.phases: Dict[str, float] = {name: 0.0 for name in INDEX_PHASES}
+        self.counts: Dict[str, int] = {"new": 0, "changed": 0, "skipped": 0, "failed": 0, "removed": 0}
+        self.total = 0
+        self.processed = 0
+        self.rate: Optional[float] = None
+        self.resumed_files = 0
+        self._rate_mark = (self._started, 0)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        began = self._clock()
+        try:
+            yield
+        finally:
+            self.phases[name] += self._clock() - began
+
+    def timed_iter(self, iterable: Iterable, name: str) -> Iterator:
+        """Iterate ``iterable`` charging the time spent producing items to ``name``."""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def file_done(self, outcome: str) -> None:
+        self.counts[outcome] += 1
+        self.processed += 1
+        now = self._clock()
+        mark_time, mark_count = self._rate_mark
+        if now - mark_time >= 1.0:
+            instant = (self.processed - mark_count) / (now - mark_time)
+            self.rate = instant if self.rate is None else _RATE_SMOOTHING * instant + (1 - _RATE_SMOOTHING) * self.rate
+            self._rate_mark = (now, self.processed)
+
+    def resume(self, counts: Dict[str, int]) -> None:
+        """Carry over the counts of files already processed before a restart."""
+        for outcome, count in counts.items():
+            if outcome in self.counts and outcome != "removed":
+                self.counts[outcome] = int(count)
+        self.processed = sum(count for outcome, count in self.counts.items() if outcome != "removed")
+        self.resumed_files = self.processed
+        self._rate_mark = (self._clock(), self.processed)
+
+    def elapsed(self) -> float:
+        return self._clock() - self._started
+
+    def snapshot(self) -> Dict[str, object]:
+        elapsed = self.elapsed()
+        average = self.processed / elapsed if elapsed > 0 else None
+        rate = self.rate if self.rate is not None else average
+        remaining = max(0, self.total - self.processed)
+        if not remaining:
+            eta = 0.0
+        elif rate:
+            eta = round(remaining / rate, 1)
+        else:
+            eta = None
+        return {
+            "started_at": self.started_at.isoformat(),
+            "elapsed_seconds": round(elapsed, 3),
+            "total": self.total,
+            "processed": self.processed,
+            "counts": dict(self.counts),
+            "phases": {name: round(seconds, 3) for name, seconds in self.phases.items()},
+            "files_per_second": round(average, 2) if average else None,
+            "current_files_per_second": round(rate, 2) if rate else None,
+            "eta_seconds": eta,
+            "resumed_files": self.resumed_files,
+        }
+
+
+class IndexCheckpoint:
+    """Crash-safe progress for a running index job.
+
+    Processed entries go to an append-only ``journal.jsonl``; every so often
+    the journal is fsync'd and ``position.json`` (walk position, journal
+    length, counts) is replaced atomically.  Anything in the journal past the
+    recorded length was never confirmed and is discarded on resume, so the
+    journal and position always describe the same set of files.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.journal_path = os.path.join(directory, "journal.jsonl")
+        self.position_path = os.path.join(directory, "position.json")
+        self._journal = None
+
+    def load(self, root: str) -> Optional[Tuple[Dict[str, Optional[Dict]], Dict[str, object]]]:
+        """Return ``(entries, position)`` from a previous unfinished run over ``root``."""
+        try:
+            with open(self.position_path, "r", encoding="utf-8") as fh:
+                position = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if (
+            position.get("root") != root
+            or position.get("metadata_reader_version") != music_search.METADATA_READER_VERSION
+            or not position.get("last_path")
+        ):
+            return None
+        entries: Dict[str, Optional[Dict]] = {}
+        offset = int(position.get("journal_bytes") or 0)
+        try:
+            with open(self.journal_path, "rb") as fh:
+                data = fh.read(offset)
+        except OSError:
+            return None
+        if len(data) < offset:
+            return None
+        try:
+            for line in data.splitlines():
+                record = json.loads(line)
+                entries[record["path"]] = record.get("entry")
+        except (ValueError, KeyError, TypeError):
+            return None
+        return entries, position
+
+    def open(self, journal_bytes: int = 0) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._journal = open(self.journal_path, "ab")
+        self._journal.truncate(journal_bytes)
+        self._journal.seek(journal_bytes)
+
+    def record(self, path: str, entry: Optional[Dict]) -> None:
+        self._journal.write(json.dumps({"path": path, "entry": entry}).encode("utf-8") + b"\n")
+
+    def commit(self, root: str, last_path: str, counts: Dict[str, int], started_at: str) -> None:
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        position = {
+            "root": root,
+            "last_path": last_path,
+            "journal_bytes": self._journal.tell(),
+            "counts": counts,
+            "started_at": started_at,
+            "metadata_reader_version": music_search.METADATA_READER_VERSION,
+            "saved_at": datetime.utcnow().isoformat(),
+        }
+        fd, temp_path = tempfile.mkstemp(prefix="position-", suffix=".json", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(position, fh)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(temp_path, self.position_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def close(self) -> None:
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def clear(self) -> None:
+        self.close()
+        for path in (self.position_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _checkpoint_dir(app) -> str:
+    return os.path.join(app.instance_path, "library_index_checkpoint")
+
+
+def _history_path(app) -> str:
+    return os.path.join(app.instance_path, "library_index_history.jsonl")
+
+
+def _append_history(app, record: Dict[str, object]) -> None:
+    path = _history_path(app)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record) + "\n")
+    limit = int(app.config.get("LIBRARY_INDEX_HISTORY_LIMIT", 200))
+    with open(path, "r", encoding="utf-8") as fh:
+        lines = fh.readlines()
+    if limit > 0 and len(lines) > limit:
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as fh:
+            fh.writelines(lines[-limit:])
+        os.replace(temp_path, path)
+
+
+def get_library_index_history(limit: int = 50) -> List[Dict[str, object]]:
+    """Most recent index runs, newest first."""
+    path = _history_path(current_app)
+    if not os.path.exists(path):
+        return []
+    records: List[Dict[str, object]] = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return list(reversed(records[-limit:] if limit else records))
+
+
+def _update_analysis(pending: Dict[str, Dict], metrics: IndexRunMetrics) -> None:
+    """Refresh cheap, tag-derived ``MusicAnalysis`` fields for changed files.
+
+    Audio statistics stay with ``_ensure_analysis``; only rows that already
+    exist are touched so a missing row still triggers the full analysis on
+    first view.
+    """
+    if not pending:
+        return
+    with metrics.phase("analysis"):
+        rows = MusicAnalysis.query.filter(MusicAnalysis.path.in_(list(pending))).all()
+        for row in rows:
+            tags = pending[row.path]
+            base_title = os.path.splitext(os.path.basename(row.path))[0]
+            row.missing_tags = not (tags.get("artist") and tags.get("title") and tags.get("title") != base_title)
+            if tags.get("bitrate"):
+                row.bitrate = tags["bitrate"]
+    with metrics.phase("db_flush"):
+        try:
+            db.session.commit()
+        except Exception:  # noqa: BLE001
+            db.session.rollback()
+            raise
+    pending.clear()
+
+
+def _under_folder(path: str, folder: str) -> bool:
+    return path == folder or path.startswith(folder + os.sep)
+
+
+def _publish_index(app, root: Optional[str], files: Dict[str, Dict], metrics: Optional[IndexRunMetrics] = None) -> None:
+    """Replace the live index with a full scan's ``files``.
+
+    Subtrees re-indexed after the scan started (see ``subtree_generations``)
+    are newer than what the scan saw, so their live entries win.
+    """
+    with music_search.index_write_lock():
+        generations: Dict[str, float] = {}
+        if metrics is not None and root:
+            live = music_search._load_music_index_file()
+            live_files = live.get("files") or {}
+            started = metrics.started_at.replace(tzinfo=timezone.utc).timestamp()
+            for folder, generated_at in (live.get("subtree_generations") or {}).items():
+                if live.get("root") != root or generated_at <= started:
+                    continue
+                generations[folder] = generated_at
+                prefix = os.path.normpath(os.path.join(root, *folder.split("/")))
+                files = {path: entry for path, entry in files.items() if not _under_folder(path, prefix)}
+                files.update(music_search._index_folder_items(live_files, root, folder))
+        payload = {"files": files, "generated_at": time.time(), "root": root, "subtree_generations": generations}
+        if metrics is None:
+            music_search._write_music_index_file(payload)
+        else:
+            with metrics.phase("json_write"):
+                music_search._write_music_index_file(payload)
+        music_search._MUSIC_INDEX_CACHE["data"] = payload
+        music_search._MUSIC_INDEX_CACHE["loaded_at"] = time.time()
+        music_search._MUSIC_INDEX_CACHE["root"] = root
+
+
 def _build_index(app) -> None:
     with app.app_context():
         root = app.config.get("NAS_MUSIC_ROOT")
-        existing = music_search._load_music_index_file()
         if not root or not os.path.exists(root):
-            payload = {"files": {}, "generated_at": time.time(), "root": root}
-            music_search._write_music_index_file(payload)
-            music_search._MUSIC_INDEX_CACHE["data"] = payload
-            music_search._MUSIC_INDEX_CACHE["loaded_at"] = time.time()
-            music_search._MUSIC_INDEX_CACHE["root"] = root
-            _set_state(status="idle", progress=0, total=0, error=None)
+            _publish_index(app, root, {})
+            _set_state(status="idle", progress=0, total=0, error=None, metrics=None)
             return
 
-        # Two streaming passes trade a directory walk for avoiding a potentially
-        # enormous in-memory list of every path.
-        total = sum(1 for _ in music_search._walk_music())
-        _set_state(status="running", progress=0, total=total, error=None)
+        metrics = IndexRunMetrics()
+        try:
+            _index_files(app, root, metrics)
+        except Exception as exc:
+            _append_history(app, {**metrics.snapshot(), "status": "error", "error": str(exc)})
+            raise
+        record = {**metrics.snapshot(), "status": "ok", "finished_at": datetime.utcnow().isoformat()}
+        _append_history(app, record)
+        _set_state(
+            status="idle",
+            progress=100 if metrics.total else 0,
+            total=metrics.total,
+            error=None,
+            metrics=record,
+        )
+
+
+def _index_files(app, root: str, metrics: IndexRunMetrics) -> None:
+    existing = music_search._load_music_index_file()
+    batch_size = max(1, int(app.config.get("LIBRARY_INDEX_DB_BATCH_SIZE", 200)))
+    checkpoint_files = max(1, int(app.config.get("LIBRARY_INDEX_CHECKPOINT_INTERVAL_FILES", 500)))
+    checkpoint_seconds = float(app.config.get("LIBRARY_INDEX_CHECKPOINT_INTERVAL_SECONDS", 30))
 
-        existing_files = (existing or {}).get("files", {})
-        new_files: Dict[str, Dict] = {}
-        for idx, path in enumerate(music_search._walk_music()):
+    # Two streaming passes trade a directory walk for avoiding a potentially
+    # enormous in-memory list of every path.  The walk order is sorted, so a
+    # checkpoint's last path is enough to resume it.
+    with metrics.phase("walk"):
+        metrics.total = sum(1 for _ in music_search._iter_music_paths())
+
+    checkpoint = IndexCheckpoint(_checkpoint_dir(app))
+    new_files: Dict[str, Dict] = {}
+    resume_after = None
+    journal_bytes = 0
+    restored = checkpoint.load(root)
+    if restored is not None:
+        entries, position = restored
+        new_files = {path: entry for path, entry in entries.items() if entry}
+        resume_after = position["last_path"]
+        journal_bytes = int(position["journal_bytes"])
+        metrics.resume(position.get("counts") or {})
+        if position.get("started_at"):
+            metrics.started_at = datetime.fromisoformat(position["started_at"])
+    checkpoint.open(journal_bytes)
+    _set_state(status="running", progress=_calculate_progress(metrics.processed, metrics.total), total=metrics.total, error=None, metrics=metrics.snapshot())
+
+    existing_files = (existing or {}).get("files", {})
+    pending_analysis: Dict[str, Dict] = {}
+    last_published = time.monotonic()
+    last_checkpoint = time.monotonic()
+    since_checkpoint = 0
+    last_path = resume_after
+    try:
+        for path in metrics.timed_iter(music_search._iter_music_paths(resume_after), "walk"):
             full = os.path.normpath(path)
+            entry = None
             try:
-                stat = os.stat(full)
+                with metrics.phase("stat"):
+                    stat = os.stat(full)
             except OSError:
-                progress = _calculate_progress(idx + 1, total)
-                _set_state(progress=progress)
-                continue
-            prev = existing_files.get(full)
-            if (
-                prev
-                and prev.get("mtime") == stat.st_mtime
-                and prev.get("size") == stat.st_size
-                and prev.get("metadata_reader_version") == music_search.METADATA_READER_VERSION
-            ):
-                new_files[full] = prev
-                progress = _calculate_progress(idx + 1, total)
-                _set_state(progress=progress)
-                continue
+                metrics.file_done("failed")
+            else:
+                prev = existing_files.get(full)
+                if (
+                    prev
+                    and prev.get("mtime") == stat.st_mtime
+                    and prev.get("size") == stat.st_size
+                    and prev.get("metadata_reader_version") == music_search.METADATA_READER_VERSION
+                ):
+                    entry = prev
+                    metrics.file_done("skipped")
+                else:
+                    try:
+                        with metrics.phase("tags"):
+                            tags = music_search._read_tags(full)
+                    except Exception:  # noqa: BLE001
+                        metrics.file_done("failed")
+                    else:
+                        entry = music_search._build_index_entry(full, root, stat, tags)
+                        pending_analysis[full] = tags
+                        metrics.file_done("changed" if prev else "new")
+                        if len(pending_analysis) >= batch_size:
+                            _update_analysis(pending_analysis, metrics)
+            if entry is not None:
+                new_files[full] = entry
+            checkpoint.record(full, entry)
+            last_path = path
+            since_checkpoint += 1
 
-            tags = music_search._read_tags(full)
-            rel_dir = os.path.relpath(os.path.dirname(full), root)
-            folder = "" if rel_dir == "." else rel_dir.replace(os.sep, "/")
-            search_parts = [
-                tags.get("title"),
-                tags.get("artist"),
-                tags.get("album_artist"),
-                tags.get("album"),
-                tags.get("composer"),
-                tags.get("genre"),
-                tags.get("year"),
-            ]
-            search_blob = " ".join(music_search._search_tokens(" ".join([str(p) for p in search_parts if p])))
-            entry = {
-                "path": full,
-                "title": tags.get("title"),
-                "artist": tags.get("artist"),
-                "album_artist": tags.get("album_artist"),
-                "album": tags.get("album"),
-                "composer": tags.get("composer"),
-                "genre": tags.get("genre"),
-                "year": tags.get("year"),
-                "folder": folder,
-                "mtime": stat.st_mtime,
-                "size": stat.st_size,
-                "search": search_blob,
-                "track_num": music_search._parse_track_number(tags.get("track")),
-                "disc_num": music_search._parse_track_number(tags.get("disc")),
-                "metadata_reader_version": music_search.METADATA_READER_VERSION,
-            }
-            new_files[full] = entry
-            progress = _calculate_progress(idx + 1, total)
-            _set_state(progress=progress)
-
-        payload = {"files": new_files, "generated_at": time.time(), "root": root}
-        music_search._write_music_index_file(payload)
-        music_search._MUSIC_INDEX_CACHE["data"] = payload
-        music_search._MUSIC_INDEX_CACHE["loaded_at"] = time.time()
-        music_search._MUSIC_INDEX_CACHE["root"] = root
-        _set_state(status="idle", progress=100 if total else 0, total=total, error=None)
+            if since_checkpoint >= checkpoint_files or time.monotonic() - last_checkpoint >= checkpoint_seconds:
+                # Analysis rows are committed first so the database never lags the checkpoint.
+                _update_analysis(pending_analysis, metrics)
+                with metrics.phase("checkpoint"):
+                    checkpoint.commit(root, last_path, metrics.counts, metrics.started_at.isoformat())
+                since_checkpoint = 0
+                last_checkpoint = time.monotonic()
+
+            if time.monotonic() - last_published >= _STATE_UPDATE_INTERVAL:
+                _yield_to_priority_jobs(app, metrics)
+                last_published = time.monotonic()
+                _set_state(progress=_calculate_progress(metrics.processed, metrics.total), metrics=metrics.snapshot())
+
+        _update_analysis(pending_analysis, metrics)
+    finally:
+        checkpoint.close()
+    metrics.counts["removed"] = sum(1 for path in existing_files if path not in new_files)
+    _publish_index(app, root, new_files, metrics)
+    checkpoint.clear()
+
+
+def _priority_marker_path(app) -> str:
+    return os.path.join(app.instance_path, "library-index.priority")
+
+
+def _yield_to_priority_jobs(app, metrics: IndexRunMetrics) -> None:
+    """Pause the full scan while a subtree re-index holds the priority marker.
+
+    A marker older than ``LIBRARY_INDEX_PRIORITY_MAX_WAIT_SECONDS`` is treated
+    as left over from a crashed job and ignored.
+    """
+    marker = _priority_marker_path(app)
+    max_wait = float(app.config.get("LIBRARY_INDEX_PRIORITY_MAX_WAIT_SECONDS", 300))
+    paused = False
+    with metrics.phase("priority_wait"):
+        while True:
+            try:
+                age = time.time() - os.path.getmtime(marker)
+            except OSError:
+                break
+            if age > max_wait:
+                break
+            if not paused:
+                paused = True
+                _set_state(status="paused", metrics=metrics.snapshot())
+            time.sleep(0.2)
+    if paused:
+        _set_state(status="running")
+
+
+def resolve_subtree(folder: str) -> Optional[str]:
+    """Map ``folder`` (relative to ``NAS_MUSIC_ROOT`` or absolute inside it) to a ``/`` path.
+
+    Returns ``None`` for the root itself, paths outside the root and missing folders.
+    """
+    root = current_app.config.get("NAS_MUSIC_ROOT")
+    if not root or not folder:
+        return None
+    root_norm = os.path.normpath(root)
+    full = os.path.normpath(os.path.join(root_norm, folder.strip()))
+    try:
+        if os.path.commonpath([full, root_norm]) != root_norm or full == root_norm:
+            return None
+    except ValueError:
+        return None
+    if not os.path.isdir(full):
+        return None
+    return os.path.relpath(full, root_norm).replace(os.sep, "/")
+
+
+def _set_subtree_state(folder: str, **updates: object) -> None:
+    with _state_lock:
+        state = _subtree_jobs.setdefault(folder, {})
+        state.update(updates)
+        state["updated_at"] = datetime.utcnow().isoformat()
+
+
+def _index_subtree(app, folder: str) -> Dict[str, object]:
+    """Re-index one folder and merge it into the live index in a single write."""
+    root = app.config.get("NAS_MUSIC_ROOT")
+    live_files = music_search._load_music_index_file().get("files") or {}
+    entries: Dict[str, Dict] = {}
+    counts = {"new": 0, "changed": 0, "skipped": 0, "failed": 0, "removed": 0}
+    for path in music_search._iter_music_paths(subdir=folder):
+        full = os.path.normpath(path)
+        try:
+            stat = os.stat(full)
+        except OSError:
+            counts["failed"] += 1
+            continue
+        prev = live_files.get(full)
+        if (
+            prev
+            and prev.get("mtime") == stat.st_mtime
+            and prev.get("size") == stat.st_size
+            and prev.get("metadata_reader_version") == music_search.METADATA_READER_VERSION
+        ):
+            entries[full] = prev
+            counts["skipped"] += 1
+            continue
+        entries[full] = music_search._build_index_entry(full, root, stat, music_search._read_tags(full))
+        counts["changed" if prev else "new"] += 1
+        _set_subtree_state(folder, processed=sum(counts.values()))
+
+    with music_search.index_write_lock():
+        index = music_search._load_music_index_file()
+        if index.get("root") != root:
+            index = {"files": {}, "root": root}
+        files = index.get("files") or {}
+        removed = [path for path, _ in music_search._index_folder_items(files, root, folder) if path not in entries]
+        for path in removed:
+            files.pop(path, None)
+        changed = {path: entry for path, entry in entries.items() if files.get(path) != entry}
+        files.update(entries)
+        counts["removed"] = len(removed)
+        previous_generated_at = index.get("generated_at")
+        now = time.time()
+        index["files"] = files
+        index["generated_at"] = now
+        index.setdefault("subtree_generations", {})[folder] = now
+        music_search._write_music_index_file(index)
+        music_search._MUSIC_INDEX_CACHE.update({"data": index, "loaded_at": now, "root": root})
+        music_search._patch_library_editor_index(changed, previous_generated_at, now, removed=removed)
+    return counts
+
+
+def start_subtree_index_job(folder: str) -> bool:
+    """Queue a priority re-index of ``folder`` (already validated by :func:`resolve_subtree`)."""
+    with _state_lock:
+        current = _subtree_jobs.get(folder)
+        if current and current.get("status") in {"queued", "running"}:
+            return False
+        _subtree_jobs[folder] = {
+            "status": "queued",
+            "processed": 0,
+            "counts": None,
+            "error": None,
+            "updated_at": datetime.utcnow().isoformat(),
+        }
+    app = current_app._get_current_object()
+    thread = threading.Thread(target=_run_subtree_job, args=(app, folder), daemon=True)
+    thread.start()
+    return True
+
+
+def _run_subtree_job(app, folder: str) -> None:
+    marker = _priority_marker_path(app)
+    with _subtree_run_lock:
+        try:
+            os.makedirs(os.path.dirname(marker), exist_ok=True)
+            with open(marker, "w", encoding="utf-8") as fh:
+                fh.write(folder)
+            _set_subtree_state(folder, status="running")
+            started = time.perf_counter()
+            with app.app_context():
+                counts = _index_subtree(app, folder)
+            _set_subtree_state(
+                folder,
+                status="idle",
+                counts=counts,
+                elapsed_seconds=round(time.perf_counter() - started, 3),
+                error=None,
+            )
+        except Exception as exc:  # noqa: BLE001
+            _set_subtree_state(folder, status="error", error=str(exc))
+        finally:
+            try:
+                os.remove(marker)
+            except OSError:
+                pass
 
 
 def start_library_index_job() -> bool:
     with _state_lock:
-        if _library_index_state.get("status") in {"running", "queued"}:
+        if _library_index_state.get("status") in {"running", "queued", "paused"}:
             return False
         _library_index_state["status"] = "queued"
         _library_index_state["progress"] = 0
@@ -148,4 +614,5 @@ def _run_job(app) -> None:
 def get_library_index_status() -> Dict[str, object]:
     with _state_lock:
         payload = dict(_library_index_state)
+        payload["subtrees"] = {folder: dict(state) for folder, state in _subtree_jobs.items()}
     return payload
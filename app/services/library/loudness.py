@@ -0,0 +1,201 @@
+"""EBU R128 loudness measurement for the music library.
+
+Each track is measured once with ffmpeg's ``ebur128`` filter (integrated
+loudness, loudness range and true peak) and the summary is stored on its
+``MusicAnalysis`` row.  :func:`run_loudness_batch` measures the tracks that
+are new or changed since their last measurement, running several ffmpeg
+processes side by side.  A track ffmpeg cannot measure stays unanalyzed and
+is tried again after ``LOUDNESS_ANALYSIS_RETRY_HOURS``.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from flask import current_app
+
+from app.logger import init_logger
+from app.models import MusicAnalysis, db
+from app.services.library.music_search import get_music_index
+
+logger = init_logger()
+
+_SUMMARY_PATTERNS = {
+    "loudness_lufs": re.compile(r"\bI:\s*(-?[\d.]+|-inf)\s*LUFS"),
+    "loudness_range_lu": re.compile(r"\bLRA:\s*(-?[\d.]+)\s*LU\b"),
+    "true_peak_dbtp": re.compile(r"\bPeak:\s*(-?[\d.]+|-inf)\s*dBFS"),
+}
+
+
+def parse_ebur128_summary(output: str) -> Optional[Dict[str, Optional[float]]]:
+    """Extract the summary block ffmpeg prints at the end of an ``ebur128`` run.
+
+    Silent tracks report ``-inf``; those values come back as ``None``.
+    Returns ``None`` when no summary is present (decode failure).
+    """
+    marker = output.rfind("Summary:")
+    if marker < 0:
+        return None
+    summary = output[marker:]
+    result: Dict[str, Optional[float]] = {}
+    for field, pattern in _SUMMARY_PATTERNS.items():
+        match = pattern.search(summary)
+        if not match or match.group(1) == "-inf":
+            result[field] = None
+            continue
+        try:
+            result[field] = float(match.group(1))
+        except ValueError:
+            result[field] = None
+    if all(value is None for value in result.values()) and "LUFS" not in summary:
+        return None
+    return result
+
+
+def measure_loudness(path: str, timeout: int = 300) -> Optional[Dict[str, Optional[float]]]:
+    """Run ffmpeg's ``ebur128`` filter over ``path`` and return the parsed summary.
+
+    Raises ``FileNotFoundError`` when ffmpeg is not installed so batch callers
+    can stop instead of marking every track as failed.
+    """
+    cmd = [
+        "ffmpeg",
+        "-nostdin",
+        "-hide_banner",
+        "-nostats",
+        "-threads",
+        "1",
+        "-i",
+        path,
+        "-map",
+        "0:a:0",
+        "-filter_complex",
+        "ebur128=peak=true",
+        "-f",
+        "null",
+        "-",
+    ]
+    try:
+        proc = subprocess.run(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+            check=False,
+        )
+    except subprocess.TimeoutExpired:
+        logger.warning("Loudness analysis timed out for %s", path)
+        return None
+    if proc.returncode != 0:
+        return None
+    return parse_ebur128_summary(proc.stderr.decode("utf-8", "replace"))
+
+
+def loudness_candidates(limit: Optional[int] = None) -> List[str]:
+    """Index paths never measured, or modified since their last measurement.
+
+    Tracks whose last measurement failed wait for their retry time.
+    """
+    files = get_music_index().get("files") or {}
+    measured = {
+        path: analyzed_at
+        for path, analyzed_at in MusicAnalysis.query.with_entities(
+            MusicAnalysis.path, MusicAnalysis.loudness_analyzed_at
+        ).filter(MusicAnalysis.loudness_analyzed_at.isnot(None))
+    }
+    waiting = {
+        path
+        for (path,) in MusicAnalysis.query.with_entities(MusicAnalysis.path).filter(
+            MusicAnalysis.loudness_retry_at > datetime.utcnow()
+        )
+    }
+    candidates: List[str] = []
+    for path in sorted(files):
+        if path in waiting:
+            continue
+        analyzed_at = measured.get(path)
+        mtime = files[path].get("mtime")
+        if analyzed_at is not None and (not mtime or analyzed_at >= datetime.utcfromtimestamp(mtime)):
+            continue
+        candidates.append(path)
+        if limit and len(candidates) >= limit:
+            break
+    return candidates
+
+
+def _store_loudness(
+    path: str,
+    values: Optional[Dict[str, Optional[float]]],
+    analyzed_at: datetime,
+    retry_hours: float = 24,
+) -> None:
+    """Store a measurement; a failed one (``values`` None) clears the old values and sets a retry time."""
+    analysis = MusicAnalysis.query.filter_by(path=path).first()
+    if analysis is None:
+        analysis = MusicAnalysis(path=path, missing_tags=False)
+        db.session.add(analysis)
+    measured = values or {}
+    analysis.loudness_lufs = measured.get("loudness_lufs")
+    analysis.loudness_range_lu = measured.get("loudness_range_lu")
+    analysis.true_peak_dbtp = measured.get("true_peak_dbtp")
+    analysis.loudness_analyzed_at = analyzed_at if values else None
+    analysis.loudness_retry_at = None if values else analyzed_at + timedelta(hours=retry_hours)
+    analysis.updated_at = analyzed_at
+
+
+def run_loudness_batch(limit: Optional[int] = None, max_workers: Optional[int] = None) -> Dict[str, object]:
+    """Measure up to ``limit`` pending tracks with ``max_workers`` concurrent ffmpeg runs.
+
+    Failed measurements leave the track unanalyzed with a retry time, so a
+    bad file does not come back every batch.  The summary includes
+    throughput so the scheduler log doubles as a benchmark.
+    """
+    limit = limit or int(current_app.config.get("LOUDNESS_ANALYSIS_BATCH_LIMIT", 200))
+    max_workers = max(1, int(max_workers or current_app.config.get("LOUDNESS_ANALYSIS_WORKERS", 2)))
+    timeout = int(current_app.config.get("LOUDNESS_ANALYSIS_TIMEOUT_SECONDS", 300))
+    retry_hours = float(current_app.config.get("LOUDNESS_ANALYSIS_RETRY_HOURS", 24))
+    candidates = loudness_candidates(limit)
+    summary: Dict[str, object] = {
+        "candidates": len(candidates),
+        "analyzed": 0,
+        "failed": 0,
+        "workers": max_workers,
+        "status": "ok",
+    }
+    if not candidates:
+        summary["elapsed_seconds"] = 0.0
+        return summary
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="loudness") as pool:
+        futures = {pool.submit(measure_loudness, path, timeout): path for path in candidates if os.path.exists(path)}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                values = future.result()
+            except FileNotFoundError:
+                summary["status"] = "ffmpeg_unavailable"
+                for pending in futures:
+                    pending.cancel()
+                break
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Loudness analysis failed for %s: %s", path, exc)
+                values = None
+            _store_loudness(path, values, datetime.utcnow(), retry_hours)
+            summary["analyzed" if values else "failed"] += 1
+    db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    done = summary["analyzed"] + summary["failed"]
+    summary["elapsed_seconds"] = round(elapsed, 3)
+    if elapsed > 0 and done:
+        per_minute = done * 60.0 / elapsed
+        summary["tracks_per_minute"] = round(per_minute, 2)
+        summary["tracks_per_minute_per_core"] = round(per_minute / max_workers, 2)
+    return summary
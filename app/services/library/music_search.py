@@ -1,10 +1,16 @@
 import os
 import json
 import hashlib
+import math
 import time
 import re
 import tempfile
-from typing import List, Dict, Optional, Tuple
+import threading
+import fcntl
+from contextlib import contextmanager
+from collections.abc import ItemsView, MutableMapping, ValuesView
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 from flask import current_app
 import requests
@@ -25,10 +31,18 @@ except Exception:  # noqa: BLE001
 from sqlalchemy.exc import DBAPIError, StatementError
 
 from app.models import db, MusicAnalysis, MusicCue
+from app.services.library.enrichment import (
+    LookupUnavailable,
+    cached_lookup,
+    fetch_json,
+    get_enrichment_suggestion,
+    normalize_lookup_key,
+)
 
 
 AUDIO_EXTS = (".mp3", ".flac", ".m4a", ".wav", ".ogg")
 METADATA_READER_VERSION = 3
+MUSIC_INDEX_FORMAT_VERSION = 1
 _MUSIC_INDEX_CACHE: Dict[str, Optional[object]] = {"data": None, "loaded_at": None, "root": None}
 _LIBRARY_EDITOR_INDEX_CACHE: Dict[str, Optional[object]] = {"data": None, "loaded_at": None, "root": None, "music_generated_at": None}
 
@@ -44,10 +58,180 @@ def _walk_music():
 
 
 def _music_index_path() -> str:
+    """Legacy single-document index, read only until the first sharded write."""
     return os.path.join(current_app.instance_path, "music_index.json")
 
 
+def _music_index_dir() -> str:
+    return os.path.join(current_app.instance_path, "music_index")
+
+
+def _music_index_manifest_path() -> str:
+    return os.path.join(_music_index_dir(), "manifest.json")
+
+
+def _music_index_shard_key(path: str, root: Optional[str]) -> str:
+    """Top-level folder of ``path`` under ``root``; ``""`` for files at the root."""
+    if not root:
+        return ""
+    try:
+        rel = os.path.relpath(path, root)
+    except ValueError:
+        return ""
+    parts = rel.split(os.sep)
+    if len(parts) < 2 or parts[0] == "..":
+        return ""
+    return parts[0]
+
+
+def atomic_write_json(path: str, payload: object, prefix: str) -> None:
+    """Write ``payload`` as JSON through a synced temp file, so readers see the old or the new file."""
+    fd, temp_path = tempfile.mkstemp(prefix=prefix, suffix=".json", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _read_music_index_manifest() -> Optional[Dict]:
+    try:
+        with open(_music_index_manifest_path(), "r", encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("format_version") != MUSIC_INDEX_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+class _ShardedItemsView(ItemsView):
+    def __iter__(self):
+        yield from self._mapping._iter_items()
+
+
+class _ShardedValuesView(ValuesView):
+    def __iter__(self):
+        for _, entry in self._mapping._iter_items():
+            yield entry
+
+
+class ShardedMusicFiles(MutableMapping):
+    """``files`` mapping of the sharded music index.
+
+    Shards (one per top-level folder) are read from disk on first access, so a
+    lookup or a patch touches only the folders involved.  Mutations mark their
+    shard dirty; :func:`_write_music_index_file` rewrites just those shards.
+    """
+
+    def __init__(self, directory: str, root: Optional[str], shards: Dict[str, Dict]):
+        self.directory = directory
+        self.root = root
+        self._records = dict(shards)
+        self._loaded: Dict[str, Dict[str, Dict]] = {}
+        self._dirty: set = set()
+        self._lock = threading.Lock()
+
+    def _read_shard(self, key: str) -> Dict[str, Dict]:
+        record = self._records.get(key)
+        if not record:
+            return {}
+        try:
+            with open(os.path.join(self.directory, record["file"]), "r", encoding="utf-8") as fh:
+                return json.load(fh) or {}
+        except FileNotFoundError:
+            # A newer write replaced this shard; follow the current manifest.
+            current = ((_read_music_index_manifest() or {}).get("shards") or {}).get(key)
+            return _read_shard_entries(self.directory, current)
+        except (OSError, ValueError):
+            return {}
+
+    def _shard(self, key: str) -> Dict[str, Dict]:
+        shard = self._loaded.get(key)
+        if shard is None:
+            with self._lock:
+                shard = self._loaded.get(key)
+                if shard is None:
+                    shard = self._read_shard(key)
+                    self._loaded[key] = shard
+        return shard
+
+    def shard_keys(self) -> List[str]:
+        return sorted(set(self._records) | set(self._loaded))
+
+    def shard_items(self, key: str) -> Iterable[Tuple[str, Dict]]:
+        return list(self._shard(key).items())
+
+    def dirty_shards(self) -> Dict[str, Dict[str, Dict]]:
+        return {key: self._loaded[key] for key in sorted(self._dirty)}
+
+    def records(self) -> Dict[str, Dict]:
+        return dict(self._records)
+
+    def _mark_written(self, records: Dict[str, Dict]) -> None:
+        self._records = dict(records)
+        self._dirty.clear()
+
+    def _iter_items(self):
+        for key in self.shard_keys():
+            yield from self.shard_items(key)
+
+    def __getitem__(self, path: str) -> Dict:
+        return self._shard(_music_index_shard_key(path, self.root))[path]
+
+    def __setitem__(self, path: str, entry: Dict) -> None:
+        key = _music_index_shard_key(path, self.root)
+        self._shard(key)[path] = entry
+        self._dirty.add(key)
+
+    def __delitem__(self, path: str) -> None:
+        key = _music_index_shard_key(path, self.root)
+        del self._shard(key)[path]
+        self._dirty.add(key)
+
+    def __iter__(self):
+        for path, _ in self._iter_items():
+            yield path
+
+    def __len__(self) -> int:
+        total = 0
+        for key in self.shard_keys():
+            if key in self._loaded:
+                total += len(self._loaded[key])
+            else:
+                total += int(self._records[key].get("count") or 0)
+        return total
+
+    def items(self):
+        return _ShardedItemsView(self)
+
+    def values(self):
+        return _ShardedValuesView(self)
+
+
+def _index_folder_items(files, root: Optional[str], folder: str) -> Iterable[Tuple[str, Dict]]:
+    """Index entries under ``folder`` (root-relative, ``/``-separated).
+
+    For a sharded index only the folder's top-level shard is read.
+    """
+    prefix = os.path.normpath(os.path.join(root or "", *folder.split("/")))
+    if isinstance(files, ShardedMusicFiles):
+        items = files.shard_items(folder.split("/")[0])
+    else:
+        items = list(files.items())
+    return [(path, entry) for path, entry in items if path == prefix or path.startswith(prefix + os.sep)]
+
+
 def _load_music_index_file() -> Dict:
+    manifest = _read_music_index_manifest()
+    if manifest is not None:
+        index = {key: value for key, value in manifest.items() if key not in {"shards", "format_version"}}
+        index["files"] = ShardedMusicFiles(_music_index_dir(), manifest.get("root"), manifest.get("shards") or {})
+        return index
     path = _music_index_path()
     if not os.path.exists(path):
         return {"files": {}, "generated_at": None, "root": None}
@@ -58,13 +242,67 @@ def _load_music_index_file() -> Dict:
         return {"files": {}, "generated_at": None, "root": None}
 
 
-def _write_music_index_file(payload: Dict) -> None:
-    path = _music_index_path()
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    fd, temp_path = tempfile.mkstemp(prefix="music-index-", suffix=".json", dir=os.path.dirname(path))
+def music_index_snapshot() -> Dict:
+    """The published index as read from disk, bypassing the in-memory cache.
+
+    ``root``, ``change_seq`` and the shard list come from one manifest.
+    Shards are read lazily, and one replaced by a later publish is read from
+    the newer manifest instead, so ``files`` can be ahead of ``change_seq``
+    (never behind).  Change-log consumers bounded by ``change_seq`` then
+    re-check those entries on their next refresh, which is harmless.
+    """
+    return _load_music_index_file()
+
+
+def _write_music_index_shard(directory: str, key: str, data: str, digest: str) -> str:
+    """Write one serialized shard under a content-addressed name and return the name."""
+    name = f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}-{digest[:16]}.json"
+    target = os.path.join(directory, name)
+    if os.path.exists(target):
+        return name
+    fd, temp_path = tempfile.mkstemp(prefix="music-index-shard-", suffix=".json", dir=directory)
     try:
         with os.fdopen(fd, "w", encoding="utf-8") as fh:
-            json.dump(payload, fh)
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return name
+
+
+def _music_index_change_log_path() -> str:
+    return os.path.join(_music_index_dir(), "changes.jsonl")
+
+
+def _read_shard_entries(directory: str, record: Optional[Dict]) -> Dict[str, Dict]:
+    if not record:
+        return {}
+    try:
+        with open(os.path.join(directory, record["file"]), "r", encoding="utf-8") as fh:
+            return json.load(fh) or {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _append_music_index_change(record: Dict) -> None:
+    """Append one change record; the log is trimmed to ``MUSIC_INDEX_CHANGE_LOG_LIMIT`` records."""
+    path = _music_index_change_log_path()
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(json.dumps(record) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+    limit = max(1, int(current_app.config.get("MUSIC_INDEX_CHANGE_LOG_LIMIT", 500)))
+    if record["seq"] % limit:
+        return
+    with open(path, "r", encoding="utf-8") as fh:
+        lines = fh.readlines()[-limit:]
+    fd, temp_path = tempfile.mkstemp(prefix="music-index-changes-", suffix=".jsonl", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            fh.writelines(lines)
             fh.flush()
             os.fsync(fh.fileno())
         os.replace(temp_path, path)
@@ -73,6 +311,168 @@ def _write_music_index_file(payload: Dict) -> None:
             os.remove(temp_path)
 
 
+def music_index_change_seq() -> int:
+    return int((_read_music_index_manifest() or {}).get("change_seq") or 0)
+
+
+def music_index_changes_since(seq: Optional[int], until: Optional[int] = None) -> Optional[Dict]:
+    """Paths added/changed (``upserted``) and ``removed`` since change ``seq``.
+
+    ``until`` stops at that change instead of the latest one; pass the
+    ``change_seq`` of a :func:`music_index_snapshot` so the changes match its
+    files.  Returns ``None`` when the log cannot answer (no ``seq``, the index
+    was rebuilt from scratch, or the records were trimmed); callers then fall
+    back to a full evaluation.
+    """
+    current = music_index_change_seq() if until is None else int(until)
+    if seq is None or seq > current:
+        return None
+    result = {"seq": current, "upserted": [], "removed": []}
+    if seq == current:
+        return result
+    records = []
+    try:
+        with open(_music_index_change_log_path(), "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if seq < int(record.get("seq") or 0) <= current:
+                    records.append(record)
+    except OSError:
+        return None
+    records.sort(key=lambda record: record["seq"])
+    if [record["seq"] for record in records] != list(range(seq + 1, current + 1)):
+        return None
+    state: Dict[str, bool] = {}
+    for record in records:
+        if record.get("reset"):
+            return None
+        for path in record.get("upserted") or []:
+            state[path] = True
+        for path in record.get("removed") or []:
+            state[path] = False
+    result["upserted"] = sorted(path for path, present in state.items() if present)
+    result["removed"] = sorted(path for path, present in state.items() if not present)
+    return result
+
+
+_index_lock_state = threading.local()
+
+
+@contextmanager
+def index_write_lock() -> Iterator[None]:
+    """Serialise read-modify-write cycles on the live index across processes.
+
+    Re-entrant within a thread, so a writer already holding the lock can call
+    :func:`_write_music_index_file`, which takes it as well.
+    """
+    depth = getattr(_index_lock_state, "depth", 0)
+    if depth:
+        _index_lock_state.depth = depth + 1
+        try:
+            yield
+        finally:
+            _index_lock_state.depth -= 1
+        return
+    lock_path = os.path.join(current_app.instance_path, "library-index.merge.lock")
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, "w", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        _index_lock_state.depth = 1
+        try:
+            yield
+        finally:
+            _index_lock_state.depth = 0
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _write_music_index_file(payload: Dict) -> None:
+    """Persist ``payload`` as a manifest plus one JSON shard per top-level folder.
+
+    Only shards whose content changed are written: a :class:`ShardedMusicFiles`
+    reports its dirty shards directly, and a plain ``files`` dict (full scans)
+    is grouped and compared against the manifest digests.  Shard files are
+    content-addressed and the manifest is replaced last, so readers always see
+    a complete generation.  The paths that changed are appended to the index
+    change log (see :func:`music_index_changes_since`).  The whole cycle runs
+    under :func:`index_write_lock`.
+    """
+    with index_write_lock():
+        _write_music_index_file_unlocked(payload)
+
+
+def _write_music_index_file_unlocked(payload: Dict) -> None:
+    directory = _music_index_dir()
+    os.makedirs(directory, exist_ok=True)
+    root = payload.get("root")
+    files = payload.get("files") or {}
+    manifest = _read_music_index_manifest()
+    previous: Dict[str, Dict] = (manifest or {}).get("shards") or {}
+    reset = manifest is None or manifest.get("root") != root
+    reusable = {} if reset else previous
+
+    if isinstance(files, ShardedMusicFiles) and files.directory == directory and files.root == root:
+        records = dict(reusable or files.records())
+        changed = files.dirty_shards()
+    else:
+        records = {}
+        changed = {key: {} for key in reusable}  # folders that vanished are written as empty
+        for path, entry in files.items():
+            changed.setdefault(_music_index_shard_key(path, root), {})[path] = entry
+
+    upserted: List[str] = []
+    removed: List[str] = []
+    for key, entries in changed.items():
+        prior = reusable.get(key)
+        data = digest = None
+        if entries:
+            data = json.dumps(entries, sort_keys=True, separators=(",", ":"))
+            digest = hashlib.sha1(data.encode("utf-8")).hexdigest()
+            if prior and prior.get("digest") == digest:
+                records[key] = prior
+                continue
+        if not reset:
+            old = _read_shard_entries(directory, prior)
+            upserted.extend(path for path, entry in entries.items() if old.get(path) != entry)
+            removed.extend(path for path in old if path not in entries)
+        if not entries:
+            records.pop(key, None)
+            continue
+        records[key] = {
+            "file": _write_music_index_shard(directory, key, data, digest),
+            "digest": digest,
+            "count": len(entries),
+            "generation": time.time(),
+        }
+
+    seq = int((manifest or {}).get("change_seq") or 0)
+    change = None
+    if reset or upserted or removed:
+        seq += 1
+        change = {"seq": seq, "at": time.time(), "reset": reset, "upserted": upserted, "removed": removed}
+    new_manifest = {key: value for key, value in payload.items() if key != "files"}
+    new_manifest.update({"format_version": MUSIC_INDEX_FORMAT_VERSION, "shards": records, "change_seq": seq})
+    atomic_write_json(_music_index_manifest_path(), new_manifest, "music-index-manifest-")
+    if isinstance(files, ShardedMusicFiles):
+        files._mark_written(records)
+    payload["change_seq"] = seq
+    if change is not None:
+        _append_music_index_change(change)
+
+    live = {record["file"] for record in records.values()}
+    for record in previous.values():
+        if record.get("file") not in live:
+            try:
+                os.remove(os.path.join(directory, record["file"]))
+            except OSError:
+                pass
+    legacy = _music_index_path()
+    if os.path.exists(legacy):
+        os.remove(legacy)
+
+
 def _library_editor_index_path() -> str:
     return os.path.join(current_app.instance_path, "library_editor_index.json")
 
@@ -137,44 +537,47 @@ def build_music_index(existing: Optional[Dict] = None) -> Dict:
         analysis = MusicAnalysis.query.filter_by(path=full).first()
         if not analysis or _analysis_needs_stats(analysis):
             _ensure_analysis(full, tags)
-        rel_dir = os.path.relpath(os.path.dirname(full), root)
-        folder = "" if rel_dir == "." else rel_dir.replace(os.sep, "/")
-        search_parts = [
-            tags.get("title"),
-            tags.get("artist"),
-            tags.get("album_artist"),
-            tags.get("album"),
-            tags.get("composer"),
-            tags.get("genre"),
-            tags.get("year"),
-        ]
-        search_blob = " ".join(_search_tokens(" ".join([str(p) for p in search_parts if p])))
-        entry = {
-            "path": full,
-            "title": tags.get("title"),
-            "artist": tags.get("artist"),
-            "album_artist": tags.get("album_artist"),
-            "album": tags.get("album"),
-            "composer": tags.get("composer"),
-            "isrc": tags.get("isrc"),
-            "genre": tags.get("genre"),
-            "mood": tags.get("mood"),
-            "explicit": tags.get("explicit"),
-            "year": tags.get("year"),
-            "folder": folder,
-            "mtime": stat.st_mtime,
-            "size": stat.st_size,
-            "search": search_blob,
-            "track_num": _parse_track_number(tags.get("track")),
-            "disc_num": _parse_track_number(tags.get("disc")),
-            "metadata_reader_version": METADATA_READER_VERSION,
-        }
-        new_files[full] = entry
+        new_files[full] = _build_index_entry(full, root, stat, tags)
     payload = {"files": new_files, "generated_at": time.time(), "root": root}
     _write_music_index_file(payload)
     return payload
 
 
+def _build_index_entry(full: str, root: str, stat: os.stat_result, tags: Dict) -> Dict:
+    rel_dir = os.path.relpath(os.path.dirname(full), root)
+    folder = "" if rel_dir == "." else rel_dir.replace(os.sep, "/")
+    search_parts = [
+        tags.get("title"),
+        tags.get("artist"),
+        tags.get("album_artist"),
+        tags.get("album"),
+        tags.get("composer"),
+        tags.get("genre"),
+        tags.get("year"),
+    ]
+    search_blob = " ".join(_search_tokens(" ".join([str(p) for p in search_parts if p])))
+    return {
+        "path": full,
+        "title": tags.get("title"),
+        "artist": tags.get("artist"),
+        "album_artist": tags.get("album_artist"),
+        "album": tags.get("album"),
+        "composer": tags.get("composer"),
+        "isrc": tags.get("isrc"),
+        "genre": tags.get("genre"),
+        "mood": tags.get("mood"),
+        "explicit": tags.get("explicit"),
+        "year": tags.get("year"),
+        "folder": folder,
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "search": search_blob,
+        "track_num": _parse_track_number(tags.get("track")),
+        "disc_num": _parse_track_number(tags.get("disc")),
+        "metadata_reader_version": METADATA_READER_VERSION,
+    }
+
+
 def get_music_index(refresh: bool = False) -> Dict:
     ttl = current_app.config.get("MUSIC_INDEX_TTL", 60)
     root = current_app.config.get("NAS_MUSIC_ROOT")
@@ -232,82 +635,116 @@ def _is_surrogate_encode_error(exc: BaseException) -> bool:
     return False
 
 
-def build_library_editor_index(index: Dict | None = None) -> Dict:
-    index = index or get_music_index()
-    entries = list(index.get("files", {}).values())
-    recent_days = current_app.config.get("LIBRARY_EDITOR_RECENT_DAYS", 30)
-    recent_cutoff = time.time() - (recent_days * 86400)
-    cue_fields = (
-        "cue_in",
-        "intro",
-        "outro",
-        "cue_out",
-        "loop_in",
-        "loop_out",
-        "hook_in",
-        "hook_out",
-        "start_next",
-        "fade_in",
-        "fade_out",
-    )
-    normalized_paths = {
-        _utf8_safe_text(entry.get("path"))
-        for entry in entries
-        if entry.get("path")
-    }
+_COMPILATION_LABEL = "Various Artists / Compilations"
+_EDITOR_CUE_FIELDS = (
+    "cue_in",
+    "intro",
+    "outro",
+    "cue_out",
+    "loop_in",
+    "loop_out",
+    "hook_in",
+    "hook_out",
+    "start_next",
+    "fade_in",
+    "fade_out",
+)
+
+
+def _load_editor_cues(paths) -> Dict[str, Dict[str, float]]:
+    normalized_paths = {_utf8_safe_text(path) for path in paths if path}
     cues_by_path: Dict[str, Dict[str, float]] = {}
     if normalized_paths:
         # Load only cues for tracks in the music index (vastly reduces memory/DB load)
         # Convert set to list for query (SQLAlchemy .in_() requires iterable)
-        cues = MusicCue.query.filter(MusicCue.path.in_(list(normalized_paths))).all() if normalized_paths else []
+        cues = MusicCue.query.filter(MusicCue.path.in_(list(normalized_paths))).all()
         for cue in cues:
             normalized_cue_path = _utf8_safe_text(cue.path)
             cue_payload = {
                 field: getattr(cue, field)
-                for field in cue_fields
+                for field in _EDITOR_CUE_FIELDS
                 if getattr(cue, field) is not None
             }
             cues_by_path[normalized_cue_path] = cue_payload
+    return cues_by_path
+
+
+def _editor_browse_artist(artist: Optional[str], album_artist: Optional[str]) -> str:
+    artist = artist or "Unknown Artist"
+    album_artist = album_artist or ""
+    is_compilation = (
+        _is_compilation(album_artist)
+        or _is_compilation(artist)
+        or album_artist.strip().lower() in {"compilations", "compilation"}
+    )
+    if is_compilation:
+        return _COMPILATION_LABEL
+    return album_artist.strip() or artist
+
+
+def _editor_track_payload(entry: Dict, cues: Dict[str, float], recent_cutoff: float) -> Dict:
+    path = entry.get("path") or ""
+    return {
+        "title": entry.get("title") or os.path.splitext(os.path.basename(path))[0],
+        "path": path,
+        "artist": entry.get("artist") or "Unknown Artist",
+        "album_artist": entry.get("album_artist") or None,
+        "album": entry.get("album") or "Unknown Album",
+        "year": entry.get("year"),
+        "genre": entry.get("genre") or "Unknown Genre",
+        "composer": entry.get("composer"),
+        "isrc": entry.get("isrc"),
+        "mood": entry.get("mood"),
+        "explicit": entry.get("explicit"),
+        "folder": entry.get("folder"),
+        "track_num": entry.get("track_num"),
+        "disc_num": entry.get("disc_num"),
+        "cues": cues,
+        "missing_cues": not bool(cues),
+        "is_recent": (entry.get("mtime") or 0) >= recent_cutoff,
+    }
+
+
+def _editor_artist_sort_key(name: str):
+    return (name == _COMPILATION_LABEL, name.lower())
+
+
+def _editor_album_track_sort_key(track: Dict):
+    return (
+        track.get("disc_num") or 0,
+        track.get("track_num") or 0,
+        (track.get("title") or "").lower(),
+    )
+
+
+def _editor_genre_track_sort_key(track: Dict):
+    return (
+        (track.get("artist") or "").lower(),
+        (track.get("album") or "").lower(),
+        track.get("disc_num") or 0,
+        track.get("track_num") or 0,
+        (track.get("title") or "").lower(),
+    )
+
+
+def build_library_editor_index(index: Dict | None = None) -> Dict:
+    index = index or get_music_index()
+    entries = list(index.get("files", {}).values())
+    recent_days = current_app.config.get("LIBRARY_EDITOR_RECENT_DAYS", 30)
+    recent_cutoff = time.time() - (recent_days * 86400)
+    cues_by_path = _load_editor_cues(entry.get("path") for entry in entries)
     artists_map: Dict[str, Dict[str, Dict]] = {}
     genres_map: Dict[str, Dict] = {}
-    compilation_label = "Various Artists / Compilations"
     for entry in entries:
-        path = entry.get("path") or ""
-        title = entry.get("title") or os.path.splitext(os.path.basename(path))[0]
-        artist = entry.get("artist") or "Unknown Artist"
-        album_artist = entry.get("album_artist") or ""
-        browse_artist = album_artist.strip() or artist
-        album = entry.get("album") or "Unknown Album"
-        year = entry.get("year")
-        genre = entry.get("genre") or "Unknown Genre"
-        cues = cues_by_path.get(_utf8_safe_text(path), {})
-        is_recent = (entry.get("mtime") or 0) >= recent_cutoff
-        is_compilation = (
-            _is_compilation(album_artist)
-            or _is_compilation(artist)
-            or album_artist.strip().lower() in {"compilations", "compilation"}
+        track_payload = _editor_track_payload(
+            entry,
+            cues_by_path.get(_utf8_safe_text(entry.get("path") or ""), {}),
+            recent_cutoff,
         )
-        if is_compilation:
-            browse_artist = compilation_label
-        track_payload = {
-            "title": title,
-            "path": path,
-            "artist": artist,
-            "album_artist": album_artist or None,
-            "album": album,
-            "year": year,
-            "genre": genre,
-            "composer": entry.get("composer"),
-            "isrc": entry.get("isrc"),
-            "mood": entry.get("mood"),
-            "explicit": entry.get("explicit"),
-            "folder": entry.get("folder"),
-            "track_num": entry.get("track_num"),
-            "disc_num": entry.get("disc_num"),
-            "cues": cues,
-            "missing_cues": not bool(cues),
-            "is_recent": is_recent,
-        }
+        browse_artist = _editor_browse_artist(track_payload["artist"], track_payload["album_artist"])
+        album = track_payload["album"]
+        year = track_payload["year"]
+        genre = track_payload["genre"]
         artist_bucket = artists_map.setdefault(browse_artist, {})
         album_bucket = artist_bucket.setdefault(album, {"year": year, "genre": genre, "tracks": []})
         if not album_bucket.get("year") and year:
@@ -321,22 +758,13 @@ def build_library_editor_index(index: Dict | None = None) -> Dict:
         genre_bucket["artists"].add(browse_artist)
 
     music_artists = []
-    for artist_name in sorted(
-        artists_map.keys(),
-        key=lambda name: (name == compilation_label, name.lower()),
-    ):
+    for artist_name in sorted(artists_map.keys(), key=_editor_artist_sort_key):
         albums_map = artists_map[artist_name]
         albums_payload = []
         for album_name in sorted(albums_map.keys(), key=lambda name: name.lower()):
             album_payload = albums_map[album_name]
             tracks = album_payload.get("tracks", [])
-            tracks.sort(
-                key=lambda track: (
-                    track.get("disc_num") or 0,
-                    track.get("track_num") or 0,
-                    (track.get("title") or "").lower(),
-                )
-            )
+            tracks.sort(key=_editor_album_track_sort_key)
             albums_payload.append({
                 "name": album_name,
                 "year": album_payload.get("year"),
@@ -349,15 +777,7 @@ def build_library_editor_index(index: Dict | None = None) -> Dict:
     for genre_name in sorted(genres_map.keys(), key=lambda name: name.lower()):
         genre_payload = genres_map[genre_name]
         tracks = genre_payload.get("tracks", [])
-        tracks.sort(
-            key=lambda track: (
-                (track.get("artist") or "").lower(),
-                (track.get("album") or "").lower(),
-                track.get("disc_num") or 0,
-                track.get("track_num") or 0,
-                (track.get("title") or "").lower(),
-            )
-        )
+        tracks.sort(key=_editor_genre_track_sort_key)
         genres_payload.append({
             "name": genre_name,
             "artists": sorted(genre_payload.get("artists", set()), key=lambda name: name.lower()),
@@ -397,6 +817,121 @@ def build_library_editor_index(index: Dict | None = None) -> Dict:
     }
 
 
+def _insert_sorted(items: List[Dict], item: Dict, key) -> None:
+    item_key = key(item)
+    for idx, existing in enumerate(items):
+        if key(existing) > item_key:
+            items.insert(idx, item)
+            return
+    items.append(item)
+
+
+def _patch_library_editor_index(
+    new_entries: Dict[str, Dict],
+    previous_music_generated_at: Optional[float],
+    music_generated_at: float,
+    removed: Iterable[str] = (),
+) -> None:
+    """Swap the tracks for ``new_entries`` inside the cached editor index.
+
+    Tracks listed in ``removed`` are dropped.  Falls back to plain
+    invalidation when the cached index was not built from the music index
+    generation being patched.
+    """
+    root = current_app.config.get("NAS_MUSIC_ROOT")
+    disk = _load_library_editor_index_file()
+    data = disk.get("data")
+    if not data or disk.get("root") != root or disk.get("music_generated_at") != previous_music_generated_at:
+        invalidate_library_editor_index_cache()
+        return
+
+    paths = set(new_entries) | set(removed)
+    for artist in data.get("music", []):
+        for album in artist.get("albums", []):
+            album["tracks"] = [t for t in album.get("tracks", []) if t.get("path") not in paths]
+        artist["albums"] = [album for album in artist.get("albums", []) if album["tracks"]]
+    data["music"] = [artist for artist in data.get("music", []) if artist["albums"]]
+    for genre in data.get("genres", []):
+        genre["tracks"] = [t for t in genre.get("tracks", []) if t.get("path") not in paths]
+    data["genres"] = [genre for genre in data.get("genres", []) if genre["tracks"]]
+
+    recent_days = current_app.config.get("LIBRARY_EDITOR_RECENT_DAYS", 30)
+    recent_cutoff = time.time() - (recent_days * 86400)
+    cues_by_path = _load_editor_cues(new_entries)
+    artists = {artist["name"]: artist for artist in data["music"]}
+    genres = {genre["name"]: genre for genre in data["genres"]}
+    for path, entry in new_entries.items():
+        track = _editor_track_payload(entry, cues_by_path.get(_utf8_safe_text(path), {}), recent_cutoff)
+        browse_artist = _editor_browse_artist(track["artist"], track["album_artist"])
+        artist = artists.get(browse_artist)
+        if artist is None:
+            artist = {"name": browse_artist, "albums": []}
+            artists[browse_artist] = artist
+            _insert_sorted(data["music"], artist, lambda item: _editor_artist_sort_key(item["name"]))
+        album = next((item for item in artist["albums"] if item["name"] == track["album"]), None)
+        if album is None:
+            album = {"name": track["album"], "year": track["year"], "genre": track["genre"], "tracks": []}
+            _insert_sorted(artist["albums"], album, lambda item: item["name"].lower())
+        if not album.get("year") and track["year"]:
+            album["year"] = track["year"]
+        if not album.get("genre") and track["genre"]:
+            album["genre"] = track["genre"]
+        album["tracks"].append(track)
+        album["tracks"].sort(key=_editor_album_track_sort_key)
+
+        genre = genres.get(track["genre"])
+        if genre is None:
+            genre = {"name": track["genre"], "artists": [], "tracks": []}
+            genres[track["genre"]] = genre
+            _insert_sorted(data["genres"], genre, lambda item: item["name"].lower())
+        genre["tracks"].append(track)
+        genre["tracks"].sort(key=_editor_genre_track_sort_key)
+    for genre in data["genres"]:
+        genre["artists"] = sorted(
+            {_editor_browse_artist(t.get("artist"), t.get("album_artist")) for t in genre["tracks"]},
+            key=lambda name: name.lower(),
+        )
+
+    disk["data"] = data
+    disk["music_generated_at"] = music_generated_at
+    _write_library_editor_index_file(disk)
+    _LIBRARY_EDITOR_INDEX_CACHE.update({
+        "data": data,
+        "loaded_at": time.time(),
+        "root": root,
+        "music_generated_at": music_generated_at,
+    })
+
+
+def _patch_indexes(changed: Dict[str, Tuple[Dict, os.stat_result]]) -> None:
+    """Refresh only ``changed`` paths (``{path: (tags, stat)}``) in the on-disk indexes."""
+    root = current_app.config.get("NAS_MUSIC_ROOT")
+    # Same lock as full and subtree index publishes, so neither side's changes are lost.
+    with index_write_lock():
+        index = _load_music_index_file()
+        files = index.get("files")
+        if not files or not root or index.get("root") != root:
+            return
+        root_norm = os.path.normpath(root)
+        new_entries: Dict[str, Dict] = {}
+        for path, (tags, stat) in changed.items():
+            full = os.path.normpath(path)
+            try:
+                if os.path.commonpath([full, root_norm]) != root_norm:
+                    continue
+            except ValueError:
+                continue
+            new_entries[full] = _build_index_entry(full, root, stat, tags)
+        if not new_entries:
+            return
+        files.update(new_entries)
+        previous_generated_at = index.get("generated_at")
+        index["generated_at"] = time.time()
+        _write_music_index_file(index)
+        _MUSIC_INDEX_CACHE.update({"data": index, "loaded_at": time.time(), "root": root})
+        _patch_library_editor_index(new_entries, previous_generated_at, index["generated_at"])
+
+
 def get_library_editor_index(refresh: bool = False) -> Dict:
     ttl = current_app.config.get("LIBRARY_EDITOR_INDEX_TTL", 900)
     root = current_app.config.get("NAS_MUSIC_ROOT")
@@ -1091,6 +1626,11 @@ def _augment_with_analysis(tags: Dict) -> Dict:
         "bitrate": payload.get("bitrate") or analysis.bitrate,
         "hash": analysis.hash,
         "missing_tags": analysis.missing_tags,
+        "loudness_lufs": analysis.loudness_lufs,
+        "loudness_range_lu": analysis.loudness_range_lu,
+        "true_peak_dbtp": analysis.true_peak_dbtp,
+        "bpm": analysis.bpm,
+        "first_beat_seconds": analysis.first_beat_seconds,
         "cover_path": cover_path if os.path.exists(cover_path) else None,
         "cover_embedded": bool(tags.get("cover_embedded")),
     })
@@ -1102,12 +1642,39 @@ def lookup_musicbrainz(
     artist: Optional[str],
     limit: int = 5,
     include_releases: bool = False,
+    raise_unavailable: bool = False,
 ) -> List[Dict]:
-    """Query MusicBrainz for recordings (and optionally release variants) to suggest metadata including ISRC."""
+    """Query MusicBrainz for recordings (and optionally release variants) to suggest metadata including ISRC.
+
+    Answers, including empty ones, are cached per queried artist/title (case
+    and spacing folded) and requests share the MusicBrainz rate limiter.  Transient failures return an
+    empty list unless ``raise_unavailable`` is set, in which case
+    ``LookupUnavailable`` is raised so callers can retry later.
+    """
     if not title and not artist:
         return []
 
     limit = max(1, min(limit or 5, 15))
+    key = normalize_lookup_key(artist, title, limit, int(include_releases))
+    try:
+        results = cached_lookup(
+            "musicbrainz",
+            key,
+            lambda: _fetch_musicbrainz_recordings(title, artist, limit, include_releases),
+        )
+    except LookupUnavailable:
+        if raise_unavailable:
+            raise
+        return []
+    return results or []
+
+
+def _fetch_musicbrainz_recordings(
+    title: Optional[str],
+    artist: Optional[str],
+    limit: int,
+    include_releases: bool,
+) -> List[Dict]:
     query_parts = []
     if artist:
         query_parts.append(f'artist:"{artist}"')
@@ -1125,12 +1692,8 @@ def lookup_musicbrainz(
     ua = current_app.config.get("MUSICBRAINZ_USER_AGENT") or f"RAMS/1.0 ({current_app.config.get('STATION_NAME', 'RAMS')})"
     headers = {"User-Agent": ua}
 
-    try:
-        resp = requests.get("https://musicbrainz.org/ws/2/recording", params=params, headers=headers, timeout=8)
-        resp.raise_for_status()
-        payload = resp.json() or {}
-    except Exception:
-        return []
+    base_url = (current_app.config.get("MUSICBRAINZ_API_URL") or "https://musicbrainz.org/ws/2").rstrip("/")
+    payload = fetch_json("musicbrainz", f"{base_url}/recording", params, headers)
 
     results: List[Dict] = []
     for rec in payload.get("recordings", [])[:limit]:
@@ -1203,69 +1766,52 @@ def lookup_musicbrainz(
     return results
 
 
-def search_music(
-    query: Optional[str],
-    page: int = 1,
-    per_page: int = 50,
+def _norm_facet(val: Optional[str]) -> str:
+    return (val or "").strip().lower()
+
+
+def entry_matches(
+    entry: Dict,
+    query: Optional[str] = None,
     folder: Optional[str] = None,
     genre: Optional[str] = None,
     year: Optional[str] = None,
     mood: Optional[str] = None,
     explicit: Optional[bool] = None,
-) -> Dict:
-    index = get_music_index()
-    entries = list(index.get("files", {}).values())
-    query_lower = (query or "").lower().strip()
-
+) -> bool:
+    """Whether one index entry passes the ``search_music`` query and filters."""
     if folder:
         folder = folder.strip().replace("\\", "/").strip("/")
-        entries = [e for e in entries if (e.get("folder") or "").startswith(folder)]
-
-    if query_lower and query_lower not in {"%", "*"}:
-        entries = [e for e in entries if _matches_search_query(e.get("search") or "", query_lower)]
-
-    def _norm(val: Optional[str]) -> str:
-        return (val or "").strip().lower()
+        if not (entry.get("folder") or "").startswith(folder):
+            return False
+    query_lower = (query or "").lower().strip()
+    if query_lower and query_lower not in {"%", "*"} and not _matches_search_query(entry.get("search") or "", query_lower):
+        return False
+    if genre and _norm_facet(entry.get("genre")) != _norm_facet(genre):
+        return False
+    if mood and _norm_facet(entry.get("mood")) != _norm_facet(mood):
+        return False
+    if year and str(entry.get("year") or "").strip() != str(year).strip():
+        return False
+    if explicit is not None and bool(entry.get("explicit")) is not explicit:
+        return False
+    return True
 
-    base_entries = entries[:]
-    genre_map = {(_norm(e.get("genre"))): e.get("genre") for e in base_entries if e.get("genre")}
-    mood_map = {(_norm(e.get("mood"))): e.get("mood") for e in base_entries if e.get("mood")}
-    genres = sorted(genre_map.values(), key=lambda v: _norm(v))
-    moods = sorted(mood_map.values(), key=lambda v: _norm(v))
-    years = sorted({str(e.get("year")) for e in base_entries if e.get("year")})
 
-    if genre:
-        genre_norm = _norm(genre)
-        entries = [e for e in entries if _norm(e.get("genre")) == genre_norm]
-    if mood:
-        mood_norm = _norm(mood)
-        entries = [e for e in entries if _norm(e.get("mood")) == mood_norm]
-    if year:
-        year_str = str(year).strip()
-        entries = [e for e in entries if str(e.get("year") or "").strip() == year_str]
-    if explicit is not None:
-        entries = [e for e in entries if bool(e.get("explicit")) is explicit]
-
-    entries.sort(
-        key=lambda e: (
-            (e.get("artist") or "").lower(),
-            1 if _is_compilation(e.get("album_artist")) else 0,
-            (e.get("album") or "").lower(),
-            e.get("disc_num") or 0,
-            e.get("track_num") or 0,
-            (e.get("title") or "").lower(),
-        )
+def search_sort_key(entry: Dict) -> Tuple:
+    return (
+        (entry.get("artist") or "").lower(),
+        1 if _is_compilation(entry.get("album_artist")) else 0,
+        (entry.get("album") or "").lower(),
+        entry.get("disc_num") or 0,
+        entry.get("track_num") or 0,
+        (entry.get("title") or "").lower(),
     )
 
-    total = len(entries)
-    page = max(1, page)
-    per_page = max(1, min(per_page, 100))
-    start = (page - 1) * per_page
-    end = start + per_page
-    page_entries = entries[start:end]
 
+def search_result_items(entries: Iterable[Dict]) -> List[Dict]:
     items: List[Dict] = []
-    for entry in page_entries:
+    for entry in entries:
         path = entry["path"]
         tags = {
             "path": path,
@@ -1279,6 +1825,10 @@ def search_music(
         payload = tags.copy()
         payload.update({
             "duration_seconds": analysis.duration_seconds if analysis else None,
+            "loudness_lufs": analysis.loudness_lufs if analysis else None,
+            "loudness_range_lu": analysis.loudness_range_lu if analysis else None,
+            "true_peak_dbtp": analysis.true_peak_dbtp if analysis else None,
+            "bpm": analysis.bpm if analysis else None,
             "folder": entry.get("folder"),
             "genre": entry.get("genre"),
             "mood": entry.get("mood"),
@@ -1288,6 +1838,37 @@ def search_music(
             "disc_num": entry.get("disc_num"),
         })
         items.append(payload)
+    return items
+
+
+def search_music(
+    query: Optional[str],
+    page: int = 1,
+    per_page: int = 50,
+    folder: Optional[str] = None,
+    genre: Optional[str] = None,
+    year: Optional[str] = None,
+    mood: Optional[str] = None,
+    explicit: Optional[bool] = None,
+) -> Dict:
+    index = get_music_index()
+    # Facets describe the query/folder matches before the facet filters narrow them.
+    base_entries = [e for e in index.get("files", {}).values() if entry_matches(e, query, folder=folder)]
+    genre_map = {(_norm_facet(e.get("genre"))): e.get("genre") for e in base_entries if e.get("genre")}
+    mood_map = {(_norm_facet(e.get("mood"))): e.get("mood") for e in base_entries if e.get("mood")}
+    genres = sorted(genre_map.values(), key=lambda v: _norm_facet(v))
+    moods = sorted(mood_map.values(), key=lambda v: _norm_facet(v))
+    years = sorted({str(e.get("year")) for e in base_entries if e.get("year")})
+
+    entries = [e for e in base_entries if entry_matches(e, genre=genre, year=year, mood=mood, explicit=explicit)]
+    entries.sort(key=search_sort_key)
+
+    total = len(entries)
+    page = max(1, page)
+    per_page = max(1, min(per_page, 100))
+    start = (page - 1) * per_page
+    end = start + per_page
+    items = search_result_items(entries[start:end])
 
     folders = sorted({e.get("folder") or "" for e in entries})
     return {
@@ -1309,49 +1890,167 @@ def get_track(path: str) -> Optional[Dict]:
     return _augment_with_analysis(tags)
 
 
-def scan_library() -> List[Dict]:
-    tracks = []
-    for path in _walk_music():
-        tags = _read_tags(path)
-        tracks.append(_augment_with_analysis(tags))
-    return tracks
+def _scan_sort_key(path: str, root: str) -> Tuple[str, ...]:
+    rel = os.path.relpath(path, root)
+    return tuple(rel.split(os.sep))
+
+
+def _iter_music_paths(start_after: Optional[str] = None, subdir: Optional[str] = None):
+    """Yield audio files under ``NAS_MUSIC_ROOT`` in a stable, sorted order.
+
+    Entries are ordered by their path components, so a page can resume from
+    the last path it returned: folders that sort entirely before
+    ``start_after`` are skipped without being listed.  ``subdir`` (relative to
+    the root, ``/``-separated) limits the walk to one folder.
+    """
+    root = current_app.config.get("NAS_MUSIC_ROOT")
+    if not root or not os.path.isdir(root):
+        return
+    cursor_key = _scan_sort_key(start_after, root) if start_after else None
+
+    def _walk(folder: str, prefix: Tuple[str, ...]):
+        try:
+            with os.scandir(folder) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            return
+        for entry in entries:
+            key = prefix + (entry.name,)
+            try:
+                # Like os.walk: never follow symlinked folders, so a link loop cannot repeat files.
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            if is_dir:
+                if cursor_key is not None and key < cursor_key and cursor_key[: len(key)] != key:
+                    continue
+                yield from _walk(entry.path, key)
+            elif entry.name.lower().endswith(AUDIO_EXTS):
+                if cursor_key is not None and key <= cursor_key:
+                    continue
+                yield entry.path
+
+    if subdir:
+        parts = tuple(part for part in subdir.split("/") if part)
+        yield from _walk(os.path.join(root, *parts), parts)
+    else:
+        yield from _walk(root, ())
+
+
+_SCAN_SUMMARY_FIELDS = (
+    "path",
+    "title",
+    "artist",
+    "album",
+    "genre",
+    "year",
+    "bitrate",
+    "duration_seconds",
+    "hash",
+    "missing_tags",
+    "cover_path",
+    "cover_embedded",
+)
+
+
+def _scan_summary(track: Dict) -> Dict:
+    """Drop heavy fields (waveform peaks, raw tags) so scan pages stay small."""
+    return {field: track.get(field) for field in _SCAN_SUMMARY_FIELDS}
+
+
+def _scan_track(path: str) -> Optional[Dict]:
+    try:
+        return _scan_summary(_augment_with_analysis(_read_tags(path)))
+    except Exception as exc:  # noqa: BLE001
+        current_app.logger.warning("Library scan skipped %s: %s", path, exc)
+        return None
+
 
+def iter_library(cursor: Optional[str] = None):
+    """Stream track summaries (tags + analysis) in scan order, after ``cursor``."""
+    for path in _iter_music_paths(cursor):
+        track = _scan_track(path)
+        if track is not None:
+            yield track
 
-def find_duplicates_and_quality(tracks: List[Dict]):
-    by_hash = {}
-    duplicates = []
-    low_bitrate = []
-    needs_metadata = []
-    missing_art = []
-    recently_added = []
+
+def scan_library(cursor: Optional[str] = None, limit: Optional[int] = None) -> Dict:
+    """Return one page of the library scan.
+
+    ``next_cursor`` is the last path in the page; pass it back to continue.
+    It is ``None`` once the walk is exhausted.
+    """
+    limit = limit or int(current_app.config.get("MUSIC_SCAN_PAGE_SIZE", 200))
+    tracks: List[Dict] = []
+    paths = _iter_music_paths(cursor)
+    last_path = None
+    for path in paths:
+        last_path = path
+        track = _scan_track(path)
+        if track is not None:
+            tracks.append(track)
+        if len(tracks) >= limit:
+            break
+    has_more = next(paths, None) is not None
+    paths.close()
+    return {"tracks": tracks, "next_cursor": last_path if has_more else None}
+
+
+_QUALITY_CATEGORIES = ("duplicates", "low_bitrate", "needs_metadata", "missing_art", "recently_added")
+
+
+def find_duplicates_and_quality(
+    tracks: Iterable[Dict],
+    sink: Optional[Callable[[str, object], None]] = None,
+    sample_limit: Optional[int] = None,
+):
+    """Consume ``tracks`` once and report duplicate/quality findings.
+
+    Only the first ``sample_limit`` findings per category are kept in the
+    result (``counts`` holds the totals); every finding is also passed to
+    ``sink(category, item)`` as it is found so callers can persist the full
+    report without holding it in memory.  Duplicate detection keeps one
+    ``hash -> summary`` entry per distinct file.
+    """
+    if sample_limit is None:
+        sample_limit = int(current_app.config.get("MUSIC_SCAN_SAMPLE_LIMIT", 100))
+    by_hash: Dict[str, Dict] = {}
+    report: Dict[str, object] = {category: [] for category in _QUALITY_CATEGORIES}
+    counts = {category: 0 for category in _QUALITY_CATEGORIES}
+    scanned = 0
     now = datetime.utcnow().timestamp()
+
+    def _found(category: str, item) -> None:
+        counts[category] += 1
+        if len(report[category]) < sample_limit:
+            report[category].append(item)
+        if sink is not None:
+            sink(category, item)
+
     for t in tracks:
+        scanned += 1
         h = t.get("hash")
         if h:
             if h in by_hash:
-                duplicates.append([by_hash[h], t])
+                _found("duplicates", [by_hash[h], t])
             else:
-                by_hash[h] = t
+                by_hash[h] = {"path": t["path"], "title": t.get("title"), "artist": t.get("artist")}
         if t.get("bitrate") and t.get("bitrate") < 128000:
-            low_bitrate.append(t)
+            _found("low_bitrate", t)
         if t.get("missing_tags"):
-            needs_metadata.append(t)
+            _found("needs_metadata", t)
         cover_path = os.path.splitext(t["path"])[0] + ".jpg"
         if not os.path.exists(cover_path):
-            missing_art.append(t)
+            _found("missing_art", t)
         try:
             mtime = os.path.getmtime(t["path"])
             if now - mtime < 7 * 86400:
-                recently_added.append(t)
+                _found("recently_added", t)
         except Exception:
             pass
-    return {
-        "duplicates": duplicates,
-        "low_bitrate": low_bitrate,
-        "needs_metadata": needs_metadata,
-        "missing_art": missing_art,
-        "recently_added": recently_added,
-    }
+    report["counts"] = counts
+    report["scanned"] = scanned
+    return report
 
 
 def _parse_track_tuple(val: Optional[str]) -> Optional[Tuple[int, int]]:
@@ -1385,11 +2084,8 @@ def _is_compilation(album_artist: Optional[str]) -> bool:
     return lowered in {"various artists", "various", "va"}
 
 
-def update_metadata(path: str, updates: Dict, cover_art_bytes: Optional[bytes] = None) -> Dict:
-    """Update common tags with MP4-safe handling to avoid invalid-key errors."""
-    if not mutagen:
-        return {"status": "error", "message": "mutagen_required"}
-
+def _write_tags(path: str, updates: Dict, cover_art_bytes: Optional[bytes] = None) -> Dict:
+    """Write tag ``updates`` to ``path``; pure file I/O so it is safe to run in worker threads."""
     ext = os.path.splitext(path)[1].lower()
     try:
         if ext in {".m4a", ".mp4", ".m4b"}:
@@ -1468,25 +2164,90 @@ def update_metadata(path: str, updates: Dict, cover_art_bytes: Optional[bytes] =
                     data=cover_art_bytes,
                 ))
                 id3.save()
+        return {"status": "ok"}
+    except Exception as exc:  # noqa: BLE001
+        return {"status": "error", "message": str(exc)}
 
+
+def update_metadata(path: str, updates: Dict, cover_art_bytes: Optional[bytes] = None) -> Dict:
+    """Update common tags with MP4-safe handling to avoid invalid-key errors."""
+    if not mutagen:
+        return {"status": "error", "message": "mutagen_required"}
+    result = _write_tags(path, updates, cover_art_bytes)
+    if result.get("status") != "ok":
+        return result
+    try:
         tags = _read_tags(path)
         _ensure_analysis(path, tags)
+        _patch_indexes({path: (tags, os.stat(path))})
         return {"status": "ok"}
     except Exception as exc:  # noqa: BLE001
         return {"status": "error", "message": str(exc)}
 
 
-def bulk_update_metadata(paths: List[str], updates: Dict, cover_art_bytes: Optional[bytes] = None) -> Dict:
-    results = []
+def _write_and_reread(path: str, updates: Dict, cover_art_bytes: Optional[bytes]) -> Tuple[Dict, Optional[Dict], Optional[os.stat_result]]:
+    result = _write_tags(path, updates, cover_art_bytes)
+    if result.get("status") != "ok":
+        return result, None, None
+    try:
+        return result, _read_tags(path), os.stat(path)
+    except Exception as exc:  # noqa: BLE001
+        return {"status": "error", "message": str(exc)}, None, None
+
+
+def bulk_update_metadata(
+    paths: List[str],
+    updates: Dict,
+    cover_art_bytes: Optional[bytes] = None,
+    max_workers: Optional[int] = None,
+) -> Dict:
+    """Apply ``updates`` to many files in parallel and patch the indexes in place.
+
+    Tag writes and re-reads run on a thread pool (``METADATA_WRITE_WORKERS``);
+    database updates and index patches happen once, on the calling thread, for
+    the files that succeeded.  Each path gets its own status in ``results``.
+    """
     if not mutagen:
         return {"status": "error", "message": "mutagen_required"}
-    for path in paths:
-        outcome = {"path": path}
-        result = update_metadata(path, updates, cover_art_bytes)
-        outcome.update(result)
-        results.append(outcome)
-    db.session.commit()
-    return {"status": "ok", "results": results}
+    paths = list(dict.fromkeys(p for p in paths if p))
+    workers = max(1, int(max_workers or current_app.config.get("METADATA_WRITE_WORKERS", 4)))
+    outcomes: Dict[str, Dict] = {}
+    changed: Dict[str, Tuple[Dict, os.stat_result]] = {}
+    with ThreadPoolExecutor(max_workers=min(workers, max(1, len(paths))), thread_name_prefix="tag-writer") as pool:
+        futures = {pool.submit(_write_and_reread, path, updates, cover_art_bytes): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                result, tags, stat = future.result()
+            except Exception as exc:  # noqa: BLE001
+                result, tags, stat = {"status": "error", "message": str(exc)}, None, None
+            outcomes[path] = result
+            if tags is not None and stat is not None:
+                changed[path] = (tags, stat)
+
+    if changed:
+        analyses = {a.path: a for a in MusicAnalysis.query.filter(MusicAnalysis.path.in_(list(changed))).all()}
+        for path, (tags, _stat) in changed.items():
+            analysis = analyses.get(path)
+            if analysis is None or _analysis_needs_stats(analysis):
+                _ensure_analysis(path, tags)
+                continue
+            base_title = os.path.splitext(os.path.basename(path))[0]
+            analysis.missing_tags = not (tags.get("artist") and tags.get("title") and tags.get("title") != base_title)
+            if tags.get("bitrate"):
+                analysis.bitrate = tags["bitrate"]
+            analysis.updated_at = datetime.utcnow()
+        db.session.commit()
+        _patch_indexes(changed)
+
+    results = [{"path": path, **outcomes[path]} for path in paths]
+    succeeded = sum(1 for item in results if item.get("status") == "ok")
+    return {
+        "status": "ok",
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+    }
 
 
 def harvest_cover_art(path: str, tags: Optional[Dict] = None) -> Dict:
@@ -1610,23 +2371,29 @@ def enrich_metadata_external(tags: Dict) -> Dict:
 
     # AudioDB track lookup (open, no key required for basic fields)
     if artist and title:
-        try:
-            resp = requests.get(
-                "https://theaudiodb.com/api/v1/json/2/searchtrack.php",
-                params={"s": artist, "t": title},
-                timeout=8,
-            )
-            resp.raise_for_status()
-            payload = resp.json() or {}
+        base_url = (current_app.config.get("AUDIODB_API_URL") or "https://theaudiodb.com/api/v1/json/2").rstrip("/")
+
+        def _fetch_audiodb() -> Optional[Dict]:
+            payload = fetch_json("audiodb", f"{base_url}/searchtrack.php", {"s": artist, "t": title})
             tracks = payload.get("track") or []
-            if tracks:
-                t = tracks[0]
-                suggestions["genre"] = t.get("strGenre")
-                suggestions["mood"] = t.get("strMood")
-                suggestions["bpm"] = t.get("intTempo")
-                suggestions["key"] = t.get("strMusicVidDirector") or t.get("strStyle")
-        except Exception:
-            pass
+            return tracks[0] if tracks else None
+
+        try:
+            t = cached_lookup("audiodb", normalize_lookup_key(artist, title), _fetch_audiodb)
+        except LookupUnavailable:
+            t = None
+        if t:
+            suggestions["genre"] = t.get("strGenre")
+            suggestions["mood"] = t.get("strMood")
+            suggestions["bpm"] = t.get("intTempo")
+            suggestions["key"] = t.get("strMusicVidDirector") or t.get("strStyle")
+
+    # MusicBrainz suggestions gathered by the background enrichment queue
+    if tags.get("path"):
+        queued = get_enrichment_suggestion(tags["path"])
+        for field in ("album", "year", "isrc"):
+            if queued and queued.get(field) and not tags.get(field):
+                suggestions[field] = queued.get(field)
 
     # Placeholder for AcoustID / other services; only used if key configured
     acoustid_key = current_app.config.get("ACOUSTID_API_KEY")
@@ -1639,10 +2406,87 @@ def enrich_metadata_external(tags: Dict) -> Dict:
     return {"status": "ok", "suggestions": suggestions}
 
 
-def queues_snapshot():
-    tracks = scan_library()
-    metrics = find_duplicates_and_quality(tracks)
-    return {"tracks": tracks, "metrics": metrics}
+def _quality_report_path() -> str:
+    return os.path.join(current_app.instance_path, "library_quality_report.jsonl")
+
+
+def _quality_metrics_path() -> str:
+    return os.path.join(current_app.instance_path, "library_quality_metrics.json")
+
+
+_quality_lock = threading.Lock()
+_quality_thread: Optional[threading.Thread] = None
+
+
+def build_quality_report() -> Dict:
+    """Stream the whole library once and write the duplicate/quality report.
+
+    Findings are appended to ``library_quality_report.jsonl.partial`` as they
+    are found and the file is renamed into place when the pass completes; the
+    capped samples and counts are stored in ``library_quality_metrics.json``.
+    """
+    report_path = _quality_report_path()
+    partial_path = report_path + ".partial"
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(partial_path, "w", encoding="utf-8") as fh:
+
+        def _sink(category: str, item) -> None:
+            fh.write(json.dumps({"category": category, "item": item}) + "\n")
+            fh.flush()
+
+        metrics = find_duplicates_and_quality(iter_library(), sink=_sink)
+    os.replace(partial_path, report_path)
+    metrics["generated_at"] = datetime.utcnow().isoformat()
+    metrics_path = _quality_metrics_path()
+    fd, tmp_path = tempfile.mkstemp(prefix="library_quality_metrics.", dir=os.path.dirname(metrics_path))
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        json.dump(metrics, fh)
+    os.replace(tmp_path, metrics_path)
+    return metrics
+
+
+def _run_quality_report(app) -> None:
+    with app.app_context():
+        try:
+            build_quality_report()
+        except Exception as exc:  # noqa: BLE001
+            current_app.logger.warning("Library quality report failed: %s", exc)
+
+
+def start_quality_report() -> bool:
+    """Run :func:`build_quality_report` in a background thread unless one is running."""
+    global _quality_thread
+    with _quality_lock:
+        if _quality_thread is not None and _quality_thread.is_alive():
+            return False
+        app = current_app._get_current_object()
+        _quality_thread = threading.Thread(target=_run_quality_report, args=(app,), daemon=True)
+        _quality_thread.start()
+        return True
+
+
+def load_quality_metrics() -> Optional[Dict]:
+    try:
+        with open(_quality_metrics_path(), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def queues_snapshot(cursor: Optional[str] = None, limit: Optional[int] = None):
+    """One page of scanned tracks plus, on the first page, library-wide metrics.
+
+    The first page starts a background quality pass (see
+    :func:`build_quality_report`) and returns the metrics of the last
+    completed pass, or ``None`` before the first one finishes.
+    """
+    page = scan_library(cursor, limit)
+    if cursor:
+        return {**page, "metrics": None}
+    metrics = load_quality_metrics()
+    started = start_quality_report()
+    running = started or (_quality_thread is not None and _quality_thread.is_alive())
+    return {**page, "metrics": metrics, "metrics_running": running}
 
 
 def load_cue(path: str) -> Optional[MusicCue]:
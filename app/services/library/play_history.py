@@ -0,0 +1,63 @@
+"""Play history and playlist membership used to rank library files for caching.
+
+``play_key`` folds an artist/title pair to the key the logs and the library
+are matched on; the pre-transcode, preview and crate rotation passes all
+share it.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional, Set
+
+from flask import current_app
+
+from app.models import LogEntry
+
+
+def play_key(artist: Optional[str], title: Optional[str]) -> str:
+    """``artist|title`` with case, punctuation and spacing folded; letters of every script are kept."""
+
+    def _norm(value: Optional[str]) -> str:
+        return re.sub(r"[\W_]+", "", (value or "").casefold())
+
+    return f"{_norm(artist)}|{_norm(title)}"
+
+
+def recent_play_counts(days: int) -> Counter:
+    cutoff = datetime.utcnow() - timedelta(days=max(1, days))
+    counts: Counter = Counter()
+    rows = (
+        LogEntry.query.with_entities(LogEntry.artist, LogEntry.title)
+        .filter(LogEntry.entry_type == "music", LogEntry.timestamp >= cutoff)
+        .all()
+    )
+    for artist, title in rows:
+        if title:
+            counts[play_key(artist, title)] += 1
+    return counts
+
+
+def dj_playlist_paths() -> Set[str]:
+    """Paths referenced by saved DJ library playlists (``RAMS_PLAYLIST_V1`` files)."""
+    export_dir = os.path.join(current_app.instance_path, "dj_playlists")
+    paths: Set[str] = set()
+    if not os.path.isdir(export_dir):
+        return paths
+    for entry in os.scandir(export_dir):
+        if not entry.is_file() or not entry.name.lower().endswith(".txt"):
+            continue
+        try:
+            with open(entry.path, "r", encoding="utf-8", errors="replace") as fh:
+                for line in fh:
+                    if not line.strip() or line.startswith("#"):
+                        continue
+                    path = line.split("\t", 1)[0].strip()
+                    if path:
+                        paths.add(os.path.normpath(path))
+        except OSError:
+            continue
+    return paths
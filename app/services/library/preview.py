@@ -0,0 +1,246 @@
+"""Short, low-bitrate preview clips for auditioning library tracks.
+
+A preview is a few seconds of the track starting at its hook (or cue-in),
+encoded to mono MP3 and kept under ``instance/previews``.  The file name is
+derived from the source's path, mtime and size plus the clip settings, so an
+edited track or changed cue point simply produces a new clip and the old one
+ages out of the size-capped cache.  Clips are rendered on first request and
+ahead of time by :func:`run_preview_batch` for tracks that are likely to be
+auditioned.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from flask import current_app
+
+from app.logger import init_logger
+from app.models import MusicCue
+from app.services.cache_locks import cache_target_lock
+from app.services.library.music_search import get_music_index
+from app.services.library.play_history import dj_playlist_paths, play_key, recent_play_counts
+from app.services.render_cache import RenderSlots, cache_usage, prune_cache, render_to_cache, touch_cached
+
+logger = init_logger()
+
+_preview_slots = RenderSlots("PREVIEW_MAX_CONCURRENCY")
+_TEMP_PREFIX = "preview-"
+_prefetch_pool: ThreadPoolExecutor | None = None
+_prefetch_guard = threading.Lock()
+
+
+def preview_cache_dir() -> str:
+    cache_dir = os.path.join(current_app.instance_path, "previews")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def _preview_settings() -> Tuple[float, str]:
+    seconds = max(1.0, float(current_app.config.get("PREVIEW_CLIP_SECONDS", 30)))
+    bitrate = str(current_app.config.get("PREVIEW_BITRATE", "64k"))
+    return seconds, bitrate
+
+
+def preview_start_seconds(path: str) -> float:
+    """Where the clip starts: the hook if one is marked, else cue-in, else the top."""
+    cue = MusicCue.query.filter_by(path=path).first()
+    if cue is None:
+        return 0.0
+    for value in (cue.hook_in, cue.cue_in):
+        if value is not None and value >= 0:
+            return float(value)
+    return 0.0
+
+
+def preview_cache_name(path: str, start: float, seconds: float, bitrate: str) -> str:
+    stat = os.stat(path)
+    key_text = f"{path}:{stat.st_mtime}:{stat.st_size}:{start:.3f}:{seconds:.3f}:{bitrate}"
+    try:
+        key = os.fsencode(key_text)
+    except Exception:
+        key = key_text.encode("utf-8", "surrogatepass")
+    return f"{hashlib.sha1(key).hexdigest()}.mp3"
+
+
+def _render_preview(path: str, target: str, start: float, seconds: float, bitrate: str, timeout: int) -> bool:
+    """Encode the clip into ``target``; raises ``FileNotFoundError`` when ffmpeg is missing."""
+    return render_to_cache(
+        target,
+        lambda output: [
+            "ffmpeg",
+            "-nostdin",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-ss",
+            f"{start:.3f}",
+            "-t",
+            f"{seconds:.3f}",
+            "-i",
+            path,
+            "-vn",
+            "-ac",
+            "1",
+            "-c:a",
+            "libmp3lame",
+            "-b:a",
+            bitrate,
+            output,
+        ],
+        timeout=timeout,
+        temp_prefix=_TEMP_PREFIX,
+    )
+
+
+def _render_one(path: str, target: str, start: float, seconds: float, bitrate: str, timeout: int) -> str:
+    """Worker body, run outside the app context.  Returns rendered/cached/failed."""
+    if os.path.exists(target):
+        return "cached"
+    with cache_target_lock(target):
+        if os.path.exists(target):
+            return "cached"
+        return "rendered" if _render_preview(path, target, start, seconds, bitrate, timeout) else "failed"
+
+
+def _clip_job(path: str) -> Optional[Tuple[str, float, float, str]]:
+    """``(target, start, seconds, bitrate)`` for ``path``, or ``None`` if it is gone."""
+    seconds, bitrate = _preview_settings()
+    start = preview_start_seconds(path)
+    try:
+        name = preview_cache_name(path, start, seconds, bitrate)
+    except OSError:
+        return None
+    return os.path.join(preview_cache_dir(), name), start, seconds, bitrate
+
+
+def ensure_preview(path: str) -> Optional[str]:
+    """Return the cached preview for ``path``, rendering it now if needed.
+
+    ``None`` means no clip could be made (ffmpeg missing or decode failure)
+    and the caller should fall back to the full stream.
+    """
+    job = _clip_job(path)
+    if job is None:
+        return None
+    target, start, seconds, bitrate = job
+    if touch_cached(target):
+        return target
+    timeout = max(1, int(current_app.config.get("PREVIEW_TIMEOUT_SECONDS", 60)))
+    if not _preview_slots.acquire(timeout=timeout):
+        return None
+    try:
+        outcome = _render_one(path, target, start, seconds, bitrate, timeout)
+    except FileNotFoundError:
+        return None
+    finally:
+        _preview_slots.release()
+    return target if outcome != "failed" else None
+
+
+def prefetch_previews(paths: Sequence[str]) -> int:
+    """Queue background renders for ``paths``; returns how many were queued.
+
+    The shared pool has ``PREVIEW_MAX_WORKERS`` threads, so a burst of
+    prefetches from the library view cannot fan out into many ffmpeg runs.
+    """
+    global _prefetch_pool
+    timeout = max(1, int(current_app.config.get("PREVIEW_TIMEOUT_SECONDS", 60)))
+    with _prefetch_guard:
+        if _prefetch_pool is None:
+            workers = max(1, int(current_app.config.get("PREVIEW_MAX_WORKERS", 2)))
+            _prefetch_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview")
+    queued = 0
+    for path in paths:
+        job = _clip_job(path)
+        if job is None or os.path.exists(job[0]):
+            continue
+        _prefetch_pool.submit(_render_one, path, *job, timeout)
+        queued += 1
+    return queued
+
+
+def preview_candidates(limit: Optional[int] = None) -> List[str]:
+    """Library paths ranked by how likely they are to be auditioned.
+
+    Recently played tracks come first, then tracks on saved DJ playlists,
+    then the newest files in the library.
+    """
+    plays = recent_play_counts(int(current_app.config.get("PRETRANSCODE_RECENT_PLAY_DAYS", 30)))
+    playlist_paths = dj_playlist_paths()
+    ranked = []
+    for path, entry in (get_music_index().get("files") or {}).items():
+        play_count = plays.get(play_key(entry.get("artist"), entry.get("title")), 0)
+        ranked.append((-play_count, 0 if path in playlist_paths else 1, -(entry.get("mtime") or 0), path))
+    ranked.sort()
+    paths = [item[-1] for item in ranked]
+    return paths[:limit] if limit else paths
+
+
+def _estimated_clip_bytes(seconds: float, bitrate: str) -> int:
+    """Constant-bitrate size of a clip, so the batch can budget before encodes finish."""
+    text = bitrate.strip().lower()
+    try:
+        bits = float(text[:-1]) * 1000 if text.endswith("k") else float(text)
+    except ValueError:
+        return 0
+    return int(seconds * bits / 8)
+
+
+def run_preview_batch(limit: Optional[int] = None, max_workers: Optional[int] = None) -> Dict[str, object]:
+    """Render missing previews for the top ``limit`` candidates with a bounded pool.
+
+    Stops submitting once the cache reaches ``PREVIEW_CACHE_MAX_BYTES`` so the
+    batch never evicts clips it just rendered.
+    """
+    summary: Dict[str, object] = {"candidates": 0, "rendered": 0, "cached": 0, "failed": 0, "status": "ok"}
+    limit = limit or int(current_app.config.get("PREVIEW_BATCH_LIMIT", 300))
+    workers = max(1, int(max_workers or current_app.config.get("PREVIEW_MAX_WORKERS", 2)))
+    timeout = max(1, int(current_app.config.get("PREVIEW_TIMEOUT_SECONDS", 60)))
+    max_bytes = int(current_app.config.get("PREVIEW_CACHE_MAX_BYTES", 0) or 0)
+    jobs = []
+    for path in preview_candidates(limit):
+        job = _clip_job(path)
+        if job is not None:
+            jobs.append((path, job))
+    summary["candidates"] = len(jobs)
+    usage = cache_usage(preview_cache_dir(), temp_prefix=_TEMP_PREFIX, suffix=".mp3")[0] if max_bytes > 0 else 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview-batch") as pool:
+        futures = {}
+        for path, job in jobs:
+            if max_bytes > 0 and usage >= max_bytes:
+                summary["status"] = "cache_full"
+                break
+            if os.path.exists(job[0]):
+                summary["cached"] += 1
+                continue
+            futures[pool.submit(_render_one, path, *job, timeout)] = job[0]
+            usage += _estimated_clip_bytes(job[2], job[3])
+        for future in as_completed(futures):
+            try:
+                outcome = future.result()
+            except FileNotFoundError:
+                summary["status"] = "ffmpeg_unavailable"
+                for pending in futures:
+                    pending.cancel()
+                break
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Preview render failed for %s: %s", futures[future], exc)
+                outcome = "failed"
+            summary[outcome] += 1
+    summary["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+def prune_preview_cache(max_bytes: Optional[int] = None) -> int:
+    """Trim the preview cache to ``max_bytes``, least recently used first."""
+    if max_bytes is None:
+        max_bytes = int(current_app.config.get("PREVIEW_CACHE_MAX_BYTES", 0) or 0)
+    return prune_cache(preview_cache_dir(), max_bytes, temp_prefix=_TEMP_PREFIX, suffix=".mp3")
@@ -0,0 +1,141 @@
+"""Materialized result sets for :class:`~app.models.SavedSearch`.
+
+Each saved search keeps its matching paths, in ``search_music`` order, under
+``instance/saved_searches/<id>.json`` together with the index change sequence
+it reflects.  Opening the search reads that file and only re-checks the
+entries the index change log reports as added, changed or removed since.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from flask import current_app
+
+from app.models import SavedSearch
+from app.services.library import music_search
+
+
+def saved_search_criteria(saved: SavedSearch) -> Dict:
+    """``entry_matches`` keyword arguments for a saved search.
+
+    The library view saves ``explicit: false`` for "any", so only ``true``
+    narrows the results.
+    """
+    try:
+        filters = json.loads(saved.filters) if saved.filters else {}
+    except (TypeError, ValueError):
+        filters = {}
+    if not isinstance(filters, dict):
+        filters = {}
+    return {
+        "query": saved.query or "",
+        "folder": filters.get("folder") or None,
+        "genre": filters.get("genre") or None,
+        "year": str(filters.get("year")) if filters.get("year") else None,
+        "mood": filters.get("mood") or None,
+        "explicit": True if filters.get("explicit") is True else None,
+    }
+
+
+def _criteria_digest(criteria: Dict) -> str:
+    return hashlib.sha1(json.dumps(criteria, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _results_path(search_id: int) -> str:
+    return os.path.join(current_app.instance_path, "saved_searches", f"{search_id}.json")
+
+
+def _load_results(search_id: int) -> Dict:
+    try:
+        with open(_results_path(search_id), "r", encoding="utf-8") as fh:
+            return json.load(fh) or {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_results(search_id: int, payload: Dict) -> None:
+    path = _results_path(search_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    music_search.atomic_write_json(path, payload, "saved-search-")
+
+
+def discard_saved_search_results(search_id: int) -> None:
+    try:
+        os.remove(_results_path(search_id))
+    except OSError:
+        pass
+
+
+def _sort_key(entry: Dict) -> List:
+    # Stored as JSON, so keep the key a list to compare equal after a round trip.
+    return list(music_search.search_sort_key(entry))
+
+
+def refresh_saved_search(saved: SavedSearch, index: Optional[Dict] = None) -> List[str]:
+    """Return the saved search's matching paths, updating the stored set first.
+
+    Only entries named in the index change log are evaluated; a full pass
+    over the library happens when the search is new or edited, the index was
+    rebuilt, or the log no longer reaches back to the stored position.  The
+    changes are read up to the ``change_seq`` of the same index snapshot the
+    entries come from, so a publish in between is picked up next time.
+    """
+    criteria = saved_search_criteria(saved)
+    digest = _criteria_digest(criteria)
+    if index is None:
+        index = music_search.music_index_snapshot()
+    files = index.get("files") or {}
+    seq = index.get("change_seq")
+    stored = _load_results(saved.id)
+    changes = None
+    if seq is not None and stored.get("digest") == digest and stored.get("root") == index.get("root"):
+        changes = music_search.music_index_changes_since(stored.get("seq"), until=seq)
+
+    if changes is None:
+        matched = sorted(
+            [_sort_key(entry), path] for path, entry in files.items() if music_search.entry_matches(entry, **criteria)
+        )
+    else:
+        if not changes["upserted"] and not changes["removed"]:
+            return [path for _, path in stored.get("results") or []]
+        touched = set(changes["upserted"]) | set(changes["removed"])
+        matched = [item for item in stored.get("results") or [] if item[1] not in touched]
+        for path in changes["upserted"]:
+            entry = files.get(path)
+            if entry is not None and music_search.entry_matches(entry, **criteria):
+                bisect.insort(matched, [_sort_key(entry), path])
+        seq = changes["seq"]
+    _write_results(saved.id, {"digest": digest, "root": index.get("root"), "seq": seq, "results": matched})
+    return [path for _, path in matched]
+
+
+def saved_search_results(saved: SavedSearch, page: int = 1, per_page: int = 50) -> Dict:
+    """One page of a saved search, shaped like ``search_music`` items."""
+    index = music_search.music_index_snapshot()
+    paths = refresh_saved_search(saved, index)
+    page = max(1, page)
+    per_page = max(1, min(per_page, 100))
+    start = (page - 1) * per_page
+    files = index.get("files") or {}
+    entries = [entry for entry in (files.get(path) for path in paths[start : start + per_page]) if entry is not None]
+    return {
+        "id": saved.id,
+        "name": saved.name,
+        "items": music_search.search_result_items(entries),
+        "total": len(paths),
+        "page": page,
+        "per_page": per_page,
+    }
+
+
+def saved_search_count(saved: SavedSearch) -> Optional[int]:
+    """Result count from the stored set, without refreshing it."""
+    stored = _load_results(saved.id)
+    if stored.get("digest") != _criteria_digest(saved_search_criteria(saved)):
+        return None
+    return len(stored.get("results") or [])
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import ffmpeg
+from flask import current_app
+
+from app.logger import init_logger
+from app.services.cache_locks import cache_target_lock
+from app.services.library.music_search import get_music_index
+from app.services.library.play_history import dj_playlist_paths, play_key, recent_play_counts
+
+logger = init_logger()
+
+_transcode_slots: threading.BoundedSemaphore | None = None
+
+
+def is_alac(path: str) -> bool:
+    try:
+        probe = ffmpeg.probe(path)
+    except Exception:
+        return False
+    for stream in probe.get("streams", []):
+        if stream.get("codec_type") == "audio" and stream.get("codec_name") == "alac":
+            return True
+    return False
+
+
+def transcode_cache_dir() -> str:
+    cache_dir = os.path.join(current_app.instance_path, "transcodes")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def _transcode_slot() -> threading.BoundedSemaphore:
+    global _transcode_slots
+    if _transcode_slots is None:
+        count = max(1, int(current_app.config.get("TRANSCODE_MAX_CONCURRENCY", 2)))
+        _transcode_slots = threading.BoundedSemaphore(count)
+    return _transcode_slots
+
+
+def _cache_file_name(path: str) -> str:
+    stat = os.stat(path)
+    key_text = f"{path}:{stat.st_mtime}:{stat.st_size}"
+    try:
+        key = os.fsencode(key_text)
+    except Exception:
+        key = key_text.encode("utf-8", "surrogatepass")
+    return f"{hashlib.sha1(key).hexdigest()}.mp3"
+
+
+def transcode_cache_path(path: str) -> str:
+    return os.path.join(transcode_cache_dir(), _cache_file_name(path))
+
+
+def _run_transcode(path: str, target: str, cache_dir: str, timeout: int) -> bool:
+    """Encode ``path`` to ``target`` through a temp file so readers never see partial output."""
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(prefix="transcode-", suffix=".mp3", dir=cache_dir)
+        os.close(fd)
+        subprocess.run(
+            [
+                "ffmpeg",
+                "-nostdin",
+                "-hide_banner",
+                "-loglevel",
+                "error",
+                "-y",
+                "-i",
+                path,
+                "-vn",
+                "-c:a",
+                "libmp3lame",
+                "-b:a",
+                "192k",
+                temp_path,
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+        os.replace(temp_path, target)
+        temp_path = None
+        return True
+    except (OSError, subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def ensure_transcoded_mp3(path: str) -> str | None:
+    if not current_app.config.get("TRANSCODE_ALAC_TO_MP3", True):
+        return None
+    if os.path.splitext(path)[1].lower() != ".m4a":
+        return None
+    if not is_alac(path):
+        return None
+    try:
+        target = transcode_cache_path(path)
+    except OSError:
+        return None
+    if os.path.exists(target):
+        return target
+    lock = cache_target_lock(target)
+    timeout = max(1, int(current_app.config.get("TRANSCODE_TIMEOUT_SECONDS", 900)))
+    acquired_slot = False
+    try:
+        with lock:
+            if os.path.exists(target):
+                return target
+            acquired_slot = _transcode_slot().acquire(timeout=timeout)
+            if not acquired_slot:
+                return None
+            if not _run_transcode(path, target, transcode_cache_dir(), timeout):
+                return None
+    finally:
+        if acquired_slot:
+            _transcode_slot().release()
+    return target
+
+
+# ---------------------------------------------------------------------------
+# Background pre-transcode
+# ---------------------------------------------------------------------------
+
+
+def _pretranscode_state_path() -> str:
+    return os.path.join(current_app.instance_path, "pretranscode_state.json")
+
+
+def _load_pretranscode_state() -> Dict:
+    path = _pretranscode_state_path()
+    if not os.path.exists(path):
+        return {"not_alac": {}, "last_run": None}
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            payload = json.load(fh) or {}
+    except (OSError, ValueError):
+        return {"not_alac": {}, "last_run": None}
+    payload.setdefault("not_alac", {})
+    payload.setdefault("last_run", None)
+    return payload
+
+
+def _write_pretranscode_state(payload: Dict) -> None:
+    path = _pretranscode_state_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix="pretranscode-", suffix=".json", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def in_off_peak_window(now: Optional[datetime] = None) -> bool:
+    """Return True when ``now`` (local time) falls inside the configured off-peak hours."""
+    now = now or datetime.now()
+    start = int(current_app.config.get("PRETRANSCODE_OFF_PEAK_START_HOUR", 1)) % 24
+    end = int(current_app.config.get("PRETRANSCODE_OFF_PEAK_END_HOUR", 6)) % 24
+    if start == end:
+        return True
+    if start < end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def pretranscode_candidates(limit: Optional[int] = None) -> List[str]:
+    """Return uncached ``.m4a`` library paths, most likely to be previewed first.
+
+    Tracks played recently (per ``LogEntry`` music rows) come first, then tracks
+    referenced by saved DJ playlists, then the rest of the library.  Files that a
+    previous run probed as non-ALAC are skipped until they change on disk.
+    """
+    state = _load_pretranscode_state()
+    not_alac = state.get("not_alac") or {}
+    cache_dir = transcode_cache_dir()
+    plays = recent_play_counts(int(current_app.config.get("PRETRANSCODE_RECENT_PLAY_DAYS", 30)))
+    playlist_paths = dj_playlist_paths()
+    ranked = []
+    for path, entry in (get_music_index().get("files") or {}).items():
+        if os.path.splitext(path)[1].lower() != ".m4a":
+            continue
+        try:
+            name = _cache_file_name(path)
+        except OSError:
+            continue
+        if name in not_alac or os.path.exists(os.path.join(cache_dir, name)):
+            continue
+        play_count = plays.get(play_key(entry.get("artist"), entry.get("title")), 0)
+        ranked.append((-play_count, 0 if path in playlist_paths else 1, path))
+    ranked.sort()
+    paths = [path for _, _, path in ranked]
+    return paths[:limit] if limit else paths
+
+
+def _pretranscode_one(path: str, cache_dir: str, timeout: int) -> Tuple[str, Optional[str]]:
+    """Worker body: probe and encode one file.
+
+    Runs outside the app context, so everything it needs is passed in.  Returns
+    the outcome (transcoded/cached/not_alac/failed) and the cache file name.
+    """
+    try:
+        name = _cache_file_name(path)
+    except OSError:
+        return "failed", None
+    target = os.path.join(cache_dir, name)
+    if os.path.exists(target):
+        return "cached", name
+    if not is_alac(path):
+        return "not_alac", name
+    with cache_target_lock(target):
+        if os.path.exists(target):
+            return "cached", name
+        return ("transcoded" if _run_transcode(path, target, cache_dir, timeout) else "failed"), name
+
+
+def _cache_usage_bytes(cache_dir: str) -> int:
+    total = 0
+    for entry in os.scandir(cache_dir):
+        try:
+            if entry.is_file():
+                total += entry.stat().st_size
+        except OSError:
+            continue
+    return total
+
+
+def run_pretranscode_batch(
+    limit: Optional[int] = None,
+    max_workers: Optional[int] = None,
+    respect_window: bool = True,
+) -> Dict:
+    """Transcode uncached ALAC files with a bounded pool of ffmpeg workers.
+
+    New work stops being submitted once the off-peak window closes (when
+    ``respect_window`` is set) or the transcode cache reaches
+    ``TRANSCODE_CACHE_MAX_BYTES``; in-flight encodes are allowed to finish.
+    """
+    summary = {
+        "started_at": datetime.utcnow().isoformat(),
+        "finished_at": None,
+        "candidates": 0,
+        "transcoded": 0,
+        "cached": 0,
+        "not_alac": 0,
+        "failed": 0,
+        "stopped": None,
+    }
+    if not current_app.config.get("TRANSCODE_ALAC_TO_MP3", True):
+        summary["stopped"] = "disabled"
+        return summary
+    if respect_window and not in_off_peak_window():
+        summary["stopped"] = "outside_window"
+        return summary
+
+    limit = limit if limit is not None else int(current_app.config.get("PRETRANSCODE_BATCH_LIMIT", 500))
+    workers = max(1, int(max_workers or current_app.config.get("PRETRANSCODE_MAX_WORKERS", 2)))
+    timeout = max(1, int(current_app.config.get("TRANSCODE_TIMEOUT_SECONDS", 900)))
+    max_bytes = int(current_app.config.get("TRANSCODE_CACHE_MAX_BYTES", 0) or 0)
+    cache_dir = transcode_cache_dir()
+    candidates = pretranscode_candidates(limit)
+    summary["candidates"] = len(candidates)
+
+    state = _load_pretranscode_state()
+    not_alac = state.get("not_alac") or {}
+    usage = _cache_usage_bytes(cache_dir) if max_bytes > 0 else 0
+    pending = iter(candidates)
+    in_flight = {}
+
+    def _can_submit() -> bool:
+        if respect_window and not in_off_peak_window():
+            summary["stopped"] = "window_closed"
+            return False
+        if max_bytes > 0 and usage >= max_bytes:
+            summary["stopped"] = "cache_full"
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pretranscode") as pool:
+        while True:
+            while len(in_flight) < workers and _can_submit():
+                path = next(pending, None)
+                if path is None:
+                    break
+                in_flight[pool.submit(_pretranscode_one, path, cache_dir, timeout)] = path
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = in_flight.pop(future)
+                try:
+                    outcome, name = future.result()
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("Pre-transcode failed for %s: %s", path, exc)
+                    outcome, name = "failed", None
+                summary[outcome] += 1
+                if outcome == "not_alac" and name:
+                    not_alac[name] = path
+                elif outcome == "transcoded" and name and max_bytes > 0:
+                    try:
+                        usage += os.path.getsize(os.path.join(cache_dir, name))
+                    except OSError:
+                        pass
+
+    summary["finished_at"] = datetime.utcnow().isoformat()
+    state["not_alac"] = not_alac
+    state["last_run"] = summary
+    try:
+        _write_pretranscode_state(state)
+    except OSError as exc:
+        logger.warning("Unable to persist pre-transcode state: %s", exc)
+    logger.info(
+        "Pre-transcode run finished: %s transcoded, %s failed, %s skipped (stopped=%s).",
+        summary["transcoded"],
+        summary["failed"],
+        summary["not_alac"] + summary["cached"],
+        summary["stopped"],
+    )
+    return summary
+
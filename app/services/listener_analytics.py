@@ -4,7 +4,7 @@ import json
 import os
 import tempfile
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from flask import current_app
 
@@ -160,9 +160,9 @@ def load_listener_history(hours: Optional[int] = None) -> List[Dict[str, Any]]:
     return results
 
 
-def peak_listeners_for_show(show_name: str, start: datetime, end: datetime) -> Optional[int]:
-    """Return the highest recorded listener sample in a show window."""
-    peaks: List[int] = []
+def listener_samples_for_show(show_name: str, start: datetime, end: datetime) -> List[Tuple[datetime, int]]:
+    """Return ``(ts, listeners)`` samples recorded in a show window, oldest first."""
+    samples: List[Tuple[datetime, int]] = []
     hours = max(1, int((datetime.utcnow() - start).total_seconds() / 3600) + 1)
     for sample in load_listener_history(hours=hours):
         try:
@@ -171,5 +171,11 @@ def peak_listeners_for_show(show_name: str, start: datetime, end: datetime) -> O
         except (TypeError, ValueError):
             continue
         if start <= ts <= end and (not sample.get("show") or sample.get("show") == show_name):
-            peaks.append(listeners)
+            samples.append((ts, listeners))
+    return sorted(samples)
+
+
+def peak_listeners_for_show(show_name: str, start: datetime, end: datetime) -> Optional[int]:
+    """Return the highest recorded listener sample in a show window."""
+    peaks = [listeners for _ts, listeners in listener_samples_for_show(show_name, start, end)]
     return max(peaks) if peaks else None
@@ -0,0 +1,213 @@
+"""Continuous marathon recordings split into chunk files.
+
+A marathon is recorded by one ffmpeg process for the whole event: the
+segment muxer cuts the single upstream connection at every chunk boundary
+(``-segment_times``), so consecutive chunks are sample-continuous and a
+stream failure costs one reconnect rather than one per chunk.  Chunks are
+written into ``Marathons/<name>/<name>.segments/`` using the segmented
+recorder's manifest, so the live view can follow a marathon too.  Every
+attempt records the chunk it started in; segment ``n`` of an attempt
+belongs to chunk ``chunk_index + (n - start_number)``.  Once ffmpeg closes
+a chunk it is joined into the usual ``<label>_<date>_RAWDATA.mp3`` with a
+sidecar for the chunk window and ``parts`` for the integrity check.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.logger import init_logger
+from app.services.log_export import read_recording_metadata, recording_csv_path, write_recording_metadata
+from app.services.recording_segments import (
+    list_segments,
+    read_segment_manifest,
+    segment_directory,
+    write_segment_manifest,
+)
+
+logger = init_logger()
+
+
+def marathon_chunks(start: datetime, end: datetime, chunk_hours: int, safe_name: str) -> List[Dict]:
+    """Chunk windows of a marathon with the file label each one is recorded under."""
+    chunks: List[Dict] = []
+    current = start
+    while current < end:
+        chunk_end = min(current + timedelta(hours=chunk_hours), end)
+        label = f"{safe_name}_{current.strftime('%a_%I%p').lstrip('0')}_{chunk_end.strftime('%I%p').lstrip('0')}"
+        chunks.append({"index": len(chunks), "start": current, "end": chunk_end, "label": label})
+        current = chunk_end
+    return chunks
+
+
+def marathon_segment_dir(base_folder: str, safe_name: str) -> str:
+    return segment_directory(os.path.join(base_folder, f"{safe_name}.mp3"))
+
+
+def chunk_output_path(base_folder: str, chunk: Dict) -> str:
+    return os.path.join(base_folder, f"{chunk['label']}_{chunk['start'].strftime('%m-%d-%y')}_RAWDATA.mp3")
+
+
+def chunk_index_at(chunks: List[Dict], when: datetime) -> int:
+    for chunk in chunks:
+        if when < chunk["end"]:
+            return chunk["index"]
+    return chunks[-1]["index"]
+
+
+def segment_times_from(chunks: List[Dict], when: datetime) -> List[float]:
+    """Chunk boundaries still ahead of ``when``, in seconds from ``when``."""
+    return [(chunk["end"] - when).total_seconds() for chunk in chunks[:-1] if chunk["end"] > when]
+
+
+def next_segment_number(segment_dir: str) -> int:
+    """First number no attempt has used, including chunks already joined and removed."""
+    return int(read_segment_manifest(segment_dir).get("next_number") or 0)
+
+
+def chunk_segments(segment_dir: str) -> Dict[int, List[Dict]]:
+    """Segments on disk grouped by the chunk they belong to, in play order."""
+    attempts = {attempt["attempt"]: attempt for attempt in read_segment_manifest(segment_dir).get("attempts") or []}
+    grouped: Dict[int, List[Dict]] = {}
+    for segment in list_segments(segment_dir):
+        attempt = attempts.get(segment["attempt"]) or {}
+        if "chunk_index" not in attempt:
+            continue
+        offset = segment["number"] - int(attempt.get("start_number") or 0)
+        grouped.setdefault(int(attempt["chunk_index"]) + offset, []).append({
+            **segment,
+            # Only an attempt's first segment starts mid-chunk; the rest start on a boundary.
+            "started_at": attempt.get("started_at") if offset == 0 else None,
+        })
+    return grouped
+
+
+def closed_chunks(segment_dir: str, *, active_attempt: Optional[int] = None) -> List[int]:
+    """Chunks ffmpeg is done with: every segment closed, or left behind by an earlier attempt.
+
+    The chunk the active attempt is writing stays open even before that
+    attempt has produced its first segment file.
+    """
+    grouped = chunk_segments(segment_dir)
+    writing = None
+    if active_attempt is not None:
+        attempts = read_segment_manifest(segment_dir).get("attempts") or []
+        attempt = next((item for item in attempts if item.get("attempt") == active_attempt), None)
+        if attempt is not None and "chunk_index" in attempt:
+            closed_by_attempt = sum(
+                1
+                for segments in grouped.values()
+                for segment in segments
+                if segment["attempt"] == active_attempt and segment["complete"]
+            )
+            writing = int(attempt["chunk_index"]) + closed_by_attempt
+    return sorted(
+        index
+        for index, segments in grouped.items()
+        if (writing is None or index < writing)
+        and all(segment["complete"] or segment["attempt"] != active_attempt for segment in segments)
+    )
+
+
+def finish_marathon(segment_dir: str, *, keep_segments: bool = False, last_chunk: Optional[int] = None) -> bool:
+    """Mark the marathon's segment folder finished and remove it unless kept.
+
+    The folder is only removed once every chunk with audio has been joined;
+    chunks after ``last_chunk`` (cut off by a cancellation) are dropped.
+    Returns False when unjoined audio is left in the folder.
+    """
+    manifest = read_segment_manifest(segment_dir)
+    finalized = set(manifest.get("finalized_chunks") or [])
+    unjoined = [
+        index
+        for index in chunk_segments(segment_dir)
+        if index not in finalized and (last_chunk is None or index <= last_chunk)
+    ]
+    if manifest:
+        manifest["status"] = "incomplete" if unjoined else "complete"
+        manifest["finished_at"] = datetime.utcnow().isoformat()
+        write_segment_manifest(segment_dir, manifest)
+    if unjoined:
+        logger.warning("Marathon segments in %s kept: chunks %s were not joined.", segment_dir, unjoined)
+        return False
+    if not keep_segments:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+    return True
+
+
+def _utc(value: datetime) -> datetime:
+    """Local wall-clock time as naive UTC, like the recorder's sidecars."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def finalize_chunk(
+    segment_dir: str,
+    chunk: Dict,
+    output_path: str,
+    *,
+    show_name: str,
+    keep_segments: bool = False,
+) -> Optional[str]:
+    """Join the segments of one chunk into ``output_path`` and write its sidecar.
+
+    Part offsets are measured from the chunk's scheduled start, so a late
+    start or a reconnect inside the chunk shows up as a dropout.
+    """
+    segments = chunk_segments(segment_dir).get(chunk["index"]) or []
+    manifest = read_segment_manifest(segment_dir)
+    finalized = set(manifest.get("finalized_chunks") or [])
+    if not segments or chunk["index"] in finalized:
+        return None
+
+    parts: List[Dict] = []
+    position = 0
+    directory = os.path.dirname(output_path) or "."
+    fd, temporary = tempfile.mkstemp(prefix=".rams-stitch-", suffix=".mp3", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for segment in segments:
+                offset = 0.0
+                if segment["started_at"]:
+                    offset = max(0.0, (datetime.fromisoformat(segment["started_at"]) - chunk["start"]).total_seconds())
+                if not parts or parts[-1]["attempt"] != segment["attempt"]:
+                    parts.append({"attempt": segment["attempt"], "offset": round(offset, 3), "start_byte": position})
+                with open(os.path.join(segment_dir, segment["file"]), "rb") as handle:
+                    shutil.copyfileobj(handle, out, 1024 * 1024)
+                position += segment["size"]
+                parts[-1]["end_byte"] = position
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temporary, output_path)
+    finally:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+
+    metadata = read_recording_metadata(output_path)
+    metadata.update({
+        "schema_version": 1,
+        "show_name": show_name,
+        "dj": "",
+        "show_date": chunk["start"].date().isoformat(),
+        "show_start": _utc(chunk["start"]).isoformat(),
+        "show_end": _utc(chunk["end"]).isoformat(),
+        "log_file": os.path.basename(recording_csv_path(output_path)),
+        "parts": parts,
+        "updated_at": datetime.utcnow().isoformat(),
+    })
+    write_recording_metadata(output_path, metadata)
+
+    manifest = read_segment_manifest(segment_dir)
+    manifest["finalized_chunks"] = sorted(set(manifest.get("finalized_chunks") or []) | {chunk["index"]})
+    manifest["next_number"] = max(int(manifest.get("next_number") or 0), max(seg["number"] for seg in segments) + 1)
+    write_segment_manifest(segment_dir, manifest)
+    if not keep_segments:
+        for segment in segments:
+            try:
+                os.remove(os.path.join(segment_dir, segment["file"]))
+            except OSError:
+                pass
+    return output_path
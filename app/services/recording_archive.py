@@ -0,0 +1,261 @@
+"""Move old recordings from the primary recordings path to a cold archive tier.
+
+Recordings older than ``RECORDINGS_ARCHIVE_AFTER_DAYS`` (by show date, else
+file time) move to ``RECORDINGS_ARCHIVE_ROOT`` under the same relative path,
+together with their sidecar, log CSV and level timeline.  With
+``RECORDINGS_ARCHIVE_BITRATE`` set, MP3s above that bitrate are re-encoded
+on the way.  The catalog row follows the file (``tier = "archive"``) and
+remembers where it came from, so :func:`restore_recording` can put it back.
+:func:`plan_archive` is the dry run: it lists what would move and how many
+bytes the primary path would get back.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import mutagen  # type: ignore
+from flask import current_app
+from sqlalchemy import and_, or_
+
+from app.logger import init_logger
+from app.models import RecordingCatalog, db
+from app.services.log_export import read_recording_metadata, recording_csv_path, recording_metadata_path, write_recording_metadata
+from app.services.recording_levels import levels_timeline_path
+from app.services.recordings_catalog import ARCHIVE_TIER, PRIMARY_TIER, recording_roots, relocate_recording
+
+logger = init_logger()
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def archive_root() -> Optional[str]:
+    root = current_app.config.get("RECORDINGS_ARCHIVE_ROOT")
+    return os.path.abspath(root) if root else None
+
+
+def _primary_root() -> str:
+    return dict(recording_roots())[PRIMARY_TIER]
+
+
+def companion_paths(path: str) -> List[str]:
+    """Files that travel with a recording between tiers."""
+    return [recording_metadata_path(path), recording_csv_path(path), levels_timeline_path(path)]
+
+
+def parse_bitrate(value) -> Optional[int]:
+    """``"64k"`` / ``"64000"`` / ``64`` as bits per second; None when unset."""
+    if not value:
+        return None
+    text = str(value).strip().lower()
+    if text.endswith("k"):
+        return int(float(text[:-1]) * 1000)
+    number = float(text)
+    return int(number * 1000 if number < 1000 else number)
+
+
+def _source_bitrate(path: str) -> Optional[int]:
+    try:
+        audio = mutagen.File(path)
+    except Exception:
+        return None
+    return getattr(getattr(audio, "info", None), "bitrate", None) or None
+
+
+def _reencode_target(row: RecordingCatalog, bitrate: Optional[int]) -> Optional[int]:
+    """Bitrate to re-encode ``row`` to, or None to move it unchanged."""
+    if not bitrate or not row.path.lower().endswith(".mp3"):
+        return None
+    source = _source_bitrate(row.path)
+    return bitrate if source is None or source > bitrate else None
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _due_rows(cutoff: datetime):
+    return RecordingCatalog.query.filter(
+        RecordingCatalog.tier == PRIMARY_TIER,
+        or_(
+            and_(RecordingCatalog.show_date.isnot(None), RecordingCatalog.show_date < cutoff.date()),
+            and_(RecordingCatalog.show_date.is_(None), RecordingCatalog.modified_at < cutoff),
+        ),
+        or_(RecordingCatalog.restored_at.is_(None), RecordingCatalog.restored_at < cutoff),
+    ).order_by(RecordingCatalog.modified_at)
+
+
+def plan_archive(
+    *,
+    now: Optional[datetime] = None,
+    after_days: Optional[int] = None,
+    bitrate=None,
+    limit: Optional[int] = None,
+) -> Dict:
+    """What an archive pass would do, without touching any file.
+
+    ``primary_bytes_reclaimed`` is what leaves the primary path;
+    ``net_bytes_saved`` is what re-encoding saves overall (estimated from
+    duration and the target bitrate).
+    """
+    config = current_app.config
+    target_root = archive_root()
+    after_days = int(config.get("RECORDINGS_ARCHIVE_AFTER_DAYS", 180) if after_days is None else after_days)
+    bitrate = parse_bitrate(config.get("RECORDINGS_ARCHIVE_BITRATE") if bitrate is None else bitrate)
+    now = now or datetime.now()
+    cutoff = now - timedelta(days=after_days)
+    plan = {
+        "enabled": bool(target_root),
+        "archive_root": target_root,
+        "cutoff": cutoff.isoformat(),
+        "bitrate": bitrate,
+        "recordings": [],
+        "conflicts": [],
+        "primary_bytes_reclaimed": 0,
+        "archive_bytes_added": 0,
+        "net_bytes_saved": 0,
+    }
+    if not target_root:
+        return plan
+    primary_root = _primary_root()
+    query = _due_rows(cutoff)
+    for row in query.limit(limit) if limit else query:
+        target = os.path.join(target_root, os.path.relpath(row.path, primary_root))
+        if os.path.exists(target):
+            plan["conflicts"].append({"path": row.path, "target": target})
+            continue
+        companion_bytes = sum(_size(path) for path in companion_paths(row.path))
+        reencode = _reencode_target(row, bitrate)
+        archived_size = row.size_bytes
+        if reencode and row.duration_seconds:
+            archived_size = min(row.size_bytes, int(row.duration_seconds * reencode / 8))
+        plan["recordings"].append({
+            "path": row.path,
+            "target": target,
+            "show_date": row.show_date.isoformat() if row.show_date else None,
+            "size_bytes": row.size_bytes,
+            "companion_bytes": companion_bytes,
+            "archived_bytes": archived_size,
+            "reencode_bitrate": reencode,
+        })
+        plan["primary_bytes_reclaimed"] += row.size_bytes + companion_bytes
+        plan["archive_bytes_added"] += archived_size + companion_bytes
+    plan["net_bytes_saved"] = plan["primary_bytes_reclaimed"] - plan["archive_bytes_added"]
+    return plan
+
+
+def _reencode(source: str, target: str, bitrate: int) -> None:
+    directory = os.path.dirname(target)
+    fd, temporary = tempfile.mkstemp(prefix=".rams-archive-", suffix=".mp3", dir=directory)
+    os.close(fd)
+    command = [
+        "ffmpeg", "-y", "-i", source, "-vn", "-map_metadata", "0", "-codec:a", "libmp3lame",
+        "-b:a", str(bitrate), "-id3v2_version", "3", temporary,
+    ]
+    try:
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=3600)
+        if result.returncode != 0:
+            raise ArchiveError(result.stderr.decode(errors="ignore").strip()[-500:] or f"ffmpeg exited {result.returncode}")
+        os.replace(temporary, target)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+    os.remove(source)
+
+
+def _move_with_companions(source: str, target: str) -> None:
+    for companion_source, companion_target in zip(companion_paths(source), companion_paths(target)):
+        if os.path.exists(companion_source):
+            shutil.move(companion_source, companion_target)
+
+
+def archive_recording(row: RecordingCatalog, *, bitrate=None) -> RecordingCatalog:
+    """Move one primary-tier recording (and its companions) to the archive tier."""
+    target_root = archive_root()
+    if not target_root:
+        raise ArchiveError("RECORDINGS_ARCHIVE_ROOT is not set")
+    if row.tier != PRIMARY_TIER:
+        raise ArchiveError(f"{row.path} is already archived")
+    source = row.path
+    target = os.path.join(target_root, os.path.relpath(source, _primary_root()))
+    if os.path.exists(target):
+        raise ArchiveError(f"{target} already exists")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    reencode = _reencode_target(row, parse_bitrate(bitrate))
+    original_size = row.size_bytes
+    if reencode:
+        _reencode(source, target, reencode)
+    else:
+        shutil.move(source, target)
+    _move_with_companions(source, target)
+    if reencode:
+        metadata = read_recording_metadata(target)
+        # Byte ranges of stitched attempts do not survive re-encoding.
+        metadata.pop("parts", None)
+        metadata["archive"] = {"bitrate": reencode, "original_size": original_size}
+        write_recording_metadata(target, metadata)
+
+    row = relocate_recording(source, target, commit=False)
+    row.primary_path = source
+    row.archive_bitrate = f"{reencode // 1000}k" if reencode else None
+    row.archived_at = datetime.utcnow()
+    db.session.commit()
+    return row
+
+
+def restore_recording(row: RecordingCatalog) -> RecordingCatalog:
+    """Move an archived recording back to where it was archived from."""
+    if row.tier != ARCHIVE_TIER:
+        raise ArchiveError(f"{row.path} is not archived")
+    source = row.path
+    target = row.primary_path or os.path.join(_primary_root(), os.path.relpath(source, archive_root() or ""))
+    if os.path.exists(target):
+        raise ArchiveError(f"{target} already exists")
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.move(source, target)
+    _move_with_companions(source, target)
+
+    row = relocate_recording(source, target, commit=False)
+    row.primary_path = None
+    row.archived_at = None
+    row.restored_at = datetime.utcnow()
+    db.session.commit()
+    return row
+
+
+def run_archive_pass(*, dry_run: bool = False, now: Optional[datetime] = None, limit: Optional[int] = None) -> Dict:
+    """Archive everything :func:`plan_archive` selects; returns the plan plus per-file results."""
+    plan = plan_archive(now=now, limit=limit)
+    plan["dry_run"] = dry_run
+    plan["archived"] = 0
+    plan["bytes_reclaimed"] = 0
+    plan["failed"] = []
+    if dry_run or not plan["enabled"]:
+        return plan
+    bitrate = current_app.config.get("RECORDINGS_ARCHIVE_BITRATE")
+    for item in plan["recordings"]:
+        row = RecordingCatalog.query.filter_by(path=item["path"]).first()
+        if row is None:
+            continue
+        try:
+            archive_recording(row, bitrate=bitrate)
+            plan["archived"] += 1
+            plan["bytes_reclaimed"] += item["size_bytes"] + item["companion_bytes"]
+        except (OSError, ArchiveError, subprocess.SubprocessError) as exc:
+            db.session.rollback()
+            logger.warning("Unable to archive %s: %s", item["path"], exc)
+            plan["failed"].append({"path": item["path"], "error": str(exc)})
+    return plan
@@ -0,0 +1,201 @@
+"""Cut time-range clips out of recordings without re-encoding.
+
+ffmpeg seeks on the input (``-ss`` before ``-i``) and stream-copies the
+audio, so a clip costs a seek plus a copy of its own bytes wherever it sits
+in the recording.  Clips are cached under ``instance/recording_clips`` by a
+name derived from the recording's path, mtime and size plus the range, and
+the cache is trimmed to ``RECORDING_CLIP_CACHE_MAX_BYTES`` (least recently
+used first) whenever a new clip is written.
+
+A recording still being made is clipped from its closed segments: the
+chunks overlapping the range are joined into a scratch file and cut the
+same way, with the time lost between a failure and its retry collapsed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import os
+import re
+import tempfile
+from typing import Callable, List, Optional, Tuple
+
+from flask import current_app
+
+from app.logger import init_logger
+from app.services.cache_locks import cache_target_lock
+from app.services.recording_segments import list_segments
+from app.services.render_cache import RenderSlots, prune_cache, render_to_cache, touch_cached
+
+logger = init_logger()
+
+_clip_slots = RenderSlots("RECORDING_CLIP_MAX_CONCURRENCY")
+_TEMP_PREFIX = "clip-"
+_TIMESTAMP_RE = re.compile(r"^(?:(\d+):)?(\d{1,2}):(\d{1,2}(?:\.\d+)?)$")
+
+
+class ClipError(ValueError):
+    pass
+
+
+def clip_cache_dir() -> str:
+    cache_dir = os.path.join(current_app.instance_path, "recording_clips")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def parse_timestamp(value) -> float:
+    """Seconds from ``"90"``, ``"1:30"`` or ``"1:01:30.5"``."""
+    text = str(value if value is not None else "").strip()
+    match = _TIMESTAMP_RE.match(text)
+    try:
+        if match:
+            hours, minutes, seconds = match.groups()
+            result = int(hours or 0) * 3600 + int(minutes) * 60 + float(seconds)
+        else:
+            result = float(text)
+    except ValueError:
+        raise ClipError(f"Invalid time: {text or 'empty'}") from None
+    if result < 0 or not math.isfinite(result):
+        raise ClipError(f"Invalid time: {text}")
+    return result
+
+
+def clip_bounds(start, end, duration: Optional[float] = None) -> Tuple[float, float]:
+    """Validated ``(start, end)`` in seconds, clamped to the recording length when known."""
+    start, end = parse_timestamp(start), parse_timestamp(end)
+    if duration:
+        if start >= duration:
+            raise ClipError("Clip starts after the end of the recording")
+        end = min(end, duration)
+    if end <= start:
+        raise ClipError("Clip end must be after its start")
+    max_seconds = float(current_app.config.get("RECORDING_CLIP_MAX_SECONDS", 3600))
+    if end - start > max_seconds:
+        raise ClipError(f"Clips are limited to {int(max_seconds // 60)} minutes")
+    return round(start, 3), round(end, 3)
+
+
+def clip_cache_name(path: str, start: float, end: float) -> str:
+    stat = os.stat(path)
+    key_text = f"{path}:{stat.st_mtime}:{stat.st_size}:{start:.3f}:{end:.3f}"
+    try:
+        key = os.fsencode(key_text)
+    except Exception:
+        key = key_text.encode("utf-8", "surrogatepass")
+    extension = os.path.splitext(path)[1].lower() or ".mp3"
+    return f"{hashlib.sha1(key).hexdigest()}{extension}"
+
+
+def _cut_clip(path: str, target: str, start: float, end: float, timeout: int) -> bool:
+    """Stream-copy the range into ``target``; raises ``FileNotFoundError`` when ffmpeg is missing."""
+    return render_to_cache(
+        target,
+        lambda output: [
+            "ffmpeg",
+            "-nostdin",
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-y",
+            "-ss",
+            f"{start:.3f}",
+            "-i",
+            path,
+            "-t",
+            f"{end - start:.3f}",
+            "-map",
+            "0:a",
+            "-c",
+            "copy",
+            output,
+        ],
+        timeout=timeout,
+        temp_prefix=_TEMP_PREFIX,
+    )
+
+
+def ensure_clip(path: str, start: float, end: float) -> str:
+    """Return the cached clip of ``path`` between ``start`` and ``end``, cutting it if needed.
+
+    Raises :class:`ClipError` when the clip cannot be made and
+    ``FileNotFoundError`` when ffmpeg is missing.
+    """
+    target = os.path.join(clip_cache_dir(), clip_cache_name(path, start, end))
+    return _cached_clip(target, lambda timeout: _cut_clip(path, target, start, end, timeout))
+
+
+def _cached_clip(target: str, cut: Callable[[int], bool]) -> str:
+    if touch_cached(target):
+        return target
+    timeout = max(1, int(current_app.config.get("RECORDING_CLIP_TIMEOUT_SECONDS", 30)))
+    if not _clip_slots.acquire(timeout=timeout):
+        raise ClipError("Clip extraction is busy; try again shortly")
+    try:
+        with cache_target_lock(target):
+            if not os.path.exists(target) and not cut(timeout):
+                raise ClipError("Unable to cut this clip from the recording")
+    finally:
+        _clip_slots.release()
+    prune_clip_cache(keep=target)
+    return target
+
+
+def _segment_offset(segments: List[dict], seconds: float) -> float:
+    """Position of ``seconds`` (recording time) within the joined ``segments``; gaps take no time."""
+    position = 0.0
+    for segment in segments:
+        if seconds <= segment["start"]:
+            return position
+        if seconds <= segment["end"]:
+            return position + seconds - segment["start"]
+        position += segment["end"] - segment["start"]
+    return position
+
+
+def _cut_segment_clip(segment_dir: str, segments: List[dict], target: str, start: float, end: float, timeout: int) -> bool:
+    fd, joined = tempfile.mkstemp(prefix=_TEMP_PREFIX, suffix=".mp3", dir=os.path.dirname(target))
+    try:
+        with os.fdopen(fd, "wb") as output:
+            for segment in segments:
+                with open(os.path.join(segment_dir, segment["file"]), "rb") as handle:
+                    while True:
+                        block = handle.read(1024 * 1024)
+                        if not block:
+                            break
+                        output.write(block)
+        return _cut_clip(joined, target, _segment_offset(segments, start), _segment_offset(segments, end), timeout)
+    finally:
+        try:
+            os.remove(joined)
+        except OSError:
+            pass
+
+
+def ensure_segment_clip(segment_dir: str, start: float, end: float) -> str:
+    """Clip of a recording in progress, cut from the segments ffmpeg has closed.
+
+    Raises :class:`ClipError` when no closed segment overlaps the range yet
+    and ``FileNotFoundError`` when ffmpeg is missing.
+    """
+    segments = [
+        segment
+        for segment in list_segments(segment_dir)
+        if segment["complete"] and segment["end"] > start and segment["start"] < end
+    ]
+    if not segments:
+        raise ClipError("That part of the recording has not been written yet")
+    key_text = ":".join(
+        [segment_dir, f"{start:.3f}", f"{end:.3f}"] + [f"{item['file']}/{item['size']}" for item in segments]
+    )
+    name = hashlib.sha1(key_text.encode("utf-8", "surrogatepass")).hexdigest()
+    target = os.path.join(clip_cache_dir(), f"{name}.mp3")
+    return _cached_clip(target, lambda timeout: _cut_segment_clip(segment_dir, segments, target, start, end, timeout))
+
+
+def prune_clip_cache(max_bytes: Optional[int] = None, *, keep: Optional[str] = None) -> int:
+    """Trim the clip cache to ``max_bytes``, least recently used first."""
+    if max_bytes is None:
+        max_bytes = int(current_app.config.get("RECORDING_CLIP_CACHE_MAX_BYTES", 0) or 0)
+    return prune_cache(clip_cache_dir(), max_bytes, temp_prefix=_TEMP_PREFIX, keep=keep)
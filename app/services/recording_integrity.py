@@ -0,0 +1,222 @@
+"""Post-recording integrity check for show recordings.
+
+The verifier walks the MPEG audio frame headers of a recording (no decoding)
+to measure how much audio it really holds and where the bitstream is broken.
+It then lines the pieces of the recording up against their wall-clock
+starts to find dropouts: the main file and its ``_1``/``_2`` retry files in
+single mode, or the per-attempt byte ranges a segmented recording stores
+under ``parts`` in its sidecar.  The result is written to the recording's
+JSON sidecar under ``integrity``.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.services.log_export import read_recording_metadata, write_recording_metadata
+
+# Bitrates in kbit/s by (MPEG-1?, layer).
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+# Pieces that start within this many seconds of where the previous one ended are contiguous.
+GAP_TOLERANCE_SECONDS = 2.0
+
+
+def parse_frame_header(data, pos: int) -> Optional[Tuple[int, int, int]]:
+    """``(frame_bytes, samples, sample_rate)`` for a valid header at ``pos``, else None."""
+    if pos + 4 > len(data) or data[pos] != 0xFF or (data[pos + 1] & 0xE0) != 0xE0:
+        return None
+    version = (data[pos + 1] >> 3) & 0x03
+    layer_bits = (data[pos + 1] >> 1) & 0x03
+    bitrate_index = data[pos + 2] >> 4
+    rate_index = (data[pos + 2] >> 2) & 0x03
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][rate_index]
+    padding = (data[pos + 2] >> 1) & 0x01
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding, 576, sample_rate
+    return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+
+
+def _id3v2_size(data) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+def _resync(data, pos: int, end: int) -> Optional[int]:
+    """Next offset holding two consecutive valid frame headers (or one that ends the data)."""
+    pos = data.find(b"\xff", pos, end)
+    while pos != -1:
+        header = parse_frame_header(data, pos)
+        if header:
+            following = pos + header[0]
+            if following == end or (following < end and parse_frame_header(data, following)):
+                return pos
+        pos = data.find(b"\xff", pos + 1, end)
+    return None
+
+
+def scan_frames(data, start: int = 0, end: Optional[int] = None) -> Dict:
+    """Walk frame headers in ``data[start:end]``.
+
+    Returns the audio duration and frame count, plus ``corrupt`` regions
+    (bytes that are not valid frames), each with the audio time it follows
+    and a duration estimated from the average bitrate.  A final frame cut
+    short is reported under ``truncated_bytes``.
+    """
+    end = len(data) if end is None else min(end, len(data))
+    if end - start >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    pos = start
+    frames = 0
+    seconds = 0.0
+    audio_bytes = 0
+    corrupt: List[Dict] = []
+    truncated = 0
+    while pos < end:
+        header = parse_frame_header(data, pos)
+        if header is None:
+            resumed = _resync(data, pos + 1, end)
+            skipped = (resumed if resumed is not None else end) - pos
+            if resumed is None and skipped < 4:
+                truncated = skipped
+                break
+            corrupt.append({"byte": pos, "bytes": skipped, "at": round(seconds, 3)})
+            if resumed is None:
+                break
+            pos = resumed
+            continue
+        frame_bytes, samples, sample_rate = header
+        if pos + frame_bytes > end:
+            truncated = end - pos
+            break
+        frames += 1
+        seconds += samples / sample_rate
+        audio_bytes += frame_bytes
+        pos += frame_bytes
+    byte_rate = audio_bytes / seconds if seconds else 0.0
+    for region in corrupt:
+        region["duration"] = round(region["bytes"] / byte_rate, 3) if byte_rate else 0.0
+    return {"frames": frames, "seconds": seconds, "corrupt": corrupt, "truncated_bytes": truncated}
+
+
+def _parse_time(value) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def recording_parts(path: str, metadata: Dict) -> List[Dict]:
+    """Pieces of a recording with their wall-clock offset from the show start.
+
+    Byte ranges are relative to the first audio byte, so tags written after
+    the recording do not shift them.
+    """
+    if metadata.get("parts"):
+        return [
+            {
+                "path": path,
+                "offset": float(part.get("offset") or 0.0),
+                "start_byte": int(part.get("start_byte") or 0),
+                "end_byte": part.get("end_byte"),
+            }
+            for part in metadata["parts"]
+        ]
+    parts = [{"path": path, "offset": 0.0, "start_byte": 0, "end_byte": None}]
+    show_start = _parse_time(metadata.get("show_start"))
+    base, ext = os.path.splitext(path)
+    retry = 1
+    while os.path.isfile(f"{base}_{retry}{ext}"):
+        retry_path = f"{base}_{retry}{ext}"
+        retry_start = _parse_time(read_recording_metadata(retry_path).get("show_start"))
+        offset = (retry_start - show_start).total_seconds() if retry_start and show_start else None
+        parts.append({"path": retry_path, "offset": offset, "start_byte": 0, "end_byte": None})
+        retry += 1
+    return parts
+
+
+def _scan_part(part: Dict) -> Dict:
+    with open(part["path"], "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return scan_frames(b"")
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            audio_start = _id3v2_size(data)
+            end = part["end_byte"]
+            return scan_frames(
+                data,
+                audio_start + part["start_byte"],
+                audio_start + int(end) if end is not None else None,
+            )
+
+
+def verify_recording(path: str, *, min_coverage: float = 0.98, save: bool = True) -> Dict:
+    """Measure coverage and gaps for ``path`` and store them in its sidecar.
+
+    ``expected_seconds`` comes from the sidecar's show window; without one,
+    only the audio found is reported and coverage is None.
+    """
+    metadata = read_recording_metadata(path)
+    show_start = _parse_time(metadata.get("show_start"))
+    show_end = _parse_time(metadata.get("show_end"))
+    expected = (show_end - show_start).total_seconds() if show_start and show_end else None
+
+    gaps: List[Dict] = []
+    parts_report: List[Dict] = []
+    recorded = 0.0
+    cursor = 0.0
+    for part in recording_parts(path, metadata):
+        scan = _scan_part(part)
+        offset = part["offset"] if part["offset"] is not None else cursor
+        if offset - cursor > GAP_TOLERANCE_SECONDS:
+            gaps.append({"at": round(cursor, 3), "duration": round(offset - cursor, 3), "kind": "dropout"})
+        start = max(cursor, offset)
+        for region in scan["corrupt"]:
+            gaps.append({"at": round(start + region["at"], 3), "duration": region["duration"], "kind": "corrupt"})
+        if scan["truncated_bytes"]:
+            gaps.append({"at": round(start + scan["seconds"], 3), "duration": 0.0, "kind": "truncated"})
+        recorded += scan["seconds"]
+        cursor = start + scan["seconds"]
+        parts_report.append({
+            "file": os.path.basename(part["path"]),
+            "offset": round(start, 3),
+            "seconds": round(scan["seconds"], 3),
+            "frames": scan["frames"],
+        })
+    if expected is not None and expected - cursor > GAP_TOLERANCE_SECONDS:
+        gaps.append({"at": round(cursor, 3), "duration": round(expected - cursor, 3), "kind": "missing_end"})
+
+    coverage = min(1.0, recorded / expected) if expected else None
+    report = {
+        "checked_at": datetime.utcnow().isoformat(),
+        "expected_seconds": round(expected, 3) if expected is not None else None,
+        "recorded_seconds": round(recorded, 3),
+        "coverage": round(coverage, 4) if coverage is not None else None,
+        "min_coverage": min_coverage,
+        "ok": coverage >= min_coverage if coverage is not None else recorded > 0,
+        "gaps": gaps,
+        "parts": parts_report,
+    }
+    if save:
+        metadata["integrity"] = report
+        write_recording_metadata(path, metadata)
+    return report
@@ -0,0 +1,215 @@
+"""Level analysis of a recording while it is being captured.
+
+The recorder asks ffmpeg for a second output next to the MP3: the same
+input, decoded to mono 16-bit PCM at a low sample rate, written to stdout.
+:class:`LevelAnalyzer` reads that pipe, computes RMS and peak (dBFS) for
+every second, and hands each completed window to a callback.  The scheduler
+uses the callback to classify the window and feed the dead-air alerts.  The
+per-second timeline is kept in ``<recording>.levels.json`` next to the
+recording and rewritten at each window.
+
+While an analyzer is producing windows, the periodic stream probe is
+skipped, since it would open a second connection to the same stream.  An
+analyzer that has failed, or has not completed a window within two window
+lengths (ffmpeg stalled, no PCM), no longer counts, so the probe and its
+stream-down handling take over again.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from app.logger import init_logger
+
+logger = init_logger()
+
+_ACTIVE_LOCK = threading.Lock()
+_ACTIVE: set = set()
+
+WindowCallback = Callable[[int, List[float], List[float]], Optional[str]]
+
+
+def inline_levels_active() -> bool:
+    """True while some analyzer has completed a window recently."""
+    now = time.monotonic()
+    with _ACTIVE_LOCK:
+        return any(analyzer.reporting(now) for analyzer in _ACTIVE)
+
+
+def levels_timeline_path(recording_path: str) -> str:
+    base, _ = os.path.splitext(recording_path)
+    return f"{base}.levels.json"
+
+
+def read_levels_timeline(recording_path: str) -> dict:
+    try:
+        with open(levels_timeline_path(recording_path), "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def pcm_output_args(duration: int, sample_rate: int) -> List[str]:
+    """Extra ffmpeg output (after the recording output) that writes mono s16le PCM to stdout."""
+    return [
+        "-map", "0:a:0", "-vn", "-ac", "1", "-ar", str(sample_rate), "-t", str(duration),
+        "-acodec", "pcm_s16le", "-f", "s16le", "pipe:1",
+    ]
+
+
+def _dbfs(value: float) -> float:
+    return round(20 * math.log10(value), 1) if value > 0 else -100.0
+
+
+class LevelAnalyzer:
+    """Per-second RMS/peak timeline built from a PCM pipe.
+
+    ``start_attempt`` marks where a new ffmpeg run begins relative to the
+    first one; the seconds in between are stored as ``None`` so the timeline
+    stays aligned with the show clock across stream restarts.
+    """
+
+    def __init__(
+        self,
+        recording_path: str,
+        *,
+        sample_rate: int = 8000,
+        window_seconds: int = 60,
+        on_window: Optional[WindowCallback] = None,
+    ):
+        self.recording_path = recording_path
+        self.sample_rate = int(sample_rate)
+        self.window_seconds = max(1, int(window_seconds))
+        self.on_window = on_window
+        self.started_at = datetime.utcnow()
+        self.rms_db: List[Optional[float]] = []
+        self.peak_db: List[Optional[float]] = []
+        self.windows: List[dict] = []
+        self._pending = b""
+        self._window_start = 0
+        self._closed = False
+        self.failed = False
+        # Creation counts as the first report, so a new recording gets two windows to deliver one.
+        self.last_window_at = time.monotonic()
+        with _ACTIVE_LOCK:
+            _ACTIVE.add(self)
+
+    def reporting(self, now: Optional[float] = None) -> bool:
+        """Analysis has not failed and the last window is at most two window lengths old."""
+        now = time.monotonic() if now is None else now
+        return not self.failed and now - self.last_window_at <= 2 * self.window_seconds
+
+    def start_attempt(self, offset_seconds: float) -> None:
+        self._pending = b""
+        target = int(offset_seconds)
+        if target > len(self.rms_db):
+            self._emit_window(final=True)
+            gap = target - len(self.rms_db)
+            self.rms_db.extend([None] * gap)
+            self.peak_db.extend([None] * gap)
+            self._window_start = len(self.rms_db)
+
+    def feed(self, data: bytes) -> None:
+        import numpy as np
+
+        self._pending += data
+        second_bytes = self.sample_rate * 2
+        whole = len(self._pending) // second_bytes
+        if not whole:
+            return
+        samples = np.frombuffer(self._pending[: whole * second_bytes], dtype="<i2").astype(np.float64)
+        self._pending = self._pending[whole * second_bytes:]
+        for second in samples.reshape(whole, self.sample_rate):
+            self.rms_db.append(_dbfs(float(np.sqrt(np.mean(second ** 2)) / 32768.0)))
+            self.peak_db.append(_dbfs(float(np.max(np.abs(second)) / 32768.0)))
+            if len(self.rms_db) - self._window_start >= self.window_seconds:
+                self._emit_window()
+
+    def drain(self, stream, chunk_size: int = 64 * 1024) -> None:
+        """Read ``stream`` to EOF.  Analysis errors never stop the reading, or ffmpeg would block."""
+        while True:
+            data = stream.read(chunk_size)
+            if not data:
+                break
+            if self.failed:
+                continue
+            try:
+                self.feed(data)
+            except Exception as exc:  # noqa: BLE001
+                self.failed = True
+                logger.warning("Inline level analysis stopped for %s: %s", self.recording_path, exc)
+
+    def _emit_window(self, final: bool = False) -> None:
+        start = self._window_start
+        rms = [value for value in self.rms_db[start:] if value is not None]
+        peaks = [value for value in self.peak_db[start:] if value is not None]
+        self._window_start = len(self.rms_db)
+        if not rms or (final and len(rms) < min(self.window_seconds, 5)):
+            return
+        classification = None
+        if self.on_window:
+            try:
+                classification = self.on_window(start, rms, peaks)
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Level window callback failed for %s: %s", self.recording_path, exc)
+        self.windows.append({"at": start, "seconds": len(rms), "classification": classification})
+        self.last_window_at = time.monotonic()
+        try:
+            self.write_timeline()
+        except OSError as exc:
+            logger.warning("Unable to write level timeline for %s: %s", self.recording_path, exc)
+
+    def timeline(self) -> dict:
+        return {
+            "schema_version": 1,
+            "started_at": self.started_at.isoformat(),
+            "sample_rate": self.sample_rate,
+            "status": "complete" if self._closed else "recording",
+            "seconds": len(self.rms_db),
+            "rms_db": self.rms_db,
+            "peak_db": self.peak_db,
+            "windows": self.windows,
+            "dead_air": [
+                {"at": window["at"], "duration": window["seconds"]}
+                for window in self.windows
+                if window["classification"] == "dead_air"
+            ],
+        }
+
+    def write_timeline(self) -> str:
+        path = levels_timeline_path(self.recording_path)
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, temporary = tempfile.mkstemp(prefix=".rams-levels-", suffix=".json", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(self.timeline(), handle, separators=(",", ":"))
+            os.replace(temporary, path)
+        except Exception:
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+            raise
+        return path
+
+    def close(self) -> None:
+        with _ACTIVE_LOCK:
+            _ACTIVE.discard(self)
+        if self._closed:
+            return
+        self._emit_window(final=True)
+        self._closed = True
+        if self.rms_db:
+            try:
+                self.write_timeline()
+            except OSError as exc:
+                logger.warning("Unable to write level timeline for %s: %s", self.recording_path, exc)
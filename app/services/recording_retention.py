@@ -0,0 +1,243 @@
+"""Byte and age quotas for recordings on the primary recordings path.
+
+Quotas come from config: a station-wide ``RECORDINGS_RETENTION_MAX_BYTES`` /
+``RECORDINGS_RETENTION_MAX_AGE_DAYS``, a default per show
+(``RECORDINGS_RETENTION_SHOW_MAX_BYTES`` / ``..._SHOW_MAX_AGE_DAYS``) and
+per-show overrides in ``RECORDINGS_RETENTION_SHOWS`` keyed by show name.
+Usage is summed from the recordings catalog.  :func:`plan_retention`
+selects recordings oldest first: those past an age limit, then enough of
+each over-quota show, then enough of the station to fit the global quota.
+Nothing younger than ``RECORDINGS_RETENTION_MIN_AGE_DAYS`` is ever
+selected.  :func:`run_retention` stores every plan as a
+``RecordingRetentionRun`` before acting and, unless simulating, archives or
+deletes (``RECORDINGS_RETENTION_ACTION``) the selected recordings,
+committing the outcome of each one into the stored plan as it goes.
+"""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from flask import current_app
+
+from app.logger import init_logger
+from app.models import RecordingCatalog, RecordingRetentionRun, db
+from app.services.recording_archive import ArchiveError, archive_recording, archive_root
+from app.services.recordings_catalog import PRIMARY_TIER, delete_recording, normalize_key
+
+logger = init_logger()
+
+RETENTION_ACTIONS = ("archive", "delete")
+
+
+def _limit(value) -> Optional[int]:
+    """Quota value as a positive int; unset, zero or negative means no limit."""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def retention_settings() -> Dict:
+    config = current_app.config
+    action = str(config.get("RECORDINGS_RETENTION_ACTION") or "archive").lower()
+    if action not in RETENTION_ACTIONS:
+        raise ValueError(f"RECORDINGS_RETENTION_ACTION must be one of {', '.join(RETENTION_ACTIONS)}")
+    shows = {}
+    for name, quota in (config.get("RECORDINGS_RETENTION_SHOWS") or {}).items():
+        quota = quota or {}
+        shows[normalize_key(name)] = {
+            "max_bytes": _limit(quota.get("max_bytes")),
+            "max_age_days": _limit(quota.get("max_age_days")),
+        }
+    return {
+        "action": action,
+        "max_bytes": _limit(config.get("RECORDINGS_RETENTION_MAX_BYTES")),
+        "max_age_days": _limit(config.get("RECORDINGS_RETENTION_MAX_AGE_DAYS")),
+        "show_max_bytes": _limit(config.get("RECORDINGS_RETENTION_SHOW_MAX_BYTES")),
+        "show_max_age_days": _limit(config.get("RECORDINGS_RETENTION_SHOW_MAX_AGE_DAYS")),
+        "shows": shows,
+        "min_age_days": max(0, int(config.get("RECORDINGS_RETENTION_MIN_AGE_DAYS", 14) or 0)),
+    }
+
+
+def retention_configured(settings: Optional[Dict] = None) -> bool:
+    settings = settings or retention_settings()
+    limits = [settings["max_bytes"], settings["max_age_days"], settings["show_max_bytes"], settings["show_max_age_days"]]
+    for quota in settings["shows"].values():
+        limits.extend(quota.values())
+    return any(limits)
+
+
+def _show_quota(settings: Dict, show_key: str) -> Dict[str, Optional[int]]:
+    override = settings["shows"].get(show_key, {})
+    return {
+        "max_bytes": override.get("max_bytes") or settings["show_max_bytes"],
+        "max_age_days": override.get("max_age_days") or settings["show_max_age_days"],
+    }
+
+
+def _recorded_at(row: RecordingCatalog) -> datetime:
+    return datetime.combine(row.show_date, time.min) if row.show_date else row.modified_at
+
+
+def plan_retention(*, now: Optional[datetime] = None) -> Dict:
+    """Usage per show and station-wide, and the recordings each quota would remove."""
+    settings = retention_settings()
+    now = now or datetime.now()
+    protected_after = now - timedelta(days=settings["min_age_days"])
+    rows = sorted(
+        RecordingCatalog.query.filter(RecordingCatalog.tier == PRIMARY_TIER),
+        key=lambda row: (_recorded_at(row), row.path),
+    )
+
+    shows: Dict[str, Dict] = {}
+    for row in rows:
+        usage = shows.setdefault(row.show_key, {
+            "show_name": row.show_name,
+            **_show_quota(settings, row.show_key),
+            "bytes": 0,
+            "recordings": 0,
+        })
+        usage["bytes"] += row.size_bytes
+        usage["recordings"] += 1
+    for usage in shows.values():
+        usage["bytes_after"] = usage["bytes"]
+    total_after = sum(row.size_bytes for row in rows)
+
+    selected: Dict[str, Dict] = {}
+
+    def _select(row: RecordingCatalog, reason: str) -> None:
+        nonlocal total_after
+        if row.path in selected:
+            selected[row.path]["reasons"].append(reason)
+            return
+        selected[row.path] = {
+            "path": row.path,
+            "show_name": row.show_name,
+            "show_key": row.show_key,
+            "recorded_at": _recorded_at(row).isoformat(),
+            "size_bytes": row.size_bytes,
+            "reasons": [reason],
+        }
+        shows[row.show_key]["bytes_after"] -= row.size_bytes
+        total_after -= row.size_bytes
+
+    eligible = [row for row in rows if _recorded_at(row) < protected_after]
+    for row in eligible:
+        show_age = shows[row.show_key]["max_age_days"]
+        if show_age and _recorded_at(row) < now - timedelta(days=show_age):
+            _select(row, "show_age")
+        if settings["max_age_days"] and _recorded_at(row) < now - timedelta(days=settings["max_age_days"]):
+            _select(row, "global_age")
+    for row in eligible:
+        usage = shows[row.show_key]
+        if usage["max_bytes"] and usage["bytes_after"] > usage["max_bytes"] and row.path not in selected:
+            _select(row, "show_bytes")
+    for row in eligible:
+        if settings["max_bytes"] and total_after > settings["max_bytes"] and row.path not in selected:
+            _select(row, "global_bytes")
+
+    over_quota = [
+        key for key, usage in shows.items() if usage["max_bytes"] and usage["bytes_after"] > usage["max_bytes"]
+    ]
+    return {
+        "generated_at": now.isoformat(),
+        "action": settings["action"],
+        "configured": retention_configured(settings),
+        "archive_available": bool(archive_root()),
+        "quotas": {
+            "max_bytes": settings["max_bytes"],
+            "max_age_days": settings["max_age_days"],
+            "min_age_days": settings["min_age_days"],
+        },
+        "usage": {
+            "bytes": sum(usage["bytes"] for usage in shows.values()),
+            "bytes_after": total_after,
+            "recordings": len(rows),
+            "shows": shows,
+        },
+        # Quotas still exceeded once everything old enough to touch is gone.
+        "still_over_quota": {
+            "global": bool(settings["max_bytes"] and total_after > settings["max_bytes"]),
+            "shows": over_quota,
+        },
+        "recordings": list(selected.values()),
+        "bytes_planned": sum(item["size_bytes"] for item in selected.values()),
+    }
+
+
+def _apply(item: Dict, action: str) -> int:
+    row = RecordingCatalog.query.filter_by(path=item["path"]).first()
+    if row is None or row.tier != PRIMARY_TIER:
+        raise ArchiveError("no longer on the recordings path")
+    if action == "archive":
+        archive_recording(row, bitrate=current_app.config.get("RECORDINGS_ARCHIVE_BITRATE"))
+        return item["size_bytes"]
+    return delete_recording(item["path"])
+
+
+def run_retention(
+    *,
+    simulate: Optional[bool] = None,
+    trigger: str = "scheduled",
+    now: Optional[datetime] = None,
+) -> RecordingRetentionRun:
+    """Plan, then (unless simulating) act on the plan; the run is stored either way.
+
+    The run and its plan are committed before anything is touched, and each
+    recording's result and the run totals are committed as it is handled, so
+    a pass that dies midway still says what it had already archived or
+    deleted (items it never reached stay ``pending``).
+    """
+    if simulate is None:
+        simulate = bool(current_app.config.get("RECORDINGS_RETENTION_SIMULATE", True))
+    plan = plan_retention(now=now)
+    plan["simulate"] = simulate
+    acting = not simulate and bool(plan["recordings"])
+    if acting and plan["action"] == "archive" and not plan["archive_available"]:
+        plan["error"] = "RECORDINGS_ARCHIVE_ROOT is not set; nothing was archived"
+        acting = False
+    if acting:
+        for item in plan["recordings"]:
+            item["result"] = "pending"
+    run = RecordingRetentionRun(
+        simulate=simulate,
+        action=plan["action"],
+        trigger=trigger,
+        recordings=len(plan["recordings"]),
+        bytes_planned=plan["bytes_planned"],
+        bytes_freed=0,
+        failed=0,
+        plan=json.dumps(plan, default=str),
+    )
+    db.session.add(run)
+    db.session.commit()
+    if not acting:
+        return run
+
+    run_id = run.id
+    bytes_freed = failed = 0
+    for item in plan["recordings"]:
+        try:
+            bytes_freed += _apply(item, plan["action"])
+            item["result"] = "archived" if plan["action"] == "archive" else "deleted"
+        except (OSError, ArchiveError, subprocess.SubprocessError) as exc:
+            db.session.rollback()
+            logger.warning("Retention could not %s %s: %s", plan["action"], item["path"], exc)
+            item["result"] = "failed"
+            item["error"] = str(exc)
+            failed += 1
+        run = db.session.get(RecordingRetentionRun, run_id)
+        run.bytes_freed, run.failed = bytes_freed, failed
+        run.plan = json.dumps(plan, default=str)
+        db.session.commit()
+    return run
+
+
+def recent_retention_runs(limit: int = 10) -> List[RecordingRetentionRun]:
+    return RecordingRetentionRun.query.order_by(RecordingRetentionRun.created_at.desc()).limit(limit).all()
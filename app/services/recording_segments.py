@@ -0,0 +1,332 @@
+"""Segmented show recordings.
+
+In segmented mode the recorder runs ffmpeg's segment muxer, which writes the
+stream as fixed-length MP3 chunks into ``<recording>.segments/`` next to the
+final file.  ``manifest.json`` in that folder records each ffmpeg attempt
+(the first one and every retry after a stream failure) with its wall-clock
+start.  Each attempt also gets its own segment list, which ffmpeg appends to
+as chunks are closed.  Finished chunks can be played or clipped while the
+show is still on air.  When the recording ends the chunks are joined into
+the usual ``*_RAWDATA.mp3`` file.
+
+Chunks are written without ID3v2 or Xing headers, so joining them is a plain
+byte concatenation of MPEG frames and needs no second ffmpeg pass.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.services.log_export import read_recording_metadata, write_recording_metadata
+
+SEGMENT_DIR_SUFFIX = ".segments"
+SEGMENT_MANIFEST = "manifest.json"
+SEGMENT_PATTERN = "seg_%05d.mp3"
+_SEGMENT_RE = re.compile(r"^seg_(\d{5,})\.mp3$")
+
+
+def segment_directory(recording_path: str) -> str:
+    base, _ = os.path.splitext(recording_path)
+    return f"{base}{SEGMENT_DIR_SUFFIX}"
+
+
+def is_segment_directory(path: str) -> bool:
+    return path.endswith(SEGMENT_DIR_SUFFIX)
+
+
+def _manifest_path(segment_dir: str) -> str:
+    return os.path.join(segment_dir, SEGMENT_MANIFEST)
+
+
+def read_segment_manifest(segment_dir: str) -> dict:
+    try:
+        with open(_manifest_path(segment_dir), "r", encoding="utf-8") as handle:
+            payload = json.load(handle)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def write_segment_manifest(segment_dir: str, payload: dict) -> str:
+    path = _manifest_path(segment_dir)
+    os.makedirs(segment_dir, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(prefix=".rams-segments-", suffix=".json", dir=segment_dir)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        os.replace(temporary, path)
+    except Exception:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+    return path
+
+
+def _segment_files(segment_dir: str) -> List[str]:
+    try:
+        names = os.listdir(segment_dir)
+    except OSError:
+        return []
+    return sorted(name for name in names if _SEGMENT_RE.match(name))
+
+
+def begin_segment_attempt(
+    segment_dir: str,
+    *,
+    recording_path: str,
+    segment_seconds: int,
+    started_at: datetime,
+    metadata: Optional[dict] = None,
+    min_start_number: int = 0,
+    fields: Optional[dict] = None,
+) -> dict:
+    """Register a new ffmpeg attempt and return it (``start_number`` and ``list`` file).
+
+    Numbering continues after the chunks already on disk (and at least from
+    ``min_start_number``) so a retry never overwrites audio captured before
+    the stream dropped.  ``fields`` are stored on the attempt.
+    """
+    manifest = read_segment_manifest(segment_dir) or {
+        "schema_version": 1,
+        "recording": os.path.basename(recording_path),
+        "segment_seconds": segment_seconds,
+        "started_at": started_at.isoformat(),
+        "attempts": [],
+    }
+    if metadata:
+        manifest.update(metadata)
+    existing = _segment_files(segment_dir)
+    start_number = int(_SEGMENT_RE.match(existing[-1]).group(1)) + 1 if existing else 0
+    attempt = {
+        **(fields or {}),
+        "attempt": len(manifest["attempts"]),
+        "started_at": started_at.isoformat(),
+        "start_number": max(start_number, min_start_number),
+        "list": f"segments_{len(manifest['attempts'])}.csv",
+    }
+    manifest["attempts"].append(attempt)
+    manifest["status"] = "recording"
+    write_segment_manifest(segment_dir, manifest)
+    return attempt
+
+
+def build_segment_command(
+    stream_url: str,
+    duration: int,
+    segment_dir: str,
+    *,
+    segment_seconds: int,
+    attempt: dict,
+    segment_times: Optional[List[float]] = None,
+) -> List[str]:
+    """ffmpeg command for one attempt; ``segment_times`` (seconds from the attempt start) overrides fixed lengths."""
+    if segment_times:
+        split = ["-segment_times", ",".join(f"{value:.3f}" for value in segment_times)]
+    else:
+        split = ["-segment_time", str(segment_seconds)]
+    return [
+        "ffmpeg", "-y", "-i", stream_url, "-t", str(duration), "-acodec", "copy",
+        "-f", "segment",
+        *split,
+        "-segment_format", "mp3",
+        "-segment_format_options", "id3v2_version=0:write_xing=0",
+        "-segment_start_number", str(attempt["start_number"]),
+        "-segment_list", os.path.join(segment_dir, attempt["list"]),
+        "-segment_list_type", "csv",
+        "-segment_list_flags", "+live",
+        "-reset_timestamps", "1",
+        os.path.join(segment_dir, SEGMENT_PATTERN),
+    ]
+
+
+def _read_segment_list(path: str) -> Dict[str, tuple]:
+    entries: Dict[str, tuple] = {}
+    try:
+        with open(path, "r", newline="", encoding="utf-8") as handle:
+            for row in csv.reader(handle):
+                if len(row) < 3:
+                    continue
+                try:
+                    entries[os.path.basename(row[0])] = (float(row[1]), float(row[2]))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return entries
+
+
+def list_segments(segment_dir: str) -> List[dict]:
+    """Chunks in play order with their offset from the recording start.
+
+    ``complete`` is False for a chunk ffmpeg is still writing (or abandoned
+    mid-write); its ``end`` is unknown.  Offsets come from each attempt's
+    wall-clock start, so the time lost between a failure and its retry shows
+    up as a jump in ``start``.
+    """
+    manifest = read_segment_manifest(segment_dir)
+    try:
+        origin = datetime.fromisoformat(manifest["started_at"])
+    except (KeyError, TypeError, ValueError):
+        origin = None
+    owners = []
+    for attempt in manifest.get("attempts") or []:
+        try:
+            offset = (datetime.fromisoformat(attempt["started_at"]) - origin).total_seconds() if origin else 0.0
+        except (KeyError, TypeError, ValueError):
+            offset = 0.0
+        owners.append((
+            int(attempt.get("start_number") or 0),
+            attempt.get("attempt", 0),
+            max(0.0, offset),
+            _read_segment_list(os.path.join(segment_dir, attempt.get("list") or "")),
+        ))
+    owners.sort()
+
+    segments: List[dict] = []
+    cursor: Dict[int, float] = {}
+    for name in _segment_files(segment_dir):
+        number = int(_SEGMENT_RE.match(name).group(1))
+        owner = next((item for item in reversed(owners) if item[0] <= number), (0, 0, 0.0, {}))
+        _, attempt_no, attempt_offset, listed = owner
+        timing = listed.get(name)
+        if timing:
+            start, end = attempt_offset + timing[0], attempt_offset + timing[1]
+        else:
+            start, end = cursor.get(attempt_no, attempt_offset), None
+        segments.append({
+            "file": name,
+            "number": number,
+            "attempt": attempt_no,
+            "start": round(start, 3),
+            "end": round(end, 3) if end is not None else None,
+            "complete": timing is not None,
+            "size": os.path.getsize(os.path.join(segment_dir, name)),
+        })
+        if end is not None:
+            cursor[attempt_no] = end
+    return segments
+
+
+def iter_segment_bytes(segment_dir: str, *, start_seconds: float = 0.0, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Concatenated audio of the chunks written so far, from the chunk holding ``start_seconds``."""
+    for segment in list_segments(segment_dir):
+        if segment["end"] is not None and segment["end"] <= start_seconds:
+            continue
+        try:
+            with open(os.path.join(segment_dir, segment["file"]), "rb") as handle:
+                while True:
+                    block = handle.read(chunk_size)
+                    if not block:
+                        break
+                    yield block
+        except OSError:
+            continue
+
+
+def stitch_segments(segment_dir: str, output_path: str) -> Optional[str]:
+    """Join all chunks into ``output_path`` atomically; returns the path or None when empty."""
+    segments = list_segments(segment_dir)
+    if not segments:
+        return None
+    directory = os.path.dirname(output_path) or "."
+    fd, temporary = tempfile.mkstemp(prefix=".rams-stitch-", suffix=".mp3", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for segment in segments:
+                with open(os.path.join(segment_dir, segment["file"]), "rb") as handle:
+                    shutil.copyfileobj(handle, out, 1024 * 1024)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temporary, output_path)
+    finally:
+        if os.path.exists(temporary):
+            os.unlink(temporary)
+    return output_path
+
+
+def segment_parts(segments: List[dict]) -> List[dict]:
+    """One entry per ffmpeg attempt: its wall-clock offset and byte range in the stitched file."""
+    parts: List[dict] = []
+    position = 0
+    for segment in segments:
+        if not parts or parts[-1]["attempt"] != segment["attempt"]:
+            parts.append({"attempt": segment["attempt"], "offset": segment["start"], "start_byte": position})
+        position += segment["size"]
+        parts[-1]["end_byte"] = position
+    return parts
+
+
+def finalize_segmented_recording(segment_dir: str, output_path: str, *, keep_segments: bool = False) -> Optional[str]:
+    """Stitch the final file, mark the manifest complete and drop the chunks unless kept.
+
+    The attempt layout is copied into the recording's sidecar as ``parts`` so
+    the integrity check can still place dropouts once the chunks are gone.
+    """
+    segments = list_segments(segment_dir)
+    stitched = stitch_segments(segment_dir, output_path)
+    if stitched:
+        metadata = read_recording_metadata(output_path)
+        metadata["parts"] = segment_parts(segments)
+        write_recording_metadata(output_path, metadata)
+    manifest = read_segment_manifest(segment_dir)
+    if manifest:
+        manifest["status"] = "complete" if stitched else "empty"
+        manifest["segments"] = segments
+        manifest["finished_at"] = datetime.utcnow().isoformat()
+        write_segment_manifest(segment_dir, manifest)
+    if stitched and not keep_segments:
+        shutil.rmtree(segment_dir, ignore_errors=True)
+    return stitched
+
+
+def live_segment_directories(root: str) -> List[str]:
+    """Segment folders under ``root`` whose manifest still says ``recording``."""
+    found: List[str] = []
+    for current_root, dirs, _ in os.walk(root):
+        for name in list(dirs):
+            if not is_segment_directory(name):
+                continue
+            dirs.remove(name)
+            path = os.path.join(current_root, name)
+            if read_segment_manifest(path).get("status") == "recording":
+                found.append(path)
+    return sorted(found)
+
+
+def stale_segment_directories(
+    root: str,
+    *,
+    active: Iterable[str] = (),
+    stale_after_seconds: float = 600,
+    now: Optional[float] = None,
+) -> List[str]:
+    """Live folders whose recorder is gone (the app died mid-show).
+
+    A folder is stale when its manifest still says ``recording``, no running
+    recorder owns it (``active``) and nothing in it changed for
+    ``stale_after_seconds``; ffmpeg touches the open chunk continuously.
+    """
+    now = time.time() if now is None else now
+    active = set(active)
+    stale: List[str] = []
+    for path in live_segment_directories(root):
+        if path in active:
+            continue
+        try:
+            newest = max((entry.stat().st_mtime for entry in os.scandir(path)), default=0.0)
+        except OSError:
+            continue
+        if now - newest >= stale_after_seconds:
+            stale.append(path)
+    return stale
@@ -0,0 +1,201 @@
+"""Compact peak summaries ("waveform thumbnails") for finished recordings.
+
+A background batch gives every catalogued recording a ``waveform`` entry in
+its JSON sidecar: ``RECORDING_WAVEFORM_POINTS`` peak values (0-1 of full
+scale), each covering ``seconds_per_point`` of audio.  When the recorder's
+inline level timeline exists, the per-second peaks come from it and nothing
+is decoded.  Otherwise ffmpeg decodes a low-rate mono copy that is reduced
+to per-second peaks while it streams.  The recording page draws the
+overview from the sidecar without touching the audio.
+
+A recording that cannot be summarised gets a ``waveform_error`` entry
+instead, with the attempt count and the time it may be retried (backing off
+from ``RECORDING_WAVEFORM_RETRY_HOURS``), so one broken file does not hold
+up the batch; after ``RECORDING_WAVEFORM_MAX_ATTEMPTS`` it is left alone.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from flask import current_app
+
+from app.logger import init_logger
+from app.models import RecordingCatalog, db
+from app.services.log_export import read_recording_metadata, write_recording_metadata
+from app.services.recording_levels import read_levels_timeline
+from app.services.recordings_catalog import catalog_recording
+
+logger = init_logger()
+
+DECODE_SAMPLE_RATE = 2000
+
+
+def downsample_peaks(per_second: List[float], points: int) -> List[float]:
+    """Reduce per-second peaks to at most ``points`` values, keeping each bucket's maximum."""
+    if not per_second:
+        return []
+    step = max(1, math.ceil(len(per_second) / max(1, points)))
+    return [round(max(per_second[i:i + step]), 3) for i in range(0, len(per_second), step)]
+
+
+def peaks_from_levels(timeline: Dict) -> List[float]:
+    """Per-second linear peaks from an inline level timeline; gaps read as silence."""
+    return [10 ** (value / 20) if value is not None else 0.0 for value in timeline.get("peak_db") or []]
+
+
+def decode_peaks(path: str, *, sample_rate: int = DECODE_SAMPLE_RATE, timeout: int = 900) -> List[float]:
+    """Per-second linear peaks from a streamed ffmpeg decode (bounded memory)."""
+    import numpy as np
+
+    command = [
+        "ffmpeg", "-v", "error", "-nostdin", "-i", path, "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "pipe:1",
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    second_bytes = sample_rate * 2
+    peaks: List[float] = []
+    pending = b""
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            data = process.stdout.read(64 * second_bytes)
+            if not data:
+                break
+            pending += data
+            whole = len(pending) // second_bytes
+            if whole:
+                samples = np.frombuffer(pending[: whole * second_bytes], dtype="<i2").reshape(whole, sample_rate)
+                peaks.extend((np.abs(samples.astype(np.int32)).max(axis=1) / 32768.0).tolist())
+                pending = pending[whole * second_bytes:]
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"waveform decode exceeded {timeout}s")
+        if len(pending) >= 2:
+            tail = np.frombuffer(pending[: len(pending) // 2 * 2], dtype="<i2").astype(np.int32)
+            peaks.append(float(np.abs(tail).max()) / 32768.0)
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+    if process.returncode not in (0, None) and not peaks:
+        raise RuntimeError(f"ffmpeg exited {process.returncode}")
+    return peaks
+
+
+def compute_waveform(path: str, *, points: int = 1000) -> Dict:
+    timeline = read_levels_timeline(path)
+    if timeline.get("peak_db"):
+        per_second, source = peaks_from_levels(timeline), "levels"
+    else:
+        per_second, source = decode_peaks(path), "decode"
+    values = downsample_peaks(per_second, points)
+    return {
+        "schema_version": 1,
+        "points": values,
+        "seconds": len(per_second),
+        "seconds_per_point": math.ceil(len(per_second) / len(values)) if values else 0,
+        "source": source,
+        "computed_at": datetime.utcnow().isoformat(),
+    }
+
+
+def store_waveform(path: str, *, points: int = 1000) -> Dict:
+    waveform = compute_waveform(path, points=points)
+    metadata = read_recording_metadata(path)
+    metadata["waveform"] = waveform
+    metadata.pop("waveform_error", None)
+    write_recording_metadata(path, metadata)
+    catalog_recording(path, commit=False)
+    return waveform
+
+
+def record_waveform_failure(path: str, error: str, *, retry_hours: float = 6, max_attempts: int = 3) -> Dict:
+    """Note a failed summary in the sidecar; ``retry_after`` doubles per attempt and is None once given up."""
+    metadata = read_recording_metadata(path)
+    attempts = int((metadata.get("waveform_error") or {}).get("attempts") or 0) + 1
+    now = datetime.utcnow()
+    retry_after = now + timedelta(hours=retry_hours * 2 ** (attempts - 1)) if attempts < max_attempts else None
+    metadata["waveform_error"] = {
+        "attempts": attempts,
+        "error": error[:500],
+        "failed_at": now.isoformat(),
+        "retry_after": retry_after.isoformat() if retry_after else None,
+    }
+    write_recording_metadata(path, metadata)
+    catalog_recording(path, commit=False)
+    return metadata["waveform_error"]
+
+
+def _retry_due(sidecar: Optional[str], now: datetime) -> bool:
+    try:
+        failure = json.loads(sidecar or "{}").get("waveform_error")
+    except ValueError:
+        return True
+    if not failure:
+        return True
+    try:
+        return datetime.fromisoformat(failure["retry_after"]) <= now
+    except (KeyError, TypeError, ValueError):
+        return False  # given up
+
+
+def waveform_candidates(limit: int, *, settle_seconds: int = 300) -> List[str]:
+    """Catalogued recordings without a waveform whose file has stopped changing.
+
+    Recordings that never failed come first; failed ones only once their
+    retry time has passed.
+    """
+    settled = time.time() - settle_seconds
+    now = datetime.utcnow()
+    rows = (
+        RecordingCatalog.query.filter(
+            RecordingCatalog.mtime < settled,
+            db.or_(RecordingCatalog.sidecar.is_(None), ~RecordingCatalog.sidecar.contains('"waveform"')),
+        )
+        .order_by(
+            db.func.coalesce(RecordingCatalog.sidecar.contains('"waveform_error"'), False),
+            RecordingCatalog.modified_at.desc(),
+        )
+        .with_entities(RecordingCatalog.path, RecordingCatalog.sidecar)
+    )
+    candidates: List[str] = []
+    for path, sidecar in rows.yield_per(200):
+        if len(candidates) >= limit:
+            break
+        if _retry_due(sidecar, now):
+            candidates.append(path)
+    return candidates
+
+
+def run_waveform_batch(limit: Optional[int] = None) -> Dict[str, object]:
+    limit = limit or int(current_app.config.get("RECORDING_WAVEFORM_BATCH_LIMIT", 20))
+    points = int(current_app.config.get("RECORDING_WAVEFORM_POINTS", 1000))
+    retry_hours = float(current_app.config.get("RECORDING_WAVEFORM_RETRY_HOURS", 6))
+    max_attempts = int(current_app.config.get("RECORDING_WAVEFORM_MAX_ATTEMPTS", 3))
+    summary: Dict[str, object] = {"candidates": 0, "computed": 0, "failed": 0, "status": "ok"}
+    candidates = waveform_candidates(limit)
+    summary["candidates"] = len(candidates)
+    for path in candidates:
+        if not os.path.exists(path):
+            continue
+        try:
+            store_waveform(path, points=points)
+            summary["computed"] += 1
+        except FileNotFoundError:
+            summary["status"] = "ffmpeg_unavailable"
+            break
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Waveform summary failed for %s: %s", path, exc)
+            summary["failed"] += 1
+            try:
+                record_waveform_failure(path, str(exc), retry_hours=retry_hours, max_attempts=max_attempts)
+            except OSError as write_exc:
+                logger.warning("Unable to record the waveform failure for %s: %s", path, write_exc)
+    db.session.commit()
+    return summary
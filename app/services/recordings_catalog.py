@@ -0,0 +1,440 @@
+"""SQLite catalog of the show recordings on disk.
+
+Each audio file under the recordings root has one ``RecordingCatalog`` row
+holding its show/DJ names (from the folder layout, the filename or the ID3
+tags), period folder, size, mtime, duration and a copy of its JSON
+sidecar.  The recordings pages query this table instead of walking the tree.
+
+Rows are kept current incrementally: the recorder catalogs a file when it
+finishes, log submission refreshes ``has_log``, deleting a recording from
+the UI drops its row, and :func:`reconcile_catalog` (run on a schedule)
+picks up anything changed behind the app's back.  Rows record which tier
+holds the file: the recordings root or, once moved by
+``app.services.recording_archive``, the archive root.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import mutagen  # type: ignore
+from flask import current_app
+
+from app.logger import init_logger
+from app.models import RecordingCatalog, db
+from app.services.log_export import read_recording_metadata, recording_csv_path, recording_metadata_path
+from app.services.recording_levels import levels_timeline_path
+from app.services.recording_periods import (
+    UNASSIGNED_PERIOD_LABEL,
+    load_recording_periods,
+    period_folder_name,
+    recordings_base_root,
+)
+from app.services.recording_segments import is_segment_directory
+
+logger = init_logger()
+
+RECORDING_EXTENSIONS = (".mp3", ".wav", ".m4a", ".aac")
+PRIMARY_TIER = "primary"
+ARCHIVE_TIER = "archive"
+
+
+def normalize_key(value: str | None) -> str:
+    if not value:
+        return ""
+    return value.strip().lower()
+
+
+def _parse_recording_label(filename: str) -> str | None:
+    match = re.match(r"(.+)[_-]\d{2}[-_]\d{2}[-_]\d{2,4}_RAWDATA", filename)
+    if match:
+        return match.group(1)
+    return None
+
+
+def _read_recording_tags(path: str) -> dict[str, str]:
+    try:
+        audio = mutagen.File(path, easy=True)
+    except Exception:
+        return {}
+    if not audio or not getattr(audio, "tags", None):
+        return {}
+
+    def _first_value(key: str) -> str | None:
+        if key not in audio.tags:
+            return None
+        value = audio.tags.get(key)
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else None
+        return str(value).strip() if value else None
+
+    title = _first_value("title")
+    artist = _first_value("artist")
+    album = _first_value("album")
+    payload = {}
+    if title:
+        payload["title"] = title
+    if artist:
+        payload["artist"] = artist
+    if album:
+        payload["album"] = album
+    return payload
+
+
+def _parse_id3_show_name(tags: dict[str, str]) -> str | None:
+    title = tags.get("title")
+    if title:
+        match = re.match(r"(.+)\s+\(\d{2}-\d{2}-\d{4}\)$", title)
+        if match:
+            return match.group(1).strip()
+        return title.strip()
+    album = tags.get("album")
+    if album:
+        return album.strip()
+    return None
+
+
+def _path_parts(full: str, base_root: str) -> list[str]:
+    rel = os.path.relpath(full, base_root)
+    if rel in (".", ""):
+        return []
+    return rel.split(os.sep)
+
+
+def recording_names(*, full: str, base_root: str, period_folders: set[str]) -> tuple[str, str]:
+    """``(show_name, dj_name)`` for a recording, from its folders, filename, then ID3 tags."""
+    show_name = None
+    dj_name = None
+
+    parts = _path_parts(full, base_root)
+    period_folder = None
+    remaining = parts
+    if parts and parts[0] in period_folders:
+        period_folder = parts[0]
+        remaining = parts[1:]
+
+    dj_folder = None
+    show_folder = None
+    if remaining:
+        if len(remaining) > 1:
+            dj_folder = remaining[0]
+            if len(remaining) > 2 and remaining[1].lower() == "radio shows":
+                show_folder = remaining[2] if len(remaining) > 3 else None
+            elif len(remaining) > 2:
+                show_folder = remaining[1]
+        elif period_folder is None:
+            dj_folder = remaining[0]
+
+    if dj_folder:
+        dj_name = dj_folder.replace("_", " ").strip()
+
+    if show_folder:
+        show_name = show_folder.replace("_", " ").strip()
+
+    if not show_name:
+        filename = os.path.basename(full)
+        safe_label = _parse_recording_label(filename) or os.path.splitext(filename)[0]
+        show_name = safe_label.replace("_", " ").strip()
+        if not dj_name and safe_label:
+            dj_name = safe_label.replace("_", " ").strip()
+
+    if not show_name or not dj_name:
+        tags = _read_recording_tags(full)
+        if not show_name:
+            show_name = _parse_id3_show_name(tags)
+        if not dj_name:
+            dj_name = (tags.get("artist") or "").strip() or None
+
+    return show_name or "Unknown", dj_name or "Unknown"
+
+
+def period_folder_map(periods: list[str]) -> dict[str, str]:
+    return {period_folder_name(period): period for period in periods}
+
+
+def period_folder_for_path(path: str, base_root: str) -> str:
+    """Top-level folder holding ``path`` under the recordings root ("" for the root itself)."""
+    rel = os.path.relpath(os.path.dirname(path), base_root)
+    if rel == ".":
+        return ""
+    return rel.split(os.sep, 1)[0]
+
+
+def period_label(period_folder: str, period_map: dict[str, str]) -> str:
+    if not period_folder:
+        return UNASSIGNED_PERIOD_LABEL
+    return period_map.get(period_folder, period_folder)
+
+
+def _catalog_path(path: str) -> str:
+    return os.path.abspath(os.path.normpath(path))
+
+
+def recording_roots() -> List[Tuple[str, str]]:
+    """``(tier, root)`` for the recordings root and, when configured, the archive root."""
+    roots = [(PRIMARY_TIER, _catalog_path(recordings_base_root()))]
+    archive_root = current_app.config.get("RECORDINGS_ARCHIVE_ROOT")
+    if archive_root:
+        roots.append((ARCHIVE_TIER, _catalog_path(archive_root)))
+    return roots
+
+
+def _contains(root: str, path: str) -> bool:
+    try:
+        return os.path.commonpath([root, path]) == root
+    except ValueError:
+        return False
+
+
+def tier_for_path(path: str) -> Tuple[str, str]:
+    """``(tier, root)`` of the innermost recordings root holding ``path`` (primary if none does)."""
+    path = _catalog_path(path)
+    matches = [(tier, root) for tier, root in recording_roots() if _contains(root, path)]
+    if not matches:
+        return recording_roots()[0]
+    return max(matches, key=lambda item: len(item[1]))
+
+
+def _mtime_or_none(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _duration_seconds(path: str, metadata: dict) -> Optional[float]:
+    integrity = metadata.get("integrity")
+    if isinstance(integrity, dict) and integrity.get("recorded_seconds"):
+        return float(integrity["recorded_seconds"])
+    try:
+        audio = mutagen.File(path)
+    except Exception:
+        return None
+    length = getattr(getattr(audio, "info", None), "length", None)
+    return round(float(length), 3) if length else None
+
+
+def _show_date(metadata: dict) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(metadata.get("show_date")))
+    except ValueError:
+        return None
+
+
+def _fill_row(
+    row: RecordingCatalog,
+    path: str,
+    stat: os.stat_result,
+    *,
+    base_root: str,
+    period_folders: set[str],
+    tier: str = PRIMARY_TIER,
+):
+    metadata = read_recording_metadata(path)
+    show_name, dj_name = recording_names(full=path, base_root=base_root, period_folders=period_folders)
+    row.filename = os.path.basename(path)
+    row.period_folder = period_folder_for_path(path, base_root)
+    row.show_name = show_name
+    row.dj_name = dj_name
+    row.show_key = normalize_key(show_name)
+    row.dj_key = normalize_key(dj_name)
+    row.show_date = _show_date(metadata)
+    row.size_bytes = stat.st_size
+    row.mtime = stat.st_mtime
+    row.modified_at = datetime.fromtimestamp(stat.st_mtime)
+    row.duration_seconds = _duration_seconds(path, metadata)
+    row.has_log = os.path.isfile(recording_csv_path(path))
+    row.sidecar_mtime = _mtime_or_none(recording_metadata_path(path))
+    row.sidecar = json.dumps(metadata) if metadata else None
+    row.tier = tier
+    row.updated_at = datetime.utcnow()
+
+
+def _is_stale(row: RecordingCatalog, path: str, stat: os.stat_result) -> bool:
+    return (
+        row.size_bytes != stat.st_size
+        or row.mtime != stat.st_mtime
+        or row.sidecar_mtime != _mtime_or_none(recording_metadata_path(path))
+        or row.has_log != os.path.isfile(recording_csv_path(path))
+    )
+
+
+def _period_folders() -> set[str]:
+    return set(period_folder_map(load_recording_periods().get("periods", [])))
+
+
+def catalog_recording(path: str, *, force: bool = False, commit: bool = True) -> Optional[RecordingCatalog]:
+    """Add or refresh the row for ``path``; drops the row if the file is gone.
+
+    Unchanged files (same size, mtime, sidecar and log presence) are left
+    alone unless ``force`` is set.
+    """
+    path = _catalog_path(path)
+    row = RecordingCatalog.query.filter_by(path=path).first()
+    try:
+        stat = os.stat(path)
+    except OSError:
+        if row is not None:
+            db.session.delete(row)
+            if commit:
+                db.session.commit()
+        return None
+    if row is not None and not force and not _is_stale(row, path, stat):
+        return row
+    if row is None:
+        row = RecordingCatalog(path=path)
+        db.session.add(row)
+    tier, base_root = tier_for_path(path)
+    _fill_row(row, path, stat, base_root=base_root, period_folders=_period_folders(), tier=tier)
+    if commit:
+        db.session.commit()
+    return row
+
+
+def relocate_recording(old_path: str, new_path: str, *, commit: bool = True) -> Optional[RecordingCatalog]:
+    """Point the row for ``old_path`` at the file now at ``new_path``, keeping the row."""
+    row = RecordingCatalog.query.filter_by(path=_catalog_path(old_path)).first()
+    if row is None:
+        return catalog_recording(new_path, commit=commit)
+    row.path = _catalog_path(new_path)
+    return catalog_recording(new_path, force=True, commit=commit)
+
+
+def catalog_finished_recording(path: str) -> List[RecordingCatalog]:
+    """Catalog a finished recording together with its ``_1``/``_2`` retry files."""
+    base, ext = os.path.splitext(path)
+    paths = [path]
+    retry = 1
+    while os.path.isfile(f"{base}_{retry}{ext}"):
+        paths.append(f"{base}_{retry}{ext}")
+        retry += 1
+    rows = [catalog_recording(item, commit=False) for item in paths]
+    db.session.commit()
+    return [row for row in rows if row is not None]
+
+
+def forget_recording(path: str, *, commit: bool = True) -> bool:
+    row = RecordingCatalog.query.filter_by(path=_catalog_path(path)).first()
+    if row is None:
+        return False
+    db.session.delete(row)
+    if commit:
+        db.session.commit()
+    return True
+
+
+def delete_recording(path: str, *, commit: bool = True) -> int:
+    """Remove a recording's audio, sidecar and level timeline and drop its row.
+
+    The submitted log CSV stays: it is compliance data in its own right.
+    Returns the bytes removed; an ``OSError`` leaves the row in place.
+    """
+    removed = 0
+    for candidate in (path, recording_metadata_path(path), levels_timeline_path(path)):
+        try:
+            size = os.path.getsize(candidate)
+            os.remove(candidate)
+        except FileNotFoundError:
+            continue
+        removed += size
+    forget_recording(path, commit=commit)
+    return removed
+
+
+def _walk_recordings(base_root: str, skip_roots: Iterable[str] = ()) -> Iterable[str]:
+    skip = set(skip_roots)
+    for current_root, dirs, files in os.walk(base_root):
+        # Chunks of a segmented recording are not recordings of their own,
+        # and a tier root nested in another is walked on its own.
+        dirs[:] = [
+            name for name in dirs
+            if not is_segment_directory(name) and os.path.join(current_root, name) not in skip
+        ]
+        for filename in files:
+            if filename.lower().endswith(RECORDING_EXTENSIONS):
+                yield os.path.join(current_root, filename)
+
+
+def reconcile_catalog(*, force: bool = False) -> Dict[str, int]:
+    """Bring the catalog in line with every recordings tier in one walk each."""
+    roots = recording_roots()
+    period_folders = _period_folders()
+    rows = {row.path: row for row in RecordingCatalog.query.all()}
+    counts = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+    seen = set()
+    for tier, base_root in roots:
+        if not os.path.isdir(base_root):
+            continue
+        for path in _walk_recordings(base_root, skip_roots=[root for _, root in roots if root != base_root]):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            seen.add(path)
+            row = rows.get(path)
+            if row is not None and not force and not _is_stale(row, path, stat):
+                counts["unchanged"] += 1
+                continue
+            if row is None:
+                row = RecordingCatalog(path=path)
+                db.session.add(row)
+                counts["added"] += 1
+            else:
+                counts["updated"] += 1
+            _fill_row(row, path, stat, base_root=base_root, period_folders=period_folders, tier=tier)
+    for path, row in rows.items():
+        if path not in seen:
+            db.session.delete(row)
+            counts["removed"] += 1
+    db.session.commit()
+    return counts
+
+
+def ensure_catalog() -> None:
+    """Build the catalog on first use so an upgraded install does not show an empty list."""
+    if db.session.query(RecordingCatalog.id).first() is None:
+        reconcile_catalog()
+
+
+def _filtered_query(*, show: str | None = None, dj: str | None = None, period_folder: str | None = None):
+    query = RecordingCatalog.query
+    if period_folder is not None:
+        query = query.filter(RecordingCatalog.period_folder == period_folder)
+    if normalize_key(show):
+        query = query.filter(RecordingCatalog.show_key == normalize_key(show))
+    if normalize_key(dj):
+        query = query.filter(RecordingCatalog.dj_key == normalize_key(dj))
+    return query
+
+
+def query_recordings(
+    *,
+    show: str | None = None,
+    dj: str | None = None,
+    period_folder: str | None = None,
+    page: int | None = None,
+    page_size: int = 15,
+) -> Tuple[List[RecordingCatalog], int]:
+    """Newest-first rows matching the filters, and the total match count.
+
+    ``period_folder=None`` means every period; ``page=None`` returns all rows.
+    """
+    query = _filtered_query(show=show, dj=dj, period_folder=period_folder)
+    total = query.count()
+    query = query.order_by(RecordingCatalog.modified_at.desc(), RecordingCatalog.id.desc())
+    if page is not None:
+        query = query.offset((max(page, 1) - 1) * page_size).limit(page_size)
+    return query.all(), total
+
+
+def recording_facets(*, period_folder: str | None = None) -> Tuple[List[str], List[str]]:
+    """Sorted distinct show and DJ names for the filter dropdowns."""
+    query = _filtered_query(period_folder=period_folder)
+    shows = [name for (name,) in query.with_entities(RecordingCatalog.show_name).distinct()]
+    djs = [name for (name,) in query.with_entities(RecordingCatalog.dj_name).distinct()]
+    return sorted(shows), sorted(djs)
+
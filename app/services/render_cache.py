@@ -0,0 +1,134 @@
+"""Size-capped caches of files ffmpeg renders on demand (library previews, recording clips).
+
+A render writes into a temp file in the cache directory, named with the
+cache's temp prefix, and is moved into place only once ffmpeg succeeded, so
+readers never see partial output.  Serving a cached file bumps its mtime and
+:func:`prune_cache` trims the directory least recently used first.  Renders
+for the same target are serialized with
+:func:`app.services.cache_locks.cache_target_lock`.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from flask import current_app
+
+
+class RenderSlots:
+    """Process-wide cap on concurrent renders, sized from ``config_key`` on first use."""
+
+    def __init__(self, config_key: str, default: int = 2):
+        self.config_key = config_key
+        self.default = default
+        self._guard = threading.Lock()
+        self._slots: threading.BoundedSemaphore | None = None
+
+    def _semaphore(self) -> threading.BoundedSemaphore:
+        with self._guard:
+            if self._slots is None:
+                count = max(1, int(current_app.config.get(self.config_key, self.default)))
+                self._slots = threading.BoundedSemaphore(count)
+            return self._slots
+
+    def acquire(self, timeout: float) -> bool:
+        return self._semaphore().acquire(timeout=timeout)
+
+    def release(self) -> None:
+        self._semaphore().release()
+
+
+def touch_cached(target: str) -> bool:
+    """Whether ``target`` is cached; a hit is moved to the young end of the LRU trim."""
+    if not os.path.exists(target):
+        return False
+    try:
+        os.utime(target)
+    except OSError:
+        pass
+    return True
+
+
+def render_to_cache(target: str, command: Callable[[str], List[str]], *, timeout: int, temp_prefix: str) -> bool:
+    """Run ``command(temp_path)`` and move its output to ``target``.
+
+    Returns False when ffmpeg fails, times out or writes nothing; raises
+    ``FileNotFoundError`` when ffmpeg is not installed.
+    """
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            prefix=temp_prefix, suffix=os.path.splitext(target)[1], dir=os.path.dirname(target)
+        )
+        os.close(fd)
+        subprocess.run(
+            command(temp_path),
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=timeout,
+        )
+        if os.path.getsize(temp_path) == 0:
+            return False
+        os.replace(temp_path, target)
+        temp_path = None
+        return True
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return False
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def cache_usage(
+    cache_dir: str, *, temp_prefix: str, suffix: Optional[str] = None
+) -> Tuple[int, List[Tuple[float, int, str]]]:
+    """Bytes used by finished files and ``(last_used, size, path)`` for each; renders in progress are skipped."""
+    total = 0
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if not entry.is_file() or entry.name.startswith(temp_prefix):
+            continue
+        if suffix and not entry.name.endswith(suffix):
+            continue
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue
+        total += stat.st_size
+        entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, entry.path))
+    return total, entries
+
+
+def prune_cache(
+    cache_dir: str,
+    max_bytes: int,
+    *,
+    temp_prefix: str,
+    suffix: Optional[str] = None,
+    keep: Optional[str] = None,
+) -> int:
+    """Trim ``cache_dir`` to ``max_bytes``, least recently used first, sparing ``keep``."""
+    if max_bytes <= 0:
+        return 0
+    total, entries = cache_usage(cache_dir, temp_prefix=temp_prefix, suffix=suffix)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import math
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from typing import Any, Dict, Optional, Tuple
@@ -35,14 +36,21 @@ class QueueItem:
     title: str = ""
     duration: float = 0.0
     cues: CuePoints = field(default_factory=CuePoints)
+    bpm: Optional[float] = None
+    first_beat: Optional[float] = None
 
     @classmethod
     def from_payload(cls, payload: Dict[str, Any]) -> "QueueItem":
+        first_beat = payload.get("first_beat")
+        if first_beat is None:
+            first_beat = payload.get("first_beat_seconds")
         return cls(
             kind=(payload.get("kind") or "").lower(),
             title=payload.get("title") or "",
             duration=float(payload.get("duration") or 0.0),
             cues=CuePoints.from_dict(payload.get("cues")),
+            bpm=_as_float(payload.get("bpm")),
+            first_beat=_as_float(first_beat),
         )
 
 
@@ -54,6 +62,7 @@ class OverlayPlan:
     duration: float
     span_transition: bool = False
     reason: str = ""
+    beat_aligned: bool = False
 
     def to_dict(self) -> Dict[str, Any]:
         payload = asdict(self)
@@ -219,35 +228,42 @@ def _plan_overlay(
     next_intro_len = _next_intro_length(next_item)
 
     if intro_window and duration <= _window_length(intro_window):
+        beat = _next_beat(current, intro_window[0], intro_window[1] - duration)
         return OverlayPlan(
             status="scheduled",
-            start_in=0.0,
+            start_in=max(0.0, beat - current_position) if beat is not None else 0.0,
             window=intro_window,
             duration=duration,
             reason="intro_window",
+            beat_aligned=beat is not None,
         )
 
     if outro_window and duration <= _window_length(outro_window):
-        start_in = max(0.0, outro_window[0] - current_position)
+        beat = _next_beat(current, outro_window[0], outro_window[1] - duration)
+        start = beat if beat is not None else outro_window[0]
         return OverlayPlan(
             status="scheduled",
-            start_in=start_in,
+            start_in=max(0.0, start - current_position),
             window=outro_window,
             duration=duration,
             reason="outro_window",
+            beat_aligned=beat is not None,
         )
 
     if outro_window and next_intro_len > 0:
         combined = _window_length(outro_window) + next_intro_len
         if duration <= combined:
-            start_in = max(0.0, outro_window[0] - current_position)
+            window = (outro_window[0], outro_window[1] + next_intro_len)
+            beat = _next_beat(current, outro_window[0], window[1] - duration)
+            start = beat if beat is not None else outro_window[0]
             return OverlayPlan(
                 status="scheduled",
-                start_in=start_in,
-                window=(outro_window[0], outro_window[1] + next_intro_len),
+                start_in=max(0.0, start - current_position),
+                window=window,
                 duration=duration,
                 span_transition=True,
                 reason="outro_to_intro",
+                beat_aligned=beat is not None,
             )
 
     defer_to = _next_safe_window_start(current, current_position)
@@ -330,6 +346,22 @@ def _next_safe_window_start(current: QueueItem, current_position: float) -> floa
     return current.duration or current_position
 
 
+def _next_beat(item: QueueItem, earliest: float, latest: float) -> Optional[float]:
+    """First beat of ``item`` at or after ``earliest`` if it is no later than ``latest``.
+
+    Returns ``None`` when the item has no tempo analysis or no beat falls in
+    the range, in which case callers keep their cue-based start.
+    """
+    if not item.bpm or item.bpm <= 0 or item.first_beat is None:
+        return None
+    period = 60.0 / item.bpm
+    beats_in = max(0, math.ceil((earliest - item.first_beat) / period - 1e-6))
+    beat = item.first_beat + beats_in * period
+    if beat > latest:
+        return None
+    return beat
+
+
 def _window_length(window: Tuple[float, float]) -> float:
     return max(0.0, window[1] - window[0])
 
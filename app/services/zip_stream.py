@@ -0,0 +1,65 @@
+"""Stream a ZIP archive to a response as it is built.
+
+:func:`iter_zip` writes each file as a stored (uncompressed) entry (audio is
+already compressed) into a small in-memory sink that is drained after every
+chunk, so memory stays around one read chunk and the first bytes go out as
+soon as the first file is opened.  The sink cannot seek, so
+:mod:`zipfile` writes the CRC and sizes in a data descriptor after each
+entry, and ZIP64 is used for entries and archives past 4 GiB.
+"""
+
+from __future__ import annotations
+
+import zipfile
+from typing import Iterable, Iterator, List, Tuple
+
+from app.logger import init_logger
+
+logger = init_logger()
+
+ZIP_CHUNK_SIZE = 1024 * 1024
+
+
+class _ZipSink:
+    """Write-only file object that hands written bytes back to the generator."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        if chunks:
+            yield b"".join(chunks)
+
+
+def iter_zip(members: Iterable[Tuple[str, str]], *, chunk_size: int = ZIP_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield a ZIP archive of ``(path, arcname)`` pairs.
+
+    Files that disappear before they are reached are skipped with a warning;
+    the headers for an entry are only written once its file is open.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for path, arcname in members:
+            try:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                source = open(path, "rb")
+            except OSError as exc:
+                logger.warning("Skipping %s in ZIP download: %s", path, exc)
+                continue
+            with source, archive.open(info, "w") as target:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
@@ -50,6 +50,56 @@ class Config:
     STREAM_PROBE_TIMEOUT_SECONDS = 25
     STREAM_PROBE_INTERVAL_MINUTES = 1
 
+    # Show recording: "single" writes one file per ffmpeg run; "segmented" writes
+    # RECORDING_SEGMENT_SECONDS chunks (playable while live) and stitches them at the end.
+    RECORDING_MODE = "single"
+    RECORDING_SEGMENT_SECONDS = 300
+    RECORDING_KEEP_SEGMENTS = False
+    # Segment folders still marked "recording" with no recorder and no writes for this long are stitched.
+    RECORDING_STALE_SEGMENTS_MINUTES = 10
+    # Marathons: "continuous" records the whole event with one ffmpeg run split at chunk
+    # boundaries; "chunked" starts a separate recording for every chunk.
+    RECORDING_MARATHON_MODE = "continuous"
+    # Recordings holding less than this share of the show window are flagged after the integrity check.
+    RECORDING_MIN_COVERAGE = 0.98
+    # Decode a mono PCM copy of the recorder input for per-second levels and dead-air
+    # alerts; the separate stream probe is skipped while a recording is running.
+    RECORDING_INLINE_LEVELS = True
+    RECORDING_LEVELS_SAMPLE_RATE = 8000
+    RECORDING_LEVELS_WINDOW_SECONDS = 60
+    # The recordings pages read a catalog table; this pass re-syncs it with files changed outside RAMS.
+    RECORDINGS_CATALOG_RECONCILE_MINUTES = 30
+    # Archive tier: recordings older than RECORDINGS_ARCHIVE_AFTER_DAYS move to RECORDINGS_ARCHIVE_ROOT
+    # nightly (disabled while unset); set a bitrate such as "64k" to re-encode MP3s on the way.
+    RECORDINGS_ARCHIVE_ROOT = os.getenv("RAMS_RECORDINGS_ARCHIVE_ROOT") or None
+    RECORDINGS_ARCHIVE_AFTER_DAYS = 180
+    RECORDINGS_ARCHIVE_BITRATE = None
+    RECORDINGS_ARCHIVE_HOUR = 3
+    # Overview waveforms: peak summaries stored in each finished recording's sidecar.
+    RECORDING_WAVEFORM_POINTS = 1000
+    RECORDING_WAVEFORM_INTERVAL_MINUTES = 15
+    RECORDING_WAVEFORM_BATCH_LIMIT = 20
+    # Failed summaries are retried after RETRY_HOURS, doubling each time, up to MAX_ATTEMPTS.
+    RECORDING_WAVEFORM_RETRY_HOURS = 6
+    RECORDING_WAVEFORM_MAX_ATTEMPTS = 3
+    # Clips cut from recordings by time range (stream copy, cached under instance/recording_clips).
+    RECORDING_CLIP_MAX_SECONDS = 3600
+    RECORDING_CLIP_MAX_CONCURRENCY = 2
+    RECORDING_CLIP_TIMEOUT_SECONDS = 30
+    RECORDING_CLIP_CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+    # Retention quotas for the recordings path (unset = no limit). Per-show overrides are keyed by
+    # show name, e.g. {"Night Show": {"max_bytes": 50 * 1024**3, "max_age_days": 365}}. Each nightly
+    # pass stores its plan; it only archives/deletes once RECORDINGS_RETENTION_SIMULATE is off.
+    RECORDINGS_RETENTION_MAX_BYTES = None
+    RECORDINGS_RETENTION_MAX_AGE_DAYS = None
+    RECORDINGS_RETENTION_SHOW_MAX_BYTES = None
+    RECORDINGS_RETENTION_SHOW_MAX_AGE_DAYS = None
+    RECORDINGS_RETENTION_SHOWS = {}
+    RECORDINGS_RETENTION_MIN_AGE_DAYS = 14
+    RECORDINGS_RETENTION_ACTION = "archive"  # archive | delete
+    RECORDINGS_RETENTION_SIMULATE = True
+    RECORDINGS_RETENTION_HOUR = 4
+
     # REST/API defaults
     DEFAULT_OFF_AIR_MESSAGE = "WLMC is currently off-air"
 
@@ -125,7 +175,15 @@ class Config:
     NEWS_TYPES_CONFIG = os.path.join(NAS_ROOT, "news_types.json")
     NAS_MUSIC_ROOT = os.getenv("RAMS_MUSIC_LIBRARY") or os.path.join(NAS_ROOT, "music")
     MUSIC_INDEX_TTL = 60
+    LIBRARY_INDEX_DB_BATCH_SIZE = 200  # MusicAnalysis rows committed per batch while indexing
+    LIBRARY_INDEX_HISTORY_LIMIT = 200  # runs kept in instance/library_index_history.jsonl
+    LIBRARY_INDEX_CHECKPOINT_INTERVAL_FILES = 500  # resumable checkpoint every N files...
+    LIBRARY_INDEX_CHECKPOINT_INTERVAL_SECONDS = 30  # ...or every N seconds, whichever comes first
+    LIBRARY_INDEX_PRIORITY_MAX_WAIT_SECONDS = 300  # full scan ignores an older subtree priority marker
     LIBRARY_EDITOR_INDEX_TTL = 900
+    METADATA_WRITE_WORKERS = 4
+    MUSIC_SCAN_PAGE_SIZE = 200  # tracks per /api/music/scan/library page
+    MUSIC_SCAN_SAMPLE_LIMIT = 100  # findings kept per category in the scan response
     MEDIA_INDEX_TTL = 60
     PSA_LIBRARY_PATH = os.path.join(NAS_ROOT, "psa")
     IMAGING_LIBRARY_PATH = os.path.join(NAS_ROOT, "imaging")
@@ -133,6 +191,10 @@ class Config:
     VOICE_TRACKS_ROOT = os.path.join(NAS_ROOT, "voice_tracks")
     TRANSCODE_ALAC_TO_MP3 = True
     TRANSCODE_CACHE_RETENTION_HOURS = 48
+    COVER_THUMBNAIL_SIZES = (96, 240, 480)
+    COVER_CACHE_MAX_AGE_SECONDS = 86400
+    COVER_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+    COVER_CACHE_RETENTION_DAYS = 90
     AUDIO_HOST_UPLOAD_DIR = os.path.join(DATA_ROOT, "hosted_audio")
     AUDIO_HOST_BACKDROP_DEFAULT = os.path.join(DATA_ROOT, "hosted_audio_default.jpg")
     RADIODJ_IMPORT_FOLDER = os.path.join(DATA_ROOT, "radiodj_imports")
@@ -156,6 +218,16 @@ class Config:
 
     # Metadata enrichment
     MUSICBRAINZ_USER_AGENT = "RAMS/1.0 (support@example.com)"
+    MUSICBRAINZ_API_URL = "https://musicbrainz.org/ws/2"
+    MUSICBRAINZ_RATE_LIMIT_PER_SECOND = 1.0  # MusicBrainz allows ~1 request/second per client
+    MUSICBRAINZ_RATE_LIMIT_WAIT_SECONDS = 5
+    MUSICBRAINZ_CACHE_DAYS = 30
+    MUSICBRAINZ_NEGATIVE_CACHE_HOURS = 72
+    AUDIODB_API_URL = "https://theaudiodb.com/api/v1/json/2"
+    AUDIODB_RATE_LIMIT_PER_SECOND = 2.0
+    ENRICHMENT_INTERVAL_MINUTES = 30
+    ENRICHMENT_BATCH_SIZE = 50
+    ENRICHMENT_MAX_ATTEMPTS = 3
 
     # Rate limiting
     RATE_LIMIT_ENABLED = True
@@ -183,6 +255,40 @@ class Config:
     TRANSCODE_MAX_CONCURRENCY = 2
     TRANSCODE_TIMEOUT_SECONDS = 900
     TRANSCODE_CACHE_MAX_BYTES = 10 * 1024 * 1024 * 1024
+    # Nightly ALAC pre-transcode batch (local hours; start == end means "any time")
+    PRETRANSCODE_ENABLED = True
+    PRETRANSCODE_OFF_PEAK_START_HOUR = 1
+    PRETRANSCODE_OFF_PEAK_END_HOUR = 6
+    PRETRANSCODE_MAX_WORKERS = 2
+    PRETRANSCODE_BATCH_LIMIT = 500
+    PRETRANSCODE_RECENT_PLAY_DAYS = 30
+    # EBU R128 loudness analysis (ffmpeg ebur128; one ffmpeg process per worker)
+    LOUDNESS_ANALYSIS_ENABLED = True
+    LOUDNESS_ANALYSIS_INTERVAL_MINUTES = 60
+    LOUDNESS_ANALYSIS_WORKERS = 2
+    LOUDNESS_ANALYSIS_BATCH_LIMIT = 200
+    LOUDNESS_ANALYSIS_TIMEOUT_SECONDS = 300
+    LOUDNESS_ANALYSIS_RETRY_HOURS = 24  # wait before measuring a track again after a failed run
+    # Tempo / first-beat estimation (needs numpy; decodes mono 11.025 kHz PCM)
+    TEMPO_ANALYSIS_ENABLED = True
+    TEMPO_ANALYSIS_INTERVAL_MINUTES = 60
+    TEMPO_ANALYSIS_WORKERS = 2
+    TEMPO_ANALYSIS_BATCH_LIMIT = 200
+    TEMPO_ANALYSIS_TIMEOUT_SECONDS = 120
+    TEMPO_ANALYSIS_MAX_SECONDS = 240  # analyze at most this much of each track
+    TEMPO_ANALYSIS_RETRY_HOURS = 24  # wait before analyzing a track again after a failed run
+    # Audition previews: short mono MP3 clips from the hook/cue-in (instance/previews)
+    PREVIEW_ENABLED = True
+    PREVIEW_CLIP_SECONDS = 30
+    PREVIEW_BITRATE = "64k"
+    PREVIEW_MAX_CONCURRENCY = 2  # on-demand renders
+    PREVIEW_MAX_WORKERS = 2  # background/prefetch renders
+    PREVIEW_TIMEOUT_SECONDS = 60
+    PREVIEW_BATCH_LIMIT = 300
+    PREVIEW_INTERVAL_MINUTES = 120
+    PREVIEW_CACHE_MAX_BYTES = 512 * 1024 * 1024
+    MUSIC_INDEX_CHANGE_LOG_LIMIT = 500  # index change records kept for incremental consumers
+    CRATE_PLAY_HISTORY_DAYS = 30  # LogEntry history used to order crate rotations
     ICECAST_ANALYTICS_RETENTION_DAYS = 365
     RATE_LIMIT_TRUSTED_PROXIES = []
     RUN_UTILS_ON_STARTUP = _env_flag("RAMS_RUN_UTILS_ON_STARTUP", "1")
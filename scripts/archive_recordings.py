@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+
+from app import create_app
+from app.services.recording_archive import plan_archive, run_archive_pass
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Move old recordings to the archive tier (RECORDINGS_ARCHIVE_ROOT).")
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report what would move and the bytes reclaimed on the recordings path.",
+    )
+    parser.add_argument("--after-days", type=int, default=None, help="Override RECORDINGS_ARCHIVE_AFTER_DAYS.")
+    parser.add_argument("--bitrate", default=None, help="Override RECORDINGS_ARCHIVE_BITRATE (e.g. 64k).")
+    parser.add_argument("--limit", type=int, default=None, help="Archive at most this many recordings.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    # Never start the scheduler or run startup maintenance from this one-off tool.
+    os.environ["RAMS_WSGI_SAFE_MODE"] = "1"
+
+    app = create_app()
+    if args.after_days is not None:
+        app.config["RECORDINGS_ARCHIVE_AFTER_DAYS"] = args.after_days
+    if args.bitrate is not None:
+        app.config["RECORDINGS_ARCHIVE_BITRATE"] = args.bitrate
+
+    with app.app_context():
+        if args.dry_run:
+            result = plan_archive(limit=args.limit)
+        else:
+            result = run_archive_pass(limit=args.limit)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
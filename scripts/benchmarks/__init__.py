@@ -0,0 +1,5 @@
+"""Repeatable benchmarks for library hot paths.
+
+Run modules from the repository root so ``app`` is importable, e.g.
+``python -m scripts.benchmarks.library --tracks 20000 --output before.json``.
+"""
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""Timing and memory benchmarks for the music library hot paths.
+
+Builds a synthetic library (see :mod:`scripts.benchmarks.synthetic`), then
+times ``search_music``, index loading, ``build_dj_library_index``,
+``_match_playlist_entries`` and, with ``--audio-files``, a cold and an
+unchanged ``build_music_index`` scan over tiny tagged MP3 files.  Each case
+gets a warm-up call, ``--repeats`` timed calls (min/median/max) and one
+separate call under ``tracemalloc`` for peak allocation, so the memory
+tracer never skews the timings.
+
+Results are written as JSON; pass a previous file with ``--compare`` to print
+median deltas and flag cases slower than ``--threshold``::
+
+    python -m scripts.benchmarks.library --tracks 20000 --output before.json
+    python -m scripts.benchmarks.library --tracks 20000 --compare before.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from flask import Flask
+
+from app.models import db
+from app.services.library import dj_library, music_search
+from scripts.benchmarks.synthetic import generate_index, playlist_entries, write_audio_library
+
+RESULT_SCHEMA = 1
+
+
+def _make_app(instance_path: str, music_root: str) -> Flask:
+    app = Flask("benchmarks", instance_path=instance_path)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=music_root,
+        MUSIC_INDEX_TTL=24 * 3600,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _reset_index_cache() -> None:
+    music_search._MUSIC_INDEX_CACHE.update({"data": None, "loaded_at": None, "root": None})
+
+
+def measure(func: Callable[[], object], repeats: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """Warm up once, time ``repeats`` calls, then take one traced call for peak memory."""
+    if setup:
+        setup()
+    func()
+    samples: List[float] = []
+    for _ in range(max(1, repeats)):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000.0)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "repeats": len(samples),
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "peak_kib": round(peak / 1024.0, 1),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_index_cases(args: argparse.Namespace, workdir: str) -> Dict[str, Dict]:
+    root = os.path.join(workdir, "music")
+    app = _make_app(os.path.join(workdir, "instance"), root)
+    results: Dict[str, Dict] = {}
+    with app.app_context():
+        files = generate_index(args.tracks, root, seed=args.seed)
+        music_search._write_music_index_file({"files": files, "generated_at": time.time(), "root": root})
+        _reset_index_cache()
+        music_search.get_music_index()
+
+        def case(name: str, func: Callable[[], object], setup: Optional[Callable[[], None]] = None) -> None:
+            results[name] = measure(func, args.repeats, setup)
+            print(f"{name:32s} median {results[name]['median_ms']:10.2f} ms  peak {results[name]['peak_kib']:10.1f} KiB")
+
+        case("index_load_cold", music_search.get_music_index, setup=_reset_index_cache)
+        music_search.get_music_index()
+        case("search_query", lambda: music_search.search_music("love night"))
+        case("search_query_genre", lambda: music_search.search_music("love", genre="Rock"))
+        case("search_browse_folder", lambda: music_search.search_music(None, folder="Various Artists"))
+        case("search_no_match", lambda: music_search.search_music("zzqx"))
+        case("dj_library_index", dj_library.build_dj_library_index)
+        rows = playlist_entries(files, args.playlist_rows, seed=args.seed)
+        case(f"playlist_match_{len(rows)}", lambda: dj_library._match_playlist_entries("Benchmark", rows))
+    return results
+
+
+def run_scan_cases(args: argparse.Namespace, workdir: str) -> Dict[str, Dict]:
+    root = os.path.join(workdir, "audio")
+    write_audio_library(root, args.audio_files, seed=args.seed)
+    app = _make_app(os.path.join(workdir, "scan-instance"), root)
+    results: Dict[str, Dict] = {}
+    with app.app_context():
+        results["scan_cold"] = measure(lambda: music_search.build_music_index(None), args.repeats)
+        existing = music_search.build_music_index(None)
+        results["scan_unchanged"] = measure(lambda: music_search.build_music_index(existing), args.repeats)
+    for name in ("scan_cold", "scan_unchanged"):
+        print(f"{name:32s} median {results[name]['median_ms']:10.2f} ms  peak {results[name]['peak_kib']:10.1f} KiB")
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Print median deltas against ``baseline``; returns the names that regressed."""
+    regressions: List[str] = []
+    if baseline.get("params") != current.get("params"):
+        print("warning: baseline was produced with different parameters", baseline.get("params"))
+    print(f"\n{'case':32s} {'baseline':>12s} {'current':>12s} {'delta':>8s}")
+    for name, result in current["results"].items():
+        before = (baseline.get("results") or {}).get(name)
+        if not before:
+            print(f"{name:32s} {'-':>12s} {result['median_ms']:12.2f} {'new':>8s}")
+            continue
+        delta = (result["median_ms"] - before["median_ms"]) / before["median_ms"] if before["median_ms"] else 0.0
+        flag = ""
+        if delta > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:32s} {before['median_ms']:12.2f} {result['median_ms']:12.2f} {delta:+8.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark music search and index paths on a synthetic library.")
+    parser.add_argument("--tracks", type=int, default=20000, help="Synthetic index size.")
+    parser.add_argument("--audio-files", type=int, default=0, help="Tiny MP3 files for the scan benchmark (0 skips it).")
+    parser.add_argument("--playlist-rows", type=int, default=10, help="Rows matched by the playlist benchmark.")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed calls per case after one warm-up.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Median slowdown treated as a regression.")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit non-zero when a case regresses.")
+    args = parser.parse_args(argv)
+
+    params = {
+        "tracks": args.tracks,
+        "audio_files": args.audio_files,
+        "playlist_rows": args.playlist_rows,
+        "repeats": args.repeats,
+        "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory(prefix="rams-bench-") as workdir:
+        results = run_index_cases(args, workdir)
+        if args.audio_files > 0:
+            results.update(run_scan_cases(args, workdir))
+
+    report = {
+        "schema": RESULT_SCHEMA,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions and args.fail_on_regression:
+            print(f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+
+from app.services.library.loudness import measure_loudness
+
+AUDIO_EXTS = (".mp3", ".flac", ".m4a", ".wav", ".ogg")
+
+
+def _collect_files(root: str, limit: int) -> List[str]:
+    files: List[str] = []
+    for base, dirs, names in os.walk(root):
+        dirs.sort()
+        for name in sorted(names):
+            if name.lower().endswith(AUDIO_EXTS):
+                files.append(os.path.join(base, name))
+                if len(files) >= limit:
+                    return files
+    return files
+
+
+def run_benchmark(files: List[str], workers: int, timeout: int) -> None:
+    started = time.perf_counter()
+    measured = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(measure_loudness, path, timeout) for path in files]
+        for future in as_completed(futures):
+            if future.result():
+                measured += 1
+            else:
+                failed += 1
+    elapsed = time.perf_counter() - started
+    done = measured + failed
+    per_minute = done * 60.0 / elapsed if elapsed > 0 else 0.0
+    print("Loudness benchmark summary")
+    print(f"Tracks: {done} (measured {measured}, failed {failed})")
+    print(f"Workers: {workers}")
+    print(f"Elapsed: {elapsed:.2f}s")
+    print(f"Throughput: {per_minute:.1f} tracks/min ({per_minute / workers:.1f} tracks/min/core)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure EBU R128 analysis throughput on a music folder.")
+    parser.add_argument("root", help="Folder containing audio files.")
+    parser.add_argument("--limit", type=int, default=100, help="Maximum number of files to analyze.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, os.cpu_count() or 1],
+        help="Worker counts to compare (one ffmpeg process per worker).",
+    )
+    parser.add_argument("--timeout", type=int, default=300, help="Per-track ffmpeg timeout in seconds.")
+    args = parser.parse_args()
+
+    files = _collect_files(args.root, args.limit)
+    if not files:
+        raise SystemExit(f"No audio files found under {args.root}")
+    for workers in dict.fromkeys(max(1, w) for w in args.workers):
+        run_benchmark(files, workers, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from app.services.library.crates import evaluate_members, generate_rotation, normalize_rules, update_members
+from app.services.library.play_history import play_key
+from scripts.benchmarks.synthetic import GENRES, generate_index
+
+def _synthetic_library(tracks: int, artists: int, seed: int) -> Tuple[Dict[str, Dict], Dict[str, float]]:
+    files = generate_index(tracks, "/music", seed=seed, artists=artists)
+    rng = random.Random(seed)
+    durations = {path: rng.uniform(150, 360) for path in files}
+    return files, durations
+
+
+def _synthetic_plays(files: Dict[str, Dict], share: float, now: datetime, seed: int) -> Dict[str, datetime]:
+    rng = random.Random(seed + 1)
+    played: Dict[str, datetime] = {}
+    for entry in files.values():
+        if rng.random() < share:
+            played[play_key(entry["artist"], entry["title"])] = now - timedelta(hours=rng.uniform(1, 30 * 24))
+    return played
+
+
+def _timed(label: str, func):
+    started = time.perf_counter()
+    result = func()
+    print(f"{label}: {(time.perf_counter() - started) * 1000:.1f} ms")
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Time crate evaluation and a rotation over a synthetic library.")
+    parser.add_argument("--tracks", type=int, default=80000, help="Synthetic library size.")
+    parser.add_argument("--artists", type=int, default=8000, help="Distinct artists in the library.")
+    parser.add_argument("--hours", type=float, default=24.0, help="Rotation length in hours.")
+    parser.add_argument("--changes", type=int, default=200, help="Index changes applied incrementally.")
+    parser.add_argument("--played-share", type=float, default=0.3, help="Share of tracks with play history.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rules = normalize_rules(
+        {
+            "genres": ["Rock", "Pop", "Electronic", "R&B"],
+            "year_min": 1980,
+            "explicit": False,
+            "min_days_since_played": 3,
+            "artist_separation": 12,
+        }
+    )
+    now = datetime.utcnow()
+    files, durations = _synthetic_library(args.tracks, args.artists, args.seed)
+    played = _synthetic_plays(files, args.played_share, now, args.seed)
+    print(f"Library: {len(files)} tracks, {args.artists} artists, {len(played)} with play history")
+
+    members = _timed("Full rule evaluation", lambda: evaluate_members(rules, files))
+    print(f"Members: {len(members)}")
+
+    rng = random.Random(args.seed + 2)
+    changed: List[str] = rng.sample(sorted(files), min(args.changes, len(files)))
+    for path in changed:
+        files[path] = {**files[path], "genre": rng.choice(GENRES)[0]}
+    removed = changed[: len(changed) // 10]
+    for path in removed:
+        files.pop(path)
+    _timed(
+        f"Incremental update ({len(changed)} changed, {len(removed)} removed)",
+        lambda: update_members(members, rules, files, changed[len(removed):], removed),
+    )
+    assert members == evaluate_members(rules, files)
+
+    entries = [files[path] for path in members]
+    rotation = _timed(
+        f"{args.hours:g}h rotation",
+        lambda: generate_rotation(
+            entries,
+            rules,
+            seconds=args.hours * 3600,
+            last_played=played,
+            durations=durations,
+            now=now,
+            seed="benchmark",
+        ),
+    )
+    print(f"Rotation: {len(rotation)} tracks, {sum(item['duration_seconds'] for item in rotation) / 3600:.2f}h")
+
+
+if __name__ == "__main__":
+    main()
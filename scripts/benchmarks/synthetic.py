@@ -0,0 +1,139 @@
+"""Synthetic music libraries with realistic shape.
+
+Artist popularity follows a Zipf-like curve (a few artists own many albums,
+most own one), albums hold 8-14 tracks under ``<Artist>/<Album>/``, genres
+are weighted towards a handful of common ones, years skew recent and a few
+percent of albums are compilations.  :func:`generate_index` builds index
+entries directly (through ``music_search._build_index_entry`` so the shape
+matches a real scan); :func:`write_audio_library` writes tiny tagged MP3
+files for benchmarks that need to read tags from disk.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+from typing import Dict, Iterator, List, Tuple
+
+from app.services.library import music_search
+
+GENRES = [
+    ("Rock", 18),
+    ("Pop", 16),
+    ("Hip-Hop", 12),
+    ("Electronic", 10),
+    ("Indie", 9),
+    ("R&B", 7),
+    ("Country", 6),
+    ("Jazz", 5),
+    ("Folk", 5),
+    ("Metal", 4),
+    ("Classical", 3),
+    ("Reggae", 3),
+    ("Blues", 2),
+]
+MOODS = ["Upbeat", "Chill", "Dark", "Happy", "Melancholy", "Energetic", None, None]
+WORDS = (
+    "love night city fire heart summer rain dream blue gold wild river light shadow home road "
+    "ghost echo stone star dance lost young sweet cold electric paper silver ocean midnight"
+).split()
+
+# One MPEG-1 Layer III frame (128 kbit/s, 44.1 kHz): a 4-byte header plus silence.
+_MP3_FRAME = b"\xff\xfb\x90\x44" + b"\x00" * 413
+
+
+def _phrase(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high))).title()
+
+
+def iter_tracks(count: int, seed: int = 1, artists: int | None = None) -> Iterator[Tuple[str, Dict]]:
+    """Yield ``(relative_path, tags)`` for ``count`` tracks, deterministically for ``seed``."""
+    rng = random.Random(seed)
+    artist_count = artists or max(1, count // 10)
+    weights = [1.0 / (rank ** 1.1) for rank in range(1, artist_count + 1)]
+    genre_names = [name for name, _ in GENRES]
+    genre_weights = [weight for _, weight in GENRES]
+    artist_genres: Dict[int, str] = {}
+    album_counts: Dict[int, int] = {}
+    produced = 0
+    while produced < count:
+        artist_idx = rng.choices(range(artist_count), cum_weights=None, weights=weights)[0]
+        artist = f"{_phrase(rng, 1, 2)} {artist_idx:05d}" if artist_idx % 7 == 0 else f"Artist {artist_idx:05d}"
+        genre = artist_genres.setdefault(artist_idx, rng.choices(genre_names, weights=genre_weights)[0])
+        album_counts[artist_idx] = album_counts.get(artist_idx, 0) + 1
+        album = f"{_phrase(rng, 1, 3)} Vol {album_counts[artist_idx]}"
+        compilation = rng.random() < 0.04
+        year = str(min(2025, int(rng.triangular(1960, 2026, 2018))))
+        for track_no in range(1, min(rng.randint(8, 14), count - produced) + 1):
+            track_artist = f"Artist {rng.randrange(artist_count):05d}" if compilation else artist
+            tags = {
+                "title": _phrase(rng, 1, 4),
+                "artist": track_artist,
+                "album_artist": "Various Artists" if compilation else artist,
+                "album": album,
+                "genre": genre if rng.random() > 0.1 else rng.choices(genre_names, weights=genre_weights)[0],
+                "mood": rng.choice(MOODS),
+                "year": year,
+                "track": f"{track_no}",
+                "disc": "1",
+                "explicit": rng.random() < 0.08,
+            }
+            folder_artist = "Various Artists" if compilation else artist
+            rel = os.path.join(folder_artist, album, f"{track_no:02d} {tags['title']}.mp3")
+            yield rel, tags
+            produced += 1
+
+
+def generate_index(count: int, root: str, seed: int = 1, artists: int | None = None) -> Dict[str, Dict]:
+    """Index ``files`` mapping for a synthetic library under ``root`` (nothing is written)."""
+    files: Dict[str, Dict] = {}
+    for idx, (rel, tags) in enumerate(iter_tracks(count, seed, artists)):
+        full = os.path.normpath(os.path.join(root, rel))
+        size = 3_000_000 + (idx * 7919) % 9_000_000
+        stat = os.stat_result((0o100644, idx, 0, 1, 0, 0, size, 0, 1_600_000_000 + idx, 0))
+        files[full] = music_search._build_index_entry(full, root, stat, tags)
+    return files
+
+
+def write_audio_library(root: str, count: int, seed: int = 1, frames: int = 4) -> List[str]:
+    """Write ``count`` tiny ID3-tagged MP3 files under ``root``; returns their paths."""
+    from mutagen.id3 import ID3, TALB, TCON, TDRC, TIT2, TPE1, TPE2, TPOS, TRCK  # type: ignore
+
+    paths: List[str] = []
+    for rel, tags in iter_tracks(count, seed):
+        full = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as fh:
+            fh.write(_MP3_FRAME * frames)
+        id3 = ID3()
+        id3.add(TIT2(encoding=3, text=tags["title"]))
+        id3.add(TPE1(encoding=3, text=tags["artist"]))
+        id3.add(TPE2(encoding=3, text=tags["album_artist"]))
+        id3.add(TALB(encoding=3, text=tags["album"]))
+        id3.add(TCON(encoding=3, text=tags["genre"]))
+        id3.add(TDRC(encoding=3, text=tags["year"]))
+        id3.add(TRCK(encoding=3, text=tags["track"]))
+        id3.add(TPOS(encoding=3, text=tags["disc"]))
+        id3.save(full)
+        paths.append(full)
+    return paths
+
+
+def playlist_entries(files: Dict[str, Dict], count: int, seed: int = 1, missing_share: float = 0.2) -> List[Dict]:
+    """Playlist rows as a DJ would paste them: mostly library tracks with noisy spelling."""
+    rng = random.Random(seed + 101)
+    entries = list(files.values())
+    rows: List[Dict] = []
+    for idx in range(count):
+        if rng.random() < missing_share:
+            rows.append({"title": _phrase(rng, 2, 4), "artist": f"Unknown {idx}"})
+            continue
+        entry = rng.choice(entries)
+        title = entry.get("title") or ""
+        variant = rng.randrange(3)
+        if variant == 1:
+            title = f"{title} (Remastered)"
+        elif variant == 2:
+            title = title.lower()
+        rows.append({"title": title, "artist": entry.get("artist") or ""})
+    return rows
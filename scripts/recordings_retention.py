@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+
+from app import create_app
+from app.services.recording_retention import run_retention
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Apply the recordings retention quotas (RECORDINGS_RETENTION_*).")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--simulate",
+        dest="simulate",
+        action="store_true",
+        default=None,
+        help="Only report what would be archived or deleted (the plan is still stored).",
+    )
+    mode.add_argument(
+        "--apply",
+        dest="simulate",
+        action="store_false",
+        help="Archive or delete the planned recordings even if RECORDINGS_RETENTION_SIMULATE is on.",
+    )
+    parser.add_argument("--action", choices=("archive", "delete"), default=None, help="Override RECORDINGS_RETENTION_ACTION.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = _parse_args()
+    # Never start the scheduler or run startup maintenance from this one-off tool.
+    os.environ["RAMS_WSGI_SAFE_MODE"] = "1"
+
+    app = create_app()
+    if args.action is not None:
+        app.config["RECORDINGS_RETENTION_ACTION"] = args.action
+
+    with app.app_context():
+        run = run_retention(simulate=args.simulate, trigger="manual")
+        result = {"run_id": run.id, "bytes_freed": run.bytes_freed, "failed": run.failed, **json.loads(run.plan)}
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+
+from app.services.library import music_search
+from scripts.benchmarks import synthetic
+
+
+def test_synthetic_index_is_deterministic_and_library_shaped(tmp_path):
+    root = str(tmp_path / "music")
+    files = synthetic.generate_index(400, root, seed=3)
+    assert len(files) == 400
+    assert files == synthetic.generate_index(400, root, seed=3)
+
+    folders = {entry["folder"] for entry in files.values()}
+    assert all(folder.count("/") == 1 for folder in folders)
+    per_artist = {}
+    for entry in files.values():
+        per_artist[entry["album_artist"]] = per_artist.get(entry["album_artist"], 0) + 1
+    counts = sorted(per_artist.values(), reverse=True)
+    assert counts[0] >= 2 * counts[len(counts) // 2]  # a few artists own several albums
+    assert all(entry["search"] for entry in files.values())
+
+
+def test_synthetic_audio_files_carry_readable_tags(tmp_path):
+    root = str(tmp_path / "audio")
+    paths = synthetic.write_audio_library(root, 5, seed=2)
+    expected = [tags for _, tags in synthetic.iter_tracks(5, seed=2)]
+    assert len(paths) == 5 and all(os.path.getsize(path) > 0 for path in paths)
+    tags = music_search._read_tags(paths[0])
+    assert tags["title"] == expected[0]["title"]
+    assert tags["artist"] == expected[0]["artist"]
+    assert tags["album"] == expected[0]["album"]
@@ -0,0 +1,108 @@
+import os
+import threading
+
+from flask import Flask
+
+from app.models import db
+from app.services.library import music_search
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz) is 417 bytes.
+_MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=str(tmp_path / "music"),
+        PSA_LIBRARY_PATH=str(tmp_path / "psa"),
+        VOICE_TRACKS_ROOT=str(tmp_path / "voice"),
+        METADATA_WRITE_WORKERS=2,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _write_mp3(path, title, artist):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(_MP3_FRAME * 8)
+    audio = music_search.mutagen.File(str(path), easy=True)
+    audio.add_tags()
+    audio["title"] = [title]
+    audio["artist"] = [artist]
+    audio["album"] = ["First Album"]
+    audio.save()
+    return str(path)
+
+
+def test_bulk_update_reports_per_file_and_patches_indexes(tmp_path, monkeypatch):
+    music_search._MUSIC_INDEX_CACHE.update({"data": None, "loaded_at": None, "root": None})
+    music_search.invalidate_library_editor_index_cache()
+    app = _app(tmp_path)
+    first = _write_mp3(tmp_path / "music" / "a" / "one.mp3", "One", "Old Artist")
+    second = _write_mp3(tmp_path / "music" / "b" / "two.mp3", "Two", "Old Artist")
+    untouched = _write_mp3(tmp_path / "music" / "c" / "three.mp3", "Three", "Someone Else")
+    missing = str(tmp_path / "music" / "gone.mp3")
+
+    with app.app_context():
+        music_search.get_library_editor_index(refresh=True)
+
+        def _no_rebuild(*_args, **_kwargs):
+            raise AssertionError("indexes should be patched, not rebuilt")
+
+        monkeypatch.setattr(music_search, "build_music_index", _no_rebuild)
+        monkeypatch.setattr(music_search, "build_library_editor_index", _no_rebuild)
+
+        result = music_search.bulk_update_metadata([first, second, missing], {"artist": "New Artist"})
+
+        assert [item["status"] for item in result["results"]] == ["ok", "ok", "error"]
+        assert (result["succeeded"], result["failed"]) == (2, 1)
+
+        index = music_search._load_music_index_file()
+        assert index["files"][first]["artist"] == "New Artist"
+        assert index["files"][untouched]["artist"] == "Someone Else"
+        assert "new" in index["files"][second]["search"]
+
+        editor = music_search.get_library_editor_index()
+        artists = {artist["name"]: artist for artist in editor["music"]}
+        assert "Old Artist" not in artists
+        new_tracks = [t["path"] for album in artists["New Artist"]["albums"] for t in album["tracks"]]
+        assert sorted(new_tracks) == sorted([first, second])
+        assert [artist["name"] for artist in editor["music"]] == ["New Artist", "Someone Else"]
+        disk = music_search._load_library_editor_index_file()
+        assert disk["music_generated_at"] == index["generated_at"]
+
+
+def test_index_patch_waits_for_a_concurrent_publish(tmp_path):
+    music_search._MUSIC_INDEX_CACHE.update({"data": None, "loaded_at": None, "root": None})
+    app = _app(tmp_path)
+    first = _write_mp3(tmp_path / "music" / "a" / "one.mp3", "One", "Old Artist")
+    added = _write_mp3(tmp_path / "music" / "a" / "two.mp3", "Two", "Old Artist")
+
+    def _patch():
+        with app.app_context():
+            tags = {**music_search._read_tags(first), "artist": "New Artist"}
+            music_search._patch_indexes({first: (tags, os.stat(first))})
+
+    with app.app_context():
+        root = str(tmp_path / "music")
+        entry = music_search._build_index_entry(first, root, os.stat(first), music_search._read_tags(first))
+        music_search._write_music_index_file({"files": {first: entry}, "generated_at": 1.0, "root": root})
+        with music_search.index_write_lock():
+            patcher = threading.Thread(target=_patch)
+            patcher.start()
+            patcher.join(timeout=0.3)
+            assert patcher.is_alive()
+            # A publish in the same folder lands while the bulk edit waits.
+            index = music_search._load_music_index_file()
+            index["files"][added] = music_search._build_index_entry(
+                added, root, os.stat(added), music_search._read_tags(added)
+            )
+            music_search._write_music_index_file(index)
+        patcher.join(timeout=10)
+        files = music_search._load_music_index_file()["files"]
+        assert files[first]["artist"] == "New Artist"
+        assert added in files
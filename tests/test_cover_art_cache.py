@@ -0,0 +1,69 @@
+import os
+
+from flask import Flask, abort, request
+
+from app.services.library import cover_art
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(COVER_THUMBNAIL_SIZES=(96, 240))
+
+    @app.route("/cover")
+    def cover():
+        resp = cover_art.send_cover(request.args["path"], request.args.get("size", type=int))
+        if resp is None:
+            abort(404)
+        return resp
+
+    return app
+
+
+def test_cover_is_cached_and_revalidated_without_reading_audio(tmp_path, monkeypatch):
+    track = tmp_path / "song.mp3"
+    track.write_bytes(b"audio")
+    (tmp_path / "song.jpg").write_bytes(b"jpeg-bytes")
+    monkeypatch.setattr(cover_art, "_render_thumbnail", lambda *_args: False)
+    client = _app(tmp_path).test_client()
+
+    first = client.get("/cover", query_string={"path": str(track), "size": 200})
+    assert first.status_code == 200
+    assert first.data == b"jpeg-bytes"
+    etag = first.headers["ETag"]
+    assert etag.endswith('-240"') and not etag.startswith("W/")
+    assert "max-age=" in first.headers["Cache-Control"]
+    assert "no-cache" not in first.headers["Cache-Control"]
+
+    def _fail(_path):
+        raise AssertionError("audio should not be parsed on revalidation")
+
+    monkeypatch.setattr(cover_art, "_extract_cover", _fail)
+    second = client.get(
+        "/cover",
+        query_string={"path": str(track), "size": 200},
+        headers={"If-None-Match": etag},
+    )
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.headers["Cache-Control"] == first.headers["Cache-Control"]
+
+    os.utime(track, ns=(1, 1))
+    with _app(tmp_path).test_request_context():
+        assert f'"{cover_art.cover_etag(str(track), 200)}"' != etag
+
+
+def test_missing_cover_is_negatively_cached(tmp_path, monkeypatch):
+    track = tmp_path / "plain.mp3"
+    track.write_bytes(b"audio")
+    calls = []
+
+    def _extract(path):
+        calls.append(path)
+        return None, "image/jpeg"
+
+    monkeypatch.setattr(cover_art, "_extract_cover", _extract)
+    client = _app(tmp_path).test_client()
+
+    assert client.get("/cover", query_string={"path": str(track)}).status_code == 404
+    assert client.get("/cover", query_string={"path": str(track)}).status_code == 404
+    assert len(calls) == 1
@@ -0,0 +1,111 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app.models import Crate, db
+from app.services.library import crates, music_search
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=str(tmp_path / "music"),
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _entry(root, folder, name, **fields):
+    path = os.path.join(root, folder, name)
+    return path, {"path": path, "folder": folder, "title": name, **fields}
+
+
+def test_rules_validation_and_matching():
+    rules = crates.normalize_rules({"genres": ["Rock"], "year_min": "1990", "year_max": 1999, "folders": ["A/"]})
+    assert rules["folders"] == ["A"]
+    assert crates.rules_match(rules, {"genre": "rock", "year": "1994-03-01", "folder": "A/B"})
+    assert not crates.rules_match(rules, {"genre": "rock", "year": "2001", "folder": "A"})
+    assert not crates.rules_match(rules, {"genre": "rock", "year": "1994", "folder": "AB"})
+    with pytest.raises(ValueError):
+        crates.normalize_rules({"year_min": 2000, "year_max": 1990})
+
+
+def test_rotation_respects_play_age_and_artist_separation():
+    now = datetime(2026, 1, 1, 12, 0)
+    entries = [
+        {"path": f"/m/{artist}{idx}.mp3", "artist": artist, "title": f"{artist}{idx}"}
+        for artist in ("A", "B", "C")
+        for idx in range(3)
+    ]
+    rules = crates.normalize_rules({"min_days_since_played": 2, "artist_separation": 2})
+    last_played = {
+        crates.play_key("A", "A0"): now - timedelta(hours=5),  # too recent
+        crates.play_key("B", "B0"): now - timedelta(days=10),
+    }
+
+    rotation = crates.generate_rotation(
+        entries, rules, seconds=8 * 100, last_played=last_played, durations={e["path"]: 100 for e in entries}, now=now
+    )
+
+    paths = [item["path"] for item in rotation]
+    assert "/m/A0.mp3" not in paths
+    assert len(paths) == 8 and len(set(paths)) == 8
+    artists = [item["artist"] for item in rotation]
+    assert all(len({*artists[i : i + 3]}) == 3 for i in range(len(artists) - 2))
+    # Never-played tracks come first; separation may pull B0 one slot earlier.
+    assert "/m/B0.mp3" in paths[-2:]
+    assert rotation[-1]["offset_seconds"] == 700
+
+
+def test_crate_members_follow_index_changes_incrementally(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    root = str(tmp_path / "music")
+    a1, rock = _entry(root, "A", "1.mp3", genre="Rock")
+    b1, pop = _entry(root, "B", "1.mp3", genre="Pop")
+    with app.app_context():
+        music_search._write_music_index_file({"files": {a1: rock, b1: pop}, "generated_at": 1.0, "root": root})
+        crate = Crate(name="Rock", rules=json.dumps({"genres": ["Rock"]}))
+        db.session.add(crate)
+        db.session.commit()
+        assert crates.refresh_crate_members(crate) == [a1]
+
+        index = music_search._load_music_index_file()
+        index["files"][b1] = {**pop, "genre": "Rock"}
+        del index["files"][a1]
+        music_search._write_music_index_file(index)
+
+        monkeypatch.setattr(crates, "evaluate_members", lambda *args: pytest.fail("full evaluation"))
+        assert crates.refresh_crate_members(crate) == [b1]
+
+        rotation = crates.build_crate_rotation(crate, hours=0.5)
+        assert {item["path"] for item in rotation["items"]} == {b1}
+        assert rotation["members"] == 1
+
+
+def test_publish_during_a_crate_refresh_is_picked_up_next_time(tmp_path):
+    app = _app(tmp_path)
+    root = str(tmp_path / "music")
+    a1, rock = _entry(root, "A", "1.mp3", genre="Rock")
+    b1, late = _entry(root, "B", "1.mp3", genre="Rock")
+    with app.app_context():
+        music_search._write_music_index_file({"files": {a1: rock}, "generated_at": 1.0, "root": root})
+        crate = Crate(name="Rock", rules=json.dumps({"genres": ["Rock"]}))
+        db.session.add(crate)
+        db.session.commit()
+        assert crates.refresh_crate_members(crate) == [a1]
+
+        music_search._write_music_index_file(music_search.music_index_snapshot())
+        snapshot = music_search.music_index_snapshot()
+        index = music_search.music_index_snapshot()
+        index["files"][b1] = late
+        music_search._write_music_index_file(index)  # lands while the refresh below holds the older snapshot
+
+        assert crates.refresh_crate_members(crate, snapshot) == [a1]
+        assert crates.refresh_crate_members(crate) == [a1, b1]
@@ -0,0 +1,62 @@
+from flask import Flask
+
+from app.models import db
+from app.services.library import library_index, music_search
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=str(tmp_path / "music"),
+        LIBRARY_INDEX_DB_BATCH_SIZE=1,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+class _Crash(BaseException):
+    pass
+
+
+def test_interrupted_index_resumes_from_checkpoint(tmp_path, monkeypatch):
+    music_search._MUSIC_INDEX_CACHE.update({"data": None, "loaded_at": None, "root": None})
+    app = _app(tmp_path)
+    app.config["LIBRARY_INDEX_CHECKPOINT_INTERVAL_FILES"] = 2
+    music = tmp_path / "music"
+    for name in ("a/1.mp3", "a/2.mp3", "b/3.mp3", "b/4.mp3", "c.mp3"):
+        (music / name).parent.mkdir(parents=True, exist_ok=True)
+        (music / name).write_bytes(b"\0" * 16)
+
+    real_read_tags = music_search._read_tags
+    reads = []
+
+    def crashing_read_tags(path):
+        reads.append(path)
+        if len(reads) == 4:
+            raise _Crash()
+        return real_read_tags(path)
+
+    monkeypatch.setattr(music_search, "_read_tags", crashing_read_tags)
+    try:
+        library_index._build_index(app)
+    except _Crash:
+        pass
+    checkpoint = tmp_path / "instance" / "library_index_checkpoint" / "position.json"
+    assert checkpoint.exists()
+
+    reads.clear()
+    monkeypatch.setattr(music_search, "_read_tags", lambda path: reads.append(path) or real_read_tags(path))
+    library_index._build_index(app)
+
+    # Files 1-2 were checkpointed; 3 was journaled after the checkpoint, so it is redone.
+    assert [path.rsplit("/", 1)[-1] for path in reads] == ["3.mp3", "4.mp3", "c.mp3"]
+    metrics = library_index.get_library_index_status()["metrics"]
+    assert metrics["resumed_files"] == 2
+    assert metrics["counts"]["new"] == 5
+    with app.app_context():
+        assert len(music_search._load_music_index_file()["files"]) == 5
+    assert not checkpoint.exists()
@@ -0,0 +1,65 @@
+from flask import Flask
+
+from app.models import MusicAnalysis, db
+from app.services.library import library_index, music_search
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=str(tmp_path / "music"),
+        LIBRARY_INDEX_DB_BATCH_SIZE=1,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_index_run_records_counts_phases_and_history(tmp_path):
+    music_search._MUSIC_INDEX_CACHE.update({"data": None, "loaded_at": None, "root": None})
+    app = _app(tmp_path)
+    music = tmp_path / "music"
+    music.mkdir()
+    for name in ("a.mp3", "b.mp3"):
+        (music / name).write_bytes(b"\0" * 16)
+    with app.app_context():
+        db.session.add(MusicAnalysis(path=str(music / "a.mp3"), missing_tags=False))
+        db.session.commit()
+
+    library_index._build_index(app)
+    first = library_index.get_library_index_status()["metrics"]
+    assert first["counts"]["new"] == 2
+    assert set(first["phases"]) == set(library_index.INDEX_PHASES)
+    assert first["eta_seconds"] == 0.0
+    with app.app_context():
+        # Untagged file: the lightweight analysis pass flags it.
+        assert MusicAnalysis.query.filter_by(path=str(music / "a.mp3")).one().missing_tags
+
+    (music / "b.mp3").unlink()
+    (music / "c.mp3").write_bytes(b"\0" * 16)
+    library_index._build_index(app)
+
+    with app.app_context():
+        runs = library_index.get_library_index_history()
+    assert len(runs) == 2
+    latest = runs[0]
+    assert latest["status"] == "ok"
+    assert (latest["counts"]["skipped"], latest["counts"]["new"], latest["counts"]["removed"]) == (1, 1, 1)
+
+
+def test_rate_is_smoothed_and_drives_eta():
+    now = [0.0]
+    metrics = library_index.IndexRunMetrics(clock=lambda: now[0])
+    metrics.total = 100
+    for _ in range(4):
+        now[0] += 0.25
+        metrics.file_done("new")
+    assert metrics.rate == 4.0
+    for _ in range(8):
+        now[0] += 0.125
+        metrics.file_done("skipped")
+    assert metrics.rate == 0.3 * 8.0 + 0.7 * 4.0
+    assert metrics.snapshot()["eta_seconds"] == round(88 / metrics.rate, 1)
@@ -0,0 +1,81 @@
+import json
+
+from flask import Flask
+
+from app.models import db
+from app.services.library import music_search
+
+
+def _app(tmp_path, **config):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=str(tmp_path / "music"),
+    )
+    app.config.update(config)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _library(tmp_path, names):
+    paths = []
+    for name in names:
+        path = tmp_path / "music" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"\0" * 32)
+        paths.append(str(path))
+    return paths
+
+
+def test_scan_pages_resume_from_cursor_in_sorted_order(tmp_path):
+    app = _app(tmp_path)
+    paths = _library(tmp_path, ["b/2.mp3", "a/x/1.mp3", "a/z.mp3", "c.mp3", "a/notes.txt"])
+    expected = sorted(p for p in paths if p.endswith(".mp3"))
+    with app.app_context():
+        seen = []
+        cursor = None
+        while True:
+            page = music_search.scan_library(cursor=cursor, limit=2)
+            seen.extend(track["path"] for track in page["tracks"])
+            assert all("peaks" not in track for track in page["tracks"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+    assert seen == expected
+
+
+def test_scan_does_not_follow_symlinked_folders(tmp_path):
+    app = _app(tmp_path)
+    [track] = _library(tmp_path, ["a/1.mp3"])
+    (tmp_path / "music" / "a" / "loop").symlink_to(tmp_path / "music")
+    with app.app_context():
+        assert list(music_search._iter_music_paths()) == [track]
+
+
+def test_quality_report_streams_findings_with_capped_samples(tmp_path):
+    app = _app(tmp_path, MUSIC_SCAN_SAMPLE_LIMIT=1)
+    _library(tmp_path, ["one.mp3", "two.mp3", "three.mp3"])
+    with app.app_context():
+        snapshot = music_search.queues_snapshot(limit=2)
+        # The first page comes back before the library-wide pass has finished.
+        assert snapshot["metrics_running"] and snapshot["metrics"] is None
+        assert len(snapshot["tracks"]) == 2
+        assert snapshot["next_cursor"] == snapshot["tracks"][-1]["path"]
+        music_search._quality_thread.join(timeout=30)
+        metrics = music_search.queues_snapshot(limit=2)["metrics"]
+        music_search._quality_thread.join(timeout=30)
+
+    assert metrics["scanned"] == 3
+    # Identical content: two duplicate pairs, but only one kept in the sample.
+    assert metrics["counts"]["duplicates"] == 2
+    assert len(metrics["duplicates"]) == 1
+    assert metrics["counts"]["missing_art"] == 3
+
+    report = tmp_path / "instance" / "library_quality_report.jsonl"
+    lines = [json.loads(line) for line in report.read_text(encoding="utf-8").splitlines()]
+    assert sum(1 for line in lines if line["category"] == "missing_art") == 3
+    assert not (tmp_path / "instance" / "library_quality_report.jsonl.partial").exists()
@@ -0,0 +1,75 @@
+import threading
+
+from flask import Flask
+
+from app.models import db
+from app.services.library import library_index, music_search
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=str(tmp_path / "music"),
+        LIBRARY_INDEX_DB_BATCH_SIZE=1,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_subtree_reindex_merges_and_survives_running_full_scan(tmp_path, monkeypatch):
+    music_search._MUSIC_INDEX_CACHE.update({"data": None, "loaded_at": None, "root": None})
+    app = _app(tmp_path)
+    music = tmp_path / "music"
+    for name in ("a/1.mp3", "b/2.mp3", "c/3.mp3"):
+        (music / name).parent.mkdir(parents=True, exist_ok=True)
+        (music / name).write_bytes(b"\0" * 16)
+    library_index._build_index(app)
+
+    # A DJ drops a file into b/ while a full scan is already past that folder.
+    real_read_tags = music_search._read_tags
+    dropped = music / "b" / "new.mp3"
+
+    def read_tags(path):
+        if path.endswith("3.mp3") and not dropped.exists():
+            dropped.write_bytes(b"\0" * 16)
+            library_index._run_subtree_job(app, "b")
+        return real_read_tags(path)
+
+    monkeypatch.setattr(music_search, "_read_tags", read_tags)
+    (music / "c" / "3.mp3").write_bytes(b"\0" * 32)  # force a tag read in c/
+    library_index._build_index(app)
+
+    with app.app_context():
+        index = music_search._load_music_index_file()
+    assert str(dropped) in index["files"]
+    assert set(index["subtree_generations"]) == {"b"}
+    assert library_index.get_library_index_status()["subtrees"]["b"]["counts"]["new"] == 1
+    assert not (tmp_path / "instance" / "library-index.priority").exists()
+
+
+def test_resolve_subtree_rejects_escapes(tmp_path):
+    app = _app(tmp_path)
+    (tmp_path / "music" / "Album").mkdir(parents=True)
+    with app.app_context():
+        assert library_index.resolve_subtree("Album/") == "Album"
+        assert library_index.resolve_subtree(str(tmp_path / "music" / "Album")) == "Album"
+        assert library_index.resolve_subtree("../instance") is None
+        assert library_index.resolve_subtree(".") is None
+        assert library_index.resolve_subtree("Missing") is None
+
+
+def test_full_scan_waits_for_priority_marker(tmp_path):
+    app = _app(tmp_path)
+    marker = tmp_path / "instance" / "library-index.priority"
+    marker.parent.mkdir(parents=True, exist_ok=True)
+    marker.write_text("Album", encoding="utf-8")
+    threading.Timer(0.3, marker.unlink).start()
+    metrics = library_index.IndexRunMetrics()
+
+    library_index._yield_to_priority_jobs(app, metrics)
+
+    assert metrics.phases["priority_wait"] >= 0.2
@@ -0,0 +1,97 @@
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from app.models import MusicAnalysis, db
+from app.services.library import loudness
+
+_EBUR128_STDERR = """\
+[Parsed_ebur128_0 @ 0x55d] Summary:
+
+  Integrated loudness:
+    I:         -14.2 LUFS
+    Threshold: -24.6 LUFS
+
+  Loudness range:
+    LRA:         6.3 LU
+    Threshold: -34.5 LUFS
+    LRA low:   -19.4 LUFS
+    LRA high:  -13.1 LUFS
+
+  True peak:
+    Peak:       -0.4 dBFS
+"""
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_parse_ebur128_summary():
+    assert loudness.parse_ebur128_summary(_EBUR128_STDERR) == {
+        "loudness_lufs": -14.2,
+        "loudness_range_lu": 6.3,
+        "true_peak_dbtp": -0.4,
+    }
+    silent = _EBUR128_STDERR.replace("-14.2 LUFS", "-inf LUFS").replace("-0.4 dBFS", "-inf dBFS")
+    assert loudness.parse_ebur128_summary(silent)["loudness_lufs"] is None
+    assert loudness.parse_ebur128_summary("Invalid data found when processing input") is None
+
+
+def test_batch_stores_results_and_skips_unchanged_tracks(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    files = {}
+    for name in ("good", "broken"):
+        path = tmp_path / f"{name}.mp3"
+        path.write_bytes(b"\0" * 16)
+        files[str(path)] = {"path": str(path), "mtime": time.time() - 60}
+    good = str(tmp_path / "good.mp3")
+    monkeypatch.setattr(loudness, "get_music_index", lambda: {"files": files})
+    calls = []
+
+    def fake_measure(path, timeout):
+        calls.append(path)
+        return loudness.parse_ebur128_summary(_EBUR128_STDERR) if path == good else None
+
+    monkeypatch.setattr(loudness, "measure_loudness", fake_measure)
+    with app.app_context():
+        first = loudness.run_loudness_batch(max_workers=2)
+        second = loudness.run_loudness_batch(max_workers=2)
+        row = MusicAnalysis.query.filter_by(path=good).one()
+
+        assert (first["analyzed"], first["failed"]) == (1, 1)
+        assert "tracks_per_minute_per_core" in first
+        assert second["candidates"] == 0
+        assert len(calls) == 2
+        assert (row.loudness_lufs, row.loudness_range_lu, row.true_peak_dbtp) == (-14.2, 6.3, -0.4)
+
+
+def test_failed_measurement_stays_unanalyzed_until_its_retry_time(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    path = tmp_path / "broken.mp3"
+    path.write_bytes(b"\0" * 16)
+    files = {str(path): {"path": str(path), "mtime": time.time() - 60}}
+    monkeypatch.setattr(loudness, "get_music_index", lambda: {"files": files})
+    results = [None, loudness.parse_ebur128_summary(_EBUR128_STDERR)]
+    monkeypatch.setattr(loudness, "measure_loudness", lambda _path, _timeout: results.pop(0))
+    with app.app_context():
+        assert loudness.run_loudness_batch()["failed"] == 1
+        row = MusicAnalysis.query.filter_by(path=str(path)).one()
+        assert row.loudness_analyzed_at is None and row.loudness_lufs is None
+        assert row.loudness_retry_at > datetime.utcnow() + timedelta(hours=23)
+        assert loudness.loudness_candidates() == []
+
+        row.loudness_retry_at = datetime.utcnow() - timedelta(minutes=1)
+        db.session.commit()
+        assert loudness.run_loudness_batch()["analyzed"] == 1
+        row = MusicAnalysis.query.filter_by(path=str(path)).one()
+        assert row.loudness_retry_at is None and row.loudness_lufs == -14.2 and row.loudness_analyzed_at
@@ -0,0 +1,277 @@
+import io
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+
+from app import scheduler
+from app.logger import init_logger
+from app.models import MarathonEvent, db
+from app.services import marathon_recorder, recording_segments
+from app.services.log_export import read_recording_metadata
+
+
+def _write_segment(segment_dir, number, payload, listed=None, list_name="segments_0.csv"):
+    name = f"seg_{number:05d}.mp3"
+    with open(os.path.join(segment_dir, name), "wb") as handle:
+        handle.write(payload)
+    if listed is not None:
+        with open(os.path.join(segment_dir, list_name), "a", encoding="utf-8") as handle:
+            handle.write(f"{name},{listed[0]:.6f},{listed[1]:.6f}\n")
+
+
+def test_chunks_and_split_points():
+    start = datetime(2026, 3, 6, 18, 0)
+    chunks = marathon_recorder.marathon_chunks(start, start + timedelta(hours=5), 2, "Radiothon")
+
+    assert [chunk["label"] for chunk in chunks] == [
+        "Radiothon_Fri_06PM_8PM", "Radiothon_Fri_08PM_10PM", "Radiothon_Fri_10PM_11PM",
+    ]
+    joined_late = start + timedelta(minutes=30)
+    assert marathon_recorder.chunk_index_at(chunks, joined_late) == 0
+    assert marathon_recorder.segment_times_from(chunks, joined_late) == [5400.0, 12600.0]
+    assert marathon_recorder.segment_times_from(chunks, start + timedelta(hours=4, minutes=30)) == []
+
+    command = recording_segments.build_segment_command(
+        "http://stream", 16200, "/tmp/x.segments", segment_seconds=7200,
+        attempt={"start_number": 0, "list": "segments_0.csv"}, segment_times=[5400.0, 12600.0],
+    )
+    assert command[command.index("-segment_times") + 1] == "5400.000,12600.000"
+    assert "-segment_time" not in command
+
+
+def test_chunks_joined_across_a_reconnect(tmp_path):
+    base_folder = str(tmp_path / "Radiothon")
+    os.makedirs(base_folder)
+    start = datetime(2026, 3, 6, 10, 0)
+    chunks = marathon_recorder.marathon_chunks(start, start + timedelta(hours=4), 2, "Radiothon")
+    segment_dir = marathon_recorder.marathon_segment_dir(base_folder, "Radiothon")
+    recording = os.path.join(base_folder, "Radiothon.mp3")
+
+    first = recording_segments.begin_segment_attempt(
+        segment_dir, recording_path=recording, segment_seconds=7200, started_at=start,
+        fields={"chunk_index": 0},
+    )
+    _write_segment(segment_dir, 0, b"a" * 6, listed=(0.0, 7200.0))
+    _write_segment(segment_dir, 1, b"b" * 3)  # stream dropped 30 minutes into the second chunk
+
+    assert marathon_recorder.closed_chunks(segment_dir, active_attempt=first["attempt"]) == [0]
+    first_path = marathon_recorder.chunk_output_path(base_folder, chunks[0])
+    assert marathon_recorder.finalize_chunk(segment_dir, chunks[0], first_path, show_name="Radiothon") == first_path
+    assert os.path.basename(first_path) == "Radiothon_Fri_10AM_12PM_03-06-26_RAWDATA.mp3"
+    assert not os.path.exists(os.path.join(segment_dir, "seg_00000.mp3"))
+
+    retry = recording_segments.begin_segment_attempt(
+        segment_dir, recording_path=recording, segment_seconds=7200,
+        started_at=start + timedelta(hours=2, minutes=40),
+        min_start_number=marathon_recorder.next_segment_number(segment_dir),
+        fields={"chunk_index": 1},
+    )
+    assert (retry["start_number"], retry["chunk_index"]) == (2, 1)
+    _write_segment(segment_dir, 2, b"c" * 4, listed=(0.0, 4800.0), list_name="segments_1.csv")
+
+    assert marathon_recorder.closed_chunks(segment_dir, active_attempt=retry["attempt"]) == [1]
+    second_path = marathon_recorder.chunk_output_path(base_folder, chunks[1])
+    marathon_recorder.finalize_chunk(segment_dir, chunks[1], second_path, show_name="Radiothon")
+    with open(second_path, "rb") as handle:
+        assert handle.read() == b"bbbcccc"
+    metadata = read_recording_metadata(second_path)
+    assert metadata["show_name"] == "Radiothon"
+    assert metadata["parts"] == [
+        {"attempt": 0, "offset": 0.0, "start_byte": 0, "end_byte": 3},
+        {"attempt": 1, "offset": 2400.0, "start_byte": 3, "end_byte": 7},
+    ]
+    # Already joined chunks are not joined twice.
+    assert marathon_recorder.finalize_chunk(segment_dir, chunks[1], second_path, show_name="Radiothon") is None
+
+    marathon_recorder.finish_marathon(segment_dir)
+    assert not os.path.exists(segment_dir)
+
+
+def test_record_marathon_runs_one_process_for_the_whole_event(tmp_path, monkeypatch):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        STREAM_URL="http://stream",
+        OUTPUT_FOLDER=str(tmp_path / "rec"),
+        RECORDING_PERIODS_PATH=str(tmp_path / "periods.json"),
+        RECORDING_INLINE_LEVELS=False,
+    )
+    (tmp_path / "periods.json").write_text(json.dumps({"periods": ["Spring 2026"], "current": "Spring 2026"}))
+    db.init_app(app)
+    now = datetime.now()
+    with app.app_context():
+        db.create_all()
+        event = MarathonEvent(
+            name="Radiothon", safe_name="Radiothon", chunk_hours=1, status="pending",
+            start_time=now - timedelta(minutes=30), end_time=now + timedelta(minutes=90),
+        )
+        db.session.add(event)
+        db.session.commit()
+        event_id = event.id
+    monkeypatch.setattr(scheduler, "flask_app", app)
+    monkeypatch.setattr(scheduler, "logger", init_logger())
+    restarts = []
+    monkeypatch.setattr(
+        scheduler,
+        "restart_instreamer",
+        lambda **kwargs: restarts.append(kwargs) or SimpleNamespace(
+            accepted=False, status="disabled", message="", should_count_restart=False,
+        ),
+    )
+    commands = []
+
+    class FakeProcess:
+        returncode = 0
+
+        def __init__(self, command, **_kwargs):
+            commands.append(command)
+            segment_dir = os.path.dirname(command[-1])
+            _write_segment(segment_dir, 0, b"A" * 4, listed=(0.0, 1800.0))
+            _write_segment(segment_dir, 1, b"B" * 4, listed=(1800.0, 5400.0))
+            self.stderr = io.BytesIO(b"")
+
+        def poll(self):
+            return 0
+
+        def wait(self, timeout=None):
+            return 0
+
+    monkeypatch.setattr(scheduler.subprocess, "Popen", FakeProcess)
+
+    scheduler.record_marathon(event_id, str(tmp_path / "missing.json"))
+
+    [command] = commands
+    assert float(command[command.index("-segment_times") + 1]) > 1700
+    folder = tmp_path / "rec" / "Spring 2026" / "Marathons" / "Radiothon"
+    finals = sorted(name for name in os.listdir(folder) if name.endswith("_RAWDATA.mp3"))
+    assert [(folder / name).read_bytes() for name in finals] in ([b"AAAA", b"BBBB"], [b"BBBB", b"AAAA"])
+    assert not any(name.endswith(".segments") for name in os.listdir(folder))
+    # ffmpeg gave up early: one reconnect attempt, not one per remaining chunk.
+    assert len(restarts) == 1
+    assert not scheduler.ACTIVE_RECORDINGS
+
+
+def test_chunk_stays_open_until_the_retry_writes_into_it(tmp_path):
+    base_folder = str(tmp_path / "Radiothon")
+    os.makedirs(base_folder)
+    start = datetime(2026, 3, 6, 10, 0)
+    chunks = marathon_recorder.marathon_chunks(start, start + timedelta(hours=4), 2, "Radiothon")
+    segment_dir = marathon_recorder.marathon_segment_dir(base_folder, "Radiothon")
+    recording = os.path.join(base_folder, "Radiothon.mp3")
+
+    recording_segments.begin_segment_attempt(
+        segment_dir, recording_path=recording, segment_seconds=7200, started_at=start, fields={"chunk_index": 0},
+    )
+    _write_segment(segment_dir, 0, b"a" * 6)  # stream dropped 30 minutes into the first chunk
+    retry = recording_segments.begin_segment_attempt(
+        segment_dir, recording_path=recording, segment_seconds=7200,
+        started_at=start + timedelta(minutes=40),
+        min_start_number=marathon_recorder.next_segment_number(segment_dir),
+        fields={"chunk_index": 0},
+    )
+
+    # The retry has not written anything yet, but it is recording into chunk 0.
+    assert marathon_recorder.closed_chunks(segment_dir, active_attempt=retry["attempt"]) == []
+    _write_segment(segment_dir, 1, b"b" * 4, listed=(0.0, 4800.0), list_name="segments_1.csv")
+    _write_segment(segment_dir, 2, b"c" * 2)
+    assert marathon_recorder.closed_chunks(segment_dir, active_attempt=retry["attempt"]) == [0]
+
+    path = marathon_recorder.chunk_output_path(base_folder, chunks[0])
+    marathon_recorder.finalize_chunk(segment_dir, chunks[0], path, show_name="Radiothon")
+    with open(path, "rb") as handle:
+        assert handle.read() == b"aaaaaabbbb"
+
+
+def test_finish_marathon_keeps_unjoined_audio(tmp_path):
+    base_folder = str(tmp_path / "Radiothon")
+    os.makedirs(base_folder)
+    start = datetime(2026, 3, 6, 10, 0)
+    segment_dir = marathon_recorder.marathon_segment_dir(base_folder, "Radiothon")
+    recording_segments.begin_segment_attempt(
+        segment_dir, recording_path=os.path.join(base_folder, "Radiothon.mp3"), segment_seconds=7200,
+        started_at=start, fields={"chunk_index": 0},
+    )
+    _write_segment(segment_dir, 0, b"a" * 6, listed=(0.0, 7200.0))
+    _write_segment(segment_dir, 1, b"b" * 3)
+
+    assert marathon_recorder.finish_marathon(segment_dir) is False
+    assert os.path.exists(os.path.join(segment_dir, "seg_00000.mp3"))
+    assert recording_segments.read_segment_manifest(segment_dir)["status"] == "incomplete"
+    # Chunk 1 was cut off by a cancellation; only chunk 0 has to be joined.
+    marathon_recorder.finalize_chunk(
+        segment_dir,
+        marathon_recorder.marathon_chunks(start, start + timedelta(hours=4), 2, "Radiothon")[0],
+        os.path.join(base_folder, "chunk0.mp3"),
+        show_name="Radiothon",
+    )
+    assert marathon_recorder.finish_marathon(segment_dir, last_chunk=0) is True
+    assert not os.path.exists(segment_dir)
+
+
+def test_marathon_cancelled_in_the_database_stops_after_the_current_chunk(tmp_path, monkeypatch):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'rams.db'}",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        STREAM_URL="http://stream",
+        OUTPUT_FOLDER=str(tmp_path / "rec"),
+        RECORDING_PERIODS_PATH=str(tmp_path / "periods.json"),
+        RECORDING_INLINE_LEVELS=False,
+    )
+    (tmp_path / "periods.json").write_text(json.dumps({"periods": ["Spring 2026"], "current": "Spring 2026"}))
+    db.init_app(app)
+    now = datetime.now()
+    with app.app_context():
+        db.create_all()
+        # The first chunk ends a second from now; the marathon runs for two more hours.
+        event = MarathonEvent(
+            name="Radiothon", safe_name="Radiothon", chunk_hours=1, status="pending",
+            start_time=now - timedelta(seconds=3599), end_time=now + timedelta(hours=2),
+        )
+        db.session.add(event)
+        db.session.commit()
+        event_id = event.id
+    monkeypatch.setattr(scheduler, "flask_app", app)
+    monkeypatch.setattr(scheduler, "logger", init_logger())
+    monkeypatch.setattr(scheduler, "MARATHON_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(scheduler, "restart_instreamer", lambda **_kwargs: pytest.fail("restarted after a cancel"))
+    processes = []
+
+    class FakeProcess:
+        returncode = None
+
+        def __init__(self, command, **_kwargs):
+            processes.append(self)
+            self.stderr = io.BytesIO(b"")
+
+        def poll(self):
+            return self.returncode
+
+        def terminate(self):
+            self.returncode = 255
+
+        def wait(self, timeout=None):
+            if self.returncode is None:
+                # Cancelled from the web process: only the database row changes.
+                with sqlite3.connect(tmp_path / "rams.db") as conn:
+                    conn.execute("UPDATE marathon_event SET canceled_at = ? WHERE id = ?", (str(datetime.utcnow()), event_id))
+                time.sleep(min(timeout or 0.05, 0.05))
+                raise scheduler.subprocess.TimeoutExpired("ffmpeg", timeout)
+            return self.returncode
+
+    monkeypatch.setattr(scheduler.subprocess, "Popen", FakeProcess)
+    assert not scheduler.ACTIVE_RECORDINGS
+
+    started = time.monotonic()
+    scheduler.record_marathon(event_id, str(tmp_path / "missing.json"))
+
+    assert time.monotonic() - started < 10
+    [process] = processes
+    assert process.returncode == 255
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+
+from flask import Flask
+
+from app.services.library import music_search
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(NAS_MUSIC_ROOT=str(tmp_path / "music"))
+    return app
+
+
+def _entry(path):
+    return {"path": path, "title": os.path.basename(path), "mtime": 1.0, "size": 16}
+
+
+def _shard_files(tmp_path):
+    directory = tmp_path / "instance" / "music_index"
+    return {name for name in os.listdir(directory) if name.endswith(".json") and name != "manifest.json"}
+
+
+def test_only_changed_shards_are_rewritten(tmp_path):
+    app = _app(tmp_path)
+    root = str(tmp_path / "music")
+    paths = [os.path.join(root, "A", "1.mp3"), os.path.join(root, "B", "x", "2.mp3"), os.path.join(root, "3.mp3")]
+    with app.app_context():
+        music_search._write_music_index_file(
+            {"files": {p: _entry(p) for p in paths}, "generated_at": 1.0, "root": root, "subtree_generations": {"A": 1.0}}
+        )
+        manifest = json.loads((tmp_path / "instance" / "music_index" / "manifest.json").read_text())
+        assert set(manifest["shards"]) == {"A", "B", ""}
+        before = _shard_files(tmp_path)
+
+        index = music_search._load_music_index_file()
+        assert index["subtree_generations"] == {"A": 1.0}
+        files = index["files"]
+        assert len(files) == 3
+        files[paths[0]] = {**_entry(paths[0]), "title": "changed"}
+        assert list(files.dirty_shards()) == ["A"]
+        music_search._write_music_index_file(index)
+
+        after = _shard_files(tmp_path)
+        assert len(after - before) == 1 and len(before - after) == 1
+        reread = music_search._load_music_index_file()["files"]
+        assert reread[paths[0]]["title"] == "changed"
+        assert dict(reread.items()) == {**{p: _entry(p) for p in paths}, paths[0]: reread[paths[0]]}
+
+        # A full rescan with identical content writes no shard at all.
+        full = dict(reread.items())
+        music_search._write_music_index_file({"files": full, "generated_at": 2.0, "root": root})
+        assert _shard_files(tmp_path) == after
+
+        del reread[paths[1]]
+        music_search._write_music_index_file({"files": reread, "generated_at": 3.0, "root": root})
+        manifest = json.loads((tmp_path / "instance" / "music_index" / "manifest.json").read_text())
+        assert set(manifest["shards"]) == {"A", ""}
+        assert len(_shard_files(tmp_path)) == 2
+
+        # First write was a reset; the unchanged rescan logged nothing.
+        assert manifest["change_seq"] == 3
+        assert music_search.music_index_changes_since(0) is None
+        assert music_search.music_index_changes_since(1) == {
+            "seq": 3,
+            "upserted": [paths[0]],
+            "removed": [paths[1]],
+        }
+        assert music_search.music_index_changes_since(3)["upserted"] == []
+
+
+def test_lookup_reads_only_its_shard_and_migrates_legacy_file(tmp_path):
+    app = _app(tmp_path)
+    root = str(tmp_path / "music")
+    a, b = os.path.join(root, "A", "1.mp3"), os.path.join(root, "B", "2.mp3")
+    legacy = tmp_path / "instance" / "music_index.json"
+    legacy.parent.mkdir(parents=True)
+    legacy.write_text(json.dumps({"files": {a: _entry(a), b: _entry(b)}, "generated_at": 1.0, "root": root}))
+    with app.app_context():
+        index = music_search._load_music_index_file()
+        assert isinstance(index["files"], dict)
+        music_search._write_music_index_file(index)
+        assert not legacy.exists()
+
+        files = music_search._load_music_index_file()["files"]
+        assert files.get(a)["path"] == a
+        assert set(files._loaded) == {"A"}
+        assert dict(music_search._index_folder_items(files, root, "B")) == {b: _entry(b)}
+
+
+def test_index_writes_wait_for_the_index_lock(tmp_path):
+    app = _app(tmp_path)
+    root = str(tmp_path / "music")
+    a, b = os.path.join(root, "A", "1.mp3"), os.path.join(root, "B", "2.mp3")
+    written = threading.Event()
+
+    def _other_writer():
+        with app.app_context():
+            index = music_search._load_music_index_file()
+            index["files"][b] = _entry(b)
+            music_search._write_music_index_file(index)
+        written.set()
+
+    with app.app_context():
+        music_search._write_music_index_file({"files": {a: _entry(a)}, "generated_at": 1.0, "root": root})
+        with music_search.index_write_lock():
+            index = music_search._load_music_index_file()
+            writer = threading.Thread(target=_other_writer)
+            writer.start()
+            assert not written.wait(0.3)
+            index["files"][a] = {**_entry(a), "title": "edited"}
+            # Re-entrant: the holder can still write.
+            music_search._write_music_index_file(index)
+        writer.join(timeout=10)
+        files = music_search._load_music_index_file()["files"]
+        assert files[a]["title"] == "edited" and b in files
+        assert json.loads((tmp_path / "instance" / "music_index" / "manifest.json").read_text())["change_seq"] == 3
+
+
+def test_replaced_shard_follows_the_manifest_and_survives_a_broken_one(tmp_path):
+    app = _app(tmp_path)
+    root = str(tmp_path / "music")
+    a, b = os.path.join(root, "A", "1.mp3"), os.path.join(root, "B", "2.mp3")
+    directory = tmp_path / "instance" / "music_index"
+    with app.app_context():
+        music_search._write_music_index_file({"files": {a: _entry(a), b: _entry(b)}, "generated_at": 1.0, "root": root})
+
+        def _publish(title):
+            index = music_search._load_music_index_file()
+            index["files"][a] = {**_entry(a), "title": title}
+            music_search._write_music_index_file(index)
+
+        # The stale view's shard file is gone; it reads the newer one instead.
+        stale = music_search._load_music_index_file()["files"]
+        _publish("newer")
+        assert stale.get(a)["title"] == "newer"
+
+        # A replaced shard with an unreadable manifest, and a corrupt shard, read as empty.
+        stale = music_search._load_music_index_file()["files"]
+        _publish("newest")
+        manifest = (directory / "manifest.json").read_text()
+        (directory / "manifest.json").write_text("{not json")
+        assert stale.get(a) is None
+        (directory / "manifest.json").write_text(manifest)
+        (directory / json.loads(manifest)["shards"]["B"]["file"]).write_text("{not json")
+        assert music_search._load_music_index_file()["files"].get(b) is None
@@ -0,0 +1,147 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from flask import Flask
+
+from app.models import ExternalLookupCache, MetadataEnrichmentItem, db
+from app.services.library import enrichment, music_search
+
+
+class _FakeMusicBrainz(BaseHTTPRequestHandler):
+    requests = []
+    unavailable = False
+
+    def do_GET(self):  # noqa: N802
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query).get("query", [""])[0]
+        type(self).requests.append(query)
+        if type(self).unavailable:
+            self.send_response(503)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+        recordings = []
+        if "Known Song" in query:
+            recordings.append(
+                {
+                    "id": "mbid-1",
+                    "title": "Known Song",
+                    "artist-credit": [{"name": "The Band"}],
+                    "isrcs": ["USABC0000001"],
+                    "releases": [{"title": "The Album", "date": "1999-04-01"}],
+                }
+            )
+        body = json.dumps({"recordings": recordings}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def fake_musicbrainz():
+    _FakeMusicBrainz.requests = []
+    _FakeMusicBrainz.unavailable = False
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeMusicBrainz)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def app(fake_musicbrainz, tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        MUSICBRAINZ_API_URL=f"http://127.0.0.1:{fake_musicbrainz.server_address[1]}/ws/2",
+        MUSICBRAINZ_RATE_LIMIT_PER_SECOND=100.0,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+def test_lookup_is_cached_by_queried_artist_and_title(app):
+    first = music_search.lookup_musicbrainz("Known Song", "The Band")
+    second = music_search.lookup_musicbrainz("known  song", "the band")
+
+    assert first[0]["isrc"] == "USABC0000001"
+    assert second == first
+    assert len(_FakeMusicBrainz.requests) == 1
+
+    # Qualifiers are part of the query, so different versions get their own entries.
+    music_search.lookup_musicbrainz("Known Song (Live)", "The Band")
+    music_search.lookup_musicbrainz("Known Song (Remix)", "The Band")
+    assert len(_FakeMusicBrainz.requests) == 3
+
+
+def test_no_match_is_cached_but_outage_is_not(app):
+    assert music_search.lookup_musicbrainz("Unknown", "Nobody") == []
+    assert music_search.lookup_musicbrainz("Unknown", "Nobody") == []
+    assert len(_FakeMusicBrainz.requests) == 1
+    assert ExternalLookupCache.query.filter_by(found=False).count() == 1
+
+    _FakeMusicBrainz.unavailable = True
+    assert music_search.lookup_musicbrainz("Other", "Nobody") == []
+    with pytest.raises(enrichment.LookupUnavailable):
+        music_search.lookup_musicbrainz("Other", "Nobody", raise_unavailable=True)
+    assert ExternalLookupCache.query.count() == 1
+
+
+def test_queue_processes_batches_with_one_lookup_per_song(app, monkeypatch):
+    files = {
+        "/music/a.mp3": {"path": "/music/a.mp3", "title": "Known Song", "artist": "The Band"},
+        "/music/b.mp3": {"path": "/music/b.mp3", "title": "Known Song", "artist": "The Band"},
+        "/music/c.mp3": {"path": "/music/c.mp3", "title": "Unknown", "artist": "Nobody"},
+        "/music/d.mp3": {
+            "path": "/music/d.mp3",
+            "title": "Complete",
+            "artist": "Nobody",
+            "album": "Done",
+            "year": "2001",
+            "isrc": "X",
+        },
+    }
+    monkeypatch.setattr(music_search, "get_music_index", lambda: {"files": files})
+
+    assert enrichment.enqueue_missing_metadata() == 3
+    counts = enrichment.process_enrichment_queue(batch_size=10)
+
+    assert counts["matched"] == 2 and counts["no_match"] == 1
+    assert len(_FakeMusicBrainz.requests) == 2
+    item = MetadataEnrichmentItem.query.filter_by(path="/music/a.mp3").one()
+    assert json.loads(item.suggestion)["album"] == "The Album"
+    assert enrichment.get_enrichment_suggestion("/music/b.mp3")["year"] == "1999"
+
+
+def test_rate_limit_is_shared_between_limiters_on_one_file(tmp_path):
+    now = [1000.0]
+    slept = []
+
+    def _sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    path = str(tmp_path / "rate_limits" / "musicbrainz.json")
+    # Two limiters on one file stand in for a web worker and the background service.
+    web = enrichment.SharedRateLimiter(path, rate=1.0, clock=lambda: now[0], sleep=_sleep)
+    worker = enrichment.SharedRateLimiter(path, rate=1.0, clock=lambda: now[0], sleep=_sleep)
+    assert web.acquire()
+    assert worker.acquire()
+    assert slept == [pytest.approx(1.0)]
+    assert not web.acquire(timeout=0.5)
+    worker.back_off(10)
+    assert not web.acquire(timeout=5)
+    assert web.acquire()
+    assert now[0] == pytest.approx(1011.0)
@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+
+from app.services.library import crates
+from app.services.library.play_history import play_key
+
+
+def test_play_key_keeps_non_latin_letters():
+    assert play_key("Кино", "Звезда по имени Солнце") == "кино|звездапоименисолнце"
+    assert play_key("坂本龍一", "戦場のメリークリスマス") == "坂本龍一|戦場のメリークリスマス"
+    assert play_key("Sigur Rós", "Hoppípolla") == "sigurrós|hoppípolla"
+    assert play_key("KINO", "Gruppa_Krovi!") == play_key("kino", "gruppa krovi")
+    assert len({play_key("Кино", "Звезда"), play_key("坂本龍一", "Merry Christmas"), play_key("Кино", "Кукушка")}) == 3
+
+
+def test_rotation_only_drops_the_non_latin_track_that_was_played():
+    now = datetime(2026, 1, 1, 12, 0)
+    entries = [
+        {"path": "/m/kino1.mp3", "artist": "Кино", "title": "Звезда"},
+        {"path": "/m/kino2.mp3", "artist": "Кино", "title": "Кукушка"},
+        {"path": "/m/sakamoto.mp3", "artist": "坂本龍一", "title": "Energy Flow"},
+    ]
+    rules = crates.normalize_rules({"min_days_since_played": 2, "artist_separation": 1})
+    last_played = {play_key("Кино", "Звезда"): now - timedelta(hours=5)}
+
+    rotation = crates.generate_rotation(
+        entries, rules, seconds=200, last_played=last_played, durations={e["path"]: 100 for e in entries}, now=now
+    )
+
+    assert sorted(item["path"] for item in rotation) == ["/m/kino2.mp3", "/m/sakamoto.mp3"]
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from app.models import LogEntry, db
+from app.services.library import transcode
+
+
+def _app(tmp_path, **config):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        TRANSCODE_CACHE_MAX_BYTES=0,
+    )
+    app.config.update(config)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _library(tmp_path, names):
+    files = {}
+    for name in names:
+        path = tmp_path / "music" / f"{name}.m4a"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"\0" * 16)
+        files[str(path)] = {"path": str(path), "title": name.title(), "artist": "Band"}
+    return {"files": files}
+
+
+def test_off_peak_window_handles_midnight_wrap(tmp_path):
+    app = _app(tmp_path, PRETRANSCODE_OFF_PEAK_START_HOUR=22, PRETRANSCODE_OFF_PEAK_END_HOUR=5)
+    with app.app_context():
+        assert transcode.in_off_peak_window(datetime(2026, 1, 1, 23, 30))
+        assert transcode.in_off_peak_window(datetime(2026, 1, 1, 4, 59))
+        assert not transcode.in_off_peak_window(datetime(2026, 1, 1, 12, 0))
+
+
+def test_candidates_rank_recent_plays_then_dj_playlists(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    index = _library(tmp_path, ["alpha", "bravo", "charlie"])
+    monkeypatch.setattr(transcode, "get_music_index", lambda: index)
+    bravo = str(tmp_path / "music" / "bravo.m4a")
+    charlie = str(tmp_path / "music" / "charlie.m4a")
+    with app.app_context():
+        db.session.add(
+            LogEntry(
+                timestamp=datetime.utcnow() - timedelta(days=1),
+                message="played",
+                entry_type="music",
+                title="Charlie",
+                artist="Band",
+            )
+        )
+        db.session.commit()
+        playlists = tmp_path / "instance" / "dj_playlists"
+        playlists.mkdir(parents=True)
+        (playlists / "set.txt").write_text(
+            f"# RAMS_PLAYLIST_V1\n{bravo}\tBravo\tBand\t\n", encoding="utf-8"
+        )
+
+        candidates = transcode.pretranscode_candidates()
+
+    assert candidates[:2] == [charlie, bravo]
+    assert len(candidates) == 3
+
+
+def test_batch_skips_cached_and_remembers_non_alac(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    index = _library(tmp_path, ["alpha", "bravo"])
+    monkeypatch.setattr(transcode, "get_music_index", lambda: index)
+    alpha = str(tmp_path / "music" / "alpha.m4a")
+    monkeypatch.setattr(transcode, "is_alac", lambda path: path == alpha)
+
+    def fake_transcode(path, target, cache_dir, timeout):
+        with open(target, "wb") as fh:
+            fh.write(b"mp3")
+        return True
+
+    monkeypatch.setattr(transcode, "_run_transcode", fake_transcode)
+    with app.app_context():
+        first = transcode.run_pretranscode_batch(respect_window=False)
+        second = transcode.run_pretranscode_batch(respect_window=False)
+
+    assert (first["transcoded"], first["not_alac"]) == (1, 1)
+    assert second["candidates"] == 0
@@ -0,0 +1,94 @@
+import os
+
+from flask import Flask
+
+from app.models import MusicCue, db
+from app.services import render_cache
+from app.services.library import preview
+
+
+def _app(tmp_path, **config):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=str(tmp_path / "music"),
+    )
+    app.config.update(config)
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _fake_ffmpeg(calls):
+    def run(cmd, **kwargs):
+        calls.append(cmd)
+        with open(cmd[-1], "wb") as fh:
+            fh.write(b"\xff" * 1000)
+
+    return run
+
+
+def test_preview_starts_at_hook_and_is_cached(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    track = tmp_path / "music" / "song.flac"
+    track.parent.mkdir(parents=True)
+    track.write_bytes(b"\0" * 64)
+    calls = []
+    monkeypatch.setattr(render_cache.subprocess, "run", _fake_ffmpeg(calls))
+
+    with app.app_context():
+        db.session.add(MusicCue(path=str(track), cue_in=1.5, hook_in=62.0))
+        db.session.commit()
+        first = preview.ensure_preview(str(track))
+        second = preview.ensure_preview(str(track))
+
+    assert first == second and os.path.dirname(first) == str(tmp_path / "instance" / "previews")
+    assert len(calls) == 1
+    cmd = calls[0]
+    assert cmd[cmd.index("-ss") + 1] == "62.000"
+    assert cmd[cmd.index("-t") + 1] == "30.000"
+    assert cmd[cmd.index("-b:a") + 1] == "64k"
+
+
+def test_preview_falls_back_without_ffmpeg(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    track = tmp_path / "music" / "song.mp3"
+    track.parent.mkdir(parents=True)
+    track.write_bytes(b"\0" * 64)
+
+    def missing(*args, **kwargs):
+        raise FileNotFoundError("ffmpeg")
+
+    monkeypatch.setattr(render_cache.subprocess, "run", missing)
+    with app.app_context():
+        assert preview.ensure_preview(str(track)) is None
+    assert os.listdir(tmp_path / "instance" / "previews") == []
+
+
+def test_batch_respects_cache_budget_and_prune_trims_lru(tmp_path, monkeypatch):
+    # 64 kbit/s * 1 s = 8000 bytes per clip, so a 20000-byte budget admits three.
+    app = _app(tmp_path, PREVIEW_CLIP_SECONDS=1, PREVIEW_CACHE_MAX_BYTES=20000)
+    music = tmp_path / "music"
+    music.mkdir()
+    paths = []
+    for idx in range(5):
+        path = music / f"{idx}.mp3"
+        path.write_bytes(b"\0" * 64)
+        paths.append(str(path))
+    calls = []
+    monkeypatch.setattr(render_cache.subprocess, "run", _fake_ffmpeg(calls))
+    monkeypatch.setattr(preview, "preview_candidates", lambda limit=None: paths)
+
+    with app.app_context():
+        summary = preview.run_preview_batch()
+        assert summary["rendered"] == 3
+        assert summary["status"] == "cache_full"
+
+        cache_dir = tmp_path / "instance" / "previews"
+        clips = sorted(cache_dir.iterdir())
+        for age, clip in enumerate(clips):
+            os.utime(clip, (1000 + age, 1000 + age))
+        assert preview.prune_preview_cache(max_bytes=1000) == 2
+        assert sorted(cache_dir.iterdir()) == clips[2:]
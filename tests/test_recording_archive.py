@@ -0,0 +1,117 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from app.models import RecordingCatalog, db
+from app.services import recording_archive
+from app.services.log_export import read_recording_metadata, write_recording_metadata
+from app.services.recording_archive import plan_archive, restore_recording, run_archive_pass
+from app.services.recordings_catalog import reconcile_catalog
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz frame.
+FRAME = b"\xff\xfb\x90\x44" + b"\x00" * 413
+
+
+def _app(tmp_path, **config):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        OUTPUT_FOLDER=str(tmp_path / "hot"),
+        RECORDINGS_ARCHIVE_ROOT=str(tmp_path / "cold"),
+        RECORDINGS_ARCHIVE_AFTER_DAYS=90,
+        RECORDING_PERIODS_PATH=str(tmp_path / "periods.json"),
+        **config,
+    )
+    (tmp_path / "periods.json").write_text(json.dumps({"periods": ["Spring 2026"], "current": "Spring 2026"}))
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _recording(tmp_path, name, show_date, payload=b"\x00" * 1000, log=True):
+    path = tmp_path / "hot" / "Spring 2026" / "Ana_Ruiz" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(payload)
+    write_recording_metadata(str(path), {"show_name": "Night Show", "show_date": show_date, "parts": [{"offset": 0}]})
+    if log:
+        path.with_suffix(".csv").write_text("time,title\n")
+    return str(path)
+
+
+def test_dry_run_plans_then_pass_moves_to_cold_tier_and_restore_brings_back(tmp_path):
+    app = _app(tmp_path)
+    old = _recording(tmp_path, "Night_Show_01-05-26_RAWDATA.mp3", "2026-01-05")
+    _recording(tmp_path, "Night_Show_05-04-26_RAWDATA.mp3", "2026-05-04")
+    now = datetime(2026, 5, 10)
+
+    with app.app_context():
+        reconcile_catalog()
+        companions = os.path.getsize(old[:-4] + ".json") + os.path.getsize(old[:-4] + ".csv")
+
+        plan = plan_archive(now=now)
+        [item] = plan["recordings"]
+        assert item["path"] == old
+        assert plan["primary_bytes_reclaimed"] == 1000 + companions
+        assert plan["net_bytes_saved"] == 0  # moved as-is
+        assert os.path.exists(old)
+
+        result = run_archive_pass(now=now)
+        assert result["archived"] == 1 and result["bytes_reclaimed"] == 1000 + companions
+        cold = str(tmp_path / "cold" / "Spring 2026" / "Ana_Ruiz" / "Night_Show_01-05-26_RAWDATA.mp3")
+        assert not os.path.exists(old) and os.path.exists(cold)
+        assert os.path.exists(cold[:-4] + ".csv") and read_recording_metadata(cold)["show_name"] == "Night Show"
+
+        row = RecordingCatalog.query.filter_by(path=cold).one()
+        assert (row.tier, row.primary_path, row.has_log, row.period_folder) == ("archive", old, True, "Spring 2026")
+        # The periodic reconcile walks both tiers and keeps the archived row.
+        assert reconcile_catalog()["removed"] == 0
+        assert RecordingCatalog.query.count() == 2
+
+        row = restore_recording(row)
+        assert (row.path, row.tier, row.archived_at) == (old, "primary", None)
+        assert os.path.exists(old[:-4] + ".json") and not os.path.exists(cold)
+        # A restored recording is not sent straight back to the archive.
+        assert plan_archive(now=now)["recordings"] == []
+
+
+def test_reencode_estimate_and_sidecar_cleanup(tmp_path, monkeypatch):
+    app = _app(tmp_path, RECORDINGS_ARCHIVE_BITRATE="64k")
+    old = _recording(tmp_path, "Night_Show_01-05-26_RAWDATA.mp3", "2026-01-05", payload=FRAME * 400, log=False)
+    commands = []
+
+    class Result:
+        returncode = 0
+        stderr = b""
+
+    def fake_run(command, **_kwargs):
+        commands.append(command)
+        with open(command[-1], "wb") as handle:
+            handle.write(b"\x01" * 100)
+        return Result()
+
+    monkeypatch.setattr(recording_archive.subprocess, "run", fake_run)
+
+    with app.app_context():
+        reconcile_catalog()
+        row = RecordingCatalog.query.one()
+        plan = plan_archive(now=datetime(2026, 5, 10))
+        [item] = plan["recordings"]
+        assert item["reencode_bitrate"] == 64000
+        assert item["archived_bytes"] == pytest.approx(row.duration_seconds * 64000 / 8, abs=1)
+        assert plan["net_bytes_saved"] == pytest.approx(row.size_bytes / 2, rel=0.05)
+
+        run_archive_pass(now=datetime(2026, 5, 10))
+
+    [command] = commands
+    assert command[command.index("-b:a") + 1] == "64000" and command[command.index("-i") + 1] == old
+    cold = tmp_path / "cold" / "Spring 2026" / "Ana_Ruiz" / "Night_Show_01-05-26_RAWDATA.mp3"
+    assert cold.read_bytes() == b"\x01" * 100 and not os.path.exists(old)
+    metadata = read_recording_metadata(str(cold))
+    assert "parts" not in metadata and metadata["archive"] == {"bitrate": 64000, "original_size": len(FRAME) * 400}
+    with app.app_context():
+        assert RecordingCatalog.query.one().archive_bitrate == "64k"
@@ -0,0 +1,111 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app.services import recording_clips, recording_segments, render_cache
+from app.services.recording_clips import ClipError, clip_bounds, ensure_clip, ensure_segment_clip, parse_timestamp
+
+
+def _app(tmp_path, **config):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(RECORDING_CLIP_MAX_SECONDS=600, **config)
+    return app
+
+
+def test_parse_timestamp_and_bounds(tmp_path):
+    assert parse_timestamp("90") == 90.0
+    assert parse_timestamp("01:30") == 90.0
+    assert parse_timestamp("1:01:30.5") == 3690.5
+    for bad in ("", "abc", "-5", "nan"):
+        with pytest.raises(ClipError):
+            parse_timestamp(bad)
+
+    with _app(tmp_path).app_context():
+        assert clip_bounds("2:00", "4:00") == (120.0, 240.0)
+        assert clip_bounds("59:00", "1:05:00", duration=3600.25) == (3540.0, 3600.25)
+        with pytest.raises(ClipError):
+            clip_bounds("4:00", "2:00")
+        with pytest.raises(ClipError):
+            clip_bounds("0", "11:00")  # over RECORDING_CLIP_MAX_SECONDS
+        with pytest.raises(ClipError):
+            clip_bounds("1:00:01", "1:01:00", duration=3600)
+
+
+def test_clip_is_stream_copied_once_cached_and_cache_is_capped(tmp_path, monkeypatch):
+    recording = tmp_path / "Night_Show_RAWDATA.mp3"
+    recording.write_bytes(b"\xff\xfb" * 1000)
+    commands = []
+
+    def fake_run(command, **_kwargs):
+        commands.append(command)
+        with open(command[-1], "wb") as handle:
+            handle.write(b"\x01" * 600)
+
+    monkeypatch.setattr(render_cache.subprocess, "run", fake_run)
+    with _app(tmp_path, RECORDING_CLIP_CACHE_MAX_BYTES=1000).app_context():
+        first = ensure_clip(str(recording), 7200.0, 7320.0)
+        assert ensure_clip(str(recording), 7200.0, 7320.0) == first
+        [command] = commands
+        # Input seeking plus stream copy: no decode of the audio before the clip.
+        assert command.index("-ss") < command.index("-i") and command[command.index("-ss") + 1] == "7200.000"
+        assert command[command.index("-t") + 1] == "120.000" and command[command.index("-c") + 1] == "copy"
+        assert first.endswith(".mp3") and os.path.getsize(first) == 600
+
+        second = ensure_clip(str(recording), 0.0, 30.0)
+        assert os.path.exists(second) and not os.path.exists(first)
+        assert [name for name in os.listdir(os.path.dirname(second))] == [os.path.basename(second)]
+
+
+def test_failed_cut_raises_and_leaves_no_partial_file(tmp_path, monkeypatch):
+    recording = tmp_path / "Night_Show_RAWDATA.mp3"
+    recording.write_bytes(b"\xff\xfb" * 1000)
+
+    def failing_run(command, **_kwargs):
+        open(command[-1], "wb").close()
+        raise render_cache.subprocess.CalledProcessError(1, command)
+
+    monkeypatch.setattr(render_cache.subprocess, "run", failing_run)
+    with _app(tmp_path).app_context():
+        with pytest.raises(ClipError):
+            ensure_clip(str(recording), 10.0, 20.0)
+        assert os.listdir(recording_clips.clip_cache_dir()) == []
+
+
+def test_live_clip_is_cut_from_closed_segments(tmp_path, monkeypatch):
+    recording = str(tmp_path / "Show_01-02-26_RAWDATA.mp3")
+    segment_dir = recording_segments.segment_directory(recording)
+    started = datetime(2026, 1, 2, 10, 0)
+    recording_segments.begin_segment_attempt(segment_dir, recording_path=recording, segment_seconds=300, started_at=started)
+    for number, payload in enumerate((b"a", b"b")):
+        with open(os.path.join(segment_dir, f"seg_{number:05d}.mp3"), "wb") as handle:
+            handle.write(payload * 4)
+    with open(os.path.join(segment_dir, "segments_0.csv"), "w", encoding="utf-8") as handle:
+        handle.write("seg_00000.mp3,0.0,300.0\n")
+    # The stream dropped for two minutes; the retry's first segment is closed, its second still open.
+    recording_segments.begin_segment_attempt(
+        segment_dir, recording_path=recording, segment_seconds=300, started_at=started + timedelta(seconds=420)
+    )
+    for number, payload in ((2, b"c"), (3, b"d")):
+        with open(os.path.join(segment_dir, f"seg_{number:05d}.mp3"), "wb") as handle:
+            handle.write(payload * 4)
+    with open(os.path.join(segment_dir, "segments_1.csv"), "w", encoding="utf-8") as handle:
+        handle.write("seg_00002.mp3,0.0,300.0\n")
+    cuts = []
+
+    def fake_run(command, **_kwargs):
+        with open(command[command.index("-i") + 1], "rb") as handle:
+            cuts.append((handle.read(), command[command.index("-ss") + 1], command[command.index("-t") + 1]))
+        with open(command[-1], "wb") as handle:
+            handle.write(b"\x01" * 10)
+
+    monkeypatch.setattr(render_cache.subprocess, "run", fake_run)
+    with _app(tmp_path).app_context():
+        clip = ensure_segment_clip(segment_dir, 240.0, 480.0)
+        assert ensure_segment_clip(segment_dir, 240.0, 480.0) == clip
+        with pytest.raises(ClipError):
+            ensure_segment_clip(segment_dir, 730.0, 760.0)  # only in the segment ffmpeg is writing
+        assert [name for name in os.listdir(os.path.dirname(clip))] == [os.path.basename(clip)]
+    # 240s..300s of the first segment plus 420s..480s of the retry, with the gap collapsed.
+    assert cuts == [(b"aaaacccc", "240.000", "120.000")]
@@ -0,0 +1,92 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from mutagen.id3 import ID3, TIT2
+
+from app.services import recording_segments
+from app.services.log_export import read_recording_metadata, write_recording_metadata
+from app.services.recording_integrity import scan_frames, verify_recording
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, no padding: 417 bytes and 1152 samples per frame.
+FRAME = b"\xff\xfb\x90\x44" + b"\x00" * 413
+FRAME_SECONDS = 1152 / 44100
+
+
+def _sidecar(path, start, seconds):
+    write_recording_metadata(str(path), {
+        "schema_version": 1,
+        "show_name": "Night Show",
+        "show_start": start.isoformat(),
+        "show_end": (start + timedelta(seconds=seconds)).isoformat(),
+    })
+
+
+def test_scan_reports_corrupt_bytes_and_cut_off_frame():
+    data = FRAME * 50 + b"\x12\x34" * 300 + FRAME * 50 + FRAME[:200]
+
+    scan = scan_frames(data)
+
+    assert scan["frames"] == 100
+    assert scan["seconds"] == pytest.approx(100 * FRAME_SECONDS)
+    [corrupt] = scan["corrupt"]
+    assert corrupt["byte"] == 50 * len(FRAME) and corrupt["bytes"] == 600
+    assert corrupt["at"] == pytest.approx(50 * FRAME_SECONDS, abs=1e-3)
+    assert corrupt["duration"] == pytest.approx(600 / (128000 / 8), abs=0.01)
+    assert scan["truncated_bytes"] == 200
+
+
+def test_single_mode_retry_files_reveal_dropout_and_low_coverage(tmp_path):
+    start = datetime(2026, 3, 1, 22, 0)
+    main = tmp_path / "Night_Show_03-01-26_RAWDATA.mp3"
+    retry = tmp_path / "Night_Show_03-01-26_RAWDATA_1.mp3"
+    main.write_bytes(FRAME * 200 + FRAME[:100])  # ~5.2s, then the stream dropped
+    retry.write_bytes(FRAME * 400)  # ~10.4s after the Barix restart
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text="Night Show"))
+    tags.save(str(main))
+    _sidecar(main, start, 30)
+    _sidecar(retry, start + timedelta(seconds=12), 18)
+
+    report = verify_recording(str(main), min_coverage=0.9)
+
+    assert report["recorded_seconds"] == pytest.approx(600 * FRAME_SECONDS, abs=1e-3)
+    assert [gap["kind"] for gap in report["gaps"]] == ["truncated", "dropout", "missing_end"]
+    dropout = report["gaps"][1]
+    assert dropout["at"] == pytest.approx(200 * FRAME_SECONDS, abs=1e-3)
+    assert dropout["duration"] == pytest.approx(12 - 200 * FRAME_SECONDS, abs=1e-3)
+    assert report["coverage"] == pytest.approx(600 * FRAME_SECONDS / 30, abs=1e-3)
+    assert report["ok"] is False
+    assert read_recording_metadata(str(main))["integrity"] == report
+
+
+def test_segmented_parts_survive_stitching_and_tagging(tmp_path):
+    start = datetime(2026, 3, 2, 9, 0)
+    recording = tmp_path / "Morning_03-02-26_RAWDATA.mp3"
+    segment_dir = recording_segments.segment_directory(str(recording))
+    _sidecar(recording, start, 14)
+    for attempt_start, numbers in ((start, (0, 1)), (start + timedelta(seconds=9), (2,))):
+        attempt = recording_segments.begin_segment_attempt(
+            segment_dir, recording_path=str(recording), segment_seconds=2, started_at=attempt_start
+        )
+        for position, number in enumerate(numbers):
+            name = f"seg_{number:05d}.mp3"
+            with open(os.path.join(segment_dir, name), "wb") as handle:
+                handle.write(FRAME * 100)
+            with open(os.path.join(segment_dir, attempt["list"]), "a", encoding="utf-8") as handle:
+                handle.write(f"{name},{position * 100 * FRAME_SECONDS},{(position + 1) * 100 * FRAME_SECONDS}\n")
+
+    recording_segments.finalize_segmented_recording(segment_dir, str(recording))
+    tags = ID3()
+    tags.add(TIT2(encoding=3, text="Morning"))
+    tags.save(str(recording))
+
+    report = verify_recording(str(recording), min_coverage=0.5)
+
+    assert [part["frames"] for part in report["parts"]] == [200, 100]
+    [dropout, missing_end] = report["gaps"]
+    assert dropout["kind"] == "dropout"
+    assert dropout["at"] == pytest.approx(200 * FRAME_SECONDS, abs=1e-3)
+    assert dropout["duration"] == pytest.approx(9 - 200 * FRAME_SECONDS, abs=1e-3)
+    assert missing_end["at"] == pytest.approx(9 + 100 * FRAME_SECONDS, abs=1e-3)
+    assert report["ok"] is True
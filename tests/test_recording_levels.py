@@ -0,0 +1,131 @@
+import io
+import json
+import math
+import struct
+
+import pytest
+from flask import Flask
+
+from app import scheduler
+from app.logger import init_logger
+from app.models import StreamProbe, db
+from app.services import detection
+from app.services.recording_levels import LevelAnalyzer, inline_levels_active, levels_timeline_path
+
+
+def _pcm(seconds, rate, amplitude):
+    count = int(seconds * rate)
+    values = [int(amplitude * 32767 * math.sin(2 * math.pi * 5 * i / rate)) for i in range(count)]
+    return struct.pack(f"<{count}h", *values)
+
+
+def test_analyzer_builds_per_second_timeline_with_gap_padding(tmp_path):
+    windows = []
+    analyzer = LevelAnalyzer(
+        str(tmp_path / "show.mp3"),
+        sample_rate=400,
+        window_seconds=3,
+        on_window=lambda start, rms, peaks: windows.append((start, rms, peaks)) or "dead_air",
+    )
+    assert inline_levels_active()
+    analyzer.start_attempt(0)
+    analyzer.drain(io.BytesIO(_pcm(3, 400, 0.5) + _pcm(1.5, 400, 0.0)))
+    analyzer.start_attempt(10)  # stream restarted ten seconds after the first attempt
+    analyzer.feed(_pcm(2, 400, 0.25))
+    analyzer.close()
+
+    assert not inline_levels_active()
+    timeline = json.loads(open(levels_timeline_path(str(tmp_path / "show.mp3")), encoding="utf-8").read())
+    assert timeline["status"] == "complete" and timeline["seconds"] == 12
+    assert timeline["rms_db"][0] == pytest.approx(-9.0, abs=0.2)
+    assert timeline["peak_db"][0] == pytest.approx(-6.0, abs=0.2)
+    assert timeline["rms_db"][3] == -100.0
+    assert timeline["rms_db"][4:10] == [None] * 6
+    assert timeline["rms_db"][10] == pytest.approx(-15.1, abs=0.2)
+    # Full window at 0s; the one-second tail before the restart is too short to classify.
+    assert [start for start, _, _ in windows] == [0]
+    assert timeline["dead_air"] == [{"at": 0, "duration": 3}]
+
+
+def test_record_stream_tees_pcm_to_inline_levels(tmp_path, monkeypatch):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        RECORDING_LEVELS_SAMPLE_RATE=200,
+        RECORDING_LEVELS_WINDOW_SECONDS=5,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    monkeypatch.setattr(scheduler, "flask_app", app)
+    monkeypatch.setattr(scheduler, "logger", init_logger())
+    monkeypatch.setattr(detection, "probe_stream", lambda _url: pytest.fail("second stream connection"))
+    commands = []
+
+    class FakeProcess:
+        returncode = 0
+
+        def __init__(self, command, stdout=None, stderr=None):
+            commands.append(command)
+            with open(command[command.index("copy") + 1], "wb") as handle:
+                handle.write(b"\x00" * 16)
+            with app.app_context():
+                detection.probe_and_record()  # the scheduled probe stands down while recording
+            self.stdout = io.BytesIO(_pcm(5, 200, 0.0) + _pcm(5, 200, 0.7))
+            self.stderr = io.BytesIO(b"")
+
+        def wait(self):
+            return 0
+
+        def poll(self):
+            return 0
+
+    monkeypatch.setattr(scheduler.subprocess, "Popen", FakeProcess)
+    output = tmp_path / "Show"
+
+    scheduler.record_stream("http://stream", 10, str(output), str(tmp_path / "missing.json"))
+
+    [command] = commands
+    assert command[-1] == "pipe:1" and command[command.index("-ar") + 1] == "200"
+    [recording] = [path for path in tmp_path.iterdir() if path.name.endswith("_RAWDATA.mp3")]
+    timeline = json.loads(open(levels_timeline_path(str(recording)), encoding="utf-8").read())
+    assert timeline["seconds"] == 10
+    # A steady tone has no dynamics, so it reads as automation.
+    assert [window["classification"] for window in timeline["windows"]] == ["dead_air", "automation"]
+    with app.app_context():
+        assert [probe.classification for probe in StreamProbe.query.order_by(StreamProbe.id)] == ["dead_air", "automation"]
+
+
+def test_stalled_or_failed_analyzer_hands_back_to_the_probe(tmp_path, monkeypatch):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        STREAM_URL="http://stream",
+        SELF_HEAL_ENABLED=False,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    probes, alerts = [], []
+    monkeypatch.setattr(detection, "probe_stream", lambda url: probes.append(url))
+    monkeypatch.setattr(detection, "process_probe_alerts", lambda up, result: alerts.append(up))
+
+    analyzer = LevelAnalyzer(str(tmp_path / "show.mp3"), sample_rate=400, window_seconds=3)
+    try:
+        assert inline_levels_active()
+        # No window for more than two window lengths: ffmpeg stopped delivering PCM.
+        analyzer.last_window_at -= 7
+        assert not inline_levels_active()
+        with app.app_context():
+            detection.probe_and_record()
+        assert probes == ["http://stream"] and alerts == [False]
+
+        analyzer.feed(_pcm(3, 400, 0.5))
+        assert inline_levels_active()
+        analyzer.feed = None  # analysis breaks; drain keeps reading so ffmpeg is not blocked
+        analyzer.drain(io.BytesIO(b"\x00" * 800))
+        assert analyzer.failed and not inline_levels_active()
+    finally:
+        analyzer.close()
@@ -0,0 +1,130 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from app.models import RecordingCatalog, RecordingRetentionRun, db
+from app.services import recording_retention
+from app.services.log_export import write_recording_metadata
+from app.services.recording_retention import plan_retention, run_retention
+from app.services.recordings_catalog import reconcile_catalog
+
+NOW = datetime(2026, 10, 1)
+
+
+def _app(tmp_path, **config):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        OUTPUT_FOLDER=str(tmp_path / "rec"),
+        RECORDING_PERIODS_PATH=str(tmp_path / "periods.json"),
+        RECORDINGS_RETENTION_MIN_AGE_DAYS=14,
+        **config,
+    )
+    (tmp_path / "periods.json").write_text(json.dumps({"periods": ["Fall 2026"], "current": "Fall 2026"}))
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _recording(tmp_path, show, show_date, size):
+    stamp = datetime.strptime(show_date, "%Y-%m-%d").strftime("%m-%d-%y")
+    path = tmp_path / "rec" / "Fall 2026" / "Ana_Ruiz" / f"{show.replace(' ', '_')}_{stamp}_RAWDATA.mp3"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\x00" * size)
+    write_recording_metadata(str(path), {"show_name": show, "show_date": show_date})
+    path.with_suffix(".csv").write_text("time,title\n")
+    return str(path)
+
+
+def _seed(tmp_path):
+    return {
+        "night_old": _recording(tmp_path, "Night Show", "2026-06-01", 400),
+        "night_mid": _recording(tmp_path, "Night Show", "2026-08-01", 400),
+        "night_new": _recording(tmp_path, "Night Show", "2026-09-25", 400),  # inside the protected window
+        "jazz_old": _recording(tmp_path, "Jazz Hour", "2026-07-01", 300),
+        "jazz_new": _recording(tmp_path, "Jazz Hour", "2026-09-01", 300),
+    }
+
+
+def test_plan_applies_age_then_show_then_global_quotas_oldest_first(tmp_path):
+    app = _app(
+        tmp_path,
+        RECORDINGS_RETENTION_SHOWS={"Night Show": {"max_bytes": 500}},
+        RECORDINGS_RETENTION_SHOW_MAX_AGE_DAYS=120,
+        RECORDINGS_RETENTION_MAX_BYTES=800,
+    )
+    paths = _seed(tmp_path)
+    with app.app_context():
+        reconcile_catalog()
+        plan = plan_retention(now=NOW)
+
+    selected = {item["path"]: item["reasons"] for item in plan["recordings"]}
+    assert selected == {
+        paths["night_old"]: ["show_age"],  # older than 120 days
+        paths["night_mid"]: ["show_bytes"],  # Night Show still at 800 > 500
+        paths["jazz_old"]: ["global_bytes"],  # station at 700 + 300 = 1000 > 800
+    }
+    assert plan["usage"]["bytes"] == 1800 and plan["usage"]["bytes_after"] == 700
+    assert plan["usage"]["shows"]["night show"]["bytes_after"] == 400
+    assert plan["bytes_planned"] == 1100
+    assert plan["still_over_quota"] == {"global": False, "shows": []}
+
+
+def test_simulate_stores_plan_and_delete_run_keeps_logs(tmp_path):
+    app = _app(tmp_path, RECORDINGS_RETENTION_MAX_AGE_DAYS=90, RECORDINGS_RETENTION_ACTION="delete")
+    paths = _seed(tmp_path)
+    with app.app_context():
+        reconcile_catalog()
+        simulated = run_retention(now=NOW)
+        assert simulated.simulate and simulated.recordings == 2 and simulated.bytes_freed == 0
+        assert all(os.path.exists(path) for path in paths.values())
+
+        run = run_retention(simulate=False, now=NOW)
+        assert (run.recordings, run.failed) == (2, 0)
+        assert run.bytes_freed >= 700
+        results = {item["path"]: item["result"] for item in json.loads(run.plan)["recordings"]}
+        assert results == {paths["night_old"]: "deleted", paths["jazz_old"]: "deleted"}
+        assert not os.path.exists(paths["night_old"]) and os.path.exists(paths["night_old"][:-4] + ".csv")
+        assert RecordingCatalog.query.count() == 3
+        assert RecordingRetentionRun.query.count() == 2
+
+
+def test_archive_action_without_archive_root_changes_nothing(tmp_path):
+    app = _app(tmp_path, RECORDINGS_RETENTION_MAX_AGE_DAYS=90)
+    paths = _seed(tmp_path)
+    with app.app_context():
+        reconcile_catalog()
+        run = run_retention(simulate=False, now=NOW)
+        plan = json.loads(run.plan)
+    assert "RECORDINGS_ARCHIVE_ROOT" in plan["error"] and run.bytes_freed == 0
+    assert all(os.path.exists(path) for path in paths.values())
+
+
+def test_run_is_stored_before_acting_and_updated_per_recording(tmp_path, monkeypatch):
+    app = _app(tmp_path, RECORDINGS_RETENTION_MAX_AGE_DAYS=90, RECORDINGS_RETENTION_ACTION="delete")
+    paths = _seed(tmp_path)
+    real_apply = recording_retention._apply
+    stored = []
+
+    def apply_then_crash(item, action):
+        stored.append(json.loads(RecordingRetentionRun.query.one().plan))
+        if len(stored) == 2:
+            raise RuntimeError("worker killed")
+        return real_apply(item, action)
+
+    monkeypatch.setattr(recording_retention, "_apply", apply_then_crash)
+    with app.app_context():
+        reconcile_catalog()
+        with pytest.raises(RuntimeError):
+            run_retention(simulate=False, now=NOW)
+        db.session.rollback()
+        run = RecordingRetentionRun.query.one()
+        results = [item["result"] for item in json.loads(run.plan)["recordings"]]
+    assert [item["result"] for item in stored[0]["recordings"]] == ["pending", "pending"]
+    assert results == ["deleted", "pending"] and run.bytes_freed >= 400 and run.failed == 0
+    assert not os.path.exists(paths["night_old"]) and os.path.exists(paths["jazz_old"])
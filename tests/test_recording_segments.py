@@ -0,0 +1,149 @@
+import os
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from app import scheduler
+from app.logger import init_logger
+from app.models import db
+from app.services import recording_segments
+
+
+def _write_chunk(segment_dir, number, payload, listed=None, list_name="segments_0.csv"):
+    name = f"seg_{number:05d}.mp3"
+    with open(os.path.join(segment_dir, name), "wb") as handle:
+        handle.write(payload)
+    if listed is not None:
+        with open(os.path.join(segment_dir, list_name), "a", encoding="utf-8") as handle:
+            handle.write(f"{name},{listed[0]:.6f},{listed[1]:.6f}\n")
+
+
+def test_segments_keep_retry_offsets_and_stitch_in_order(tmp_path):
+    recording = str(tmp_path / "Show_01-02-26_RAWDATA.mp3")
+    segment_dir = recording_segments.segment_directory(recording)
+    started = datetime(2026, 1, 2, 10, 0)
+
+    first = recording_segments.begin_segment_attempt(
+        segment_dir, recording_path=recording, segment_seconds=300, started_at=started
+    )
+    assert first["start_number"] == 0
+    _write_chunk(segment_dir, 0, b"a" * 10, listed=(0.0, 300.0))
+    _write_chunk(segment_dir, 1, b"b" * 5)  # cut off when the stream dropped
+
+    retry = recording_segments.begin_segment_attempt(
+        segment_dir, recording_path=recording, segment_seconds=300, started_at=started + timedelta(seconds=420)
+    )
+    assert retry == {"attempt": 1, "started_at": "2026-01-02T10:07:00", "start_number": 2, "list": "segments_1.csv"}
+    _write_chunk(segment_dir, 2, b"c" * 7, listed=(0.0, 300.0), list_name="segments_1.csv")
+
+    segments = recording_segments.list_segments(segment_dir)
+    assert [(seg["file"], seg["start"], seg["end"], seg["complete"]) for seg in segments] == [
+        ("seg_00000.mp3", 0.0, 300.0, True),
+        ("seg_00001.mp3", 300.0, None, False),
+        ("seg_00002.mp3", 420.0, 720.0, True),
+    ]
+    assert b"".join(recording_segments.iter_segment_bytes(segment_dir, start_seconds=400)) == b"b" * 5 + b"c" * 7
+    assert recording_segments.live_segment_directories(str(tmp_path)) == [segment_dir]
+
+    command = recording_segments.build_segment_command(
+        "http://stream", 600, segment_dir, segment_seconds=300, attempt=retry
+    )
+    assert command[command.index("-segment_start_number") + 1] == "2"
+    assert command[-1] == os.path.join(segment_dir, "seg_%05d.mp3")
+
+    assert recording_segments.finalize_segmented_recording(segment_dir, recording) == recording
+    with open(recording, "rb") as handle:
+        assert handle.read() == b"a" * 10 + b"b" * 5 + b"c" * 7
+    assert not os.path.exists(segment_dir)
+
+
+def test_record_stream_segmented_mode_stitches_final_file(tmp_path, monkeypatch):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        RECORDING_MODE="segmented",
+        RECORDING_SEGMENT_SECONDS=60,
+        RECORDING_INLINE_LEVELS=False,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    monkeypatch.setattr(scheduler, "flask_app", app)
+    monkeypatch.setattr(scheduler, "logger", init_logger())
+    commands = []
+
+    class FakeProcess:
+        returncode = 0
+
+        def __init__(self, command, **_kwargs):
+            commands.append(command)
+            segment_dir = os.path.dirname(command[-1])
+            list_path = command[command.index("-segment_list") + 1]
+            for number in range(2):
+                _write_chunk(segment_dir, number, bytes([65 + number]) * 4, listed=(number * 60.0, number * 60.0 + 60))
+            assert os.path.basename(list_path) == "segments_0.csv"
+
+        def communicate(self):
+            return None, b""
+
+        def poll(self):
+            return 0
+
+    monkeypatch.setattr(scheduler.subprocess, "Popen", FakeProcess)
+    output = str(tmp_path / "rec" / "Show")
+    os.makedirs(os.path.dirname(output))
+
+    scheduler.record_stream("http://stream", 120, output, str(tmp_path / "missing.json"))
+
+    [command] = commands
+    assert "-f" in command and command[command.index("-f") + 1] == "segment"
+    [final] = [name for name in os.listdir(tmp_path / "rec") if name.endswith(".mp3")]
+    assert final.endswith("_RAWDATA.mp3")
+    assert (tmp_path / "rec" / final).read_bytes() == b"AAAABBBB"
+    assert not any(name.endswith(".segments") for name in os.listdir(tmp_path / "rec"))
+
+
+def test_catalog_pass_stitches_folders_left_by_a_dead_recorder(tmp_path, monkeypatch):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        OUTPUT_FOLDER=str(tmp_path / "rec"),
+        RECORDING_STALE_SEGMENTS_MINUTES=10,
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    monkeypatch.setattr(scheduler, "flask_app", app)
+    monkeypatch.setattr(scheduler, "logger", init_logger())
+    started = datetime(2026, 1, 2, 10, 0)
+    folders = {}
+    for name in ("Dead", "Running", "Fresh"):
+        recording = str(tmp_path / "rec" / "Spring 2026" / name / f"{name}_01-02-26_RAWDATA.mp3")
+        os.makedirs(os.path.dirname(recording))
+        segment_dir = recording_segments.segment_directory(recording)
+        recording_segments.begin_segment_attempt(
+            segment_dir, recording_path=recording, segment_seconds=300, started_at=started
+        )
+        _write_chunk(segment_dir, 0, b"a" * 4, listed=(0.0, 300.0))
+        _write_chunk(segment_dir, 1, b"b" * 2)
+        if name != "Fresh":
+            for entry in os.scandir(segment_dir):
+                os.utime(entry.path, (0, 1_000_000))
+        folders[name] = (recording, segment_dir)
+    monkeypatch.setitem(scheduler.ACTIVE_RECORDINGS, "running", {"segment_dir": folders["Running"][1]})
+
+    with app.app_context():
+        root = str(tmp_path / "rec")
+        assert recording_segments.stale_segment_directories(root, active=[folders["Running"][1]]) == [
+            folders["Dead"][1]
+        ]
+        scheduler._finalize_stale_segments()
+
+    recording, segment_dir = folders["Dead"]
+    with open(recording, "rb") as handle:
+        assert handle.read() == b"aaaabb"
+    assert not os.path.exists(segment_dir)
+    for name in ("Running", "Fresh"):
+        assert recording_segments.read_segment_manifest(folders[name][1])["status"] == "recording"
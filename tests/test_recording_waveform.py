@@ -0,0 +1,142 @@
+import json
+import os
+import struct
+import time
+
+import pytest
+from flask import Flask
+
+from app.models import RecordingCatalog, db
+from app.services import recording_waveform
+from app.services.log_export import read_recording_metadata, write_recording_metadata
+from app.services.recording_waveform import downsample_peaks, run_waveform_batch
+from app.services.recordings_catalog import reconcile_catalog
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        OUTPUT_FOLDER=str(tmp_path / "rec"),
+        RECORDING_PERIODS_PATH=str(tmp_path / "periods.json"),
+        RECORDING_WAVEFORM_POINTS=4,
+    )
+    (tmp_path / "periods.json").write_text(json.dumps({"periods": ["Fall 2026"], "current": "Fall 2026"}))
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _recording(tmp_path, name, *, age=600):
+    path = tmp_path / "rec" / "Fall 2026" / "Ana_Ruiz" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\x00" * 1000)
+    write_recording_metadata(str(path), {"show_name": "Night Show"})
+    settled = time.time() - age
+    os.utime(path, (settled, settled))
+    return str(path)
+
+
+def test_downsample_keeps_bucket_maximum():
+    assert downsample_peaks([0.1, 0.5, 0.2, 0.9, 0.3], 2) == [0.5, 0.9]
+    assert downsample_peaks([0.25, 0.5], 10) == [0.25, 0.5]
+    assert downsample_peaks([], 10) == []
+
+
+def test_batch_uses_level_timeline_and_skips_recordings_still_settling(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    finished = _recording(tmp_path, "Night_Show_RAWDATA.mp3")
+    _recording(tmp_path, "Late_Show_RAWDATA.mp3", age=0)
+    with open(finished[:-4] + ".levels.json", "w", encoding="utf-8") as handle:
+        json.dump({"peak_db": [0.0, -6.0, None, -100.0, -20.0, -20.0, -20.0, -20.0]}, handle)
+    monkeypatch.setattr(recording_waveform, "decode_peaks", lambda _path: pytest.fail("decoded despite timeline"))
+
+    with app.app_context():
+        reconcile_catalog()
+        summary = run_waveform_batch()
+        assert (summary["candidates"], summary["computed"], summary["failed"]) == (1, 1, 0)
+        waveform = read_recording_metadata(finished)["waveform"]
+        assert waveform["points"] == [1.0, 0.0, 0.1, 0.1]
+        assert (waveform["seconds"], waveform["seconds_per_point"], waveform["source"]) == (8, 2, "levels")
+        assert read_recording_metadata(finished)["show_name"] == "Night Show"
+        row = RecordingCatalog.query.filter_by(path=finished).one()
+        assert '"waveform"' in row.sidecar
+        # Recordings with a waveform are not picked up again.
+        assert run_waveform_batch()["candidates"] == 0
+
+
+def test_decode_path_reduces_streamed_pcm_and_reports_missing_ffmpeg(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    path = _recording(tmp_path, "Night_Show_RAWDATA.mp3")
+    rate = recording_waveform.DECODE_SAMPLE_RATE
+    pcm = struct.pack(f"<{rate}h", *([16384] + [0] * (rate - 1))) + struct.pack("<3h", 0, -32768, 0)
+
+    class FakeProcess:
+        returncode = 0
+
+        def __init__(self, command, **_kwargs):
+            assert command[command.index("-i") + 1] == path
+            self.stdout = _Chunks(pcm, 1000)
+
+        def poll(self):
+            return 0
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(recording_waveform.subprocess, "Popen", FakeProcess)
+    assert recording_waveform.decode_peaks(path) == [0.5, 1.0]
+
+    def missing(*_args, **_kwargs):
+        raise FileNotFoundError("ffmpeg")
+
+    monkeypatch.setattr(recording_waveform.subprocess, "Popen", missing)
+    with app.app_context():
+        reconcile_catalog()
+        summary = run_waveform_batch()
+    assert summary["status"] == "ffmpeg_unavailable" and summary["computed"] == 0
+    assert "waveform" not in read_recording_metadata(path)
+
+
+def test_failed_recordings_back_off_instead_of_blocking_the_batch(tmp_path, monkeypatch):
+    app = _app(tmp_path)
+    app.config.update(RECORDING_WAVEFORM_BATCH_LIMIT=1, RECORDING_WAVEFORM_MAX_ATTEMPTS=2)
+    broken = _recording(tmp_path, "Broken_Show_RAWDATA.mp3", age=600)
+    healthy = _recording(tmp_path, "Night_Show_RAWDATA.mp3", age=900)
+
+    def decode(path):
+        if path == broken:
+            raise RuntimeError("ffmpeg exited 1")
+        return [0.5, 0.25]
+
+    monkeypatch.setattr(recording_waveform, "decode_peaks", decode)
+    with app.app_context():
+        reconcile_catalog()
+        assert run_waveform_batch()["failed"] == 1
+        failure = read_recording_metadata(broken)["waveform_error"]
+        assert failure["attempts"] == 1 and failure["retry_after"] and "exited 1" in failure["error"]
+        # The broken file waits for its retry time; the next batch moves on.
+        assert recording_waveform.waveform_candidates(5) == [healthy]
+        assert run_waveform_batch()["computed"] == 1
+        assert run_waveform_batch()["candidates"] == 0
+
+        metadata = read_recording_metadata(broken)
+        metadata["waveform_error"]["retry_after"] = "2000-01-01T00:00:00"
+        write_recording_metadata(broken, metadata)
+        reconcile_catalog()
+        assert run_waveform_batch()["failed"] == 1
+        assert read_recording_metadata(broken)["waveform_error"] == {
+            **read_recording_metadata(broken)["waveform_error"], "attempts": 2, "retry_after": None,
+        }
+        assert recording_waveform.waveform_candidates(5) == []
+
+
+class _Chunks:
+    def __init__(self, data, size):
+        self._data, self._size = data, size
+
+    def read(self, _count):
+        chunk, self._data = self._data[: self._size], self._data[self._size:]
+        return chunk
@@ -0,0 +1,83 @@
+import json
+import os
+
+from flask import Flask
+
+from app.models import RecordingCatalog, db
+from app.services.log_export import write_recording_metadata
+from app.services.recordings_catalog import (
+    catalog_finished_recording,
+    forget_recording,
+    query_recordings,
+    recording_facets,
+    reconcile_catalog,
+)
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        OUTPUT_FOLDER=str(tmp_path / "recordings"),
+        RECORDING_PERIODS_PATH=str(tmp_path / "periods.json"),
+    )
+    (tmp_path / "periods.json").write_text(json.dumps({"periods": ["Fall 2026"], "current": "Fall 2026"}))
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _recording(root, *parts, mtime, payload=b"\x00" * 32):
+    path = root.joinpath(*parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(payload)
+    os.utime(path, (mtime, mtime))
+    return str(path)
+
+
+def test_reconcile_builds_paginated_catalog_and_tracks_changes(tmp_path):
+    app = _app(tmp_path)
+    root = tmp_path / "recordings"
+    night = _recording(root, "Fall 2026", "Ana_Ruiz", "Night_Show", "Night_Show_09-01-26_RAWDATA.mp3", mtime=1_000)
+    write_recording_metadata(night, {"show_name": "Night Show", "show_date": "2026-09-01", "integrity": {"recorded_seconds": 3600.5}})
+    later = _recording(root, "Fall 2026", "Ana_Ruiz", "Night_Show", "Night_Show_09-08-26_RAWDATA.mp3", mtime=2_000)
+    _recording(root, "Fall 2026", "Bo_Lee", "Jazz_Hour", "Jazz_Hour_09-02-26_RAWDATA.mp3", mtime=1_500)
+    _recording(root, "Spring 2026", "Old_Show_03-02-26_RAWDATA.mp3", mtime=500)
+    _recording(root, "Fall 2026", "Ana_Ruiz", "Night_Show", "Live_09-09-26_RAWDATA.segments", "seg_00000.mp3", mtime=3_000)
+
+    with app.app_context():
+        assert reconcile_catalog() == {"added": 4, "updated": 0, "removed": 0, "unchanged": 0}
+
+        rows, total = query_recordings(period_folder="Fall 2026", page=1, page_size=2)
+        assert total == 3
+        assert [row.filename for row in rows] == ["Night_Show_09-08-26_RAWDATA.mp3", "Jazz_Hour_09-02-26_RAWDATA.mp3"]
+        rows, total = query_recordings(show="night show", dj="Ana Ruiz")
+        assert total == 2 and rows[-1].duration_seconds == 3600.5
+        assert rows[-1].show_date.isoformat() == "2026-09-01"
+        assert json.loads(rows[-1].sidecar)["show_name"] == "Night Show"
+        assert recording_facets(period_folder="Fall 2026") == (["Jazz Hour", "Night Show"], ["Ana Ruiz", "Bo Lee"])
+        assert query_recordings(period_folder="Spring 2026")[0][0].show_name == "Old Show"
+
+        # A submitted log and a deleted file are both picked up; untouched files are skipped.
+        open(os.path.splitext(later)[0] + ".csv", "w").close()
+        os.remove(night)
+        assert reconcile_catalog() == {"added": 0, "updated": 1, "removed": 1, "unchanged": 2}
+        assert RecordingCatalog.query.filter_by(path=later).one().has_log is True
+
+
+def test_finished_recording_and_deletion_update_catalog_incrementally(tmp_path):
+    app = _app(tmp_path)
+    root = tmp_path / "recordings"
+    main = _recording(root, "Fall 2026", "Morning_10-01-26_RAWDATA.mp3", mtime=1_000)
+    retry = _recording(root, "Fall 2026", "Morning_10-01-26_RAWDATA_1.mp3", mtime=1_100)
+
+    with app.app_context():
+        rows = catalog_finished_recording(main)
+        assert [row.path for row in rows] == [main, retry]
+        assert {row.period_folder for row in rows} == {"Fall 2026"}
+
+        assert forget_recording(retry) is True
+        assert [row.path for row in query_recordings()[0]] == [main]
+        assert reconcile_catalog()["added"] == 1  # the retry file is still on disk
@@ -0,0 +1,97 @@
+import json
+import os
+
+import pytest
+from flask import Flask
+
+from app.models import SavedSearch, db
+from app.services.library import music_search, saved_searches
+
+
+def _app(tmp_path):
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI="sqlite:///:memory:",
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        NAS_MUSIC_ROOT=str(tmp_path / "music"),
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def _entry(root, folder, name, artist, genre):
+    path = os.path.join(root, folder, name)
+    blob = " ".join(music_search._search_tokens(f"{name} {artist} {genre}"))
+    return path, {"path": path, "folder": folder, "title": name, "artist": artist, "genre": genre, "search": blob}
+
+
+def test_saved_search_results_update_incrementally(tmp_path, monkeypatch):
+    music_search._MUSIC_INDEX_CACHE.update({"data": None, "loaded_at": None, "root": None})
+    app = _app(tmp_path)
+    root = str(tmp_path / "music")
+    zed, zed_entry = _entry(root, "Z", "love.mp3", "Zed", "Rock")
+    abba, abba_entry = _entry(root, "A", "love song.mp3", "Abba", "Pop")
+    other, other_entry = _entry(root, "A", "other.mp3", "Abba", "Rock")
+    with app.app_context():
+        music_search._write_music_index_file(
+            {"files": {zed: zed_entry, abba: abba_entry, other: other_entry}, "generated_at": 1.0, "root": root}
+        )
+        saved = SavedSearch(name="Love", query="love", filters=json.dumps({"genre": "", "explicit": False}))
+        db.session.add(saved)
+        db.session.commit()
+
+        first = saved_searches.saved_search_results(saved)
+        assert [item["path"] for item in first["items"]] == [abba, zed]
+        assert saved_searches.saved_search_count(saved) == 2
+
+        index = music_search._load_music_index_file()
+        _, renamed = _entry(root, "A", "other.mp3", "Beck", "Rock")
+        renamed["search"] += " love"
+        index["files"][other] = renamed
+        del index["files"][zed]
+        music_search._write_music_index_file(index)
+
+        monkeypatch.setattr(music_search, "entry_matches", _only_changed(music_search.entry_matches, {other}))
+        second = saved_searches.saved_search_results(saved, per_page=1)
+        assert second["total"] == 2
+        assert [item["path"] for item in second["items"]] == [abba]
+        assert saved_searches.refresh_saved_search(saved) == [abba, other]
+
+        # The refactored search_music applies the same matcher.
+        monkeypatch.undo()
+        search = music_search.search_music("love")
+        assert [item["path"] for item in search["items"]] == [abba, other]
+
+
+def test_publish_during_a_refresh_is_picked_up_next_time(tmp_path, monkeypatch):
+    music_search._MUSIC_INDEX_CACHE.update({"data": None, "loaded_at": None, "root": None})
+    app = _app(tmp_path)
+    root = str(tmp_path / "music")
+    zed, zed_entry = _entry(root, "Z", "love.mp3", "Zed", "Rock")
+    late, late_entry = _entry(root, "A", "love late.mp3", "Abba", "Pop")
+    with app.app_context():
+        music_search._write_music_index_file({"files": {zed: zed_entry}, "generated_at": 1.0, "root": root})
+        saved = SavedSearch(name="Love", query="love", filters=None)
+        db.session.add(saved)
+        db.session.commit()
+        assert saved_searches.refresh_saved_search(saved) == [zed]
+
+        music_search._write_music_index_file(music_search.music_index_snapshot())  # an unrelated publish
+        snapshot = music_search.music_index_snapshot()
+        index = music_search.music_index_snapshot()
+        index["files"][late] = late_entry
+        music_search._write_music_index_file(index)  # lands while the refresh below holds the older snapshot
+
+        assert saved_searches.refresh_saved_search(saved, snapshot) == [zed]
+        assert saved_searches.refresh_saved_search(saved) == [late, zed]
+
+
+def _only_changed(real, allowed):
+    def matcher(entry, *args, **kwargs):
+        if entry["path"] not in allowed:
+            pytest.fail(f"re-evaluated unchanged entry {entry['path']}")
+        return real(entry, *args, **kwargs)
+
+    return matcher
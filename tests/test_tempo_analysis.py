@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+
+from app.models import MusicAnalysis, db
+from app.services.show_automator import AutomatorConfig, CuePoints, QueueItem, _plan_overlay
+
+
+def _click_track(bpm, first_beat, seconds=30, sample_rate=11025):
+    np = pytest.importorskip("numpy")
+    samples = np.random.default_rng(0).normal(0, 0.01, int(sample_rate * seconds)).astype(np.float32)
+    click_len = int(0.03 * sample_rate)
+    t = np.arange(click_len) / sample_rate
+    click = (0.8 * np.sin(2 * np.pi * 1000 * t) * np.exp(-t / 0.005)).astype(np.float32)
+    beat = first_beat
+    while beat < seconds:
+        start = int(beat * sample_rate)
+        end = min(len(samples), start + click_len)
+        samples[start:end] += click[: end - start]
+        beat += 60.0 / bpm
+    return samples
+
+
+@pytest.mark.parametrize("bpm,first_beat", [(120, 0.25), (95, 0.6), (174, 0.1)])
+def test_tempo_and_first_beat_from_click_track(bpm, first_beat):
+    from app.services.library import tempo
+
+    result = tempo.analyze_tempo(_click_track(bpm, first_beat))
+
+    assert result["bpm"] == pytest.approx(bpm, abs=1.0)
+    period = 60.0 / bpm
+    offset = (result["first_beat_seconds"] - first_beat) % period
+    assert min(offset, period - offset) < 0.03
+
+
+def test_overlay_starts_on_next_beat_in_outro():
+    current = QueueItem(
+        kind="music",
+        duration=200.0,
+        cues=CuePoints(outro=180.0, cue_out=195.0),
+        bpm=120.0,
+        first_beat=0.2,
+    )
+    sweeper = QueueItem(kind="sweeper", duration=5.0)
+
+    plan = _plan_overlay(
+        current=current,
+        next_item=None,
+        overlay_item=sweeper,
+        current_position=170.0,
+        config=AutomatorConfig(),
+    )
+
+    assert plan.beat_aligned
+    assert plan.start_in == pytest.approx(10.2)
+
+    untimed = QueueItem(kind="music", duration=200.0, cues=CuePoints(outro=180.0, cue_out=195.0))
+    plan = _plan_overlay(
+        current=untimed,
+        next_item=None,
+        overlay_item=sweeper,
+        current_position=170.0,
+        config=AutomatorConfig(),
+    )
+    assert not plan.beat_aligned
+    assert plan.start_in == pytest.approx(10.0)
+
+
+def test_failed_decode_is_retried_but_a_beatless_track_stays_analyzed(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    from app.services.library import tempo
+
+    app = Flask(__name__, instance_path=str(tmp_path / "instance"))
+    app.config.update(SQLALCHEMY_DATABASE_URI="sqlite:///:memory:", SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    files = {}
+    for name in ("ambient", "broken"):
+        path = tmp_path / f"{name}.mp3"
+        path.write_bytes(b"\0" * 16)
+        files[str(path)] = {"path": str(path), "mtime": 1_000_000}
+    ambient, broken = str(tmp_path / "ambient.mp3"), str(tmp_path / "broken.mp3")
+    monkeypatch.setattr(tempo, "get_music_index", lambda: {"files": files})
+    monkeypatch.setattr(
+        tempo, "decode_mono_pcm", lambda path, **_kwargs: None if path == broken else tempo.np.zeros(11025 * 5)
+    )
+    with app.app_context():
+        db.create_all()
+        summary = tempo.run_tempo_batch(max_workers=1)
+        assert (summary["analyzed"], summary["failed"]) == (1, 1)
+        beatless = MusicAnalysis.query.filter_by(path=ambient).one()
+        assert beatless.bpm is None and beatless.tempo_analyzed_at and beatless.tempo_retry_at is None
+        failed = MusicAnalysis.query.filter_by(path=broken).one()
+        assert failed.tempo_analyzed_at is None and failed.tempo_retry_at > datetime.utcnow() + timedelta(hours=23)
+        assert tempo.tempo_candidates() == []
+
+        failed.tempo_retry_at = datetime.utcnow() - timedelta(minutes=1)
+        db.session.commit()
+        assert tempo.tempo_candidates() == [broken]
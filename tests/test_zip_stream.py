@@ -0,0 +1,27 @@
+import io
+import zipfile
+
+from app.services.zip_stream import iter_zip
+
+
+def test_zip_streams_stored_entries_before_later_files_exist(tmp_path):
+    first = tmp_path / "show.mp3"
+    first.write_bytes(b"\xff\xfb" * 5000)
+    second = tmp_path / "show.csv"
+    stream = iter_zip(
+        [(str(first), "Fall/show.mp3"), (str(tmp_path / "gone.mp3"), "Fall/gone.mp3"), (str(second), "Fall/show.csv")],
+        chunk_size=4096,
+    )
+
+    head = next(stream)
+    assert head.startswith(b"PK\x03\x04") and len(head) < 4096 + 100
+    second.write_text("time,title\n")  # only read once the generator reaches it
+    chunks = [head, *stream]
+
+    assert max(len(chunk) for chunk in chunks) < 4096 + 200
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        assert [info.filename for info in archive.infolist()] == ["Fall/show.mp3", "Fall/show.csv"]
+        assert {info.compress_type for info in archive.infolist()} == {zipfile.ZIP_STORED}
+        assert archive.read("Fall/show.mp3") == first.read_bytes()
+        assert archive.read("Fall/show.csv") == b"time,title\n"